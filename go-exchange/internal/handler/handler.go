@@ -1,18 +1,40 @@
 package handler
 
 import (
+	"errors"
+	"strconv"
+
 	"github.com/cryptox/go-exchange/internal/model"
 	"github.com/cryptox/go-exchange/internal/repository"
 	"github.com/gofiber/fiber/v2"
 	"github.com/google/uuid"
 )
 
+// Match modes for POST /trades/match
+const (
+	MatchDrain  = "drain"  // fill every crossing order per call (DB.MatchAll)
+	MatchSingle = "single" // one trade per call (DB.MatchOrders)
+)
+
 type Handler struct {
 	DB *repository.DB
+	// MatchMode is used when POST /trades/match has no ?mode=
+	MatchMode string
 }
 
 func New(db *repository.DB) *Handler {
-	return &Handler{DB: db}
+	return &Handler{DB: db, MatchMode: MatchDrain}
+}
+
+// Seconds clients are told to back off when DB work is shed
+const retryAfterSeconds = 1
+
+// overloaded answers 503 right away for work admission control turned away
+func overloaded(c *fiber.Ctx) error {
+	c.Set(fiber.HeaderRetryAfter, strconv.Itoa(retryAfterSeconds))
+	return c.Status(fiber.StatusServiceUnavailable).JSON(fiber.Map{
+		"error": "server overloaded, retry later",
+	})
 }
 
 // HealthCheck returns service status
@@ -33,6 +55,9 @@ func (h *Handler) CreateOrder(c *fiber.Ctx) error {
 	}
 
 	order, err := h.DB.CreateOrder(c.UserContext(), req)
+	if errors.Is(err, repository.ErrOverloaded) {
+		return overloaded(c)
+	}
 	if err != nil {
 		return c.Status(fiber.StatusInternalServerError).JSON(fiber.Map{
 			"error": "failed to create order",
@@ -50,6 +75,9 @@ func (h *Handler) GetOrderBook(c *fiber.Ctx) error {
 	}
 
 	orderBook, err := h.DB.GetOrderBook(c.UserContext(), pair)
+	if errors.Is(err, repository.ErrOverloaded) {
+		return overloaded(c)
+	}
 	if err != nil {
 		return c.Status(fiber.StatusInternalServerError).JSON(fiber.Map{
 			"error": "failed to get order book",
@@ -70,6 +98,9 @@ func (h *Handler) GetBalance(c *fiber.Ctx) error {
 	}
 
 	balance, err := h.DB.GetUserBalances(c.UserContext(), userID)
+	if errors.Is(err, repository.ErrOverloaded) {
+		return overloaded(c)
+	}
 	if err != nil {
 		return c.Status(fiber.StatusInternalServerError).JSON(fiber.Map{
 			"error": "failed to get balance",
@@ -86,7 +117,21 @@ func (h *Handler) MatchOrders(c *fiber.Ctx) error {
 		pair = "BTCUSDT"
 	}
 
-	result, err := h.DB.MatchOrders(c.UserContext(), pair)
+	var result *model.MatchResult
+	var err error
+	switch c.Query("mode", h.MatchMode) {
+	case MatchDrain:
+		result, err = h.DB.MatchAll(c.UserContext(), pair)
+	case MatchSingle:
+		result, err = h.DB.MatchOrders(c.UserContext(), pair)
+	default:
+		return c.Status(fiber.StatusBadRequest).JSON(fiber.Map{
+			"error": "invalid match mode",
+		})
+	}
+	if errors.Is(err, repository.ErrOverloaded) {
+		return overloaded(c)
+	}
 	if err != nil {
 		return c.Status(fiber.StatusInternalServerError).JSON(fiber.Map{
 			"error": "failed to match orders",
@@ -95,3 +140,36 @@ func (h *Handler) MatchOrders(c *fiber.Ctx) error {
 
 	return c.JSON(result)
 }
+
+// IngestStats returns order batching metrics of the worker serving the request
+func (h *Handler) IngestStats(c *fiber.Ctx) error {
+	if h.DB.Orders == nil {
+		return c.Status(fiber.StatusNotFound).JSON(fiber.Map{
+			"error": "order batching disabled",
+		})
+	}
+
+	return c.JSON(h.DB.Orders.Stats())
+}
+
+// BalanceCacheStats returns GET /balance cache counters of the worker serving the request
+func (h *Handler) BalanceCacheStats(c *fiber.Ctx) error {
+	if h.DB.Balances == nil {
+		return c.Status(fiber.StatusNotFound).JSON(fiber.Map{
+			"error": "balance cache disabled",
+		})
+	}
+
+	return c.JSON(h.DB.Balances.Stats())
+}
+
+// AdmissionStats returns admission control and pool acquire metrics of the worker serving the request
+func (h *Handler) AdmissionStats(c *fiber.Ctx) error {
+	if h.DB.Admission == nil {
+		return c.Status(fiber.StatusNotFound).JSON(fiber.Map{
+			"error": "admission control disabled",
+		})
+	}
+
+	return c.JSON(h.DB.Admission.Stats())
+}
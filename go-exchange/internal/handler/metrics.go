@@ -0,0 +1,50 @@
+package handler
+
+import (
+	"errors"
+	"strconv"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/metrics"
+	"github.com/gofiber/fiber/v2"
+)
+
+var (
+	requestDuration = metrics.NewHistogramVec("http_request_duration_seconds",
+		"Server-side request latency by route, from routing to the handler's return.",
+		metrics.LatencyBuckets, "method", "route")
+	requestsTotal = metrics.NewCounterVec("http_requests_total",
+		"Requests served by route and status code.", "method", "route", "code")
+	requestsInFlight = metrics.NewGauge("http_requests_in_flight",
+		"Requests currently being handled by this worker.")
+)
+
+// Instrument records per-route latency, status codes and requests in flight
+func Instrument(c *fiber.Ctx) error {
+	start := time.Now()
+	requestsInFlight.Add(1)
+	err := c.Next()
+	requestsInFlight.Add(-1)
+
+	// Errors are turned into responses by the error handler after this returns
+	code := c.Response().StatusCode()
+	if err != nil {
+		code = fiber.StatusInternalServerError
+		var fiberErr *fiber.Error
+		if errors.As(err, &fiberErr) {
+			code = fiberErr.Code
+		}
+	}
+	// Route pattern, not the path, so /balance/:userId stays one series
+	route := c.Route().Path
+	method := c.Method()
+	requestDuration.Observe(time.Since(start), method, route)
+	requestsTotal.Inc(method, route, strconv.Itoa(code))
+	return err
+}
+
+// Metrics serves this worker's metrics in the Prometheus text format
+func (h *Handler) Metrics(c *fiber.Ctx) error {
+	c.Set(fiber.HeaderContentType, "text/plain; version=0.0.4; charset=utf-8")
+	return c.Send(metrics.Expose())
+}
@@ -0,0 +1,74 @@
+package handler
+
+import (
+	"bufio"
+	"errors"
+	"strconv"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/repository"
+	"github.com/gofiber/fiber/v2"
+)
+
+// StreamOrderBook pushes the pair's order book as Server-Sent Events: a
+// snapshot, then a diff per change, each with its sequence number as the
+// event id. A gap in ids means events were missed; the stream is closed when
+// the client falls too far behind, and reconnecting starts with a new snapshot.
+func (h *Handler) StreamOrderBook(c *fiber.Ctx) error {
+	if h.DB.Feed == nil {
+		return c.Status(fiber.StatusNotFound).JSON(fiber.Map{
+			"error": "order book stream disabled",
+		})
+	}
+
+	sub, err := h.DB.Feed.Subscribe(c.UserContext(), c.Params("pair"))
+	if errors.Is(err, repository.ErrOverloaded) {
+		return overloaded(c)
+	}
+	if err != nil {
+		return c.Status(fiber.StatusInternalServerError).JSON(fiber.Map{
+			"error": "failed to get order book",
+		})
+	}
+
+	c.Set(fiber.HeaderContentType, "text/event-stream")
+	c.Set(fiber.HeaderCacheControl, "no-cache")
+	// The writer runs after the handler returns, when c is no longer valid
+	conn := c.Context().Conn()
+	c.Context().SetBodyStreamWriter(func(w *bufio.Writer) {
+		defer sub.Close()
+
+		keepAlive := time.NewTicker(repository.StreamKeepAlive)
+		defer keepAlive.Stop()
+
+		for {
+			select {
+			case ev, ok := <-sub.Events():
+				if !ok {
+					return
+				}
+				w.WriteString("id: ")
+				w.WriteString(strconv.FormatUint(ev.Seq, 10))
+				w.WriteString("\nevent: ")
+				w.WriteString(ev.Type)
+				w.WriteString("\ndata: ")
+				w.Write(ev.Data)
+				w.WriteString("\n\n")
+				// One flush for a burst of queued events
+				if len(sub.Events()) > 0 {
+					continue
+				}
+			case <-keepAlive.C:
+				w.WriteString(": keepalive\n\n")
+			}
+			// The server's WriteTimeout covers the whole response; a stream
+			// only has to make progress on each write
+			conn.SetWriteDeadline(time.Now().Add(repository.StreamKeepAlive))
+			if err := w.Flush(); err != nil {
+				// Client went away
+				return
+			}
+		}
+	})
+	return nil
+}
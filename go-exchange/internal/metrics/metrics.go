@@ -0,0 +1,300 @@
+// Package metrics keeps server-side counters and latency histograms and writes
+// them in the Prometheus text exposition format for GET /metrics.
+//
+// With prefork every worker process has its own registry, so every series
+// carries a worker="<pid>" label; a scrape reaches whichever worker accepts the
+// connection, and scrapers combine the workers they have seen.
+package metrics
+
+import (
+	"bytes"
+	"math"
+	"os"
+	"runtime"
+	"sort"
+	"strconv"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"time"
+)
+
+// LatencyBuckets are histogram upper bounds in seconds, from 100µs to 10s
+var LatencyBuckets = []float64{0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10}
+
+// Collector writes metric families into a scrape
+type Collector interface {
+	Collect(w *Writer)
+}
+
+// CollectorFunc adapts a function to Collector
+type CollectorFunc func(w *Writer)
+
+func (f CollectorFunc) Collect(w *Writer) { f(w) }
+
+var (
+	mu         sync.Mutex
+	collectors []Collector
+	workerPID  = strconv.Itoa(os.Getpid())
+)
+
+// Register adds a collector to every following scrape
+func Register(c Collector) {
+	mu.Lock()
+	defer mu.Unlock()
+	collectors = append(collectors, c)
+}
+
+// Expose renders all registered collectors and the Go runtime metrics
+func Expose() []byte {
+	mu.Lock()
+	registered := append([]Collector(nil), collectors...)
+	mu.Unlock()
+
+	w := &Writer{}
+	for _, c := range registered {
+		c.Collect(w)
+	}
+	collectRuntime(w)
+	return w.buf.Bytes()
+}
+
+// Writer builds one scrape in the text format
+type Writer struct {
+	buf bytes.Buffer
+}
+
+func (w *Writer) header(name, help, kind string) {
+	w.buf.WriteString("# HELP " + name + " " + help + "\n")
+	w.buf.WriteString("# TYPE " + name + " " + kind + "\n")
+}
+
+// sample writes one line; labels are alternating names and values
+func (w *Writer) sample(name string, value float64, labels ...string) {
+	w.buf.WriteString(name)
+	w.buf.WriteString(`{worker="` + workerPID + `"`)
+	for i := 0; i+1 < len(labels); i += 2 {
+		w.buf.WriteString("," + labels[i] + `="` + escape(labels[i+1]) + `"`)
+	}
+	w.buf.WriteString("} ")
+	w.buf.WriteString(formatFloat(value))
+	w.buf.WriteByte('\n')
+}
+
+// Gauge writes a single-sample gauge family
+func (w *Writer) Gauge(name, help string, value float64) {
+	w.header(name, help, "gauge")
+	w.sample(name, value)
+}
+
+// Counter writes a single-sample counter family
+func (w *Writer) Counter(name, help string, value float64) {
+	w.header(name, help, "counter")
+	w.sample(name, value)
+}
+
+// Summary writes a count/sum pair without quantiles
+func (w *Writer) Summary(name, help string, count uint64, sum float64) {
+	w.header(name, help, "summary")
+	w.sample(name+"_count", float64(count))
+	w.sample(name+"_sum", sum)
+}
+
+func formatFloat(v float64) string {
+	if math.IsInf(v, +1) {
+		return "+Inf"
+	}
+	return strconv.FormatFloat(v, 'g', -1, 64)
+}
+
+var labelEscaper = strings.NewReplacer(`\`, `\\`, `"`, `\"`, "\n", `\n`)
+
+func escape(v string) string {
+	return labelEscaper.Replace(v)
+}
+
+// HistogramVec is a latency histogram partitioned by label values
+type HistogramVec struct {
+	name    string
+	help    string
+	labels  []string
+	buckets []float64
+
+	mu     sync.RWMutex
+	series map[string]*histogram
+}
+
+type histogram struct {
+	values   []string
+	counts   []atomic.Uint64 // per bucket, not cumulative; last is +Inf
+	count    atomic.Uint64
+	sumNanos atomic.Int64
+}
+
+// NewHistogramVec creates and registers a histogram with the given label names
+func NewHistogramVec(name, help string, buckets []float64, labels ...string) *HistogramVec {
+	h := &HistogramVec{
+		name:    name,
+		help:    help,
+		labels:  labels,
+		buckets: buckets,
+		series:  make(map[string]*histogram),
+	}
+	Register(h)
+	return h
+}
+
+// Observe records one duration for the given label values
+func (h *HistogramVec) Observe(d time.Duration, values ...string) {
+	key := strings.Join(values, "\xff")
+	h.mu.RLock()
+	s, ok := h.series[key]
+	h.mu.RUnlock()
+	if !ok {
+		h.mu.Lock()
+		if s, ok = h.series[key]; !ok {
+			s = &histogram{values: values, counts: make([]atomic.Uint64, len(h.buckets)+1)}
+			h.series[key] = s
+		}
+		h.mu.Unlock()
+	}
+
+	seconds := d.Seconds()
+	i := sort.SearchFloat64s(h.buckets, seconds)
+	s.counts[i].Add(1)
+	s.count.Add(1)
+	s.sumNanos.Add(int64(d))
+}
+
+func (h *HistogramVec) Collect(w *Writer) {
+	h.mu.RLock()
+	series := make([]*histogram, 0, len(h.series))
+	for _, s := range h.series {
+		series = append(series, s)
+	}
+	h.mu.RUnlock()
+	sort.Slice(series, func(i, j int) bool {
+		return strings.Join(series[i].values, "\xff") < strings.Join(series[j].values, "\xff")
+	})
+
+	w.header(h.name, h.help, "histogram")
+	for _, s := range series {
+		labels := make([]string, 0, 2*len(h.labels)+2)
+		for i, name := range h.labels {
+			labels = append(labels, name, s.values[i])
+		}
+		var cumulative uint64
+		for i := range s.counts {
+			cumulative += s.counts[i].Load()
+			le := math.Inf(+1)
+			if i < len(h.buckets) {
+				le = h.buckets[i]
+			}
+			w.sample(h.name+"_bucket", float64(cumulative), append(labels, "le", formatFloat(le))...)
+		}
+		w.sample(h.name+"_sum", time.Duration(s.sumNanos.Load()).Seconds(), labels...)
+		w.sample(h.name+"_count", float64(s.count.Load()), labels...)
+	}
+}
+
+// CounterVec is a counter partitioned by label values
+type CounterVec struct {
+	name   string
+	help   string
+	labels []string
+
+	mu     sync.RWMutex
+	series map[string]*counter
+}
+
+type counter struct {
+	values []string
+	n      atomic.Uint64
+}
+
+// NewCounterVec creates and registers a counter with the given label names
+func NewCounterVec(name, help string, labels ...string) *CounterVec {
+	c := &CounterVec{name: name, help: help, labels: labels, series: make(map[string]*counter)}
+	Register(c)
+	return c
+}
+
+// Inc adds one for the given label values
+func (c *CounterVec) Inc(values ...string) {
+	key := strings.Join(values, "\xff")
+	c.mu.RLock()
+	s, ok := c.series[key]
+	c.mu.RUnlock()
+	if !ok {
+		c.mu.Lock()
+		if s, ok = c.series[key]; !ok {
+			s = &counter{values: values}
+			c.series[key] = s
+		}
+		c.mu.Unlock()
+	}
+	s.n.Add(1)
+}
+
+// Delete drops the series for the given label values
+func (c *CounterVec) Delete(values ...string) {
+	key := strings.Join(values, "\xff")
+	c.mu.Lock()
+	delete(c.series, key)
+	c.mu.Unlock()
+}
+
+func (c *CounterVec) Collect(w *Writer) {
+	c.mu.RLock()
+	series := make([]*counter, 0, len(c.series))
+	for _, s := range c.series {
+		series = append(series, s)
+	}
+	c.mu.RUnlock()
+	sort.Slice(series, func(i, j int) bool {
+		return strings.Join(series[i].values, "\xff") < strings.Join(series[j].values, "\xff")
+	})
+
+	w.header(c.name, c.help, "counter")
+	for _, s := range series {
+		labels := make([]string, 0, 2*len(c.labels))
+		for i, name := range c.labels {
+			labels = append(labels, name, s.values[i])
+		}
+		w.sample(c.name, float64(s.n.Load()), labels...)
+	}
+}
+
+// Gauge is a single value that goes up and down, e.g. requests in flight
+type Gauge struct {
+	name string
+	help string
+	v    atomic.Int64
+}
+
+// NewGauge creates and registers a gauge
+func NewGauge(name, help string) *Gauge {
+	g := &Gauge{name: name, help: help}
+	Register(g)
+	return g
+}
+
+func (g *Gauge) Add(delta int64) { g.v.Add(delta) }
+
+func (g *Gauge) Collect(w *Writer) {
+	w.Gauge(g.name, g.help, float64(g.v.Load()))
+}
+
+func collectRuntime(w *Writer) {
+	var m runtime.MemStats
+	runtime.ReadMemStats(&m)
+
+	w.Gauge("exchange_workers", "Prefork worker processes serving requests.", float64(runtime.NumCPU()))
+	w.Gauge("go_goroutines", "Goroutines that currently exist.", float64(runtime.NumGoroutine()))
+	w.Gauge("go_gomaxprocs", "GOMAXPROCS of this worker.", float64(runtime.GOMAXPROCS(0)))
+	w.Counter("go_gc_cycles_total", "Completed GC cycles.", float64(m.NumGC))
+	w.Counter("go_gc_pause_seconds_total", "Total stop-the-world GC pause time.", time.Duration(m.PauseTotalNs).Seconds())
+	w.Gauge("go_memstats_heap_alloc_bytes", "Bytes of allocated heap objects.", float64(m.HeapAlloc))
+	w.Gauge("go_memstats_sys_bytes", "Bytes obtained from the OS.", float64(m.Sys))
+	w.Counter("go_memstats_mallocs_total", "Heap objects allocated.", float64(m.Mallocs))
+}
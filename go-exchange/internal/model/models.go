@@ -77,9 +77,88 @@ type OrderBookResponse struct {
 	Pair string           `json:"pair"`
 	Bids []OrderBookEntry `json:"bids"`
 	Asks []OrderBookEntry `json:"asks"`
+	// Version of the in-memory snapshot (0 when served straight from Postgres)
+	Version uint64 `json:"version,omitempty"`
+}
+
+// OrderBookEvent is one message of GET /orderbook/:pair/stream: a snapshot of
+// the top levels first, then diffs of the levels that changed, where quantity 0
+// removes the level. Seq increases by one per diff; a snapshot carries the seq of
+// the last diff it includes.
+type OrderBookEvent struct {
+	Type string           `json:"type"`
+	Pair string           `json:"pair"`
+	Seq  uint64           `json:"seq"`
+	Bids []OrderBookEntry `json:"bids"`
+	Asks []OrderBookEntry `json:"asks"`
+	// Unix microseconds when the server built the event
+	Timestamp int64 `json:"ts"`
 }
 
 type MatchResult struct {
 	TradesExecuted int     `json:"trades_executed"`
 	VolumeMatched  float64 `json:"volume_matched"`
+	// Orders completely filled / left OPEN with a reduced quantity by this call
+	OrdersFilled int `json:"orders_filled"`
+	PartialFills int `json:"partial_fills"`
+}
+
+// Bucket counts observations <= Le (non-cumulative, Le "+Inf" catches the rest)
+type Bucket struct {
+	Le    string `json:"le"`
+	Count uint64 `json:"count"`
+}
+
+// IngestStats describes the batched POST /orders path of one worker process
+type IngestStats struct {
+	PID          int      `json:"pid"`
+	MaxBatchSize int      `json:"max_batch_size"`
+	LingerMs     float64  `json:"linger_ms"`
+	Batches      uint64   `json:"batches"`
+	Orders       uint64   `json:"orders"`
+	Fallbacks    uint64   `json:"fallbacks"`
+	Errors       uint64   `json:"errors"`
+	AvgBatchSize float64  `json:"avg_batch_size"`
+	AvgFlushMs   float64  `json:"avg_flush_ms"`
+	MaxFlushMs   float64  `json:"max_flush_ms"`
+	BatchSizes   []Bucket `json:"batch_sizes"`
+	FlushMs      []Bucket `json:"flush_ms"`
+}
+
+// CacheStats describes the GET /balance cache of one worker process
+type CacheStats struct {
+	PID           int     `json:"pid"`
+	Size          int     `json:"size"`
+	Capacity      int     `json:"capacity"`
+	TTLMs         float64 `json:"ttl_ms"`
+	Hits          uint64  `json:"hits"`
+	Misses        uint64  `json:"misses"`
+	HitRate       float64 `json:"hit_rate"`
+	Evictions     uint64  `json:"evictions"`
+	Expirations   uint64  `json:"expirations"`
+	Invalidations uint64  `json:"invalidations"`
+}
+
+// AdmissionStats describes DB admission control and pool acquire waits of one worker process
+type AdmissionStats struct {
+	PID                  int     `json:"pid"`
+	Limit                int     `json:"limit"`
+	MinLimit             int     `json:"min_limit"`
+	MaxLimit             int     `json:"max_limit"`
+	InFlight             int     `json:"in_flight"`
+	Queued               int     `json:"queued"`
+	MaxWaitMs            float64 `json:"max_wait_ms"`
+	Admitted             uint64  `json:"admitted"`
+	Rejected             uint64  `json:"rejected"`
+	QueueTimeouts        uint64  `json:"queue_timeouts"`
+	AvgQueueWaitMs       float64 `json:"avg_queue_wait_ms"`
+	LatencyMs            float64 `json:"latency_ms"`
+	BaselineLatencyMs    float64 `json:"baseline_latency_ms"`
+	AcquireWaitMs        float64 `json:"acquire_wait_ms"`
+	PoolMaxConns         int32   `json:"pool_max_conns"`
+	PoolTotalConns       int32   `json:"pool_total_conns"`
+	PoolIdleConns        int32   `json:"pool_idle_conns"`
+	PoolEmptyAcquires    int64   `json:"pool_empty_acquires"`
+	PoolCanceledAcquires int64   `json:"pool_canceled_acquires"`
+	PoolAvgAcquireWaitMs float64 `json:"pool_avg_acquire_wait_ms"`
 }
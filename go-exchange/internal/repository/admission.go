@@ -0,0 +1,263 @@
+package repository
+
+import (
+	"container/list"
+	"context"
+	"errors"
+	"math"
+	"os"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/model"
+	"github.com/jackc/pgx/v5/pgxpool"
+)
+
+// ErrOverloaded is returned instead of queueing DB work past the admission wait
+var ErrOverloaded = errors.New("overloaded: database work not admitted")
+
+const (
+	// How often the limit is re-evaluated from the latencies seen meanwhile
+	admissionWindow = 500 * time.Millisecond
+	// Latency may rise this far above the unloaded latency before the limit shrinks
+	admissionTolerance = 1.5
+	// Per-window upward drift of the unloaded latency, so it is re-learned when
+	// queries get slower for good (e.g. a growing order book)
+	admissionBaselineDrift = 1.01
+)
+
+// Limiter is admission control for DB work in one worker. At most limit calls
+// run at once; others wait up to maxWait in a bounded FIFO queue and are then
+// rejected with ErrOverloaded so the handler can answer 503 right away.
+//
+// The limit adapts toward the concurrency where queueing starts: the lowest
+// mean latency seen in a window is taken as the unloaded latency, and while the
+// current window's latency stays within admissionTolerance of it the limit
+// grows by sqrt(limit) per window; beyond that it shrinks in proportion (at most
+// by half), between minLimit and maxLimit (the pool size). pgxpool cannot be
+// resized at runtime, so bounding in-flight work is what sizes the part of the
+// pool in use.
+type Limiter struct {
+	pool     *pgxpool.Pool
+	minLimit int
+	maxLimit int
+	maxWait  time.Duration
+	maxQueue int
+
+	mu       sync.Mutex
+	limit    int
+	inFlight int
+	peak     int
+	waiters  *list.List
+
+	windowSum   time.Duration
+	windowCount int
+	latencyMs   float64
+	baselineMs  float64
+
+	lastAcquireCount    int64
+	lastAcquireDuration time.Duration
+	acquireWaitMs       float64
+
+	admitted  atomic.Uint64
+	rejected  atomic.Uint64
+	timeouts  atomic.Uint64
+	queued    atomic.Uint64
+	queuedFor atomic.Int64
+
+	stop chan struct{}
+}
+
+type admissionWaiter struct {
+	ready   chan struct{}
+	granted bool
+}
+
+func NewLimiter(pool *pgxpool.Pool, minLimit, maxLimit int, maxWait time.Duration, maxQueue int) *Limiter {
+	l := &Limiter{
+		pool:     pool,
+		minLimit: minLimit,
+		maxLimit: maxLimit,
+		maxWait:  maxWait,
+		maxQueue: maxQueue,
+		limit:    max(minLimit, maxLimit/4),
+		waiters:  list.New(),
+		stop:     make(chan struct{}),
+	}
+	go l.adaptLoop()
+	return l
+}
+
+func (l *Limiter) Close() {
+	close(l.stop)
+}
+
+// Acquire admits one unit of DB work; call release when it is done
+func (l *Limiter) Acquire(ctx context.Context) (release func(), err error) {
+	l.mu.Lock()
+	if l.inFlight < l.limit && l.waiters.Len() == 0 {
+		l.inFlight++
+		l.peak = max(l.peak, l.inFlight)
+		l.mu.Unlock()
+		return l.admit(), nil
+	}
+	if l.waiters.Len() >= l.maxQueue {
+		l.mu.Unlock()
+		l.rejected.Add(1)
+		return nil, ErrOverloaded
+	}
+	w := &admissionWaiter{ready: make(chan struct{})}
+	el := l.waiters.PushBack(w)
+	l.mu.Unlock()
+
+	l.queued.Add(1)
+	start := time.Now()
+	timer := time.NewTimer(l.maxWait)
+	defer timer.Stop()
+
+	select {
+	case <-w.ready:
+	case <-timer.C:
+		err = ErrOverloaded
+	case <-ctx.Done():
+		err = ctx.Err()
+	}
+	l.queuedFor.Add(int64(time.Since(start)))
+
+	if err != nil {
+		l.mu.Lock()
+		// The slot may have been handed over just as the wait ended
+		granted := w.granted
+		if !granted {
+			l.waiters.Remove(el)
+		}
+		l.mu.Unlock()
+		if !granted {
+			l.timeouts.Add(1)
+			l.rejected.Add(1)
+			return nil, err
+		}
+	}
+	return l.admit(), nil
+}
+
+func (l *Limiter) admit() func() {
+	l.admitted.Add(1)
+	start := time.Now()
+	var once sync.Once
+	return func() {
+		once.Do(func() { l.release(time.Since(start)) })
+	}
+}
+
+func (l *Limiter) release(took time.Duration) {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+
+	l.windowSum += took
+	l.windowCount++
+	l.inFlight--
+	l.grantLocked()
+}
+
+// grantLocked hands free slots to queued callers in arrival order
+func (l *Limiter) grantLocked() {
+	for l.inFlight < l.limit && l.waiters.Len() > 0 {
+		w := l.waiters.Remove(l.waiters.Front()).(*admissionWaiter)
+		w.granted = true
+		close(w.ready)
+		l.inFlight++
+		l.peak = max(l.peak, l.inFlight)
+	}
+}
+
+func (l *Limiter) adaptLoop() {
+	ticker := time.NewTicker(admissionWindow)
+	defer ticker.Stop()
+
+	for {
+		select {
+		case <-l.stop:
+			return
+		case <-ticker.C:
+		}
+		l.adapt()
+	}
+}
+
+func (l *Limiter) adapt() {
+	stat := l.pool.Stat()
+
+	l.mu.Lock()
+	defer l.mu.Unlock()
+
+	// Mean pool acquire wait over the window, from pgxpool's cumulative counters
+	if acquires := stat.AcquireCount() - l.lastAcquireCount; acquires > 0 {
+		waited := stat.AcquireDuration() - l.lastAcquireDuration
+		l.acquireWaitMs = float64(waited) / float64(time.Millisecond) / float64(acquires)
+	} else {
+		l.acquireWaitMs = 0
+	}
+	l.lastAcquireCount = stat.AcquireCount()
+	l.lastAcquireDuration = stat.AcquireDuration()
+
+	if l.windowCount == 0 {
+		return
+	}
+	l.latencyMs = float64(l.windowSum) / float64(time.Millisecond) / float64(l.windowCount)
+	if l.baselineMs == 0 || l.latencyMs < l.baselineMs {
+		l.baselineMs = l.latencyMs
+	} else {
+		l.baselineMs *= admissionBaselineDrift
+	}
+
+	gradient := math.Max(0.5, math.Min(1, admissionTolerance*l.baselineMs/l.latencyMs))
+	limit := float64(l.limit)
+	next := limit*gradient + math.Sqrt(limit)
+	// Latency says nothing about a larger limit that is not being used
+	if next > limit && l.peak < l.limit/2 {
+		next = limit
+	}
+	l.limit = min(l.maxLimit, max(l.minLimit, int(math.Round(next))))
+
+	l.windowSum, l.windowCount = 0, 0
+	l.peak = l.inFlight
+	l.grantLocked()
+}
+
+// Stats reports this worker's admission counters and pool acquire waits
+func (l *Limiter) Stats() *model.AdmissionStats {
+	stat := l.pool.Stat()
+
+	l.mu.Lock()
+	stats := &model.AdmissionStats{
+		PID:               os.Getpid(),
+		Limit:             l.limit,
+		MinLimit:          l.minLimit,
+		MaxLimit:          l.maxLimit,
+		InFlight:          l.inFlight,
+		Queued:            l.waiters.Len(),
+		LatencyMs:         l.latencyMs,
+		BaselineLatencyMs: l.baselineMs,
+		AcquireWaitMs:     l.acquireWaitMs,
+	}
+	l.mu.Unlock()
+
+	stats.MaxWaitMs = float64(l.maxWait) / float64(time.Millisecond)
+	stats.Admitted = l.admitted.Load()
+	stats.Rejected = l.rejected.Load()
+	stats.QueueTimeouts = l.timeouts.Load()
+	if queued := l.queued.Load(); queued > 0 {
+		stats.AvgQueueWaitMs = float64(l.queuedFor.Load()) / float64(time.Millisecond) / float64(queued)
+	}
+	stats.PoolMaxConns = stat.MaxConns()
+	stats.PoolTotalConns = stat.TotalConns()
+	stats.PoolIdleConns = stat.IdleConns()
+	stats.PoolEmptyAcquires = stat.EmptyAcquireCount()
+	stats.PoolCanceledAcquires = stat.CanceledAcquireCount()
+	if acquires := stat.AcquireCount(); acquires > 0 {
+		stats.PoolAvgAcquireWaitMs = float64(stat.AcquireDuration()) / float64(time.Millisecond) / float64(acquires)
+	}
+	return stats
+}
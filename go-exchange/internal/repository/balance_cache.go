@@ -0,0 +1,212 @@
+package repository
+
+import (
+	"container/list"
+	"context"
+	"log"
+	"os"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/model"
+	"github.com/google/uuid"
+	"github.com/jackc/pgx/v5/pgxpool"
+)
+
+// Channel the wallets trigger in init.sql notifies with the changed user_id
+const walletChangesChannel = "wallet_changes"
+
+// BalanceCache keeps recent GET /balance responses per user with a TTL and
+// LRU eviction. Entries are dropped as soon as Postgres reports a wallet change
+// (NOTIFY from the wallets trigger, so writes by any process count); the TTL
+// only bounds staleness if a notification is missed.
+type BalanceCache struct {
+	ttl      time.Duration
+	capacity int
+
+	mu      sync.Mutex
+	entries map[uuid.UUID]*list.Element
+	lru     *list.List // front = most recently used
+
+	// Bumped on every invalidation; loads that raced one are not cached
+	generation atomic.Uint64
+
+	hits          atomic.Uint64
+	misses        atomic.Uint64
+	evictions     atomic.Uint64
+	expirations   atomic.Uint64
+	invalidations atomic.Uint64
+
+	cancel context.CancelFunc
+	done   chan struct{}
+}
+
+type balanceEntry struct {
+	balances *model.BalanceResponse
+	expires  time.Time
+}
+
+func NewBalanceCache(ttl time.Duration, capacity int) *BalanceCache {
+	return &BalanceCache{
+		ttl:      ttl,
+		capacity: capacity,
+		entries:  make(map[uuid.UUID]*list.Element, capacity),
+		lru:      list.New(),
+	}
+}
+
+// Get returns the cached balances and the generation to pass to Put on a miss
+func (c *BalanceCache) Get(userID uuid.UUID) (*model.BalanceResponse, uint64) {
+	generation := c.generation.Load()
+
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	el, ok := c.entries[userID]
+	if !ok {
+		c.misses.Add(1)
+		return nil, generation
+	}
+	entry := el.Value.(*balanceEntry)
+	if time.Now().After(entry.expires) {
+		c.lru.Remove(el)
+		delete(c.entries, userID)
+		c.expirations.Add(1)
+		c.misses.Add(1)
+		return nil, generation
+	}
+	c.lru.MoveToFront(el)
+	c.hits.Add(1)
+	return entry.balances, generation
+}
+
+// Put caches balances loaded after Get returned generation, unless a wallet
+// changed in the meantime (the load may predate the change)
+func (c *BalanceCache) Put(balances *model.BalanceResponse, generation uint64) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	if c.generation.Load() != generation {
+		return
+	}
+	entry := &balanceEntry{balances: balances, expires: time.Now().Add(c.ttl)}
+	if el, ok := c.entries[balances.UserID]; ok {
+		el.Value = entry
+		c.lru.MoveToFront(el)
+		return
+	}
+	c.entries[balances.UserID] = c.lru.PushFront(entry)
+	for c.lru.Len() > c.capacity {
+		oldest := c.lru.Back()
+		c.lru.Remove(oldest)
+		delete(c.entries, oldest.Value.(*balanceEntry).balances.UserID)
+		c.evictions.Add(1)
+	}
+}
+
+// Invalidate drops one user's balances
+func (c *BalanceCache) Invalidate(userID uuid.UUID) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	c.generation.Add(1)
+	if el, ok := c.entries[userID]; ok {
+		c.lru.Remove(el)
+		delete(c.entries, userID)
+	}
+	c.invalidations.Add(1)
+}
+
+// Clear drops everything, e.g. when notifications may have been missed
+func (c *BalanceCache) Clear() {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+
+	c.generation.Add(1)
+	c.entries = make(map[uuid.UUID]*list.Element, c.capacity)
+	c.lru.Init()
+}
+
+// Listen invalidates entries on wallet change notifications until Close.
+// It keeps one connection (taken from the pool) for LISTEN.
+func (c *BalanceCache) Listen(pool *pgxpool.Pool) {
+	ctx, cancel := context.WithCancel(context.Background())
+	c.cancel = cancel
+	c.done = make(chan struct{})
+
+	go func() {
+		defer close(c.done)
+		for ctx.Err() == nil {
+			err := c.listen(ctx, pool)
+			if ctx.Err() != nil {
+				return
+			}
+			// Changes made while not listening were missed
+			log.Printf("Balance cache listener: %v; retrying", err)
+			c.Clear()
+			select {
+			case <-ctx.Done():
+			case <-time.After(time.Second):
+			}
+		}
+	}()
+}
+
+func (c *BalanceCache) listen(ctx context.Context, pool *pgxpool.Pool) error {
+	pooled, err := pool.Acquire(ctx)
+	if err != nil {
+		return err
+	}
+	// Taken out of the pool for good so the LISTEN session is never handed out
+	conn := pooled.Hijack()
+	defer conn.Close(context.Background())
+
+	if _, err := conn.Exec(ctx, "LISTEN "+walletChangesChannel); err != nil {
+		return err
+	}
+	// Anything cached before LISTEN took effect may be stale
+	c.Clear()
+
+	for {
+		n, err := conn.WaitForNotification(ctx)
+		if err != nil {
+			return err
+		}
+		if userID, err := uuid.Parse(n.Payload); err == nil {
+			c.Invalidate(userID)
+		} else {
+			c.Clear()
+		}
+	}
+}
+
+func (c *BalanceCache) Close() {
+	if c.cancel != nil {
+		c.cancel()
+		<-c.done
+	}
+}
+
+// Stats reports this worker's cache counters (prefork workers cache independently)
+func (c *BalanceCache) Stats() *model.CacheStats {
+	c.mu.Lock()
+	size := c.lru.Len()
+	c.mu.Unlock()
+
+	stats := &model.CacheStats{
+		PID:           os.Getpid(),
+		Size:          size,
+		Capacity:      c.capacity,
+		TTLMs:         float64(c.ttl) / float64(time.Millisecond),
+		Hits:          c.hits.Load(),
+		Misses:        c.misses.Load(),
+		Evictions:     c.evictions.Load(),
+		Expirations:   c.expirations.Load(),
+		Invalidations: c.invalidations.Load(),
+	}
+	if total := stats.Hits + stats.Misses; total > 0 {
+		stats.HitRate = float64(stats.Hits) / float64(total)
+	}
+	return stats
+}
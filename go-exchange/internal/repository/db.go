@@ -6,27 +6,53 @@ import (
 	"runtime"
 	"time"
 
+	"github.com/cryptox/go-exchange/internal/metrics"
 	"github.com/jackc/pgx/v5/pgxpool"
 )
 
+// queryDuration times DB work per repository operation for GET /metrics
+var queryDuration = metrics.NewHistogramVec("db_query_duration_seconds",
+	"Time spent in Postgres per repository operation, including pool acquire.",
+	metrics.LatencyBuckets, "op")
+
+func observeQuery(op string, start time.Time) {
+	queryDuration.Observe(time.Since(start), op)
+}
+
 type DB struct {
 	Pool *pgxpool.Pool
+	// Books serves GET /orderbook from memory when set (see EnableOrderBookCache)
+	Books *OrderBookCache
+	// Orders group-commits CreateOrder when set (see EnableOrderBatching)
+	Orders *OrderBatcher
+	// Balances caches GET /balance when set (see EnableBalanceCache)
+	Balances *BalanceCache
+	// Admission bounds in-flight DB work when set (see EnableAdmissionControl)
+	Admission *Limiter
+	// Lanes serializes matching per trading pair when set (see EnableMatchLanes)
+	Lanes *MatchLanes
+	// Archiver moves closed orders to orders_archive when set (see EnableOrderArchiver)
+	Archiver *OrderArchiver
+	// Feed streams order book changes when set (see EnableOrderBookStream)
+	Feed *OrderBookFeed
 }
 
-func NewDB(ctx context.Context, connString string) (*DB, error) {
+// NewDB opens this worker's pool; totalConns is the Postgres connection budget
+// shared by all prefork workers (keep it below the server's max_connections)
+func NewDB(ctx context.Context, connString string, totalConns int) (*DB, error) {
 	config, err := pgxpool.ParseConfig(connString)
 	if err != nil {
 		return nil, fmt.Errorf("parse config: %w", err)
 	}
 
 	// Calculate connections per worker (for prefork mode)
-	// Total Postgres connections = 500, divided by number of CPU workers
+	// The total budget is divided by number of CPU workers
 	numWorkers := runtime.NumCPU()
 	if numWorkers < 1 {
 		numWorkers = 1
 	}
 
-	maxConnsPerWorker := 400 / int32(numWorkers) // Leave some headroom
+	maxConnsPerWorker := int32(totalConns / numWorkers)
 	if maxConnsPerWorker < 10 {
 		maxConnsPerWorker = 10
 	}
@@ -53,9 +79,105 @@ func NewDB(ctx context.Context, connString string) (*DB, error) {
 		return nil, fmt.Errorf("ping: %w", err)
 	}
 
+	metrics.Register(metrics.CollectorFunc(func(w *metrics.Writer) {
+		collectPoolStats(w, pool.Stat())
+	}))
+
 	return &DB{Pool: pool}, nil
 }
 
+func collectPoolStats(w *metrics.Writer, s *pgxpool.Stat) {
+	w.Gauge("db_pool_max_conns", "Maximum size of this worker's pool.", float64(s.MaxConns()))
+	w.Gauge("db_pool_total_conns", "Open connections in this worker's pool.", float64(s.TotalConns()))
+	w.Gauge("db_pool_acquired_conns", "Connections currently checked out.", float64(s.AcquiredConns()))
+	w.Gauge("db_pool_idle_conns", "Idle connections.", float64(s.IdleConns()))
+	w.Summary("db_pool_acquire_seconds", "Pool acquires and the total time spent waiting for them.",
+		uint64(s.AcquireCount()), s.AcquireDuration().Seconds())
+	w.Counter("db_pool_empty_acquire_total", "Acquires that had to wait for a connection.", float64(s.EmptyAcquireCount()))
+	w.Counter("db_pool_canceled_acquire_total", "Acquires canceled by their context.", float64(s.CanceledAcquireCount()))
+}
+
+// EnableOrderBookCache serves order books from memory, re-synced from Postgres every maxStaleness
+func (db *DB) EnableOrderBookCache(maxStaleness time.Duration) {
+	db.Books = NewOrderBookCache(db.loadOrderBook, maxStaleness, orderBookDepth)
+}
+
+// EnableOrderBatching inserts orders in batches of up to maxBatch, lingering at most linger to fill one
+func (db *DB) EnableOrderBatching(maxBatch int, linger time.Duration) {
+	db.Orders = NewOrderBatcher(db.Pool, maxBatch, linger, db.admit)
+}
+
+// EnableBalanceCache caches up to capacity users' balances for ttl, invalidated on wallet changes
+func (db *DB) EnableBalanceCache(ttl time.Duration, capacity int) {
+	db.Balances = NewBalanceCache(ttl, capacity)
+	db.Balances.Listen(db.Pool)
+}
+
+// EnableAdmissionControl bounds in-flight DB work per worker with an adaptive
+// limit of at least minLimit and at most the pool size; callers beyond it wait
+// up to maxWait in a queue of maxQueue, then fail with ErrOverloaded
+func (db *DB) EnableAdmissionControl(minLimit int, maxWait time.Duration, maxQueue int) {
+	maxLimit := int(db.Pool.Config().MaxConns)
+	db.Admission = NewLimiter(db.Pool, min(minLimit, maxLimit), maxLimit, maxWait, maxQueue)
+	metrics.Register(metrics.CollectorFunc(func(w *metrics.Writer) {
+		s := db.Admission.Stats()
+		w.Gauge("admission_limit", "Current adaptive limit on in-flight DB work.", float64(s.Limit))
+		w.Gauge("admission_in_flight", "Admitted DB work in progress.", float64(s.InFlight))
+		w.Gauge("admission_queued", "Callers waiting for admission.", float64(s.Queued))
+		w.Counter("admission_admitted_total", "Calls admitted.", float64(s.Admitted))
+		w.Counter("admission_rejected_total", "Calls shed with 503.", float64(s.Rejected))
+	}))
+}
+
+// EnableMatchLanes matches each pair in its own lane, queueing up to queue calls per pair
+func (db *DB) EnableMatchLanes(queue int) {
+	db.Lanes = NewMatchLanes(queue)
+}
+
+// EnableOrderArchiver moves closed orders to orders_archive every interval, batch rows per statement
+func (db *DB) EnableOrderArchiver(interval time.Duration, batch int) {
+	db.Archiver = NewOrderArchiver(db.Pool, interval, batch)
+	metrics.Register(metrics.CollectorFunc(func(w *metrics.Writer) {
+		w.Counter("orders_archived_total", "Closed orders this worker moved to orders_archive.",
+			float64(db.Archiver.Archived()))
+	}))
+}
+
+// EnableOrderBookStream pushes changes of cached books to subscribers, queueing
+// up to buffer events each; it needs the order book cache
+func (db *DB) EnableOrderBookStream(buffer int) {
+	db.Feed = NewOrderBookFeed(db.Books, buffer)
+}
+
+// admit waits for an admission slot; release must be called when the DB work is done
+func (db *DB) admit(ctx context.Context) (release func(), err error) {
+	if db.Admission == nil {
+		return func() {}, nil
+	}
+	return db.Admission.Acquire(ctx)
+}
+
 func (db *DB) Close() {
+	if db.Feed != nil {
+		db.Feed.Close()
+	}
+	if db.Archiver != nil {
+		db.Archiver.Close()
+	}
+	if db.Lanes != nil {
+		db.Lanes.Close()
+	}
+	if db.Admission != nil {
+		db.Admission.Close()
+	}
+	if db.Balances != nil {
+		db.Balances.Close()
+	}
+	if db.Orders != nil {
+		db.Orders.Close()
+	}
+	if db.Books != nil {
+		db.Books.Close()
+	}
 	db.Pool.Close()
 }
@@ -0,0 +1,246 @@
+package repository
+
+import (
+	"context"
+	"sync"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/metrics"
+	"github.com/cryptox/go-exchange/internal/model"
+	"github.com/jackc/pgx/v5"
+)
+
+var (
+	laneCalls = metrics.NewCounterVec("match_lane_calls_total",
+		"Match calls per trading pair.", "pair")
+	laneRounds = metrics.NewCounterVec("match_lane_rounds_total",
+		"Match transactions run per trading pair; calls beyond this were coalesced.", "pair")
+	laneOwnedElsewhere = metrics.NewCounterVec("match_lane_owned_elsewhere_total",
+		"Match rounds skipped because another worker was matching the pair.", "pair")
+)
+
+// Advisory lock class of pair ownership; the pair's hashtext() is the other key
+const pairLockClass = 0x6d61
+
+const (
+	// A round runs on the lane's context, not a caller's, and is bounded by this
+	laneRoundTimeout = 5 * time.Second
+	// Lanes without calls for this long are stopped and their metric series dropped
+	laneIdleTimeout = time.Minute
+	// Pairs come from requests, so lanes are capped; calls for a pair beyond
+	// this are shed until other pairs go idle
+	maxLanes = 1024
+)
+
+// MatchLanes gives every trading pair its own matching lane in this worker. A
+// lane runs one match transaction at a time. Drain calls that queue up
+// meanwhile are coalesced into the next round, which drains until nothing
+// crosses; single calls each run their own round and make their own trade.
+// Pairs never wait on each other, and one pair's calls no longer compete for
+// the same rows with FOR UPDATE SKIP LOCKED.
+//
+// Across prefork workers a pair is owned by the transaction holding its
+// advisory lock (see ownPair); a round that finds it taken is skipped, since
+// the owner's drain is already matching those orders.
+type MatchLanes struct {
+	queue int
+
+	mu    sync.Mutex
+	lanes map[string]*matchLane
+
+	// Rounds run on ctx; Close cancels it
+	ctx    context.Context
+	cancel context.CancelFunc
+}
+
+type matchLane struct {
+	pair     string
+	requests chan *laneRequest
+}
+
+type laneRequest struct {
+	ctx   context.Context
+	kind  string
+	match func(context.Context) (*model.MatchResult, error)
+
+	done   chan struct{}
+	result *model.MatchResult
+	err    error
+}
+
+// NewMatchLanes creates lanes that queue up to queue calls per pair
+func NewMatchLanes(queue int) *MatchLanes {
+	ctx, cancel := context.WithCancel(context.Background())
+	return &MatchLanes{
+		queue:  queue,
+		lanes:  make(map[string]*matchLane),
+		ctx:    ctx,
+		cancel: cancel,
+	}
+}
+
+func (m *MatchLanes) Close() {
+	m.cancel()
+}
+
+// Do runs match in the pair's lane. Drain calls queued while a round runs
+// share the next round's outcome; only the call that leads the round reports
+// its trades, the others an empty result. A caller whose ctx ends stops
+// waiting without cancelling the round for the others.
+func (m *MatchLanes) Do(ctx context.Context, pair, kind string, match func(context.Context) (*model.MatchResult, error)) (*model.MatchResult, error) {
+	r := &laneRequest{ctx: ctx, kind: kind, match: match, done: make(chan struct{})}
+	if !m.enqueue(pair, r) {
+		return nil, ErrOverloaded
+	}
+	laneCalls.Inc(pair)
+
+	select {
+	case <-r.done:
+		return r.result, r.err
+	case <-ctx.Done():
+		return nil, ctx.Err()
+	}
+}
+
+// enqueue hands r to the pair's lane, starting one if needed; false when the
+// lane's queue or the lane count is full
+func (m *MatchLanes) enqueue(pair string, r *laneRequest) bool {
+	m.mu.Lock()
+	defer m.mu.Unlock()
+
+	if m.ctx.Err() != nil {
+		return false
+	}
+	l, ok := m.lanes[pair]
+	if !ok {
+		if len(m.lanes) >= maxLanes {
+			return false
+		}
+		l = &matchLane{pair: pair, requests: make(chan *laneRequest, m.queue)}
+		m.lanes[pair] = l
+		go m.run(l)
+	}
+	// Sent under m.mu so the lane cannot retire in between
+	select {
+	case l.requests <- r:
+		return true
+	default:
+		return false
+	}
+}
+
+// retire removes an idle lane; false if a call was queued meanwhile
+func (m *MatchLanes) retire(l *matchLane) bool {
+	m.mu.Lock()
+	defer m.mu.Unlock()
+
+	if len(l.requests) > 0 {
+		return false
+	}
+	delete(m.lanes, l.pair)
+	laneCalls.Delete(l.pair)
+	laneRounds.Delete(l.pair)
+	laneOwnedElsewhere.Delete(l.pair)
+	return true
+}
+
+func (m *MatchLanes) run(l *matchLane) {
+	idle := time.NewTimer(laneIdleTimeout)
+	defer idle.Stop()
+
+	var pending []*laneRequest
+	for {
+		if len(pending) == 0 {
+			if !idle.Stop() {
+				select {
+				case <-idle.C:
+				default:
+				}
+			}
+			idle.Reset(laneIdleTimeout)
+
+			select {
+			case r := <-l.requests:
+				pending = append(pending, r)
+			case <-idle.C:
+				if m.retire(l) {
+					return
+				}
+				continue
+			case <-m.ctx.Done():
+				return
+			}
+		}
+		// Everything queued by now arrived before this round starts
+		for queued := true; queued; {
+			select {
+			case r := <-l.requests:
+				pending = append(pending, r)
+			default:
+				queued = false
+			}
+		}
+
+		// One drain covers every queued drain call; a single call is one trade
+		round := pending[:1]
+		var later []*laneRequest
+		if pending[0].kind == "drain" {
+			round = nil
+			for _, r := range pending {
+				if r.kind == "drain" {
+					round = append(round, r)
+				} else {
+					later = append(later, r)
+				}
+			}
+		} else {
+			later = pending[1:]
+		}
+		pending = append([]*laneRequest(nil), later...)
+
+		m.runRound(l, round)
+	}
+}
+
+func (m *MatchLanes) runRound(l *matchLane, round []*laneRequest) {
+	// Callers that already gave up are not matched for
+	waiting := round[:0]
+	for _, r := range round {
+		if err := r.ctx.Err(); err != nil {
+			r.err = err
+			close(r.done)
+		} else {
+			waiting = append(waiting, r)
+		}
+	}
+	if len(waiting) == 0 {
+		return
+	}
+
+	laneRounds.Inc(l.pair)
+	ctx, cancel := context.WithTimeout(m.ctx, laneRoundTimeout)
+	result, err := waiting[0].match(ctx)
+	cancel()
+	for i, r := range waiting {
+		switch {
+		case err != nil:
+			r.err = err
+		case i == 0:
+			r.result = result
+		default:
+			r.result = &model.MatchResult{}
+		}
+		close(r.done)
+	}
+}
+
+// ownPair takes the pair's transaction-level advisory lock if no other
+// transaction holds it; false means another worker is matching the pair
+func ownPair(ctx context.Context, tx pgx.Tx, pair string) (bool, error) {
+	var owned bool
+	err := tx.QueryRow(ctx, `SELECT pg_try_advisory_xact_lock($1, hashtext($2))`, pairLockClass, pair).Scan(&owned)
+	if err == nil && !owned {
+		laneOwnedElsewhere.Inc(pair)
+	}
+	return owned, err
+}
@@ -0,0 +1,88 @@
+package repository
+
+import (
+	"context"
+	"log"
+	"sync/atomic"
+	"time"
+
+	"github.com/jackc/pgx/v5/pgxpool"
+)
+
+// OrderArchiver moves FILLED/CANCELLED orders to orders_archive in the
+// background (archive_closed_orders() in init.sql), so the orders table and its
+// indexes stay about the size of the OPEN book however long the service runs.
+//
+// Every prefork worker runs one; the SQL function lets one caller at a time do
+// the work and the others return at once.
+type OrderArchiver struct {
+	pool     *pgxpool.Pool
+	interval time.Duration
+	batch    int
+
+	archived atomic.Uint64
+	stop     chan struct{}
+}
+
+// NewOrderArchiver archives up to batch orders per statement every interval
+func NewOrderArchiver(pool *pgxpool.Pool, interval time.Duration, batch int) *OrderArchiver {
+	a := &OrderArchiver{
+		pool:     pool,
+		interval: interval,
+		batch:    batch,
+		stop:     make(chan struct{}),
+	}
+	go a.loop()
+	return a
+}
+
+func (a *OrderArchiver) Close() {
+	close(a.stop)
+}
+
+// Archived is the number of orders this worker has moved
+func (a *OrderArchiver) Archived() uint64 {
+	return a.archived.Load()
+}
+
+func (a *OrderArchiver) loop() {
+	ticker := time.NewTicker(a.interval)
+	defer ticker.Stop()
+
+	for {
+		select {
+		case <-a.stop:
+			return
+		case <-ticker.C:
+		}
+
+		// Full batches mean a backlog: keep going until it is cleared
+		for moved := a.batch; moved == a.batch; {
+			select {
+			case <-a.stop:
+				return
+			default:
+			}
+
+			var err error
+			if moved, err = a.archiveBatch(); err != nil {
+				// The next tick retries
+				log.Printf("Order archiver: %v", err)
+				break
+			}
+		}
+	}
+}
+
+func (a *OrderArchiver) archiveBatch() (int, error) {
+	ctx, cancel := context.WithTimeout(context.Background(), 30*time.Second)
+	defer cancel()
+	defer observeQuery("archive_orders", time.Now())
+
+	var moved int
+	if err := a.pool.QueryRow(ctx, `SELECT archive_closed_orders($1)`, a.batch).Scan(&moved); err != nil {
+		return 0, err
+	}
+	a.archived.Add(uint64(moved))
+	return moved, nil
+}
@@ -0,0 +1,289 @@
+package repository
+
+import (
+	"context"
+	"errors"
+	"math"
+	"os"
+	"strconv"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/model"
+	"github.com/google/uuid"
+	"github.com/jackc/pgx/v5/pgxpool"
+)
+
+// Flushers per worker: one batch commits while the next one fills
+const batchFlushers = 2
+
+// Upper bounds of the flush latency histogram in milliseconds (last is +Inf)
+var flushBucketsMs = []float64{0.5, 1, 2, 5, 10, 25, 50, 100, 250, math.Inf(1)}
+
+var errBatcherClosed = errors.New("order batcher closed")
+
+// Longest a batch (or one fallback insert) may take
+const batchTimeout = 5 * time.Second
+
+// One multi-row INSERT per batch. Each order keeps the time it was submitted,
+// as in Java, so orders at one price in the same batch stay in time priority
+// (NOW() would be one timestamp for the whole transaction).
+const batchInsertQuery = `
+	INSERT INTO orders (id, user_id, pair, side, price, quantity, status, created_at)
+	SELECT id, user_id, pair, side, price, quantity, status, created_at
+	FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::float8[], $6::float8[], $7::text[],
+		$8::timestamptz[])
+		AS o(id, user_id, pair, side, price, quantity, status, created_at)`
+
+type pendingOrder struct {
+	// The submitter's; the one-by-one fallback runs under it
+	ctx   context.Context
+	order *model.Order
+	done  chan error
+}
+
+// OrderBatcher group-commits POST /orders: orders are queued and inserted in
+// micro-batches of up to maxBatch, waiting at most linger for a batch to fill.
+// Submit returns once the order's batch has committed. Admission control sees
+// one call per batch, so the limit bounds concurrent INSERTs rather than
+// batch sizes, and time spent filling a batch is not counted as DB latency.
+type OrderBatcher struct {
+	pool     *pgxpool.Pool
+	admit    func(ctx context.Context) (release func(), err error)
+	maxBatch int
+	linger   time.Duration
+	queue    chan *pendingOrder
+	wg       sync.WaitGroup
+
+	mu     sync.RWMutex
+	closed bool
+
+	batches   atomic.Uint64
+	orders    atomic.Uint64
+	fallbacks atomic.Uint64
+	errors    atomic.Uint64
+	flushNs   atomic.Int64
+	maxFlush  atomic.Int64
+	sizeLe    []int
+	sizeCount []atomic.Uint64
+	flushHist []atomic.Uint64
+}
+
+func NewOrderBatcher(pool *pgxpool.Pool, maxBatch int, linger time.Duration,
+	admit func(ctx context.Context) (release func(), err error)) *OrderBatcher {
+	b := &OrderBatcher{
+		pool:     pool,
+		admit:    admit,
+		maxBatch: maxBatch,
+		linger:   linger,
+		queue:    make(chan *pendingOrder, maxBatch*batchFlushers),
+	}
+	// Batch size buckets: powers of two up to maxBatch
+	for le := 1; le < maxBatch; le *= 2 {
+		b.sizeLe = append(b.sizeLe, le)
+	}
+	b.sizeLe = append(b.sizeLe, maxBatch)
+	b.sizeCount = make([]atomic.Uint64, len(b.sizeLe))
+	b.flushHist = make([]atomic.Uint64, len(flushBucketsMs))
+
+	b.wg.Add(batchFlushers)
+	for i := 0; i < batchFlushers; i++ {
+		go b.run()
+	}
+	return b
+}
+
+// Submit queues an order and waits for its batch to commit. If ctx ends
+// first the order may still be committed by the pending batch.
+func (b *OrderBatcher) Submit(ctx context.Context, order *model.Order) error {
+	// Postgres keeps microseconds; the order reports what is stored
+	order.CreatedAt = time.Now().Truncate(time.Microsecond)
+	p := &pendingOrder{ctx: ctx, order: order, done: make(chan error, 1)}
+
+	b.mu.RLock()
+	if b.closed {
+		b.mu.RUnlock()
+		return errBatcherClosed
+	}
+	select {
+	case b.queue <- p:
+	case <-ctx.Done():
+		b.mu.RUnlock()
+		return ctx.Err()
+	}
+	b.mu.RUnlock()
+
+	select {
+	case err := <-p.done:
+		return err
+	case <-ctx.Done():
+		return ctx.Err()
+	}
+}
+
+// Close flushes everything queued and stops the flushers
+func (b *OrderBatcher) Close() {
+	b.mu.Lock()
+	b.closed = true
+	close(b.queue)
+	b.mu.Unlock()
+	b.wg.Wait()
+}
+
+func (b *OrderBatcher) run() {
+	defer b.wg.Done()
+
+	batch := make([]*pendingOrder, 0, b.maxBatch)
+	timer := time.NewTimer(b.linger)
+	timer.Stop()
+
+	for {
+		first, ok := <-b.queue
+		if !ok {
+			return
+		}
+		batch = append(batch[:0], first)
+
+		timer.Reset(b.linger)
+		fired := false
+	collect:
+		for len(batch) < b.maxBatch {
+			select {
+			case p, ok := <-b.queue:
+				if !ok {
+					break collect
+				}
+				batch = append(batch, p)
+			case <-timer.C:
+				fired = true
+				break collect
+			}
+		}
+		if !fired && !timer.Stop() {
+			<-timer.C
+		}
+
+		b.flush(batch)
+	}
+}
+
+func (b *OrderBatcher) flush(batch []*pendingOrder) {
+	start := time.Now()
+	ctx, cancel := context.WithTimeout(context.Background(), batchTimeout)
+	defer cancel()
+
+	release, err := b.admit(ctx)
+	if err != nil {
+		// Shed: every order of the batch gets the 503
+		for _, p := range batch {
+			p.done <- err
+		}
+		b.observe(len(batch), time.Since(start))
+		return
+	}
+	defer release()
+
+	err = b.insertBatch(ctx, batch)
+	if err != nil && len(batch) > 1 {
+		// One bad row (e.g. unknown user) fails the whole statement;
+		// insert one by one so only that order's request fails. Each retry
+		// runs under its submitter's ctx: the batch's may be spent by now
+		b.fallbacks.Add(1)
+		for _, p := range batch {
+			ctx, cancel := context.WithTimeout(p.ctx, batchTimeout)
+			err := b.insertBatch(ctx, []*pendingOrder{p})
+			cancel()
+			if err != nil {
+				b.errors.Add(1)
+			}
+			p.done <- err
+		}
+	} else {
+		if err != nil {
+			b.errors.Add(1)
+		}
+		for _, p := range batch {
+			p.done <- err
+		}
+	}
+
+	b.observe(len(batch), time.Since(start))
+}
+
+func (b *OrderBatcher) insertBatch(ctx context.Context, batch []*pendingOrder) error {
+	defer observeQuery("insert_order_batch", time.Now())
+
+	n := len(batch)
+	ids := make([]uuid.UUID, n)
+	userIDs := make([]uuid.UUID, n)
+	pairs := make([]string, n)
+	sides := make([]string, n)
+	prices := make([]float64, n)
+	quantities := make([]float64, n)
+	statuses := make([]string, n)
+	createdAt := make([]time.Time, n)
+	for i, p := range batch {
+		o := p.order
+		ids[i], userIDs[i], pairs[i] = o.ID, o.UserID, o.Pair
+		sides[i], prices[i], quantities[i], statuses[i] = string(o.Side), o.Price, o.Quantity, string(o.Status)
+		createdAt[i] = o.CreatedAt
+	}
+
+	_, err := b.pool.Exec(ctx, batchInsertQuery,
+		ids, userIDs, pairs, sides, prices, quantities, statuses, createdAt)
+	return err
+}
+
+func (b *OrderBatcher) observe(size int, took time.Duration) {
+	b.batches.Add(1)
+	b.orders.Add(uint64(size))
+	b.flushNs.Add(int64(took))
+	for {
+		prev := b.maxFlush.Load()
+		if int64(took) <= prev || b.maxFlush.CompareAndSwap(prev, int64(took)) {
+			break
+		}
+	}
+
+	for i, le := range b.sizeLe {
+		if size <= le {
+			b.sizeCount[i].Add(1)
+			break
+		}
+	}
+	ms := float64(took) / float64(time.Millisecond)
+	for i, le := range flushBucketsMs {
+		if ms <= le {
+			b.flushHist[i].Add(1)
+			break
+		}
+	}
+}
+
+// Stats reports this worker's batching counters (prefork workers batch independently)
+func (b *OrderBatcher) Stats() *model.IngestStats {
+	stats := &model.IngestStats{
+		PID:          os.Getpid(),
+		MaxBatchSize: b.maxBatch,
+		LingerMs:     float64(b.linger) / float64(time.Millisecond),
+		Batches:      b.batches.Load(),
+		Orders:       b.orders.Load(),
+		Fallbacks:    b.fallbacks.Load(),
+		Errors:       b.errors.Load(),
+		MaxFlushMs:   float64(b.maxFlush.Load()) / float64(time.Millisecond),
+		BatchSizes:   make([]model.Bucket, len(b.sizeLe)),
+		FlushMs:      make([]model.Bucket, len(flushBucketsMs)),
+	}
+	if stats.Batches > 0 {
+		stats.AvgBatchSize = float64(stats.Orders) / float64(stats.Batches)
+		stats.AvgFlushMs = float64(b.flushNs.Load()) / float64(time.Millisecond) / float64(stats.Batches)
+	}
+	for i, le := range b.sizeLe {
+		stats.BatchSizes[i] = model.Bucket{Le: strconv.Itoa(le), Count: b.sizeCount[i].Load()}
+	}
+	for i, le := range flushBucketsMs {
+		stats.FlushMs[i] = model.Bucket{Le: strconv.FormatFloat(le, 'g', -1, 64), Count: b.flushHist[i].Load()}
+	}
+	return stats
+}
@@ -0,0 +1,250 @@
+package repository
+
+import (
+	"context"
+	"sort"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/model"
+)
+
+// Levels at or below this quantity are treated as empty (float drift from fills)
+const minLevelQuantity = 1e-9
+
+// BookLoader fetches the top levels of a pair from the database
+type BookLoader func(ctx context.Context, pair string) (bids, asks []model.OrderBookEntry, err error)
+
+// OrderBookCache keeps a per-pair price-level book in memory so GET /orderbook
+// never queries Postgres on the hot path.
+//
+// Each prefork worker only sees its own writes, so local CreateOrder/MatchOrders
+// are applied immediately and the book is re-synced from Postgres (top levels,
+// same queries as before) every maxStaleness to pick up other workers' writes.
+// Readers get an immutable, versioned snapshot that is rebuilt after changes.
+type OrderBookCache struct {
+	load         BookLoader
+	maxStaleness time.Duration
+	depth        int
+
+	mu    sync.RWMutex
+	books map[string]*pairBook
+
+	stop chan struct{}
+}
+
+type pairBook struct {
+	mu      sync.Mutex
+	bids    map[float64]float64
+	asks    map[float64]float64
+	version uint64
+
+	dirty    atomic.Bool
+	snapshot atomic.Pointer[model.OrderBookResponse]
+	lastRead atomic.Int64
+
+	// Signalled (without blocking) after every change, for Watch
+	changed chan struct{}
+}
+
+func NewOrderBookCache(load BookLoader, maxStaleness time.Duration, depth int) *OrderBookCache {
+	c := &OrderBookCache{
+		load:         load,
+		maxStaleness: maxStaleness,
+		depth:        depth,
+		books:        make(map[string]*pairBook),
+		stop:         make(chan struct{}),
+	}
+	go c.refreshLoop()
+	return c
+}
+
+func (c *OrderBookCache) Close() {
+	close(c.stop)
+}
+
+// Get returns the current snapshot, loading the pair from Postgres on first use
+func (c *OrderBookCache) Get(ctx context.Context, pair string) (*model.OrderBookResponse, error) {
+	b, err := c.book(ctx, pair)
+	if err != nil {
+		return nil, err
+	}
+	return b.current(pair, c.depth), nil
+}
+
+// Watch is Get plus a channel that receives after the book changes. Changes are
+// coalesced: one receive may stand for many, so call Watch again for the latest.
+// The channel has a single consumer per pair (see OrderBookFeed).
+func (c *OrderBookCache) Watch(ctx context.Context, pair string) (*model.OrderBookResponse, <-chan struct{}, error) {
+	b, err := c.book(ctx, pair)
+	if err != nil {
+		return nil, nil, err
+	}
+	return b.current(pair, c.depth), b.changed, nil
+}
+
+func (c *OrderBookCache) book(ctx context.Context, pair string) (*pairBook, error) {
+	c.mu.RLock()
+	b := c.books[pair]
+	c.mu.RUnlock()
+
+	if b == nil {
+		bids, asks, err := c.load(ctx, pair)
+		if err != nil {
+			return nil, err
+		}
+		c.mu.Lock()
+		if b = c.books[pair]; b == nil {
+			b = &pairBook{changed: make(chan struct{}, 1)}
+			b.replace(bids, asks)
+			c.books[pair] = b
+		}
+		c.mu.Unlock()
+	}
+
+	b.lastRead.Store(time.Now().UnixNano())
+	return b, nil
+}
+
+// ApplyOrder adds a newly created OPEN order to its price level
+func (c *OrderBookCache) ApplyOrder(order *model.Order) {
+	c.apply(order.Pair, order.Side, order.Price, order.Quantity)
+}
+
+// ApplyFill removes filled quantity from a price level
+func (c *OrderBookCache) ApplyFill(pair string, side model.OrderSide, price, quantity float64) {
+	c.apply(pair, side, price, -quantity)
+}
+
+func (c *OrderBookCache) apply(pair string, side model.OrderSide, price, delta float64) {
+	c.mu.RLock()
+	b := c.books[pair]
+	c.mu.RUnlock()
+	// Pairs nobody has read yet are loaded fresh on first Get
+	if b == nil {
+		return
+	}
+
+	b.mu.Lock()
+	levels := b.asks
+	if side == model.Buy {
+		levels = b.bids
+	}
+	qty := levels[price] + delta
+	if qty <= minLevelQuantity {
+		delete(levels, price)
+	} else {
+		levels[price] = qty
+	}
+	b.markChanged()
+	b.mu.Unlock()
+}
+
+func (c *OrderBookCache) refreshLoop() {
+	ticker := time.NewTicker(c.maxStaleness)
+	defer ticker.Stop()
+
+	for {
+		select {
+		case <-c.stop:
+			return
+		case <-ticker.C:
+		}
+
+		c.mu.RLock()
+		pairs := make([]string, 0, len(c.books))
+		for pair := range c.books {
+			pairs = append(pairs, pair)
+		}
+		c.mu.RUnlock()
+
+		// Pairs not read for a while are dropped instead of polled forever
+		idleAfter := time.Now().Add(-time.Minute).UnixNano()
+		for _, pair := range pairs {
+			c.mu.RLock()
+			b := c.books[pair]
+			c.mu.RUnlock()
+			if b.lastRead.Load() < idleAfter {
+				c.mu.Lock()
+				delete(c.books, pair)
+				c.mu.Unlock()
+				continue
+			}
+
+			ctx, cancel := context.WithTimeout(context.Background(), c.maxStaleness*4)
+			bids, asks, err := c.load(ctx, pair)
+			cancel()
+			// On error keep serving the current book; the next tick retries
+			if err == nil {
+				b.mu.Lock()
+				b.replace(bids, asks)
+				b.mu.Unlock()
+			}
+		}
+	}
+}
+
+// replace swaps in levels loaded from Postgres (caller holds b.mu, or b is unshared)
+func (b *pairBook) replace(bids, asks []model.OrderBookEntry) {
+	b.bids = make(map[float64]float64, len(bids))
+	for _, e := range bids {
+		b.bids[e.Price] = e.Quantity
+	}
+	b.asks = make(map[float64]float64, len(asks))
+	for _, e := range asks {
+		b.asks[e.Price] = e.Quantity
+	}
+	b.markChanged()
+}
+
+// markChanged bumps the version after a change (caller holds b.mu, or b is unshared)
+func (b *pairBook) markChanged() {
+	b.version++
+	b.dirty.Store(true)
+	select {
+	case b.changed <- struct{}{}:
+	default:
+	}
+}
+
+// current returns the snapshot, rebuilding it first if the book changed
+func (b *pairBook) current(pair string, depth int) *model.OrderBookResponse {
+	// Lock-free fast path: nothing changed since the last rebuild
+	if !b.dirty.Load() {
+		if snap := b.snapshot.Load(); snap != nil {
+			return snap
+		}
+	}
+
+	b.mu.Lock()
+	defer b.mu.Unlock()
+
+	if b.dirty.Load() || b.snapshot.Load() == nil {
+		b.snapshot.Store(&model.OrderBookResponse{
+			Pair:    pair,
+			Bids:    topLevels(b.bids, depth, true),
+			Asks:    topLevels(b.asks, depth, false),
+			Version: b.version,
+		})
+		b.dirty.Store(false)
+	}
+	return b.snapshot.Load()
+}
+
+func topLevels(levels map[float64]float64, depth int, descending bool) []model.OrderBookEntry {
+	entries := make([]model.OrderBookEntry, 0, len(levels))
+	for price, qty := range levels {
+		entries = append(entries, model.OrderBookEntry{Price: price, Quantity: qty})
+	}
+	sort.Slice(entries, func(i, j int) bool {
+		if descending {
+			return entries[i].Price > entries[j].Price
+		}
+		return entries[i].Price < entries[j].Price
+	})
+	if len(entries) > depth {
+		entries = entries[:depth]
+	}
+	return entries
+}
@@ -0,0 +1,242 @@
+package repository
+
+import (
+	"context"
+	"sync"
+	"time"
+
+	"github.com/cryptox/go-exchange/internal/metrics"
+	"github.com/cryptox/go-exchange/internal/model"
+	"github.com/goccy/go-json"
+)
+
+// Order book stream event types
+const (
+	EventSnapshot = "snapshot"
+	EventDiff     = "diff"
+)
+
+// StreamKeepAlive is how often an idle stream is kept alive; it also keeps
+// streamed books from being dropped as idle by the cache
+const StreamKeepAlive = 15 * time.Second
+
+var (
+	streamSubscribers = metrics.NewGauge("orderbook_stream_subscribers",
+		"Open order book streams.")
+	streamEvents = metrics.NewCounterVec("orderbook_stream_events_total",
+		"Order book stream events built, once per update whatever the number of subscribers.", "type")
+	streamDropped = metrics.NewCounterVec("orderbook_stream_dropped_total",
+		"Subscribers disconnected for falling behind.", "pair")
+)
+
+// StreamEvent is one encoded model.OrderBookEvent, shared by every subscriber
+type StreamEvent struct {
+	Type string
+	Seq  uint64
+	Data []byte
+}
+
+// OrderBookFeed pushes order book changes to subscribers instead of having
+// them poll GET /orderbook. One goroutine per streamed pair waits for the
+// cache's book to change, diffs its top levels against the last published
+// ones and encodes the diff once for all of the pair's subscribers.
+//
+// Subscribers get up to buffer events queued; one that falls further behind
+// is disconnected rather than slowing the others, and reconnects for a fresh
+// snapshot. Like the cache, the feed sees other workers' writes at the next
+// re-sync.
+type OrderBookFeed struct {
+	books  *OrderBookCache
+	buffer int
+
+	mu    sync.Mutex
+	pairs map[string]*pairFeed
+}
+
+type pairFeed struct {
+	pair string
+
+	mu   sync.Mutex
+	subs map[*Subscription]struct{}
+	seq  uint64
+	last *model.OrderBookResponse
+	// Encoded snapshot of last, built for the first subscriber after a diff
+	snapshot *StreamEvent
+
+	stop chan struct{}
+}
+
+// Subscription is one subscriber's stream of events
+type Subscription struct {
+	feed   *OrderBookFeed
+	pair   *pairFeed
+	events chan *StreamEvent
+	once   sync.Once
+}
+
+func NewOrderBookFeed(books *OrderBookCache, buffer int) *OrderBookFeed {
+	return &OrderBookFeed{
+		books:  books,
+		buffer: buffer,
+		pairs:  make(map[string]*pairFeed),
+	}
+}
+
+func (f *OrderBookFeed) Close() {
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	for pair, pf := range f.pairs {
+		close(pf.stop)
+		delete(f.pairs, pair)
+	}
+}
+
+// Subscribe starts a stream of the pair's book, beginning with a snapshot
+func (f *OrderBookFeed) Subscribe(ctx context.Context, pair string) (*Subscription, error) {
+	// Loads the book on first use, before any lock is held
+	snap, _, err := f.books.Watch(ctx, pair)
+	if err != nil {
+		return nil, err
+	}
+
+	f.mu.Lock()
+	defer f.mu.Unlock()
+	pf := f.pairs[pair]
+	if pf == nil {
+		pf = &pairFeed{pair: pair, subs: make(map[*Subscription]struct{}), last: snap, stop: make(chan struct{})}
+		f.pairs[pair] = pf
+		go f.run(pf)
+	}
+
+	s := &Subscription{feed: f, pair: pf, events: make(chan *StreamEvent, f.buffer+1)}
+	pf.mu.Lock()
+	s.events <- pf.snapshotEvent()
+	pf.subs[s] = struct{}{}
+	pf.mu.Unlock()
+	streamSubscribers.Add(1)
+	return s, nil
+}
+
+// Events delivers the snapshot and then diffs; it is closed if the subscriber
+// fell behind and has to resubscribe
+func (s *Subscription) Events() <-chan *StreamEvent {
+	return s.events
+}
+
+// Close ends the subscription; the pair's goroutine stops with its last subscriber
+func (s *Subscription) Close() {
+	s.once.Do(func() {
+		f, pf := s.feed, s.pair
+		f.mu.Lock()
+		defer f.mu.Unlock()
+
+		pf.mu.Lock()
+		if _, ok := pf.subs[s]; ok {
+			delete(pf.subs, s)
+			close(s.events)
+		}
+		empty := len(pf.subs) == 0
+		pf.mu.Unlock()
+		streamSubscribers.Add(-1)
+
+		if empty && f.pairs[pf.pair] == pf {
+			close(pf.stop)
+			delete(f.pairs, pf.pair)
+		}
+	})
+}
+
+func (f *OrderBookFeed) run(pf *pairFeed) {
+	keepAlive := time.NewTicker(StreamKeepAlive)
+	defer keepAlive.Stop()
+
+	for {
+		ctx, cancel := context.WithTimeout(context.Background(), 5*time.Second)
+		snap, changed, err := f.books.Watch(ctx, pf.pair)
+		cancel()
+		// On error changed is nil and the keep-alive tick retries
+		if err == nil {
+			pf.publish(snap)
+		}
+
+		select {
+		case <-pf.stop:
+			return
+		case <-changed:
+		case <-keepAlive.C:
+		}
+	}
+}
+
+// publish sends the levels that changed since the last published snapshot
+func (pf *pairFeed) publish(snap *model.OrderBookResponse) {
+	pf.mu.Lock()
+	defer pf.mu.Unlock()
+
+	if snap == pf.last {
+		return
+	}
+	bids := diffLevels(pf.last.Bids, snap.Bids)
+	asks := diffLevels(pf.last.Asks, snap.Asks)
+	pf.last = snap
+	// A re-sync that found the same levels is not an update
+	if len(bids) == 0 && len(asks) == 0 {
+		return
+	}
+
+	pf.seq++
+	pf.snapshot = nil
+	ev := encodeEvent(EventDiff, pf.pair, pf.seq, bids, asks)
+	for s := range pf.subs {
+		select {
+		case s.events <- ev:
+		default:
+			delete(pf.subs, s)
+			close(s.events)
+			streamDropped.Inc(pf.pair)
+		}
+	}
+}
+
+// snapshotEvent encodes last at the current seq (caller holds pf.mu)
+func (pf *pairFeed) snapshotEvent() *StreamEvent {
+	if pf.snapshot == nil {
+		pf.snapshot = encodeEvent(EventSnapshot, pf.pair, pf.seq, pf.last.Bids, pf.last.Asks)
+	}
+	return pf.snapshot
+}
+
+func encodeEvent(kind, pair string, seq uint64, bids, asks []model.OrderBookEntry) *StreamEvent {
+	streamEvents.Inc(kind)
+	data, _ := json.Marshal(model.OrderBookEvent{
+		Type:      kind,
+		Pair:      pair,
+		Seq:       seq,
+		Bids:      bids,
+		Asks:      asks,
+		Timestamp: time.Now().UnixMicro(),
+	})
+	return &StreamEvent{Type: kind, Seq: seq, Data: data}
+}
+
+// diffLevels lists the levels of next that are new or changed, and those of
+// prev that are gone with quantity 0
+func diffLevels(prev, next []model.OrderBookEntry) []model.OrderBookEntry {
+	old := make(map[float64]float64, len(prev))
+	for _, e := range prev {
+		old[e.Price] = e.Quantity
+	}
+	diff := make([]model.OrderBookEntry, 0)
+	for _, e := range next {
+		if qty, ok := old[e.Price]; !ok || qty != e.Quantity {
+			diff = append(diff, e)
+		}
+		delete(old, e.Price)
+	}
+	for _, e := range prev {
+		if _, gone := old[e.Price]; gone {
+			diff = append(diff, model.OrderBookEntry{Price: e.Price})
+		}
+	}
+	return diff
+}
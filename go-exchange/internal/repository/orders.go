@@ -3,9 +3,11 @@ package repository
 import (
 	"context"
 	"sync"
+	"time"
 
 	"github.com/cryptox/go-exchange/internal/model"
 	"github.com/google/uuid"
+	"github.com/jackc/pgx/v5"
 )
 
 func (db *DB) CreateOrder(ctx context.Context, req model.CreateOrderRequest) (*model.Order, error) {
@@ -19,23 +21,42 @@ func (db *DB) CreateOrder(ctx context.Context, req model.CreateOrderRequest) (*m
 		Status:   model.Open,
 	}
 
-	query := `
-		INSERT INTO orders (id, user_id, pair, side, price, quantity, status, created_at)
-		VALUES ($1, $2, $3, $4, $5, $6, $7, NOW())
-		RETURNING created_at`
-
-	err := db.Pool.QueryRow(ctx, query,
-		order.ID, order.UserID, order.Pair, order.Side,
-		order.Price, order.Quantity, order.Status,
-	).Scan(&order.CreatedAt)
+	var err error
+	if db.Orders != nil {
+		// Admitted once per batch by the batcher
+		err = db.Orders.Submit(ctx, order)
+	} else {
+		var release func()
+		if release, err = db.admit(ctx); err != nil {
+			return nil, err
+		}
+		defer release()
+		defer observeQuery("insert_order", time.Now())
+		query := `
+			INSERT INTO orders (id, user_id, pair, side, price, quantity, status, created_at)
+			VALUES ($1, $2, $3, $4, $5, $6, $7, NOW())
+			RETURNING created_at`
+
+		err = db.Pool.QueryRow(ctx, query,
+			order.ID, order.UserID, order.Pair, order.Side,
+			order.Price, order.Quantity, order.Status,
+		).Scan(&order.CreatedAt)
+	}
 
 	if err != nil {
 		return nil, err
 	}
 
+	if db.Books != nil {
+		db.Books.ApplyOrder(order)
+	}
+
 	return order, nil
 }
 
+// Price levels per side returned by GET /orderbook
+const orderBookDepth = 50
+
 // fetchBids fetches aggregated bid orders (parallel helper)
 func (db *DB) fetchBids(ctx context.Context, pair string) ([]model.OrderBookEntry, error) {
 	query := `
@@ -92,8 +113,34 @@ func (db *DB) fetchAsks(ctx context.Context, pair string) ([]model.OrderBookEntr
 	return asks, nil
 }
 
-// GetOrderBook fetches order book with parallel queries for bids and asks
+// GetOrderBook serves the in-memory snapshot when the cache is enabled, else queries Postgres
 func (db *DB) GetOrderBook(ctx context.Context, pair string) (*model.OrderBookResponse, error) {
+	if db.Books != nil {
+		return db.Books.Get(ctx, pair)
+	}
+
+	release, err := db.admit(ctx)
+	if err != nil {
+		return nil, err
+	}
+	defer release()
+
+	bids, asks, err := db.loadOrderBook(ctx, pair)
+	if err != nil {
+		return nil, err
+	}
+
+	return &model.OrderBookResponse{
+		Pair: pair,
+		Bids: bids,
+		Asks: asks,
+	}, nil
+}
+
+// loadOrderBook fetches the top levels with parallel queries for bids and asks
+func (db *DB) loadOrderBook(ctx context.Context, pair string) ([]model.OrderBookEntry, []model.OrderBookEntry, error) {
+	defer observeQuery("orderbook", time.Now())
+
 	var wg sync.WaitGroup
 	var bidsErr, asksErr error
 	var bids, asks []model.OrderBookEntry
@@ -115,20 +162,42 @@ func (db *DB) GetOrderBook(ctx context.Context, pair string) (*model.OrderBookRe
 	wg.Wait()
 
 	if bidsErr != nil {
-		return nil, bidsErr
+		return nil, nil, bidsErr
 	}
 	if asksErr != nil {
-		return nil, asksErr
+		return nil, nil, asksErr
 	}
 
-	return &model.OrderBookResponse{
-		Pair: pair,
-		Bids: bids,
-		Asks: asks,
-	}, nil
+	return bids, asks, nil
 }
 
 func (db *DB) GetUserBalances(ctx context.Context, userID uuid.UUID) (*model.BalanceResponse, error) {
+	generation := uint64(0)
+	if db.Balances != nil {
+		var cached *model.BalanceResponse
+		if cached, generation = db.Balances.Get(userID); cached != nil {
+			return cached, nil
+		}
+	}
+
+	// Only misses take an admission slot; cache hits never touch the pool
+	release, err := db.admit(ctx)
+	if err != nil {
+		return nil, err
+	}
+	defer release()
+
+	response, err := db.loadUserBalances(ctx, userID)
+	if err != nil || db.Balances == nil {
+		return response, err
+	}
+	db.Balances.Put(response, generation)
+	return response, nil
+}
+
+func (db *DB) loadUserBalances(ctx context.Context, userID uuid.UUID) (*model.BalanceResponse, error) {
+	defer observeQuery("balances", time.Now())
+
 	response := &model.BalanceResponse{
 		UserID:   userID,
 		Balances: make(map[string]float64),
@@ -153,9 +222,26 @@ func (db *DB) GetUserBalances(ctx context.Context, userID uuid.UUID) (*model.Bal
 	return response, nil
 }
 
+// MatchOrders executes at most one trade for the pair (in its lane when lanes are enabled)
 func (db *DB) MatchOrders(ctx context.Context, pair string) (*model.MatchResult, error) {
+	if db.Lanes != nil {
+		return db.Lanes.Do(ctx, pair, "single", func(ctx context.Context) (*model.MatchResult, error) {
+			return db.matchOrders(ctx, pair)
+		})
+	}
+	return db.matchOrders(ctx, pair)
+}
+
+func (db *DB) matchOrders(ctx context.Context, pair string) (*model.MatchResult, error) {
 	result := &model.MatchResult{}
 
+	release, err := db.admit(ctx)
+	if err != nil {
+		return nil, err
+	}
+	defer release()
+	defer observeQuery("match_single", time.Now())
+
 	// Start transaction
 	tx, err := db.Pool.Begin(ctx)
 	if err != nil {
@@ -163,6 +249,12 @@ func (db *DB) MatchOrders(ctx context.Context, pair string) (*model.MatchResult,
 	}
 	defer tx.Rollback(ctx)
 
+	if db.Lanes != nil {
+		if owned, err := ownPair(ctx, tx, pair); err != nil || !owned {
+			return result, err
+		}
+	}
+
 	// Find matching orders: best bid >= best ask
 	matchQuery := `
 		WITH best_bid AS (
@@ -240,8 +332,224 @@ func (db *DB) MatchOrders(ctx context.Context, pair string) (*model.MatchResult,
 		return nil, err
 	}
 
+	if db.Books != nil {
+		db.Books.ApplyFill(pair, model.Buy, bidPrice, tradeQty)
+		db.Books.ApplyFill(pair, model.Sell, askPrice, tradeQty)
+	}
+
 	result.TradesExecuted = 1
 	result.VolumeMatched = tradeQty * tradePrice
+	for _, remaining := range []float64{bidQty - tradeQty, askQty - tradeQty} {
+		if remaining == 0 {
+			result.OrdersFilled++
+		} else {
+			result.PartialFills++
+		}
+	}
 
 	return result, nil
 }
+
+// Orders per side locked by one MatchAll call; bounds how long the transaction runs
+const matchBatchLimit = 500
+
+// Crossing orders only: bids at or above the best ask, asks at or below the best bid
+const crossingBidsQuery = `
+	SELECT id, price, quantity
+	FROM orders
+	WHERE pair = $1 AND side = 'BUY' AND status = 'OPEN'
+		AND price >= (SELECT min(price) FROM orders WHERE pair = $1 AND side = 'SELL' AND status = 'OPEN')
+	ORDER BY price DESC, created_at ASC
+	LIMIT $2
+	FOR UPDATE SKIP LOCKED`
+
+const crossingAsksQuery = `
+	SELECT id, price, quantity
+	FROM orders
+	WHERE pair = $1 AND side = 'SELL' AND status = 'OPEN'
+		AND price <= (SELECT max(price) FROM orders WHERE pair = $1 AND side = 'BUY' AND status = 'OPEN')
+	ORDER BY price ASC, created_at ASC
+	LIMIT $2
+	FOR UPDATE SKIP LOCKED`
+
+type bookOrder struct {
+	id        uuid.UUID
+	price     float64
+	quantity  float64
+	remaining float64
+}
+
+func scanBookOrders(br pgx.BatchResults) ([]bookOrder, error) {
+	rows, err := br.Query()
+	if err != nil {
+		return nil, err
+	}
+	defer rows.Close()
+
+	orders := make([]bookOrder, 0, matchBatchLimit)
+	for rows.Next() {
+		var o bookOrder
+		if err := rows.Scan(&o.id, &o.price, &o.quantity); err != nil {
+			return nil, err
+		}
+		o.remaining = o.quantity
+		orders = append(orders, o)
+	}
+	return orders, rows.Err()
+}
+
+// MatchAll drains the crossed part of the book: each transaction locks the
+// crossing orders (up to matchBatchLimit per side), walks price levels in
+// price-time priority filling as many trades as cross, including partial fills,
+// and writes all trades and order updates in one batched round trip. It runs
+// transactions until a batch leaves nothing crossing.
+func (db *DB) MatchAll(ctx context.Context, pair string) (*model.MatchResult, error) {
+	if db.Lanes != nil {
+		return db.Lanes.Do(ctx, pair, "drain", func(ctx context.Context) (*model.MatchResult, error) {
+			return db.drain(ctx, pair)
+		})
+	}
+	return db.drain(ctx, pair)
+}
+
+func (db *DB) drain(ctx context.Context, pair string) (*model.MatchResult, error) {
+	total := &model.MatchResult{}
+	for {
+		result, more, err := db.matchAll(ctx, pair)
+		if err != nil {
+			// Earlier batches are committed; report them rather than the error
+			if total.TradesExecuted > 0 {
+				return total, nil
+			}
+			return nil, err
+		}
+		total.TradesExecuted += result.TradesExecuted
+		total.VolumeMatched += result.VolumeMatched
+		total.OrdersFilled += result.OrdersFilled
+		total.PartialFills += result.PartialFills
+		if !more {
+			return total, nil
+		}
+	}
+}
+
+// matchAll runs one batch; more reports that a side hit matchBatchLimit, so
+// orders beyond it may still cross
+func (db *DB) matchAll(ctx context.Context, pair string) (result *model.MatchResult, more bool, err error) {
+	result = &model.MatchResult{}
+
+	release, err := db.admit(ctx)
+	if err != nil {
+		return nil, false, err
+	}
+	defer release()
+	defer observeQuery("match_drain", time.Now())
+
+	tx, err := db.Pool.Begin(ctx)
+	if err != nil {
+		return nil, false, err
+	}
+	defer tx.Rollback(ctx)
+
+	if db.Lanes != nil {
+		if owned, err := ownPair(ctx, tx, pair); err != nil || !owned {
+			return result, false, err
+		}
+	}
+
+	locks := &pgx.Batch{}
+	locks.Queue(crossingBidsQuery, pair, matchBatchLimit)
+	locks.Queue(crossingAsksQuery, pair, matchBatchLimit)
+	br := tx.SendBatch(ctx, locks)
+	bids, err := scanBookOrders(br)
+	if err != nil {
+		br.Close()
+		return nil, false, err
+	}
+	asks, err := scanBookOrders(br)
+	if err != nil {
+		br.Close()
+		return nil, false, err
+	}
+	if err := br.Close(); err != nil {
+		return nil, false, err
+	}
+
+	var buyIDs, sellIDs []uuid.UUID
+	var bidPrices, askPrices, quantities []float64
+	i, j := 0, 0
+	for i < len(bids) && j < len(asks) && bids[i].price >= asks[j].price {
+		bid, ask := &bids[i], &asks[j]
+		tradeQty := min(bid.remaining, ask.remaining)
+
+		buyIDs = append(buyIDs, bid.id)
+		sellIDs = append(sellIDs, ask.id)
+		bidPrices = append(bidPrices, bid.price)
+		askPrices = append(askPrices, ask.price) // Execute at ask price
+		quantities = append(quantities, tradeQty)
+		result.VolumeMatched += tradeQty * ask.price
+
+		bid.remaining -= tradeQty
+		ask.remaining -= tradeQty
+		if bid.remaining <= minLevelQuantity {
+			i++
+		}
+		if ask.remaining <= minLevelQuantity {
+			j++
+		}
+	}
+
+	if len(quantities) == 0 {
+		// Nothing crosses - this is normal
+		return result, false, nil
+	}
+
+	// Every order before i/j was filled; the one at i/j may be partially filled
+	var ids []uuid.UUID
+	var remaining []float64
+	var statuses []string
+	for _, side := range [][]bookOrder{bids[:min(i+1, len(bids))], asks[:min(j+1, len(asks))]} {
+		for _, o := range side {
+			switch {
+			case o.remaining <= minLevelQuantity:
+				// Filled orders keep their original quantity, as in MatchOrders
+				ids, remaining, statuses = append(ids, o.id), append(remaining, o.quantity), append(statuses, string(model.Filled))
+				result.OrdersFilled++
+			case o.remaining < o.quantity:
+				ids, remaining, statuses = append(ids, o.id), append(remaining, o.remaining), append(statuses, string(model.Open))
+				result.PartialFills++
+			}
+		}
+	}
+
+	writes := &pgx.Batch{}
+	writes.Queue(`
+		INSERT INTO trades (id, buy_order_id, sell_order_id, price, quantity, executed_at)
+		SELECT gen_random_uuid(), buy_order_id, sell_order_id, price, quantity, NOW()
+		FROM unnest($1::uuid[], $2::uuid[], $3::float8[], $4::float8[])
+			AS t(buy_order_id, sell_order_id, price, quantity)`,
+		buyIDs, sellIDs, askPrices, quantities)
+	writes.Queue(`
+		UPDATE orders o SET quantity = u.quantity, status = u.status
+		FROM unnest($1::uuid[], $2::float8[], $3::text[]) AS u(id, quantity, status)
+		WHERE o.id = u.id`,
+		ids, remaining, statuses)
+	if err := tx.SendBatch(ctx, writes).Close(); err != nil {
+		return nil, false, err
+	}
+
+	if err := tx.Commit(ctx); err != nil {
+		return nil, false, err
+	}
+
+	if db.Books != nil {
+		for k, qty := range quantities {
+			db.Books.ApplyFill(pair, model.Buy, bidPrices[k], qty)
+			db.Books.ApplyFill(pair, model.Sell, askPrices[k], qty)
+		}
+	}
+
+	result.TradesExecuted = len(quantities)
+
+	return result, len(bids) == matchBatchLimit || len(asks) == matchBatchLimit, nil
+}
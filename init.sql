@@ -1,6 +1,9 @@
 -- CryptoX Database Schema
 -- Shared by both Go and Java exchanges
 
+-- Query statistics for k6-tests/pg_profiler.py (needs shared_preload_libraries=pg_stat_statements)
+CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
+
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -29,16 +32,36 @@ CREATE TABLE IF NOT EXISTS orders (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
--- Trades table
+-- Closed (FILLED/CANCELLED) orders, moved out of orders by archive_closed_orders()
+-- so the orders table and its indexes hold little more than the OPEN book
+CREATE TABLE IF NOT EXISTS orders_archive (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    pair VARCHAR(20) NOT NULL,
+    side VARCHAR(4) NOT NULL,
+    price DECIMAL(20, 8) NOT NULL,
+    quantity DECIMAL(20, 8) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Trades table (no foreign keys to orders: filled orders move to orders_archive)
 CREATE TABLE IF NOT EXISTS trades (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    buy_order_id UUID NOT NULL REFERENCES orders(id),
-    sell_order_id UUID NOT NULL REFERENCES orders(id),
+    buy_order_id UUID NOT NULL,
+    sell_order_id UUID NOT NULL,
     price DECIMAL(20, 8) NOT NULL,
     quantity DECIMAL(20, 8) NOT NULL,
     executed_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Databases created before orders were archived still have the foreign keys,
+-- which would make archive_closed_orders() fail on every filled order
+ALTER TABLE trades
+    DROP CONSTRAINT IF EXISTS trades_buy_order_id_fkey,
+    DROP CONSTRAINT IF EXISTS trades_sell_order_id_fkey;
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_orders_pair_side_status ON orders(pair, side, status);
 CREATE INDEX IF NOT EXISTS idx_orders_price_created ON orders(price, created_at);
@@ -59,30 +82,104 @@ CREATE INDEX IF NOT EXISTS idx_orders_sell_open
 ON orders(pair, price ASC, created_at ASC) 
 WHERE side = 'SELL' AND status = 'OPEN';
 
--- Seed data: Create test users
-INSERT INTO users (id, email) VALUES 
-    ('11111111-1111-1111-1111-111111111111', 'alice@test.com'),
-    ('22222222-2222-2222-2222-222222222222', 'bob@test.com'),
-    ('33333333-3333-3333-3333-333333333333', 'charlie@test.com')
-ON CONFLICT (email) DO NOTHING;
-
--- Seed data: Create wallets for test users
-INSERT INTO wallets (user_id, currency, balance) VALUES
-    ('11111111-1111-1111-1111-111111111111', 'BTC', 10.0),
-    ('11111111-1111-1111-1111-111111111111', 'USDT', 100000.0),
-    ('22222222-2222-2222-2222-222222222222', 'BTC', 5.0),
-    ('22222222-2222-2222-2222-222222222222', 'USDT', 50000.0),
-    ('33333333-3333-3333-3333-333333333333', 'BTC', 2.0),
-    ('33333333-3333-3333-3333-333333333333', 'USDT', 25000.0)
-ON CONFLICT (user_id, currency) DO NOTHING;
-
--- Seed data: Create some initial orders for the order book
-INSERT INTO orders (user_id, pair, side, price, quantity, status) VALUES
-    -- Buy orders (bids)
-    ('11111111-1111-1111-1111-111111111111', 'BTC/USDT', 'BUY', 42000.00, 0.5, 'OPEN'),
-    ('22222222-2222-2222-2222-222222222222', 'BTC/USDT', 'BUY', 41900.00, 1.0, 'OPEN'),
-    ('33333333-3333-3333-3333-333333333333', 'BTC/USDT', 'BUY', 41800.00, 0.25, 'OPEN'),
-    -- Sell orders (asks)
-    ('11111111-1111-1111-1111-111111111111', 'BTC/USDT', 'SELL', 42500.00, 0.3, 'OPEN'),
-    ('22222222-2222-2222-2222-222222222222', 'BTC/USDT', 'SELL', 42600.00, 0.75, 'OPEN'),
-    ('33333333-3333-3333-3333-333333333333', 'BTC/USDT', 'SELL', 42700.00, 1.5, 'OPEN');
+-- Closed orders still waiting to be archived
+CREATE INDEX IF NOT EXISTS idx_orders_closed
+ON orders(created_at)
+WHERE status <> 'OPEN';
+
+-- Archiving deletes rows all the time; vacuum orders long before the default
+-- 20% of the table is dead so the heap and indexes stay the size of the book
+ALTER TABLE orders SET (autovacuum_vacuum_scale_factor = 0.01, autovacuum_vacuum_threshold = 1000);
+
+-- Moves up to batch_size closed orders (NULL: all of them) to orders_archive and
+-- returns how many. The services call it in the background; concurrent callers
+-- (e.g. every prefork worker) return 0 while one of them holds the lock.
+CREATE OR REPLACE FUNCTION archive_closed_orders(batch_size INT DEFAULT 10000) RETURNS INT AS $$
+DECLARE
+    moved INT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(28513, 0) THEN
+        RETURN 0;
+    END IF;
+    WITH closed AS (
+        DELETE FROM orders
+        WHERE id IN (
+            SELECT id FROM orders
+            WHERE status <> 'OPEN'
+            ORDER BY created_at
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, user_id, pair, side, price, quantity, status, created_at
+    )
+    INSERT INTO orders_archive (id, user_id, pair, side, price, quantity, status, created_at)
+    SELECT id, user_id, pair, side, price, quantity, status, created_at FROM closed;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Balance caches in both services LISTEN on wallet_changes and drop the
+-- user's cached balances when any wallet row of that user changes
+CREATE OR REPLACE FUNCTION notify_wallet_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('wallet_changes', OLD.user_id::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('wallet_changes', NEW.user_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS wallets_notify_change ON wallets;
+CREATE TRIGGER wallets_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON wallets
+FOR EACH ROW EXECUTE FUNCTION notify_wallet_change();
+
+-- Seed data, also restored in place by reset_benchmark_data()
+CREATE OR REPLACE FUNCTION seed_benchmark_data() RETURNS void AS $$
+BEGIN
+    -- Seed data: Create test users
+    INSERT INTO users (id, email) VALUES
+        ('11111111-1111-1111-1111-111111111111', 'alice@test.com'),
+        ('22222222-2222-2222-2222-222222222222', 'bob@test.com'),
+        ('33333333-3333-3333-3333-333333333333', 'charlie@test.com')
+    ON CONFLICT (email) DO NOTHING;
+
+    -- Seed data: Create wallets for test users
+    INSERT INTO wallets (user_id, currency, balance) VALUES
+        ('11111111-1111-1111-1111-111111111111', 'BTC', 10.0),
+        ('11111111-1111-1111-1111-111111111111', 'USDT', 100000.0),
+        ('22222222-2222-2222-2222-222222222222', 'BTC', 5.0),
+        ('22222222-2222-2222-2222-222222222222', 'USDT', 50000.0),
+        ('33333333-3333-3333-3333-333333333333', 'BTC', 2.0),
+        ('33333333-3333-3333-3333-333333333333', 'USDT', 25000.0)
+    ON CONFLICT (user_id, currency) DO NOTHING;
+
+    -- Seed data: Create some initial orders for the order book
+    INSERT INTO orders (user_id, pair, side, price, quantity, status) VALUES
+        -- Buy orders (bids)
+        ('11111111-1111-1111-1111-111111111111', 'BTC/USDT', 'BUY', 42000.00, 0.5, 'OPEN'),
+        ('22222222-2222-2222-2222-222222222222', 'BTC/USDT', 'BUY', 41900.00, 1.0, 'OPEN'),
+        ('33333333-3333-3333-3333-333333333333', 'BTC/USDT', 'BUY', 41800.00, 0.25, 'OPEN'),
+        -- Sell orders (asks)
+        ('11111111-1111-1111-1111-111111111111', 'BTC/USDT', 'SELL', 42500.00, 0.3, 'OPEN'),
+        ('22222222-2222-2222-2222-222222222222', 'BTC/USDT', 'SELL', 42600.00, 0.75, 'OPEN'),
+        ('33333333-3333-3333-3333-333333333333', 'BTC/USDT', 'SELL', 42700.00, 1.5, 'OPEN');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Puts the database back to exactly the seeded state (make db-reset): empties
+-- every table, then seeds it again. Truncated tables start from fresh, compact
+-- files, so each benchmark starts on the same small dataset. Extra users from
+-- workload_trace.py --seed-sql have to be loaded again afterwards.
+CREATE OR REPLACE FUNCTION reset_benchmark_data() RETURNS void AS $$
+BEGIN
+    TRUNCATE trades, orders_archive, orders, wallets, users;
+    PERFORM seed_benchmark_data();
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT seed_benchmark_data();
@@ -1,6 +1,8 @@
 package com.cryptox.exchange.controller;
 
 import com.cryptox.exchange.dto.BalanceResponse;
+import com.cryptox.exchange.dto.CacheStats;
+import com.cryptox.exchange.service.BalanceCache;
 import com.cryptox.exchange.service.TradingService;
 import lombok.RequiredArgsConstructor;
 import org.springframework.http.ResponseEntity;
@@ -15,10 +17,19 @@ import java.util.UUID;
 public class BalanceController {
 
     private final TradingService tradingService;
+    private final BalanceCache balanceCache;
 
     @GetMapping("/balance/{userId}")
     public ResponseEntity<BalanceResponse> getBalance(@PathVariable UUID userId) {
         BalanceResponse balance = tradingService.getUserBalances(userId);
         return ResponseEntity.ok(balance);
     }
+
+    @GetMapping("/stats/balance-cache")
+    public ResponseEntity<CacheStats> balanceCacheStats() {
+        if (!balanceCache.isEnabled()) {
+            return ResponseEntity.notFound().build();
+        }
+        return ResponseEntity.ok(balanceCache.stats());
+    }
 }
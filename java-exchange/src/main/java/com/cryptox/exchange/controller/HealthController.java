@@ -1,5 +1,8 @@
 package com.cryptox.exchange.controller;
 
+import com.cryptox.exchange.dto.AdmissionStats;
+import com.cryptox.exchange.service.AdmissionControl;
+import lombok.RequiredArgsConstructor;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.GetMapping;
 import org.springframework.web.bind.annotation.RestController;
@@ -7,8 +10,11 @@ import org.springframework.web.bind.annotation.RestController;
 import java.util.Map;
 
 @RestController
+@RequiredArgsConstructor
 public class HealthController {
 
+    private final AdmissionControl admissionControl;
+
     @GetMapping("/health")
     public ResponseEntity<Map<String, String>> health() {
         return ResponseEntity.ok(Map.of(
@@ -16,4 +22,12 @@ public class HealthController {
                 "service", "java-exchange"
         ));
     }
+
+    @GetMapping("/stats/admission")
+    public ResponseEntity<AdmissionStats> admissionStats() {
+        if (!admissionControl.isEnabled()) {
+            return ResponseEntity.notFound().build();
+        }
+        return ResponseEntity.ok(admissionControl.stats());
+    }
 }
@@ -1,21 +1,40 @@
 package com.cryptox.exchange.controller;
 
 import com.cryptox.exchange.dto.CreateOrderRequest;
+import com.cryptox.exchange.dto.IngestStats;
 import com.cryptox.exchange.dto.MatchResult;
 import com.cryptox.exchange.dto.OrderBookResponse;
 import com.cryptox.exchange.entity.Order;
+import com.cryptox.exchange.service.AdmissionControl;
+import com.cryptox.exchange.service.MatchLanes;
+import com.cryptox.exchange.service.OrderBatcher;
+import com.cryptox.exchange.service.OrderBookStream;
 import com.cryptox.exchange.service.TradingService;
 import jakarta.validation.Valid;
 import lombok.RequiredArgsConstructor;
+import org.springframework.beans.factory.annotation.Value;
 import org.springframework.http.HttpStatus;
+import org.springframework.http.MediaType;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
+import org.springframework.web.servlet.mvc.method.annotation.SseEmitter;
+
+import java.math.BigDecimal;
+import java.util.function.Supplier;
 
 @RestController
 @RequiredArgsConstructor
 public class OrderController {
 
     private final TradingService tradingService;
+    private final OrderBatcher orderBatcher;
+    private final AdmissionControl admissionControl;
+    private final MatchLanes matchLanes;
+    private final OrderBookStream orderBookStream;
+
+    // drain fills every crossing order per match call, single makes one trade
+    @Value("${matching.mode:drain}")
+    private String matchMode;
 
     @PostMapping("/orders")
     public ResponseEntity<Order> createOrder(@Valid @RequestBody CreateOrderRequest request) {
@@ -29,9 +48,60 @@ public class OrderController {
         return ResponseEntity.ok(orderBook);
     }
 
+    @GetMapping(path = "/orderbook/{pair}/stream", produces = MediaType.TEXT_EVENT_STREAM_VALUE)
+    public ResponseEntity<SseEmitter> streamOrderBook(@PathVariable String pair) {
+        if (!orderBookStream.isEnabled()) {
+            return ResponseEntity.notFound().build();
+        }
+        return ResponseEntity.ok(orderBookStream.subscribe(pair));
+    }
+
     @PostMapping("/trades/match")
-    public ResponseEntity<MatchResult> matchOrders(@RequestParam(defaultValue = "BTC/USDT") String pair) {
-        MatchResult result = tradingService.matchOrders(pair);
-        return ResponseEntity.ok(result);
+    public ResponseEntity<MatchResult> matchOrders(@RequestParam(defaultValue = "BTC/USDT") String pair,
+                                                   @RequestParam(required = false) String mode) {
+        String kind = mode != null ? mode : matchMode;
+        // Admitted outside the transaction, so a rejected match never takes a connection
+        Supplier<MatchResult> match = switch (kind) {
+            case "drain" -> () -> drain(pair);
+            case "single" -> () -> admissionControl.call(() -> tradingService.matchOrders(pair));
+            default -> null;
+        };
+        if (match == null) {
+            return ResponseEntity.badRequest().build();
+        }
+        return ResponseEntity.ok(matchLanes.call(pair, kind, match));
+    }
+
+    /** Runs matchAll transactions, each admitted on its own, until nothing crosses. */
+    private MatchResult drain(String pair) {
+        MatchResult total = new MatchResult(0, BigDecimal.ZERO, 0, 0);
+        while (true) {
+            TradingService.MatchBatch batch;
+            try {
+                batch = admissionControl.call(() -> tradingService.matchAll(pair));
+            } catch (RuntimeException e) {
+                // Earlier batches are committed; report them rather than the error
+                if (total.getTradesExecuted() > 0) {
+                    return total;
+                }
+                throw e;
+            }
+            MatchResult r = batch.result();
+            total.setTradesExecuted(total.getTradesExecuted() + r.getTradesExecuted());
+            total.setVolumeMatched(total.getVolumeMatched().add(r.getVolumeMatched()));
+            total.setOrdersFilled(total.getOrdersFilled() + r.getOrdersFilled());
+            total.setPartialFills(total.getPartialFills() + r.getPartialFills());
+            if (!batch.more()) {
+                return total;
+            }
+        }
+    }
+
+    @GetMapping("/stats/ingest")
+    public ResponseEntity<IngestStats> ingestStats() {
+        if (!orderBatcher.isEnabled()) {
+            return ResponseEntity.notFound().build();
+        }
+        return ResponseEntity.ok(orderBatcher.stats());
     }
 }
@@ -0,0 +1,24 @@
+package com.cryptox.exchange.controller;
+
+import com.cryptox.exchange.service.OverloadedException;
+import org.springframework.http.HttpHeaders;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.ResponseEntity;
+import org.springframework.web.bind.annotation.ExceptionHandler;
+import org.springframework.web.bind.annotation.RestControllerAdvice;
+
+import java.util.Map;
+
+@RestControllerAdvice
+public class OverloadHandler {
+
+    // Seconds clients are told to back off when DB work is shed
+    private static final String RETRY_AFTER_SECONDS = "1";
+
+    @ExceptionHandler(OverloadedException.class)
+    public ResponseEntity<Map<String, String>> overloaded(OverloadedException e) {
+        return ResponseEntity.status(HttpStatus.SERVICE_UNAVAILABLE)
+                .header(HttpHeaders.RETRY_AFTER, RETRY_AFTER_SECONDS)
+                .body(Map.of("error", "server overloaded, retry later"));
+    }
+}
@@ -0,0 +1,29 @@
+package com.cryptox.exchange.dto;
+
+import lombok.AllArgsConstructor;
+import lombok.Data;
+
+@Data
+@AllArgsConstructor
+public class AdmissionStats {
+    private int limit;
+    private int minLimit;
+    private int maxLimit;
+    private int inFlight;
+    private int queued;
+    private double maxWaitMs;
+    private long admitted;
+    private long rejected;
+    private long queueTimeouts;
+    private double avgQueueWaitMs;
+    private double latencyMs;
+    private double baselineLatencyMs;
+    private double acquireWaitMs;
+    private int poolMaxSize;
+    private int poolActive;
+    private int poolIdle;
+    private int poolPending;
+    private long poolAcquires;
+    private double poolAvgAcquireWaitMs;
+    private long poolTimeouts;
+}
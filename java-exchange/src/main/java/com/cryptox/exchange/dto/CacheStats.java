@@ -0,0 +1,18 @@
+package com.cryptox.exchange.dto;
+
+import lombok.AllArgsConstructor;
+import lombok.Data;
+
+@Data
+@AllArgsConstructor
+public class CacheStats {
+    private int size;
+    private int capacity;
+    private long ttlMs;
+    private long hits;
+    private long misses;
+    private double hitRate;
+    private long evictions;
+    private long expirations;
+    private long invalidations;
+}
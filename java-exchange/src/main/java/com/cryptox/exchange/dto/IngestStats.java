@@ -0,0 +1,30 @@
+package com.cryptox.exchange.dto;
+
+import lombok.AllArgsConstructor;
+import lombok.Data;
+
+import java.util.List;
+
+@Data
+@AllArgsConstructor
+public class IngestStats {
+    private int maxBatchSize;
+    private double lingerMs;
+    private long batches;
+    private long orders;
+    private long fallbacks;
+    private long errors;
+    private double avgBatchSize;
+    private double avgFlushMs;
+    private double maxFlushMs;
+    private List<Bucket> batchSizes;
+    private List<Bucket> flushMs;
+
+    // Observations <= le (non-cumulative, le "+Inf" catches the rest)
+    @Data
+    @AllArgsConstructor
+    public static class Bucket {
+        private String le;
+        private long count;
+    }
+}
@@ -10,4 +10,7 @@ import java.math.BigDecimal;
 public class MatchResult {
     private int tradesExecuted;
     private BigDecimal volumeMatched;
+    // Orders completely filled / left OPEN with a reduced quantity by this call
+    private int ordersFilled;
+    private int partialFills;
 }
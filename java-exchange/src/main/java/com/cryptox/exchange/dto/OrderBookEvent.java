@@ -0,0 +1,24 @@
+package com.cryptox.exchange.dto;
+
+import lombok.AllArgsConstructor;
+import lombok.Data;
+
+import java.util.List;
+
+/**
+ * One message of GET /orderbook/{pair}/stream: a snapshot of the top levels
+ * first, then diffs of the levels that changed, where quantity 0 removes the
+ * level. Seq increases by one per diff; a snapshot carries the seq of the last
+ * diff it includes.
+ */
+@Data
+@AllArgsConstructor
+public class OrderBookEvent {
+    private String type;
+    private String pair;
+    private long seq;
+    private List<OrderBookResponse.OrderBookEntry> bids;
+    private List<OrderBookResponse.OrderBookEntry> asks;
+    // Epoch microseconds when the server built the event
+    private long ts;
+}
@@ -12,6 +12,8 @@ public class OrderBookResponse {
     private String pair;
     private List<OrderBookEntry> bids;
     private List<OrderBookEntry> asks;
+    // Version of the in-memory snapshot (0 when served straight from Postgres)
+    private long version;
 
     @Data
     @AllArgsConstructor
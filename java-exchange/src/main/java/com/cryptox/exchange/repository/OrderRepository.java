@@ -47,4 +47,25 @@ public interface OrderRepository extends JpaRepository<Order, UUID> {
             LIMIT 50
             """, nativeQuery = true)
     List<Object[]> findAsksAggregated(@Param("pair") String pair);
+
+    // Crossing orders for the drain matcher: bids at or above the best ask, asks at or below the best bid
+    @Query(value = """
+            SELECT * FROM orders
+            WHERE pair = :pair AND side = 'BUY' AND status = 'OPEN'
+              AND price >= (SELECT min(price) FROM orders WHERE pair = :pair AND side = 'SELL' AND status = 'OPEN')
+            ORDER BY price DESC, created_at ASC
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+            """, nativeQuery = true)
+    List<Order> lockCrossingBids(@Param("pair") String pair, @Param("limit") int limit);
+
+    @Query(value = """
+            SELECT * FROM orders
+            WHERE pair = :pair AND side = 'SELL' AND status = 'OPEN'
+              AND price <= (SELECT max(price) FROM orders WHERE pair = :pair AND side = 'BUY' AND status = 'OPEN')
+            ORDER BY price ASC, created_at ASC
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+            """, nativeQuery = true)
+    List<Order> lockCrossingAsks(@Param("pair") String pair, @Param("limit") int limit);
 }
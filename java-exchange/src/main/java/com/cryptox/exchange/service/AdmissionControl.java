@@ -0,0 +1,327 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.AdmissionStats;
+import com.zaxxer.hikari.HikariDataSource;
+import com.zaxxer.hikari.HikariPoolMXBean;
+import com.zaxxer.hikari.metrics.IMetricsTracker;
+import com.zaxxer.hikari.metrics.MetricsTrackerFactory;
+import jakarta.annotation.PreDestroy;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.beans.factory.config.BeanPostProcessor;
+import org.springframework.stereotype.Component;
+
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.LongAdder;
+import java.util.concurrent.locks.Condition;
+import java.util.concurrent.locks.ReentrantLock;
+import java.util.function.Supplier;
+
+/**
+ * Admission control for DB work. At most {@code limit} calls run at once;
+ * others wait up to {@code admission.max-wait-ms} (at most
+ * {@code admission.max-queue} of them) and then fail with
+ * {@link OverloadedException}, answered with 503 and Retry-After instead of
+ * waiting out Hikari's connection timeout. A max wait of 0 disables it.
+ *
+ * The limit adapts toward the concurrency where queueing starts: the lowest
+ * mean latency seen in a window is taken as the unloaded latency, and while the
+ * current window stays within TOLERANCE of it the limit grows by sqrt(limit);
+ * beyond that it shrinks in proportion (at most by half). Hikari's maximum pool
+ * size follows the limit, up to the configured {@code maximum-pool-size}.
+ *
+ * Registered as a BeanPostProcessor to hook Hikari's metrics tracker (pool
+ * acquire waits) into the data source before its pool starts.
+ */
+@Component
+public class AdmissionControl implements BeanPostProcessor {
+
+    private static final long WINDOW_MS = 500;
+    // Latency may rise this far above the unloaded latency before the limit shrinks
+    private static final double TOLERANCE = 1.5;
+    // Per-window upward drift of the unloaded latency, so it is re-learned when queries get slower for good
+    private static final double BASELINE_DRIFT = 1.01;
+    // Connections kept beyond the limit for work that is not admitted (order book refresh, archiving)
+    private static final int POOL_HEADROOM = 8;
+
+    private final long maxWaitNanos;
+    private final int maxQueue;
+    private final ScheduledExecutorService adapter;
+    private volatile HikariDataSource dataSource;
+
+    private final ReentrantLock lock = new ReentrantLock();
+    private final Condition slotFree = lock.newCondition();
+    private int minLimit;
+    private int maxLimit;
+    private int limit;
+    private int inFlight;
+    private int waiting;
+    private int peak;
+    private long windowNanos;
+    private long windowCount;
+    private double latencyMs;
+    private double baselineMs;
+    private double acquireWaitMs;
+    private long lastAcquires;
+    private long lastAcquireNanos;
+
+    private final LongAdder admitted = new LongAdder();
+    private final LongAdder rejected = new LongAdder();
+    private final LongAdder timeouts = new LongAdder();
+    private final LongAdder queued = new LongAdder();
+    private final LongAdder queuedNanos = new LongAdder();
+    private final LongAdder acquires = new LongAdder();
+    private final LongAdder acquireNanos = new LongAdder();
+    private final LongAdder acquireTimeouts = new LongAdder();
+
+    public AdmissionControl(@Value("${admission.max-wait-ms:50}") long maxWaitMs,
+                            @Value("${admission.max-queue:1000}") int maxQueue,
+                            @Value("${admission.min-limit:4}") int minLimit) {
+        this.maxWaitNanos = TimeUnit.MILLISECONDS.toNanos(maxWaitMs);
+        this.maxQueue = maxQueue;
+        // Bounded by the pool size once the data source is known
+        this.minLimit = minLimit;
+        this.maxLimit = minLimit;
+        this.limit = minLimit;
+
+        if (isEnabled()) {
+            adapter = Executors.newSingleThreadScheduledExecutor(r -> {
+                Thread t = new Thread(r, "admission-adapter");
+                t.setDaemon(true);
+                return t;
+            });
+            adapter.scheduleWithFixedDelay(this::adapt, WINDOW_MS, WINDOW_MS, TimeUnit.MILLISECONDS);
+        } else {
+            adapter = null;
+        }
+    }
+
+    @Override
+    public Object postProcessAfterInitialization(Object bean, String beanName) {
+        if (bean instanceof HikariDataSource hikari && dataSource == null) {
+            lock.lock();
+            try {
+                maxLimit = Math.max(1, hikari.getMaximumPoolSize() - POOL_HEADROOM);
+                minLimit = Math.min(minLimit, maxLimit);
+                limit = Math.max(minLimit, maxLimit / 4);
+            } finally {
+                lock.unlock();
+            }
+            dataSource = hikari;
+            // Chained so a tracker installed earlier (e.g. Micrometer's) keeps working
+            MetricsTrackerFactory previous = hikari.getMetricsTrackerFactory();
+            hikari.setMetricsTrackerFactory((poolName, poolStats) -> {
+                IMetricsTracker inner = previous != null ? previous.create(poolName, poolStats) : new IMetricsTracker() {
+                };
+                return new IMetricsTracker() {
+                    @Override
+                    public void recordConnectionCreatedMillis(long connectionCreatedMillis) {
+                        inner.recordConnectionCreatedMillis(connectionCreatedMillis);
+                    }
+
+                    @Override
+                    public void recordConnectionAcquiredNanos(long elapsedAcquiredNanos) {
+                        acquires.increment();
+                        acquireNanos.add(elapsedAcquiredNanos);
+                        inner.recordConnectionAcquiredNanos(elapsedAcquiredNanos);
+                    }
+
+                    @Override
+                    public void recordConnectionUsageMillis(long elapsedBorrowedMillis) {
+                        inner.recordConnectionUsageMillis(elapsedBorrowedMillis);
+                    }
+
+                    @Override
+                    public void recordConnectionTimeout() {
+                        acquireTimeouts.increment();
+                        inner.recordConnectionTimeout();
+                    }
+
+                    @Override
+                    public void close() {
+                        inner.close();
+                    }
+                };
+            });
+        }
+        return bean;
+    }
+
+    @PreDestroy
+    public void close() {
+        if (adapter != null) {
+            adapter.shutdownNow();
+        }
+    }
+
+    public boolean isEnabled() {
+        return maxWaitNanos > 0;
+    }
+
+    /** Runs {@code work} once admitted; throws OverloadedException if no slot frees up in time. */
+    public <T> T call(Supplier<T> work) {
+        if (!isEnabled()) {
+            return work.get();
+        }
+        acquire();
+        long start = System.nanoTime();
+        try {
+            return work.get();
+        } finally {
+            release(System.nanoTime() - start);
+        }
+    }
+
+    private void acquire() {
+        lock.lock();
+        try {
+            if (inFlight >= limit) {
+                if (waiting >= maxQueue) {
+                    rejected.increment();
+                    throw new OverloadedException();
+                }
+                waiting++;
+                queued.increment();
+                long start = System.nanoTime();
+                long nanos = maxWaitNanos;
+                try {
+                    while (inFlight >= limit) {
+                        if (nanos <= 0) {
+                            timeouts.increment();
+                            rejected.increment();
+                            throw new OverloadedException();
+                        }
+                        nanos = slotFree.awaitNanos(nanos);
+                    }
+                } catch (InterruptedException e) {
+                    Thread.currentThread().interrupt();
+                    rejected.increment();
+                    throw new OverloadedException();
+                } finally {
+                    waiting--;
+                    queuedNanos.add(System.nanoTime() - start);
+                }
+            }
+            inFlight++;
+            peak = Math.max(peak, inFlight);
+        } finally {
+            lock.unlock();
+        }
+        admitted.increment();
+    }
+
+    private void release(long nanos) {
+        lock.lock();
+        try {
+            inFlight--;
+            windowNanos += nanos;
+            windowCount++;
+            slotFree.signal();
+        } finally {
+            lock.unlock();
+        }
+    }
+
+    private void adapt() {
+        int poolSize;
+        lock.lock();
+        try {
+            // Mean pool acquire wait over the window
+            long acquireCount = acquires.sum();
+            long acquireTotal = acquireNanos.sum();
+            acquireWaitMs = acquireCount > lastAcquires
+                    ? (acquireTotal - lastAcquireNanos) / 1e6 / (acquireCount - lastAcquires)
+                    : 0;
+            lastAcquires = acquireCount;
+            lastAcquireNanos = acquireTotal;
+
+            if (windowCount == 0) {
+                return;
+            }
+            latencyMs = windowNanos / 1e6 / windowCount;
+            if (baselineMs == 0 || latencyMs < baselineMs) {
+                baselineMs = latencyMs;
+            } else {
+                baselineMs *= BASELINE_DRIFT;
+            }
+
+            double gradient = Math.max(0.5, Math.min(1, TOLERANCE * baselineMs / latencyMs));
+            double next = limit * gradient + Math.sqrt(limit);
+            // Latency says nothing about a larger limit that is not being used
+            if (next > limit && peak < limit / 2) {
+                next = limit;
+            }
+            limit = Math.min(maxLimit, Math.max(minLimit, (int) Math.round(next)));
+
+            windowNanos = 0;
+            windowCount = 0;
+            peak = inFlight;
+            slotFree.signalAll();
+            poolSize = limit + POOL_HEADROOM;
+        } finally {
+            lock.unlock();
+        }
+
+        HikariDataSource hikari = dataSource;
+        if (hikari != null && hikari.getHikariConfigMXBean().getMaximumPoolSize() != poolSize) {
+            hikari.getHikariConfigMXBean().setMaximumPoolSize(poolSize);
+        }
+    }
+
+    public AdmissionStats stats() {
+        int statsLimit, statsMin, statsMax, statsInFlight, statsQueued;
+        double statsLatency, statsBaseline, statsAcquireWait;
+        lock.lock();
+        try {
+            statsLimit = limit;
+            statsMin = minLimit;
+            statsMax = maxLimit;
+            statsInFlight = inFlight;
+            statsQueued = waiting;
+            statsLatency = latencyMs;
+            statsBaseline = baselineMs;
+            statsAcquireWait = acquireWaitMs;
+        } finally {
+            lock.unlock();
+        }
+
+        int poolMax = 0, poolActive = 0, poolIdle = 0, poolPending = 0;
+        HikariDataSource hikari = dataSource;
+        if (hikari != null) {
+            poolMax = hikari.getHikariConfigMXBean().getMaximumPoolSize();
+            // Null until the pool has started
+            HikariPoolMXBean pool = hikari.getHikariPoolMXBean();
+            if (pool != null) {
+                poolActive = pool.getActiveConnections();
+                poolIdle = pool.getIdleConnections();
+                poolPending = pool.getThreadsAwaitingConnection();
+            }
+        }
+        long queuedCount = queued.sum();
+        long acquireCount = acquires.sum();
+
+        return new AdmissionStats(
+                statsLimit,
+                statsMin,
+                statsMax,
+                statsInFlight,
+                statsQueued,
+                maxWaitNanos / 1e6,
+                admitted.sum(),
+                rejected.sum(),
+                timeouts.sum(),
+                queuedCount > 0 ? queuedNanos.sum() / 1e6 / queuedCount : 0,
+                statsLatency,
+                statsBaseline,
+                statsAcquireWait,
+                poolMax,
+                poolActive,
+                poolIdle,
+                poolPending,
+                acquireCount,
+                acquireCount > 0 ? acquireNanos.sum() / 1e6 / acquireCount : 0,
+                acquireTimeouts.sum()
+        );
+    }
+}
@@ -0,0 +1,191 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.BalanceResponse;
+import com.cryptox.exchange.dto.CacheStats;
+import jakarta.annotation.PreDestroy;
+import lombok.extern.slf4j.Slf4j;
+import org.postgresql.PGConnection;
+import org.postgresql.PGNotification;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.boot.autoconfigure.jdbc.DataSourceProperties;
+import org.springframework.stereotype.Component;
+
+import java.sql.Connection;
+import java.sql.DriverManager;
+import java.sql.SQLException;
+import java.sql.Statement;
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.UUID;
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.concurrent.atomic.LongAdder;
+import java.util.function.Function;
+
+/**
+ * Recent GET /balance responses per user with a TTL and LRU eviction
+ * ({@code balance-cache.ttl-ms}, {@code balance-cache.size}; a TTL of 0
+ * disables it). Entries are dropped as soon as Postgres reports a wallet change
+ * (NOTIFY from the wallets trigger in init.sql, so writes by any process count);
+ * the TTL only bounds staleness if a notification is missed.
+ *
+ * The LISTEN session uses its own connection outside the Hikari pool, which
+ * would otherwise report it as leaked.
+ */
+@Slf4j
+@Component
+public class BalanceCache {
+
+    private static final String CHANNEL = "wallet_changes";
+
+    private record Entry(BalanceResponse balances, long expiresAt) {
+    }
+
+    private final long ttlMs;
+    private final int capacity;
+    private final DataSourceProperties dataSource;
+    private final Map<UUID, Entry> entries;
+
+    // Bumped on every invalidation; loads that raced one are not cached
+    private final AtomicLong generation = new AtomicLong();
+
+    private final LongAdder hits = new LongAdder();
+    private final LongAdder misses = new LongAdder();
+    private final LongAdder evictions = new LongAdder();
+    private final LongAdder expirations = new LongAdder();
+    private final LongAdder invalidations = new LongAdder();
+
+    private final Thread listener;
+    private volatile boolean closed;
+
+    public BalanceCache(DataSourceProperties dataSource,
+                        @Value("${balance-cache.ttl-ms:5000}") long ttlMs,
+                        @Value("${balance-cache.size:10000}") int capacity) {
+        this.dataSource = dataSource;
+        this.ttlMs = ttlMs;
+        this.capacity = capacity;
+        // Access order: iteration starts at the least recently used entry
+        this.entries = new LinkedHashMap<>(16, 0.75f, true) {
+            @Override
+            protected boolean removeEldestEntry(Map.Entry<UUID, Entry> eldest) {
+                if (size() > BalanceCache.this.capacity) {
+                    evictions.increment();
+                    return true;
+                }
+                return false;
+            }
+        };
+        this.listener = isEnabled()
+                ? Thread.ofPlatform().name("balance-cache-listener").daemon().start(this::listen)
+                : null;
+    }
+
+    public boolean isEnabled() {
+        return ttlMs > 0 && capacity > 0;
+    }
+
+    /** Cached balances, or the result of {@code load} (cached unless a wallet changed meanwhile). */
+    public BalanceResponse get(UUID userId, Function<UUID, BalanceResponse> load) {
+        if (!isEnabled()) {
+            return load.apply(userId);
+        }
+
+        long loadGeneration = generation.get();
+        synchronized (entries) {
+            Entry entry = entries.get(userId);
+            if (entry != null) {
+                if (System.currentTimeMillis() < entry.expiresAt()) {
+                    hits.increment();
+                    return entry.balances();
+                }
+                entries.remove(userId);
+                expirations.increment();
+            }
+        }
+        misses.increment();
+
+        BalanceResponse balances = load.apply(userId);
+        synchronized (entries) {
+            if (generation.get() == loadGeneration) {
+                entries.put(userId, new Entry(balances, System.currentTimeMillis() + ttlMs));
+            }
+        }
+        return balances;
+    }
+
+    public void invalidate(UUID userId) {
+        synchronized (entries) {
+            generation.incrementAndGet();
+            entries.remove(userId);
+        }
+        invalidations.increment();
+    }
+
+    /** Drops everything, e.g. when notifications may have been missed. */
+    public void clear() {
+        synchronized (entries) {
+            generation.incrementAndGet();
+            entries.clear();
+        }
+    }
+
+    @PreDestroy
+    public void close() {
+        closed = true;
+    }
+
+    private void listen() {
+        while (!closed) {
+            try (Connection conn = DriverManager.getConnection(
+                    dataSource.determineUrl(), dataSource.determineUsername(), dataSource.determinePassword());
+                 Statement statement = conn.createStatement()) {
+                statement.execute("LISTEN " + CHANNEL);
+                // Anything cached before LISTEN took effect may be stale
+                clear();
+
+                PGConnection pg = conn.unwrap(PGConnection.class);
+                while (!closed) {
+                    PGNotification[] notifications = pg.getNotifications(1000);
+                    if (notifications == null) {
+                        continue;
+                    }
+                    for (PGNotification notification : notifications) {
+                        try {
+                            invalidate(UUID.fromString(notification.getParameter()));
+                        } catch (IllegalArgumentException e) {
+                            clear();
+                        }
+                    }
+                }
+            } catch (SQLException e) {
+                // Changes made while not listening were missed
+                log.warn("Balance cache listener: {}; retrying", e.getMessage());
+                clear();
+                try {
+                    Thread.sleep(1000);
+                } catch (InterruptedException interrupted) {
+                    return;
+                }
+            }
+        }
+    }
+
+    public CacheStats stats() {
+        int size;
+        synchronized (entries) {
+            size = entries.size();
+        }
+        long hitCount = hits.sum();
+        long missCount = misses.sum();
+        return new CacheStats(
+                size,
+                capacity,
+                ttlMs,
+                hitCount,
+                missCount,
+                hitCount + missCount > 0 ? (double) hitCount / (hitCount + missCount) : 0,
+                evictions.sum(),
+                expirations.sum(),
+                invalidations.sum()
+        );
+    }
+}
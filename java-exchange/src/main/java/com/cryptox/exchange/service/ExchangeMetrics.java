@@ -0,0 +1,81 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.AdmissionStats;
+import io.micrometer.core.instrument.FunctionCounter;
+import io.micrometer.core.instrument.FunctionTimer;
+import io.micrometer.core.instrument.Gauge;
+import io.micrometer.core.instrument.MeterRegistry;
+import io.micrometer.core.instrument.binder.MeterBinder;
+import lombok.RequiredArgsConstructor;
+import org.springframework.stereotype.Component;
+
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Pool and admission meters for /metrics, under the same names the Go service
+ * uses (db_pool_*, admission_*). Spring Boot binds Hikari's own meters only if
+ * no metrics tracker is installed yet, which AdmissionControl usually has, so
+ * the pool is read through the stats AdmissionControl collects.
+ *
+ * A scrape reads every meter back to back, so they share one stats snapshot
+ * (taken under AdmissionControl's lock, plus the pool MXBean reads) instead of
+ * taking one each.
+ */
+@Component
+@RequiredArgsConstructor
+public class ExchangeMetrics implements MeterBinder {
+
+    // Far shorter than any scrape interval, far longer than one scrape
+    private static final long SNAPSHOT_TTL_NANOS = TimeUnit.MILLISECONDS.toNanos(100);
+
+    private final AdmissionControl admissionControl;
+
+    private volatile AdmissionStats snapshot;
+    private volatile long snapshotAt;
+
+    private AdmissionStats stats() {
+        long now = System.nanoTime();
+        AdmissionStats s = snapshot;
+        if (s == null || now - snapshotAt > SNAPSHOT_TTL_NANOS) {
+            s = admissionControl.stats();
+            snapshot = s;
+            snapshotAt = now;
+        }
+        return s;
+    }
+
+    @Override
+    public void bindTo(MeterRegistry registry) {
+        Gauge.builder("db.pool.max.conns", this, c -> c.stats().getPoolMaxSize())
+                .description("Maximum size of the Hikari pool").register(registry);
+        Gauge.builder("db.pool.total.conns", this, c -> c.stats().getPoolActive() + c.stats().getPoolIdle())
+                .description("Open connections in the pool").register(registry);
+        Gauge.builder("db.pool.acquired.conns", this, c -> c.stats().getPoolActive())
+                .description("Connections currently checked out").register(registry);
+        Gauge.builder("db.pool.idle.conns", this, c -> c.stats().getPoolIdle())
+                .description("Idle connections").register(registry);
+        Gauge.builder("db.pool.pending", this, c -> c.stats().getPoolPending())
+                .description("Threads waiting for a connection").register(registry);
+        FunctionTimer.builder("db.pool.acquire", this,
+                        c -> c.stats().getPoolAcquires(),
+                        c -> c.stats().getPoolAvgAcquireWaitMs() * c.stats().getPoolAcquires(),
+                        TimeUnit.MILLISECONDS)
+                .description("Pool acquires and the total time spent waiting for them").register(registry);
+        FunctionCounter.builder("db.pool.timeout", this, c -> c.stats().getPoolTimeouts())
+                .description("Acquires that hit Hikari's connection timeout").register(registry);
+
+        if (!admissionControl.isEnabled()) {
+            return;
+        }
+        Gauge.builder("admission.limit", this, c -> c.stats().getLimit())
+                .description("Current adaptive limit on in-flight DB work").register(registry);
+        Gauge.builder("admission.in.flight", this, c -> c.stats().getInFlight())
+                .description("Admitted DB work in progress").register(registry);
+        Gauge.builder("admission.queued", this, c -> c.stats().getQueued())
+                .description("Callers waiting for admission").register(registry);
+        FunctionCounter.builder("admission.admitted", this, c -> c.stats().getAdmitted())
+                .description("Calls admitted").register(registry);
+        FunctionCounter.builder("admission.rejected", this, c -> c.stats().getRejected())
+                .description("Calls shed with 503").register(registry);
+    }
+}
@@ -0,0 +1,180 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.MatchResult;
+import io.micrometer.core.instrument.Counter;
+import io.micrometer.core.instrument.MeterRegistry;
+import jakarta.annotation.PreDestroy;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.stereotype.Component;
+
+import java.math.BigDecimal;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.ArrayBlockingQueue;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.CompletableFuture;
+import java.util.concurrent.CompletionException;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.TimeUnit;
+import java.util.function.Supplier;
+
+/**
+ * Per-pair matching lanes. Each trading pair gets a virtual thread that runs
+ * one match transaction at a time. Drain calls that queue up meanwhile are
+ * coalesced into the next round, which drains until nothing crosses; single
+ * calls each run their own round and make their own trade. Pairs never wait on
+ * each other, and one pair's calls no longer compete for the same rows with
+ * FOR UPDATE SKIP LOCKED.
+ *
+ * Only the call leading a drain round reports its trades; coalesced calls get
+ * an empty result. Up to {@code matching.lane-queue} calls wait per pair, beyond
+ * that they are shed with 503; 0 disables the lanes. Pairs come from requests,
+ * so lanes idle for a minute are stopped with their meters, and calls for new
+ * pairs are shed while MAX_LANES are open.
+ */
+@Component
+public class MatchLanes {
+
+    private static final String DRAIN = "drain";
+    private static final long IDLE_MS = 60_000;
+    private static final int MAX_LANES = 1024;
+
+    private record Request(String kind, Supplier<MatchResult> match, CompletableFuture<MatchResult> done) {
+    }
+
+    private final int queueSize;
+    private final MeterRegistry meterRegistry;
+    private final ConcurrentHashMap<String, Lane> lanes = new ConcurrentHashMap<>();
+    private volatile boolean closed;
+
+    public MatchLanes(MeterRegistry meterRegistry,
+                      @Value("${matching.lane-queue:1024}") int queueSize) {
+        this.meterRegistry = meterRegistry;
+        this.queueSize = queueSize;
+    }
+
+    public boolean isEnabled() {
+        return queueSize > 0;
+    }
+
+    /** Runs {@code match} in the pair's lane; {@code kind} (drain/single) decides which calls share a round. */
+    public MatchResult call(String pair, String kind, Supplier<MatchResult> match) {
+        if (!isEnabled()) {
+            return match.get();
+        }
+        Request request = new Request(kind, match, new CompletableFuture<>());
+        boolean[] queued = {false};
+        // Offered inside compute so the lane cannot retire in between
+        Lane lane = lanes.compute(pair, (p, current) -> {
+            if (current == null) {
+                if (closed || lanes.size() >= MAX_LANES) {
+                    return null;
+                }
+                current = new Lane(p);
+            }
+            queued[0] = !closed && current.queue.offer(request);
+            return current;
+        });
+        if (!queued[0]) {
+            throw new OverloadedException();
+        }
+        lane.calls.increment();
+        try {
+            return request.done().join();
+        } catch (CompletionException e) {
+            if (e.getCause() instanceof RuntimeException cause) {
+                throw cause;
+            }
+            throw e;
+        }
+    }
+
+    @PreDestroy
+    public void close() {
+        closed = true;
+        lanes.values().forEach(lane -> lane.thread.interrupt());
+    }
+
+    private final class Lane {
+        private final String pair;
+        private final BlockingQueue<Request> queue = new ArrayBlockingQueue<>(queueSize);
+        private final Counter calls;
+        private final Counter rounds;
+        private final Thread thread;
+
+        Lane(String pair) {
+            this.pair = pair;
+            calls = Counter.builder("match.lane.calls").tag("pair", pair)
+                    .description("Match calls per trading pair").register(meterRegistry);
+            rounds = Counter.builder("match.lane.rounds").tag("pair", pair)
+                    .description("Match transactions run per trading pair; calls beyond this were coalesced")
+                    .register(meterRegistry);
+            thread = Thread.ofVirtual().name("match-lane-" + pair).start(this::run);
+        }
+
+        /** Removes the lane if nothing was queued meanwhile. */
+        private boolean retire() {
+            boolean[] retired = {false};
+            lanes.computeIfPresent(pair, (p, current) -> {
+                if (current != this || !queue.isEmpty()) {
+                    return current;
+                }
+                retired[0] = true;
+                return null;
+            });
+            if (retired[0]) {
+                meterRegistry.remove(calls);
+                meterRegistry.remove(rounds);
+            }
+            return retired[0];
+        }
+
+        private void run() {
+            List<Request> pending = new ArrayList<>();
+            while (!closed) {
+                try {
+                    if (pending.isEmpty()) {
+                        Request next = queue.poll(IDLE_MS, TimeUnit.MILLISECONDS);
+                        if (next == null) {
+                            if (retire()) {
+                                return;
+                            }
+                            continue;
+                        }
+                        pending.add(next);
+                    }
+                } catch (InterruptedException e) {
+                    break;
+                }
+                // Everything queued by now arrived before this round starts
+                queue.drainTo(pending);
+
+                // One drain covers every queued drain call; a single call is one trade
+                List<Request> round = new ArrayList<>();
+                List<Request> later = new ArrayList<>();
+                if (DRAIN.equals(pending.get(0).kind())) {
+                    for (Request r : pending) {
+                        (DRAIN.equals(r.kind()) ? round : later).add(r);
+                    }
+                } else {
+                    round.add(pending.get(0));
+                    later.addAll(pending.subList(1, pending.size()));
+                }
+                pending = later;
+
+                rounds.increment();
+                try {
+                    MatchResult result = round.get(0).match().get();
+                    round.get(0).done().complete(result);
+                    for (Request r : round.subList(1, round.size())) {
+                        r.done().complete(new MatchResult(0, BigDecimal.ZERO, 0, 0));
+                    }
+                } catch (RuntimeException e) {
+                    round.forEach(r -> r.done().completeExceptionally(e));
+                }
+            }
+            pending.forEach(r -> r.done().completeExceptionally(new OverloadedException()));
+            queue.forEach(r -> r.done().completeExceptionally(new OverloadedException()));
+        }
+    }
+}
@@ -0,0 +1,75 @@
+package com.cryptox.exchange.service;
+
+import io.micrometer.core.instrument.FunctionCounter;
+import io.micrometer.core.instrument.MeterRegistry;
+import jakarta.annotation.PreDestroy;
+import lombok.extern.slf4j.Slf4j;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.dao.DataAccessException;
+import org.springframework.jdbc.core.JdbcTemplate;
+import org.springframework.stereotype.Component;
+
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.LongAdder;
+
+/**
+ * Moves FILLED/CANCELLED orders to orders_archive in the background
+ * ({@code archive_closed_orders()} in init.sql), so the orders table and its
+ * indexes stay about the size of the OPEN book however long the service runs.
+ *
+ * Every {@code orders.archive.interval-ms} it archives batches of
+ * {@code orders.archive.batch} until less than a full batch is left.
+ * An interval of 0 disables it.
+ */
+@Slf4j
+@Component
+public class OrderArchiver {
+
+    private final JdbcTemplate jdbcTemplate;
+    private final int batch;
+    private final LongAdder archived = new LongAdder();
+    private final ScheduledExecutorService archiver;
+
+    public OrderArchiver(JdbcTemplate jdbcTemplate,
+                         MeterRegistry meterRegistry,
+                         @Value("${orders.archive.interval-ms:1000}") long intervalMs,
+                         @Value("${orders.archive.batch:10000}") int batch) {
+        this.jdbcTemplate = jdbcTemplate;
+        this.batch = batch;
+        FunctionCounter.builder("orders.archived", archived, LongAdder::sum)
+                .description("Closed orders moved to orders_archive").register(meterRegistry);
+        if (intervalMs > 0 && batch > 0) {
+            archiver = Executors.newSingleThreadScheduledExecutor(r -> {
+                Thread t = new Thread(r, "order-archiver");
+                t.setDaemon(true);
+                return t;
+            });
+            archiver.scheduleWithFixedDelay(this::archive, intervalMs, intervalMs, TimeUnit.MILLISECONDS);
+        } else {
+            archiver = null;
+        }
+    }
+
+    @PreDestroy
+    public void close() {
+        if (archiver != null) {
+            archiver.shutdownNow();
+        }
+    }
+
+    private void archive() {
+        try {
+            // Full batches mean a backlog: keep going until it is cleared
+            int moved;
+            do {
+                moved = jdbcTemplate.queryForObject("SELECT archive_closed_orders(?)", Integer.class, batch);
+                archived.add(moved);
+            } while (moved == batch && !Thread.currentThread().isInterrupted());
+        } catch (DataAccessException e) {
+            // The next run retries
+            log.warn("Order archiver: {}", e.getMessage());
+        }
+    }
+}
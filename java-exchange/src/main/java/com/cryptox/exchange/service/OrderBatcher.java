@@ -0,0 +1,287 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.IngestStats;
+import com.cryptox.exchange.entity.Order;
+import io.micrometer.core.instrument.MeterRegistry;
+import io.micrometer.core.instrument.Timer;
+import jakarta.annotation.PreDestroy;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.jdbc.core.JdbcTemplate;
+import org.springframework.stereotype.Component;
+import org.springframework.transaction.support.TransactionTemplate;
+
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.*;
+import java.util.concurrent.atomic.AtomicLong;
+import java.util.concurrent.atomic.AtomicLongArray;
+import java.util.concurrent.atomic.LongAdder;
+
+/**
+ * Group-commits POST /orders: orders are queued and inserted in micro-batches
+ * of up to {@code orders.batch.max-size}, waiting at most
+ * {@code orders.batch.linger-ms} for a batch to fill. Each batch is one JDBC
+ * batch (rewritten into a multi-row INSERT by the driver) in one transaction,
+ * and every caller's future completes when its batch commits.
+ * A max size of 0 or 1 disables batching.
+ *
+ * Admission control sees one call per batch, so its limit bounds concurrent
+ * INSERTs rather than batch sizes, and time spent filling a batch is not
+ * counted as DB latency; a shed batch fails each of its orders with 503.
+ */
+@Component
+public class OrderBatcher {
+
+    // One batch commits while the next one fills
+    private static final int FLUSHERS = 2;
+
+    private static final double[] FLUSH_BUCKETS_MS = {0.5, 1, 2, 5, 10, 25, 50, 100, 250, Double.POSITIVE_INFINITY};
+
+    private static final String INSERT_SQL = """
+            INSERT INTO orders (id, user_id, pair, side, price, quantity, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """;
+
+    private record Pending(Order order, CompletableFuture<Order> done) {
+    }
+
+    private final JdbcTemplate jdbcTemplate;
+    private final TransactionTemplate transactionTemplate;
+    private final AdmissionControl admissionControl;
+    private final int maxBatch;
+    private final long lingerMs;
+    private final BlockingQueue<Pending> queue;
+    private final List<Thread> flushers = new ArrayList<>();
+    private volatile boolean closed;
+
+    private final LongAdder batches = new LongAdder();
+    private final LongAdder orders = new LongAdder();
+    private final LongAdder fallbacks = new LongAdder();
+    private final LongAdder errors = new LongAdder();
+    private final LongAdder flushNanos = new LongAdder();
+    private final AtomicLong maxFlushNanos = new AtomicLong();
+    private final int[] sizeBuckets;
+    private final AtomicLongArray sizeCounts;
+    private final AtomicLongArray flushCounts = new AtomicLongArray(FLUSH_BUCKETS_MS.length);
+
+    // INSERTs bypass the repositories, so they are timed here for /metrics
+    private final Timer insertOk;
+    private final Timer insertFailed;
+
+    public OrderBatcher(JdbcTemplate jdbcTemplate,
+                        TransactionTemplate transactionTemplate,
+                        AdmissionControl admissionControl,
+                        MeterRegistry meterRegistry,
+                        @Value("${orders.batch.max-size:128}") int maxBatch,
+                        @Value("${orders.batch.linger-ms:1}") long lingerMs) {
+        this.jdbcTemplate = jdbcTemplate;
+        this.transactionTemplate = transactionTemplate;
+        this.admissionControl = admissionControl;
+        this.insertOk = Timer.builder("db.batch.insert").tag("outcome", "success")
+                .description("Batched order INSERTs, including the one-by-one fallback")
+                .register(meterRegistry);
+        this.insertFailed = Timer.builder("db.batch.insert").tag("outcome", "error")
+                .description("Batched order INSERTs, including the one-by-one fallback")
+                .register(meterRegistry);
+        this.maxBatch = maxBatch;
+        this.lingerMs = lingerMs;
+        this.queue = new ArrayBlockingQueue<>(Math.max(maxBatch, 1) * FLUSHERS);
+
+        // Batch size buckets: powers of two up to maxBatch
+        List<Integer> buckets = new ArrayList<>();
+        for (int le = 1; le < maxBatch; le *= 2) {
+            buckets.add(le);
+        }
+        buckets.add(Math.max(maxBatch, 1));
+        this.sizeBuckets = buckets.stream().mapToInt(Integer::intValue).toArray();
+        this.sizeCounts = new AtomicLongArray(sizeBuckets.length);
+
+        if (isEnabled()) {
+            for (int i = 0; i < FLUSHERS; i++) {
+                flushers.add(Thread.ofPlatform().name("order-batcher-" + i).daemon().start(this::run));
+            }
+        }
+    }
+
+    public boolean isEnabled() {
+        return maxBatch > 1;
+    }
+
+    /** Queues an order; the future completes once its batch has committed, or fails if the batcher closes first. */
+    public CompletableFuture<Order> submit(Order order) {
+        Pending pending = new Pending(order, new CompletableFuture<>());
+        try {
+            // Bounded waits: a full queue must not block forever once the flushers are gone
+            while (!queue.offer(pending, 100, TimeUnit.MILLISECONDS)) {
+                if (closed) {
+                    pending.done().completeExceptionally(new IllegalStateException("order batcher closed"));
+                    return pending.done();
+                }
+            }
+        } catch (InterruptedException e) {
+            Thread.currentThread().interrupt();
+            pending.done().completeExceptionally(e);
+            return pending.done();
+        }
+        // Queued after close() drained the queue: nobody else will complete it
+        if (closed && queue.remove(pending)) {
+            pending.done().completeExceptionally(new IllegalStateException("order batcher closed"));
+        }
+        return pending.done();
+    }
+
+    /** Flushes everything queued and stops the flushers; orders submitted meanwhile fail. */
+    @PreDestroy
+    public void close() throws InterruptedException {
+        closed = true;
+        for (Thread flusher : flushers) {
+            flusher.join();
+        }
+        List<Pending> leftover = new ArrayList<>();
+        queue.drainTo(leftover);
+        leftover.forEach(p -> p.done().completeExceptionally(new IllegalStateException("order batcher closed")));
+    }
+
+    private void run() {
+        List<Pending> batch = new ArrayList<>(maxBatch);
+        boolean interrupted = false;
+        while (!interrupted && (!closed || !queue.isEmpty())) {
+            try {
+                Pending first = queue.poll(100, TimeUnit.MILLISECONDS);
+                if (first == null) {
+                    continue;
+                }
+                batch.add(first);
+
+                long deadline = System.nanoTime() + TimeUnit.MILLISECONDS.toNanos(lingerMs);
+                while (batch.size() < maxBatch) {
+                    if (queue.drainTo(batch, maxBatch - batch.size()) > 0) {
+                        continue;
+                    }
+                    long remaining = deadline - System.nanoTime();
+                    Pending next = remaining > 0 ? queue.poll(remaining, TimeUnit.NANOSECONDS) : null;
+                    if (next == null) {
+                        break;
+                    }
+                    batch.add(next);
+                }
+            } catch (InterruptedException e) {
+                // Flush what was collected, then stop
+                interrupted = true;
+            }
+
+            if (!batch.isEmpty()) {
+                flush(batch);
+                batch.clear();
+            }
+        }
+    }
+
+    private void flush(List<Pending> batch) {
+        long start = System.nanoTime();
+        try {
+            admissionControl.call(() -> {
+                insert(batch);
+                return null;
+            });
+        } catch (OverloadedException e) {
+            batch.forEach(p -> p.done().completeExceptionally(e));
+        }
+        observe(batch.size(), System.nanoTime() - start);
+    }
+
+    private void insert(List<Pending> batch) {
+        try {
+            timed(() -> transactionTemplate.executeWithoutResult(status ->
+                    jdbcTemplate.batchUpdate(INSERT_SQL, batch.stream().map(p -> row(p.order())).toList())));
+            batch.forEach(p -> p.done().complete(p.order()));
+        } catch (RuntimeException e) {
+            if (batch.size() == 1) {
+                errors.increment();
+                batch.get(0).done().completeExceptionally(e);
+            } else {
+                // One bad row (e.g. unknown user) fails the whole batch;
+                // insert one by one so only that order's request fails
+                fallbacks.increment();
+                for (Pending p : batch) {
+                    try {
+                        timed(() -> jdbcTemplate.update(INSERT_SQL, row(p.order())));
+                        p.done().complete(p.order());
+                    } catch (RuntimeException single) {
+                        errors.increment();
+                        p.done().completeExceptionally(single);
+                    }
+                }
+            }
+        }
+    }
+
+    private void timed(Runnable insert) {
+        long start = System.nanoTime();
+        try {
+            insert.run();
+            insertOk.record(System.nanoTime() - start, TimeUnit.NANOSECONDS);
+        } catch (RuntimeException e) {
+            insertFailed.record(System.nanoTime() - start, TimeUnit.NANOSECONDS);
+            throw e;
+        }
+    }
+
+    private static Object[] row(Order order) {
+        return new Object[]{
+                order.getId(), order.getUserId(), order.getPair(), order.getSide().name(),
+                order.getPrice(), order.getQuantity(), order.getStatus().name(), order.getCreatedAt()
+        };
+    }
+
+    private void observe(int size, long nanos) {
+        batches.increment();
+        orders.add(size);
+        flushNanos.add(nanos);
+        maxFlushNanos.accumulateAndGet(nanos, Math::max);
+
+        for (int i = 0; i < sizeBuckets.length; i++) {
+            if (size <= sizeBuckets[i]) {
+                sizeCounts.incrementAndGet(i);
+                break;
+            }
+        }
+        double ms = nanos / 1e6;
+        for (int i = 0; i < FLUSH_BUCKETS_MS.length; i++) {
+            if (ms <= FLUSH_BUCKETS_MS[i]) {
+                flushCounts.incrementAndGet(i);
+                break;
+            }
+        }
+    }
+
+    public IngestStats stats() {
+        long batchCount = batches.sum();
+        long orderCount = orders.sum();
+
+        List<IngestStats.Bucket> sizes = new ArrayList<>(sizeBuckets.length);
+        for (int i = 0; i < sizeBuckets.length; i++) {
+            sizes.add(new IngestStats.Bucket(String.valueOf(sizeBuckets[i]), sizeCounts.get(i)));
+        }
+        List<IngestStats.Bucket> flushes = new ArrayList<>(FLUSH_BUCKETS_MS.length);
+        for (int i = 0; i < FLUSH_BUCKETS_MS.length; i++) {
+            double le = FLUSH_BUCKETS_MS[i];
+            String label = Double.isInfinite(le) ? "+Inf" : (le == Math.rint(le) ? String.valueOf((long) le) : String.valueOf(le));
+            flushes.add(new IngestStats.Bucket(label, flushCounts.get(i)));
+        }
+
+        return new IngestStats(
+                maxBatch,
+                lingerMs,
+                batchCount,
+                orderCount,
+                fallbacks.sum(),
+                errors.sum(),
+                batchCount > 0 ? (double) orderCount / batchCount : 0,
+                batchCount > 0 ? flushNanos.sum() / 1e6 / batchCount : 0,
+                maxFlushNanos.get() / 1e6,
+                sizes,
+                flushes
+        );
+    }
+}
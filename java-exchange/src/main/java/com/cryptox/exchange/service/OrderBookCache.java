@@ -0,0 +1,237 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.OrderBookResponse;
+import com.cryptox.exchange.entity.Order;
+import com.cryptox.exchange.repository.OrderRepository;
+import jakarta.annotation.PreDestroy;
+import lombok.extern.slf4j.Slf4j;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.stereotype.Component;
+import org.springframework.transaction.support.TransactionSynchronization;
+import org.springframework.transaction.support.TransactionSynchronizationManager;
+
+import java.math.BigDecimal;
+import java.util.*;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.TimeUnit;
+
+/**
+ * Per-pair price-level book kept in memory so GET /orderbook does not run the
+ * GROUP BY aggregation on every request.
+ *
+ * Orders created and filled here are applied when their transaction commits, and
+ * every book is re-synced from Postgres (same top-50 queries as before) every
+ * {@code orderbook.max-staleness-ms} to pick up anything else. Readers get an
+ * immutable, versioned snapshot that is only rebuilt after a change.
+ * A staleness of 0 disables the cache and queries Postgres per request.
+ */
+@Slf4j
+@Component
+public class OrderBookCache {
+
+    private static final int DEPTH = 50;
+
+    // Pairs not read for this long are dropped instead of re-synced forever
+    private static final long IDLE_NANOS = TimeUnit.MINUTES.toNanos(1);
+
+    private final OrderRepository orderRepository;
+    private final AdmissionControl admissionControl;
+    private final Map<String, Book> books = new ConcurrentHashMap<>();
+    private final ScheduledExecutorService refresher;
+
+    public OrderBookCache(OrderRepository orderRepository,
+                          AdmissionControl admissionControl,
+                          @Value("${orderbook.max-staleness-ms:100}") long maxStalenessMs) {
+        this.orderRepository = orderRepository;
+        this.admissionControl = admissionControl;
+        if (maxStalenessMs > 0) {
+            refresher = Executors.newSingleThreadScheduledExecutor(r -> {
+                Thread t = new Thread(r, "orderbook-refresh");
+                t.setDaemon(true);
+                return t;
+            });
+            refresher.scheduleWithFixedDelay(this::refresh, maxStalenessMs, maxStalenessMs, TimeUnit.MILLISECONDS);
+        } else {
+            refresher = null;
+        }
+    }
+
+    @PreDestroy
+    public void close() {
+        if (refresher != null) {
+            refresher.shutdownNow();
+        }
+    }
+
+    public boolean isEnabled() {
+        return refresher != null;
+    }
+
+    /** Current snapshot, loading the pair from Postgres on first use. */
+    public OrderBookResponse get(String pair) {
+        if (!isEnabled()) {
+            return admissionControl.call(() -> new OrderBookResponse(pair,
+                    entries(orderRepository.findBidsAggregated(pair)),
+                    entries(orderRepository.findAsksAggregated(pair)),
+                    0));
+        }
+        // Only first loads are admitted; the background refresh is not request work
+        Book book = books.computeIfAbsent(pair, p -> admissionControl.call(() -> load(p)));
+        book.lastRead = System.nanoTime();
+        return book.snapshot(pair);
+    }
+
+    /**
+     * Snapshot once the book's version differs from afterVersion, or the current
+     * one after timeoutMs. Keeps the pair from being dropped as idle like get.
+     */
+    public OrderBookResponse awaitChange(String pair, long afterVersion, long timeoutMs) throws InterruptedException {
+        Book book = books.computeIfAbsent(pair, p -> admissionControl.call(() -> load(p)));
+        book.lastRead = System.nanoTime();
+        book.awaitChange(afterVersion, timeoutMs);
+        return book.snapshot(pair);
+    }
+
+    /** Adds a newly created OPEN order to its price level once it is committed. */
+    public void applyOrder(Order order) {
+        afterCommit(() -> apply(order.getPair(), order.getSide(), order.getPrice(), order.getQuantity()));
+    }
+
+    /** Removes filled quantity from a price level once the trade is committed. */
+    public void applyFill(String pair, Order.OrderSide side, BigDecimal price, BigDecimal quantity) {
+        afterCommit(() -> apply(pair, side, price, quantity.negate()));
+    }
+
+    private void afterCommit(Runnable change) {
+        if (!isEnabled()) {
+            return;
+        }
+        if (TransactionSynchronizationManager.isSynchronizationActive()) {
+            TransactionSynchronizationManager.registerSynchronization(new TransactionSynchronization() {
+                @Override
+                public void afterCommit() {
+                    change.run();
+                }
+            });
+        } else {
+            change.run();
+        }
+    }
+
+    private void apply(String pair, Order.OrderSide side, BigDecimal price, BigDecimal delta) {
+        // Pairs nobody has read yet are loaded fresh on first get
+        Book book = books.get(pair);
+        if (book != null) {
+            book.apply(side, price, delta);
+        }
+    }
+
+    private Book load(String pair) {
+        Book book = new Book();
+        book.replace(orderRepository.findBidsAggregated(pair), orderRepository.findAsksAggregated(pair));
+        return book;
+    }
+
+    private void refresh() {
+        long idleBefore = System.nanoTime() - IDLE_NANOS;
+        for (Map.Entry<String, Book> entry : books.entrySet()) {
+            Book book = entry.getValue();
+            if (book.lastRead - idleBefore < 0) {
+                books.remove(entry.getKey(), book);
+                continue;
+            }
+            try {
+                String pair = entry.getKey();
+                book.replace(orderRepository.findBidsAggregated(pair), orderRepository.findAsksAggregated(pair));
+            } catch (RuntimeException e) {
+                // Keep serving the current book; the next run retries
+                log.warn("Order book refresh failed for {}: {}", entry.getKey(), e.getMessage());
+            }
+        }
+    }
+
+    private static List<OrderBookResponse.OrderBookEntry> entries(List<Object[]> rows) {
+        return rows.stream()
+                .map(row -> new OrderBookResponse.OrderBookEntry(
+                        (BigDecimal) row[0],
+                        (BigDecimal) row[1]
+                ))
+                .toList();
+    }
+
+    private static final class Book {
+        private final NavigableMap<BigDecimal, BigDecimal> bids = new TreeMap<>(Comparator.reverseOrder());
+        private final NavigableMap<BigDecimal, BigDecimal> asks = new TreeMap<>();
+        private long version;
+        private volatile OrderBookResponse snapshot;
+        private volatile long lastRead = System.nanoTime();
+
+        synchronized void apply(Order.OrderSide side, BigDecimal price, BigDecimal delta) {
+            NavigableMap<BigDecimal, BigDecimal> levels = side == Order.OrderSide.BUY ? bids : asks;
+            BigDecimal quantity = levels.getOrDefault(price, BigDecimal.ZERO).add(delta);
+            if (quantity.signum() <= 0) {
+                levels.remove(price);
+            } else {
+                levels.put(price, quantity);
+            }
+            changed();
+        }
+
+        synchronized void replace(List<Object[]> bidsRaw, List<Object[]> asksRaw) {
+            fill(bids, bidsRaw);
+            fill(asks, asksRaw);
+            changed();
+        }
+
+        private void changed() {
+            version++;
+            snapshot = null;
+            notifyAll();
+        }
+
+        synchronized void awaitChange(long afterVersion, long timeoutMs) throws InterruptedException {
+            long deadline = System.nanoTime() + TimeUnit.MILLISECONDS.toNanos(timeoutMs);
+            while (version == afterVersion) {
+                long left = deadline - System.nanoTime();
+                if (left <= 0) {
+                    return;
+                }
+                TimeUnit.NANOSECONDS.timedWait(this, left);
+            }
+        }
+
+        OrderBookResponse snapshot(String pair) {
+            // Lock-free fast path: nothing changed since the last rebuild
+            OrderBookResponse current = snapshot;
+            if (current != null) {
+                return current;
+            }
+            synchronized (this) {
+                if (snapshot == null) {
+                    snapshot = new OrderBookResponse(pair, topLevels(bids), topLevels(asks), version);
+                }
+                return snapshot;
+            }
+        }
+
+        private static void fill(Map<BigDecimal, BigDecimal> levels, List<Object[]> rows) {
+            levels.clear();
+            for (Object[] row : rows) {
+                levels.put((BigDecimal) row[0], (BigDecimal) row[1]);
+            }
+        }
+
+        private static List<OrderBookResponse.OrderBookEntry> topLevels(NavigableMap<BigDecimal, BigDecimal> levels) {
+            List<OrderBookResponse.OrderBookEntry> entries = new ArrayList<>(Math.min(levels.size(), DEPTH));
+            for (Map.Entry<BigDecimal, BigDecimal> level : levels.entrySet()) {
+                if (entries.size() == DEPTH) {
+                    break;
+                }
+                entries.add(new OrderBookResponse.OrderBookEntry(level.getKey(), level.getValue()));
+            }
+            return List.copyOf(entries);
+        }
+    }
+}
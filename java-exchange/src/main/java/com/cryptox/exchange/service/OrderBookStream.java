@@ -0,0 +1,281 @@
+package com.cryptox.exchange.service;
+
+import com.cryptox.exchange.dto.OrderBookEvent;
+import com.cryptox.exchange.dto.OrderBookResponse;
+import com.fasterxml.jackson.core.JsonProcessingException;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import io.micrometer.core.instrument.Counter;
+import io.micrometer.core.instrument.MeterRegistry;
+import jakarta.annotation.PreDestroy;
+import lombok.extern.slf4j.Slf4j;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.stereotype.Component;
+import org.springframework.web.servlet.mvc.method.annotation.SseEmitter;
+
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.time.Instant;
+import java.time.temporal.ChronoUnit;
+import java.util.*;
+import java.util.concurrent.ArrayBlockingQueue;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicBoolean;
+import java.util.concurrent.atomic.AtomicInteger;
+
+/**
+ * Pushes order book changes to GET /orderbook/{pair}/stream subscribers instead
+ * of having them poll GET /orderbook. One thread per streamed pair waits for the
+ * cached book to change, diffs its top levels against the last published ones
+ * and encodes the diff once for all of the pair's subscribers.
+ *
+ * Each subscriber has a virtual thread writing its queue of up to
+ * {@code orderbook.stream-buffer} events to the connection; one that falls
+ * further behind is disconnected rather than slowing the others, and reconnects
+ * for a fresh snapshot. 0 disables streaming, as does disabling the cache.
+ */
+@Slf4j
+@Component
+public class OrderBookStream {
+
+    public static final String SNAPSHOT = "snapshot";
+    public static final String DIFF = "diff";
+
+    // Idle streams get a comment this often; it also keeps streamed books from
+    // being dropped as idle by the cache
+    private static final long KEEP_ALIVE_MS = 15_000;
+
+    private record Event(String type, long seq, String json) {
+    }
+
+    private final OrderBookCache orderBookCache;
+    private final ObjectMapper objectMapper;
+    private final MeterRegistry meterRegistry;
+    private final int buffer;
+    private final Map<String, PairFeed> feeds = new HashMap<>();
+    private final AtomicInteger openStreams = new AtomicInteger();
+    private final Counter snapshots;
+    private final Counter diffs;
+
+    public OrderBookStream(OrderBookCache orderBookCache,
+                           ObjectMapper objectMapper,
+                           MeterRegistry meterRegistry,
+                           @Value("${orderbook.stream-buffer:64}") int buffer) {
+        this.orderBookCache = orderBookCache;
+        this.objectMapper = objectMapper;
+        this.meterRegistry = meterRegistry;
+        this.buffer = buffer;
+        meterRegistry.gauge("orderbook.stream.subscribers", openStreams);
+        snapshots = Counter.builder("orderbook.stream.events").tag("type", SNAPSHOT)
+                .description("Order book stream events built, once per update whatever the number of subscribers")
+                .register(meterRegistry);
+        diffs = Counter.builder("orderbook.stream.events").tag("type", DIFF)
+                .description("Order book stream events built, once per update whatever the number of subscribers")
+                .register(meterRegistry);
+    }
+
+    public boolean isEnabled() {
+        return buffer > 0 && orderBookCache.isEnabled();
+    }
+
+    /** Starts a stream of the pair's book, beginning with a snapshot. */
+    public SseEmitter subscribe(String pair) {
+        // Loads the book on first use (admitted like GET /orderbook), before any lock is held
+        OrderBookResponse current = orderBookCache.get(pair);
+
+        // No timeout: the stream lasts until the client or the server goes away
+        SseEmitter emitter = new SseEmitter(0L);
+        Subscriber subscriber = new Subscriber(emitter);
+        PairFeed feed;
+        synchronized (this) {
+            feed = feeds.computeIfAbsent(pair, p -> new PairFeed(p, current));
+            feed.add(subscriber);
+        }
+        openStreams.incrementAndGet();
+        emitter.onCompletion(() -> unsubscribe(feed, subscriber));
+        emitter.onError(e -> unsubscribe(feed, subscriber));
+        subscriber.start(pair);
+        return emitter;
+    }
+
+    @PreDestroy
+    public synchronized void close() {
+        for (PairFeed feed : feeds.values()) {
+            feed.thread.interrupt();
+            feed.dropAll();
+        }
+        feeds.clear();
+    }
+
+    private synchronized void unsubscribe(PairFeed feed, Subscriber subscriber) {
+        if (!subscriber.closed.compareAndSet(false, true)) {
+            return;
+        }
+        openStreams.decrementAndGet();
+        if (feed.remove(subscriber) && feeds.get(feed.pair) == feed) {
+            // Last subscriber gone
+            feeds.remove(feed.pair);
+            feed.thread.interrupt();
+        }
+    }
+
+    private Event encode(String type, String pair, long seq,
+                         List<OrderBookResponse.OrderBookEntry> bids, List<OrderBookResponse.OrderBookEntry> asks) {
+        (SNAPSHOT.equals(type) ? snapshots : diffs).increment();
+        long ts = ChronoUnit.MICROS.between(Instant.EPOCH, Instant.now());
+        try {
+            return new Event(type, seq, objectMapper.writeValueAsString(new OrderBookEvent(type, pair, seq, bids, asks, ts)));
+        } catch (JsonProcessingException e) {
+            throw new IllegalStateException(e);
+        }
+    }
+
+    /** Levels of next that are new or changed, and those of prev that are gone with quantity 0. */
+    private static List<OrderBookResponse.OrderBookEntry> diff(List<OrderBookResponse.OrderBookEntry> prev,
+                                                              List<OrderBookResponse.OrderBookEntry> next) {
+        // compareTo ordering: 42000 and 42000.00000000 are the same level
+        Map<BigDecimal, BigDecimal> old = new TreeMap<>();
+        for (OrderBookResponse.OrderBookEntry e : prev) {
+            old.put(e.getPrice(), e.getQuantity());
+        }
+        List<OrderBookResponse.OrderBookEntry> changed = new ArrayList<>();
+        for (OrderBookResponse.OrderBookEntry e : next) {
+            BigDecimal quantity = old.remove(e.getPrice());
+            if (quantity == null || quantity.compareTo(e.getQuantity()) != 0) {
+                changed.add(e);
+            }
+        }
+        for (BigDecimal price : old.keySet()) {
+            changed.add(new OrderBookResponse.OrderBookEntry(price, BigDecimal.ZERO));
+        }
+        return changed;
+    }
+
+    private final class PairFeed {
+        private final String pair;
+        private final Set<Subscriber> subscribers = new HashSet<>();
+        private final Counter dropped;
+        private final Thread thread;
+        private OrderBookResponse last;
+        private long seq;
+        // Encoded snapshot of last, built for the first subscriber after a diff
+        private Event snapshot;
+
+        PairFeed(String pair, OrderBookResponse current) {
+            this.pair = pair;
+            this.last = current;
+            dropped = Counter.builder("orderbook.stream.dropped").tag("pair", pair)
+                    .description("Subscribers disconnected for falling behind").register(meterRegistry);
+            // A platform thread: waiting on the book's monitor would pin a virtual one
+            thread = new Thread(this::run, "orderbook-stream-" + pair);
+            thread.setDaemon(true);
+            thread.start();
+        }
+
+        synchronized void add(Subscriber subscriber) {
+            if (snapshot == null) {
+                snapshot = encode(SNAPSHOT, pair, seq, last.getBids(), last.getAsks());
+            }
+            subscriber.queue.offer(snapshot);
+            subscribers.add(subscriber);
+        }
+
+        /** Removes the subscriber; true when none are left. */
+        synchronized boolean remove(Subscriber subscriber) {
+            subscribers.remove(subscriber);
+            return subscribers.isEmpty();
+        }
+
+        synchronized void dropAll() {
+            subscribers.forEach(Subscriber::stop);
+            subscribers.clear();
+        }
+
+        private void run() {
+            while (!Thread.currentThread().isInterrupted()) {
+                try {
+                    publish(orderBookCache.awaitChange(pair, last.getVersion(), KEEP_ALIVE_MS));
+                } catch (InterruptedException e) {
+                    return;
+                } catch (RuntimeException e) {
+                    // Keep the last book; the next round retries
+                    log.warn("Order book stream for {}: {}", pair, e.getMessage());
+                    try {
+                        Thread.sleep(KEEP_ALIVE_MS);
+                    } catch (InterruptedException ie) {
+                        return;
+                    }
+                }
+            }
+        }
+
+        private synchronized void publish(OrderBookResponse next) {
+            if (next == last) {
+                return;
+            }
+            List<OrderBookResponse.OrderBookEntry> bids = diff(last.getBids(), next.getBids());
+            List<OrderBookResponse.OrderBookEntry> asks = diff(last.getAsks(), next.getAsks());
+            last = next;
+            // A re-sync that found the same levels is not an update
+            if (bids.isEmpty() && asks.isEmpty()) {
+                return;
+            }
+
+            seq++;
+            snapshot = null;
+            Event event = encode(DIFF, pair, seq, bids, asks);
+            for (Iterator<Subscriber> it = subscribers.iterator(); it.hasNext(); ) {
+                Subscriber subscriber = it.next();
+                if (!subscriber.queue.offer(event)) {
+                    it.remove();
+                    subscriber.stop();
+                    dropped.increment();
+                }
+            }
+        }
+    }
+
+    private final class Subscriber {
+        private final SseEmitter emitter;
+        private final BlockingQueue<Event> queue = new ArrayBlockingQueue<>(buffer + 1);
+        private final AtomicBoolean closed = new AtomicBoolean();
+        private volatile boolean stopped;
+        private Thread sender;
+
+        Subscriber(SseEmitter emitter) {
+            this.emitter = emitter;
+        }
+
+        void start(String pair) {
+            sender = Thread.ofVirtual().name("orderbook-sse-" + pair).start(this::send);
+        }
+
+        /** Ends the stream; the client has to reconnect for a new snapshot. */
+        void stop() {
+            stopped = true;
+            Thread t = sender;
+            if (t != null) {
+                t.interrupt();
+            }
+        }
+
+        private void send() {
+            try {
+                while (!stopped) {
+                    Event event = queue.poll(KEEP_ALIVE_MS, TimeUnit.MILLISECONDS);
+                    if (event == null) {
+                        emitter.send(SseEmitter.event().comment("keepalive"));
+                    } else if (!stopped) {
+                        emitter.send(SseEmitter.event().id(Long.toString(event.seq())).name(event.type()).data(event.json()));
+                    }
+                }
+                emitter.complete();
+            } catch (InterruptedException e) {
+                emitter.complete();
+            } catch (IOException | IllegalStateException e) {
+                // Client went away; onError/onCompletion unsubscribe
+                emitter.completeWithError(e);
+            }
+        }
+    }
+}
@@ -0,0 +1,9 @@
+package com.cryptox.exchange.service;
+
+/** DB work turned away by {@link AdmissionControl}; answered with 503 and Retry-After. */
+public class OverloadedException extends RuntimeException {
+
+    public OverloadedException() {
+        super("overloaded: database work not admitted");
+    }
+}
@@ -17,17 +17,29 @@ import org.springframework.transaction.annotation.Transactional;
 import java.math.BigDecimal;
 import java.time.LocalDateTime;
 import java.util.*;
+import java.util.concurrent.CompletionException;
 import java.util.stream.Collectors;
 
 @Service
 @RequiredArgsConstructor
 public class TradingService {
 
+    // Orders per side locked by one matchAll call; bounds how long the transaction runs
+    private static final int MATCH_BATCH_LIMIT = 500;
+
+    /** One matchAll transaction; {@code more} when a side hit MATCH_BATCH_LIMIT, so orders beyond it may still cross. */
+    public record MatchBatch(MatchResult result, boolean more) {
+    }
+
     private final OrderRepository orderRepository;
     private final WalletRepository walletRepository;
     private final TradeRepository tradeRepository;
+    private final OrderBookCache orderBookCache;
+    private final OrderBatcher orderBatcher;
+    private final BalanceCache balanceCache;
+    private final AdmissionControl admissionControl;
 
-    @Transactional
+    // Not @Transactional: the batched path commits in OrderBatcher, save() runs its own transaction
     public Order createOrder(CreateOrderRequest request) {
         Order order = new Order();
         order.setUserId(request.getUserId());
@@ -38,34 +50,36 @@ public class TradingService {
         order.setStatus(Order.OrderStatus.OPEN);
         order.setCreatedAt(LocalDateTime.now());
 
-        return orderRepository.save(order);
+        Order saved;
+        if (orderBatcher.isEnabled()) {
+            // Admitted once per batch by the batcher, not while the order waits for one
+            order.setId(UUID.randomUUID());
+            try {
+                saved = orderBatcher.submit(order).join();
+            } catch (CompletionException e) {
+                if (e.getCause() instanceof RuntimeException cause) {
+                    throw cause;
+                }
+                throw e;
+            }
+        } else {
+            saved = admissionControl.call(() -> orderRepository.save(order));
+        }
+        orderBookCache.applyOrder(saved);
+        return saved;
     }
 
-    @Transactional(readOnly = true)
+    // Served from memory; no transaction so cache hits never take a pool connection
     public OrderBookResponse getOrderBook(String pair) {
-        // Use optimized native queries that aggregate at DB level
-        List<Object[]> bidsRaw = orderRepository.findBidsAggregated(pair);
-        List<Object[]> asksRaw = orderRepository.findAsksAggregated(pair);
-
-        List<OrderBookResponse.OrderBookEntry> bidEntries = bidsRaw.stream()
-                .map(row -> new OrderBookResponse.OrderBookEntry(
-                        (BigDecimal) row[0],
-                        (BigDecimal) row[1]
-                ))
-                .toList();
-
-        List<OrderBookResponse.OrderBookEntry> askEntries = asksRaw.stream()
-                .map(row -> new OrderBookResponse.OrderBookEntry(
-                        (BigDecimal) row[0],
-                        (BigDecimal) row[1]
-                ))
-                .toList();
-
-        return new OrderBookResponse(pair, bidEntries, askEntries);
+        return orderBookCache.get(pair);
     }
 
-    @Transactional(readOnly = true)
+    // Cache hits never open a transaction; misses load through the read-only repository query
     public BalanceResponse getUserBalances(UUID userId) {
+        return balanceCache.get(userId, id -> admissionControl.call(() -> loadUserBalances(id)));
+    }
+
+    private BalanceResponse loadUserBalances(UUID userId) {
         List<Wallet> wallets = walletRepository.findByUserId(userId);
 
         Map<String, BigDecimal> balances = wallets.stream()
@@ -80,7 +94,7 @@ public class TradingService {
         Optional<Order> bestAskOpt = orderRepository.findBestAsk(pair);
 
         if (bestBidOpt.isEmpty() || bestAskOpt.isEmpty()) {
-            return new MatchResult(0, BigDecimal.ZERO);
+            return new MatchResult(0, BigDecimal.ZERO, 0, 0);
         }
 
         Order bestBid = bestBidOpt.get();
@@ -88,7 +102,7 @@ public class TradingService {
 
         // Check if orders can match (bid price >= ask price)
         if (bestBid.getPrice().compareTo(bestAsk.getPrice()) < 0) {
-            return new MatchResult(0, BigDecimal.ZERO);
+            return new MatchResult(0, BigDecimal.ZERO, 0, 0);
         }
 
         // Calculate trade quantity
@@ -105,8 +119,10 @@ public class TradingService {
         tradeRepository.save(trade);
 
         // Update orders
+        int filled = 0;
         if (bestBid.getQuantity().compareTo(tradeQty) == 0) {
             bestBid.setStatus(Order.OrderStatus.FILLED);
+            filled++;
         } else {
             bestBid.setQuantity(bestBid.getQuantity().subtract(tradeQty));
         }
@@ -114,11 +130,90 @@ public class TradingService {
 
         if (bestAsk.getQuantity().compareTo(tradeQty) == 0) {
             bestAsk.setStatus(Order.OrderStatus.FILLED);
+            filled++;
         } else {
             bestAsk.setQuantity(bestAsk.getQuantity().subtract(tradeQty));
         }
         orderRepository.save(bestAsk);
 
-        return new MatchResult(1, tradeQty.multiply(tradePrice));
+        // Each side leaves the book at its own price level
+        orderBookCache.applyFill(pair, Order.OrderSide.BUY, bestBid.getPrice(), tradeQty);
+        orderBookCache.applyFill(pair, Order.OrderSide.SELL, bestAsk.getPrice(), tradeQty);
+
+        return new MatchResult(1, tradeQty.multiply(tradePrice), filled, 2 - filled);
+    }
+
+    /**
+     * Drains the crossed part of the book in one transaction: locks all crossing
+     * orders (up to MATCH_BATCH_LIMIT per side), walks price levels in price-time
+     * priority filling as many trades as cross, including partial fills. Trades
+     * and order updates go out as JDBC batches when the transaction flushes.
+     * Callers run it again while the batch reports {@code more}.
+     */
+    @Transactional
+    public MatchBatch matchAll(String pair) {
+        List<Order> bids = orderRepository.lockCrossingBids(pair, MATCH_BATCH_LIMIT);
+        List<Order> asks = orderRepository.lockCrossingAsks(pair, MATCH_BATCH_LIMIT);
+
+        List<Trade> trades = new ArrayList<>();
+        List<BigDecimal> bidPrices = new ArrayList<>();
+        Map<Order, BigDecimal> remaining = new IdentityHashMap<>();
+        BigDecimal volume = BigDecimal.ZERO;
+        int i = 0, j = 0;
+        while (i < bids.size() && j < asks.size()
+                && bids.get(i).getPrice().compareTo(asks.get(j).getPrice()) >= 0) {
+            Order bid = bids.get(i);
+            Order ask = asks.get(j);
+            BigDecimal bidLeft = remaining.getOrDefault(bid, bid.getQuantity());
+            BigDecimal askLeft = remaining.getOrDefault(ask, ask.getQuantity());
+            BigDecimal tradeQty = bidLeft.min(askLeft);
+            BigDecimal tradePrice = ask.getPrice(); // Execute at ask price
+
+            Trade trade = new Trade();
+            trade.setBuyOrderId(bid.getId());
+            trade.setSellOrderId(ask.getId());
+            trade.setPrice(tradePrice);
+            trade.setQuantity(tradeQty);
+            trade.setExecutedAt(LocalDateTime.now());
+            trades.add(trade);
+            bidPrices.add(bid.getPrice());
+            volume = volume.add(tradeQty.multiply(tradePrice));
+
+            remaining.put(bid, bidLeft.subtract(tradeQty));
+            remaining.put(ask, askLeft.subtract(tradeQty));
+            if (remaining.get(bid).signum() == 0) {
+                i++;
+            }
+            if (remaining.get(ask).signum() == 0) {
+                j++;
+            }
+        }
+
+        if (trades.isEmpty()) {
+            return new MatchBatch(new MatchResult(0, BigDecimal.ZERO, 0, 0), false);
+        }
+        tradeRepository.saveAll(trades);
+
+        // Managed entities: the changes are flushed as batched UPDATEs on commit
+        int filled = 0;
+        for (Map.Entry<Order, BigDecimal> entry : remaining.entrySet()) {
+            Order order = entry.getKey();
+            if (entry.getValue().signum() == 0) {
+                // Filled orders keep their original quantity, as in matchOrders
+                order.setStatus(Order.OrderStatus.FILLED);
+                filled++;
+            } else {
+                order.setQuantity(entry.getValue());
+            }
+        }
+
+        for (int k = 0; k < trades.size(); k++) {
+            Trade trade = trades.get(k);
+            orderBookCache.applyFill(pair, Order.OrderSide.BUY, bidPrices.get(k), trade.getQuantity());
+            orderBookCache.applyFill(pair, Order.OrderSide.SELL, trade.getPrice(), trade.getQuantity());
+        }
+
+        boolean more = bids.size() == MATCH_BATCH_LIMIT || asks.size() == MATCH_BATCH_LIMIT;
+        return new MatchBatch(new MatchResult(trades.size(), volume, filled, remaining.size() - filled), more);
     }
 }
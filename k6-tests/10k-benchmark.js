@@ -1,5 +1,7 @@
 import http from 'k6/http';
 import { check } from 'k6';
+import { SharedArray } from 'k6/data';
+import exec from 'k6/execution';
 import { Rate, Counter, Trend } from 'k6/metrics';
 
 // Custom metrics
@@ -9,12 +11,45 @@ const createOrderLatency = new Trend('create_order_latency', true);
 const getOrderBookLatency = new Trend('get_orderbook_latency', true);
 const getBalanceLatency = new Trend('get_balance_latency', true);
 const matchOrdersLatency = new Trend('match_orders_latency', true);
+// Trades executed by match calls (a drain-mode call can fill many orders)
+const tradesMatched = new Counter('trades_matched');
 
 // Configuration
 const TARGET = __ENV.TARGET || 'http://localhost:8080';
 const RPS = parseInt(__ENV.RPS) || 10000;
 const DURATION = __ENV.DURATION || '10m';
 const RESULTS_DIR = __ENV.RESULTS_DIR || 'results/mac';
+// Optional deterministic workload from k6-tests/workload_trace.py (path relative to this script)
+const TRACE = __ENV.TRACE || '';
+
+// Trading pairs: PAIRS=N spreads orders, books and matches over N pairs whose
+// popularity follows Zipf with exponent PAIR_SKEW (0 = uniform); same names as
+// workload_trace.py. The default is BTCUSDT alone.
+const PAIR_COUNT = parseInt(__ENV.PAIRS) || 1;
+const PAIR_SKEW = __ENV.PAIR_SKEW ? parseFloat(__ENV.PAIR_SKEW) : 1.0;
+const PAIR_BASES = ['BTC', 'ETH', 'SOL', 'BNB', 'XRP', 'ADA', 'DOGE', 'AVAX', 'DOT', 'LINK', 'LTC', 'TRX', 'ATOM', 'NEAR', 'UNI', 'XLM'];
+
+function pairNames(count) {
+    const names = [];
+    for (let i = 0; i < count; i++) {
+        names.push(`${i < PAIR_BASES.length ? PAIR_BASES[i] : 'COIN' + i}USDT`);
+    }
+    return names;
+}
+
+// Cumulative Zipf weights: the k-th pair (from 1) is drawn with weight 1/k^s
+function zipfCdf(count, skew) {
+    const weights = [];
+    let total = 0;
+    for (let k = 1; k <= count; k++) {
+        total += 1 / Math.pow(k, skew);
+        weights.push(total);
+    }
+    return weights.map((w) => w / total);
+}
+
+const PAIRS = pairNames(PAIR_COUNT);
+const PAIR_CDF = zipfCdf(PAIR_COUNT, PAIR_SKEW);
 
 const TEST_USER_IDS = [
     '11111111-1111-1111-1111-111111111111',
@@ -38,10 +73,20 @@ export const options = {
         http_req_duration: ['p(90)<500', 'p(95)<1000', 'p(99)<2000'],
         errors: ['rate<0.05'],
     },
+    // Include p(99) so generate-graphs.py gets it for every Trend, incl. per-endpoint ones
+    summaryTrendStats: ['avg', 'min', 'med', 'max', 'p(90)', 'p(95)', 'p(99)'],
     noConnectionReuse: false,
     userAgent: 'k6-benchmark/1.0',
 };
 
+// Replay trace: loaded once and shared read-only across all VUs
+const trace = TRACE ? new SharedArray('trace', function () {
+    return open(TRACE)
+        .split('\n')
+        .filter((line) => line && !line.startsWith('{"op":"header"'))
+        .map((line) => JSON.parse(line));
+}) : null;
+
 // Random helpers
 function randomUser() {
     return TEST_USER_IDS[Math.floor(Math.random() * TEST_USER_IDS.length)];
@@ -55,68 +100,132 @@ function randomQuantity() {
     return (0.01 + Math.random() * 0.5).toFixed(4);
 }
 
+function randomPair() {
+    const r = Math.random();
+    let lo = 0;
+    let hi = PAIR_CDF.length - 1;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (PAIR_CDF[mid] > r) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
+        }
+    }
+    return PAIRS[lo];
+}
+
 function randomSide() {
     return Math.random() > 0.5 ? 'BUY' : 'SELL';
 }
 
+// Operations
+const headers = { 'Content-Type': 'application/json' };
+
+function createOrder(order) {
+    const payload = JSON.stringify(order);
+
+    const res = http.post(`${TARGET}/orders`, payload, { headers, timeout: '10s' });
+    createOrderLatency.add(res.timings.duration);
+
+    const success = check(res, {
+        'create order status is 201': (r) => r.status === 201,
+    });
+    errorRate.add(!success);
+    if (!success && res.status === 0) droppedRequests.add(1);
+}
+
+function getOrderBook(pair) {
+    const res = http.get(`${TARGET}/orderbook/${encodeURIComponent(pair)}`, { timeout: '10s' });
+    getOrderBookLatency.add(res.timings.duration);
+
+    const success = check(res, {
+        'get orderbook status is 200': (r) => r.status === 200,
+    });
+    errorRate.add(!success);
+    if (!success && res.status === 0) droppedRequests.add(1);
+}
+
+function getBalance(userId) {
+    const res = http.get(`${TARGET}/balance/${userId}`, { timeout: '10s' });
+    getBalanceLatency.add(res.timings.duration);
+
+    const success = check(res, {
+        'get balance status is 200': (r) => r.status === 200,
+    });
+    errorRate.add(!success);
+    if (!success && res.status === 0) droppedRequests.add(1);
+}
+
+function matchOrders(pair) {
+    const res = http.post(`${TARGET}/trades/match?pair=${encodeURIComponent(pair)}`, null, { headers, timeout: '10s' });
+    matchOrdersLatency.add(res.timings.duration);
+
+    const success = check(res, {
+        'match orders status is 200': (r) => r.status === 200,
+    });
+    errorRate.add(!success);
+    if (!success && res.status === 0) droppedRequests.add(1);
+    if (success) {
+        const body = res.json();
+        // Go answers in snake_case, Java in camelCase
+        tradesMatched.add(body.trades_executed || body.tradesExecuted || 0);
+    }
+}
+
+// The i-th iteration of the test replays the i-th trace op (wrapping around),
+// so every run sends the same requests in the same order
+function replayTraceOp() {
+    const op = trace[exec.scenario.iterationInTest % trace.length];
+
+    if (op.op === 'order') {
+        createOrder({
+            user_id: op.user_id,
+            pair: op.pair,
+            side: op.side,
+            price: op.price,
+            quantity: op.quantity
+        });
+    } else if (op.op === 'orderbook') {
+        getOrderBook(op.pair);
+    } else if (op.op === 'balance') {
+        getBalance(op.user_id);
+    } else {
+        matchOrders(op.pair);
+    }
+}
+
 // Main test function
 export default function () {
-    const headers = { 'Content-Type': 'application/json' };
-    const operation = Math.random();
-
     try {
+        if (trace) {
+            replayTraceOp();
+            return;
+        }
+
+        const operation = Math.random();
+
         if (operation < 0.3) {
             // 30% - Create Order
-            const payload = JSON.stringify({
+            createOrder({
                 user_id: randomUser(),
-                pair: 'BTCUSDT',
+                pair: randomPair(),
                 side: randomSide(),
                 price: parseFloat(randomPrice()),
                 quantity: parseFloat(randomQuantity())
             });
 
-            const res = http.post(`${TARGET}/orders`, payload, { headers, timeout: '10s' });
-            createOrderLatency.add(res.timings.duration);
-
-            const success = check(res, {
-                'create order status is 201': (r) => r.status === 201,
-            });
-            errorRate.add(!success);
-            if (!success && res.status === 0) droppedRequests.add(1);
-
         } else if (operation < 0.6) {
             // 30% - Get Order Book
-            const res = http.get(`${TARGET}/orderbook/BTCUSDT`, { timeout: '10s' });
-            getOrderBookLatency.add(res.timings.duration);
-
-            const success = check(res, {
-                'get orderbook status is 200': (r) => r.status === 200,
-            });
-            errorRate.add(!success);
-            if (!success && res.status === 0) droppedRequests.add(1);
+            getOrderBook(randomPair());
 
         } else if (operation < 0.85) {
             // 25% - Get Balance
-            const userId = randomUser();
-            const res = http.get(`${TARGET}/balance/${userId}`, { timeout: '10s' });
-            getBalanceLatency.add(res.timings.duration);
-
-            const success = check(res, {
-                'get balance status is 200': (r) => r.status === 200,
-            });
-            errorRate.add(!success);
-            if (!success && res.status === 0) droppedRequests.add(1);
+            getBalance(randomUser());
 
         } else {
             // 15% - Match Orders
-            const res = http.post(`${TARGET}/trades/match?pair=BTCUSDT`, null, { headers, timeout: '10s' });
-            matchOrdersLatency.add(res.timings.duration);
-
-            const success = check(res, {
-                'match orders status is 200': (r) => r.status === 200,
-            });
-            errorRate.add(!success);
-            if (!success && res.status === 0) droppedRequests.add(1);
+            matchOrders(randomPair());
         }
     } catch (e) {
         droppedRequests.add(1);
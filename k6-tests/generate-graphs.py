@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
 """
 Generate interactive Plotly HTML graphs and PNG images comparing Go vs Java benchmark results.
-Usage: python generate-graphs.py [results_dir]
+Usage: python generate-graphs.py [results_dir] [--force] [--jobs N] [--history [DB]] [--archive [DIR]]
+       python generate-graphs.py --all [results_root] [--force] [--jobs N] [--history [DB]] [--archive [DIR]]
+
+Figures are rendered in a process pool and skipped when their inputs are unchanged
+(see report_cache.py); `--all` regenerates every results directory under the root.
+`--history` also appends each run's metrics to the regression store (see history.py).
+`--archive` stores each run's per-request samples and summary in the columnar
+archive (see results_archive.py) and adds a cross-run trend from it to the report.
+
+If raw k6 output (`go-10k-raw.json[.gz]` / `java-10k-raw.json[.gz]`, written with
+`k6 run --out json=...`) is present it is streamed into a mergeable latency sketch
+(`<service>-10k.hdr.json`), and all sketches in the directory are merged to compute
+the report numbers instead of the handleSummary JSON.
 """
 
+import argparse
+import hashlib
 import json
+import math
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
@@ -18,6 +34,19 @@ except ImportError:
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
 
+from history import record_run
+from k6_stream import ENDPOINTS, find_raw_output, stream_sketch
+from k6_timeseries import per_second_frame, per_second_telemetry
+from latency_sketch import find_sketches, merge_sketches, save_sketch, sketch_path
+from metrics_scraper import load_metrics_profile
+from orderbook_stream import ORDERBOOK_STREAM_FILE, load_orderbook_stream
+from pair_scaling import PAIR_SCALING_DIR, PAIR_SCALING_FILE, load_pair_scaling
+from pg_profiler import load_profile
+from report_cache import ReportCache
+from saturation import SATURATION_DIR, SATURATION_FILE, load_saturation
+from steady_state import analyze, load_steady_state, save_steady_state, steady_state_path
+from telemetry import efficiency, load_telemetry, summarize
+
 # Image settings
 IMG_WIDTH = 1200
 IMG_HEIGHT = 800
@@ -49,6 +78,69 @@ def load_results(results_dir: str) -> tuple:
     return go_data, java_data
 
 
+def load_metrics(results_dir: str, service: str, data: dict, cache: ReportCache = None) -> dict:
+    """Metrics for one service, computed from mergeable latency sketches when available.
+
+    Raw k6 output is first streamed into `<service>-10k.hdr.json`; that sketch is
+    then merged with any other `<service>-*.hdr.json` (extra runs or load-generator
+    shards). Directories without sketches fall back to the handleSummary JSON.
+
+    The raw run's steady-state window is detected as well (`<service>-steady-state.json`)
+    and the metrics cover only that window; `metrics["steady_state"]` holds the
+    window and the whole-run metrics it replaced. Without a window (no plateau, or
+    no samples inside it) the metrics cover the whole run.
+    """
+    raw_path = find_raw_output(results_dir, service)
+    steady = None
+    if raw_path:
+        output = sketch_path(results_dir, service)
+        digest = cache.digest([raw_path]) if cache else None
+        if cache and cache.is_fresh(output.name, digest, output):
+            print(f"✓ Raw {service} samples unchanged, reusing {output}")
+        else:
+            print(f"✓ Streaming raw {service} samples from {raw_path}")
+            save_sketch(stream_sketch(raw_path), output)
+            if cache:
+                cache.mark(output.name, digest)
+
+        steady_path = steady_state_path(results_dir, service)
+        if cache and cache.is_fresh(steady_path.name, digest, steady_path):
+            print(f"✓ Raw {service} samples unchanged, reusing {steady_path}")
+            steady = load_steady_state(steady_path)
+        else:
+            print(f"✓ Detecting {service} steady state from {raw_path}")
+            result = analyze(raw_path)
+            if result:
+                save_steady_state(result, steady_path)
+                if cache:
+                    cache.mark(steady_path.name, digest)
+                steady = load_steady_state(steady_path)
+            else:
+                # A window left by an earlier run must not trim this one
+                print(f"⚠ No {service} steady state found, using the whole run")
+                steady_path.unlink(missing_ok=True)
+        if steady and not steady["sketch"].total_requests:
+            steady = None
+
+    sketches = find_sketches(results_dir, service)
+    if not sketches:
+        return extract_metrics(data)
+    print(f"✓ Merged {len(sketches)} {service} latency sketch(es)")
+    merged = merge_sketches(sketches)
+    if not steady:
+        return merged.metrics()
+
+    # Same merge with the raw run's own sketch swapped for its steady window
+    window = merge_sketches([p for p in sketches if Path(p) != sketch_path(results_dir, service)])
+    window.merge(steady.pop("sketch"))
+    metrics = window.metrics()
+    whole_run = merged.metrics()
+    steady["whole_run"] = {key: whole_run[key] for key in ("rps", "avg", "p95", "p99", "error_rate", "total_requests")}
+    metrics["steady_state"] = steady
+    print(f"✓ {service} steady state: {steady['start']}s-{steady['end']}s of {steady['run_s']}s")
+    return metrics
+
+
 def extract_metrics(data: dict) -> dict:
     """Extract key metrics from k6 results."""
     if not data:
@@ -59,6 +151,7 @@ def extract_metrics(data: dict) -> dict:
     http_reqs = m.get("http_reqs", {}).get("values", {})
     dropped = m.get("dropped_requests", {}).get("values", {})
     errors = m.get("errors", {}).get("values", {})
+    trades = m.get("trades_matched", {}).get("values", {})
     
     return {
         "avg": http_duration.get("avg", 0),
@@ -71,9 +164,39 @@ def extract_metrics(data: dict) -> dict:
         "rps": http_reqs.get("rate", 0),
         "dropped": dropped.get("count", 0),
         "error_rate": errors.get("rate", 0) * 100,
+        "trades_matched": trades.get("count", 0),
+        "endpoints": extract_endpoint_metrics(data),
     }
 
 
+def extract_endpoint_metrics(data: dict) -> dict:
+    """Per-endpoint metrics from the custom Trends and checks in k6 results.
+    
+    The summary has no per-endpoint request count, so it is taken from the
+    passes + fails of each endpoint's status check.
+    """
+    m = data.get("metrics", {})
+    checks = {c["name"]: c for c in data.get("root_group", {}).get("checks", [])}
+    elapsed = data.get("state", {}).get("testRunDurationMs", 0) / 1000
+    
+    endpoints = {}
+    for name, endpoint in ENDPOINTS.items():
+        trend = m.get(endpoint["trend"], {}).get("values", {})
+        check = checks.get(endpoint["check"], {})
+        requests = check.get("passes", 0) + check.get("fails", 0)
+        endpoints[name] = {
+            "avg": trend.get("avg", 0),
+            "p90": trend.get("p(90)", 0),
+            "p95": trend.get("p(95)", 0),
+            "p99": trend.get("p(99)", 0),
+            "max": trend.get("max", 0),
+            "total_requests": requests,
+            "rps": requests / elapsed if elapsed > 0 else 0,
+            "error_rate": (check.get("fails", 0) / requests * 100) if requests else 0,
+        }
+    return endpoints
+
+
 def save_figure(fig, output_path: str):
     """Save figure as both HTML and PNG."""
     # Save HTML
@@ -401,8 +524,887 @@ def create_summary_dashboard(go_metrics: dict, java_metrics: dict, output_path:
     save_figure(fig, output_path)
 
 
-def create_results_markdown(go_metrics: dict, java_metrics: dict, output_dir: str):
-    """Create a markdown file with embedded images and results."""
+def create_timeseries_chart(go_series, java_series, output_path: str, go_telemetry=None, java_telemetry=None,
+                            go_window=None, java_window=None):
+    """Create per-second RPS, latency, error and VU timelines from raw k6 samples.
+    
+    With telemetry.py samples, CPU and RSS of the service and Postgres are added below.
+    Steady-state windows ((start, end) seconds) are shaded across all rows.
+    """
+    titles = ['Requests Per Second', 'Latency P50 / P99 (ms)', 'Errors Per Second', 'Active VUs']
+    has_telemetry = any(t is not None and not t.empty for t in (go_telemetry, java_telemetry))
+    if has_telemetry:
+        titles += ['CPU (cores)', 'Memory RSS (MB)']
+    rows = len(titles)
+    fig = make_subplots(
+        rows=rows, cols=1,
+        shared_xaxes=True,
+        subplot_titles=titles,
+        vertical_spacing=0.04 if has_telemetry else 0.06
+    )
+    
+    for name, series, color in [('Go', go_series, '#00ADD8'), ('Java', java_series, '#ED8B00')]:
+        if series is None or series.empty:
+            continue
+        x = series.index
+        fig.add_trace(go.Scatter(x=x, y=series["rps"], name=f'{name} RPS', line=dict(color=color)),
+                      row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=series["p99"], name=f'{name} P99', line=dict(color=color)),
+                      row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=series["p50"], name=f'{name} P50', line=dict(color=color, dash='dot')),
+                      row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=series["errors"], name=f'{name} Errors', line=dict(color=color)),
+                      row=3, col=1)
+        fig.add_trace(go.Scatter(x=x, y=series["vus"], name=f'{name} VUs', line=dict(color=color)),
+                      row=4, col=1)
+    
+    for name, window, color in [('Go', go_window, '#00ADD8'), ('Java', java_window, '#ED8B00')]:
+        if window:
+            fig.add_vrect(x0=window[0], x1=window[1], fillcolor=color, opacity=0.08, line_width=0,
+                          annotation_text=f'{name} steady state', annotation_position='top left',
+                          row='all', col=1)
+    
+    for name, group, telemetry, color in [('Go', 'go', go_telemetry, '#00ADD8'),
+                                          ('Java', 'java', java_telemetry, '#ED8B00')]:
+        if telemetry is None or telemetry.empty:
+            continue
+        x = telemetry.index
+        for metric, row in (('cpu_cores', 5), ('rss_mb', 6)):
+            fig.add_trace(go.Scatter(x=x, y=telemetry[f'{group}_{metric}'], name=f'{name} {titles[row - 1]}',
+                                     line=dict(color=color)),
+                          row=row, col=1)
+            fig.add_trace(go.Scatter(x=x, y=telemetry[f'postgres_{metric}'],
+                                     name=f'Postgres ({name} run) {titles[row - 1]}',
+                                     line=dict(color=color, dash='dot')),
+                          row=row, col=1)
+    
+    fig.update_yaxes(type='log', row=2, col=1)
+    fig.update_xaxes(title_text='Elapsed (s)', row=rows, col=1)
+    fig.update_layout(
+        title={
+            'text': '⏱️ Per-Second Timeline: Go vs Java',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=300 * rows,
+        font=dict(size=12),
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_endpoint_comparison(go_metrics: dict, java_metrics: dict, output_path: str):
+    """Create per-endpoint latency, throughput and error rate comparison."""
+    labels = [e["label"] for e in ENDPOINTS.values()]
+    
+    def values(metrics, key):
+        if not metrics:
+            return [0] * len(ENDPOINTS)
+        endpoints = metrics.get("endpoints", {})
+        return [endpoints.get(name, {}).get(key, 0) for name in ENDPOINTS]
+    
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'P95 Latency (ms) - Lower is Better',
+            'P99 Latency (ms) - Lower is Better',
+            'Throughput (RPS) - Higher is Better',
+            'Error Rate (%) - Lower is Better'
+        ),
+        vertical_spacing=0.2,
+        horizontal_spacing=0.1
+    )
+    
+    panels = [('p95', 1, 1, '{:.1f}'), ('p99', 1, 2, '{:.1f}'), ('rps', 2, 1, '{:,.0f}'), ('error_rate', 2, 2, '{:.1f}%')]
+    for key, row, col, fmt in panels:
+        for name, metrics, color in [('Go', go_metrics, '#00ADD8'), ('Java', java_metrics, '#ED8B00')]:
+            y = values(metrics, key)
+            fig.add_trace(
+                go.Bar(name=name, x=labels, y=y, marker_color=color,
+                       text=[fmt.format(v) for v in y], textposition='outside',
+                       showlegend=(row == 1 and col == 1)),
+                row=row, col=col
+            )
+    
+    fig.update_layout(
+        title={
+            'text': '🔀 Per-Endpoint Breakdown: Go vs Java',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=900,
+        barmode='group',
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    save_figure(fig, output_path)
+
+
+def _threshold_limit(saturation_entry: dict, stat: str) -> float:
+    """The `http_req_duration` limit for e.g. 'p(99)' from the recorded SLO, or None."""
+    for expr in saturation_entry.get("slo", {}).get("http_req_duration", []):
+        name, _, limit = expr.partition('<')
+        if name == stat and limit:
+            return float(limit)
+    return None
+
+
+def create_saturation_chart(saturation: dict, output_path: str):
+    """Create latency-vs-throughput and error-vs-throughput curves from saturation.py steps."""
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=(
+            'P95 / P99 Latency (ms) vs Achieved RPS',
+            'Error Rate (%) vs Achieved RPS'
+        ),
+        horizontal_spacing=0.1
+    )
+    
+    for name, key, color in [('Go', 'go', '#00ADD8'), ('Java', 'java', '#ED8B00')]:
+        entry = saturation.get(key)
+        if not entry or not entry.get("steps"):
+            continue
+        steps = entry["steps"]
+        x = [s["rps"] for s in steps]
+        symbols = ['circle' if s["ok"] else 'x' for s in steps]
+        hover = [f'target {s["target_rps"]:,} RPS' + ('' if s["ok"] else '<br>' + '<br>'.join(s["breached"]))
+                 for s in steps]
+        fig.add_trace(go.Scatter(x=x, y=[s["p99"] for s in steps], name=f'{name} P99', mode='lines+markers',
+                                 line=dict(color=color), marker=dict(symbol=symbols, size=10), hovertext=hover),
+                      row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=[s["p95"] for s in steps], name=f'{name} P95', mode='lines+markers',
+                                 line=dict(color=color, dash='dot'), marker=dict(symbol=symbols), hovertext=hover),
+                      row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=[s["error_rate"] for s in steps], name=f'{name} Errors',
+                                 mode='lines+markers', line=dict(color=color), marker=dict(symbol=symbols, size=10),
+                                 hovertext=hover),
+                      row=1, col=2)
+        if entry.get("max_sustainable_rps"):
+            fig.add_vline(x=entry["max_sustainable_rps"], line=dict(color=color, dash='dash'),
+                          annotation_text=f'{name} max {entry["max_sustainable_rps"]:,}', row=1, col=1)
+    
+    p99_limit = next((l for l in (_threshold_limit(e, 'p(99)') for e in saturation.values()) if l), None)
+    if p99_limit:
+        fig.add_hline(y=p99_limit, line=dict(color='red', dash='dash'),
+                      annotation_text=f'P99 SLO {p99_limit:,.0f} ms', row=1, col=1)
+    
+    fig.update_yaxes(type='log', row=1, col=1)
+    fig.update_xaxes(title_text='Achieved RPS')
+    fig.update_layout(
+        title={
+            'text': '📐 Saturation Curve: Latency vs Throughput',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=600,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.08,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_pair_scaling_chart(scaling: dict, output_path: str):
+    """Create throughput and match latency vs trading pair count from pair_scaling.py runs."""
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'Achieved RPS',
+            'Trades Matched per Second',
+            'Match P95 Latency (ms)',
+            'Match P99 Latency (ms)'
+        ),
+        vertical_spacing=0.15,
+        horizontal_spacing=0.1
+    )
+    
+    for name, key, color in [('Go', 'go', '#00ADD8'), ('Java', 'java', '#ED8B00')]:
+        entry = scaling.get(key)
+        if not entry or not entry.get("points"):
+            continue
+        points = sorted(entry["points"], key=lambda p: p["pairs"])
+        x = [p["pairs"] for p in points]
+        symbols = ['circle' if p["ok"] else 'x' for p in points]
+        for row, col, field in [(1, 1, 'rps'), (1, 2, 'trades_per_sec'), (2, 1, 'match_p95'), (2, 2, 'match_p99')]:
+            fig.add_trace(go.Scatter(x=x, y=[p[field] for p in points], name=name, legendgroup=key,
+                                     showlegend=(row, col) == (1, 1), mode='lines+markers',
+                                     line=dict(color=color), marker=dict(symbol=symbols, size=10)),
+                          row=row, col=col)
+    
+    fig.update_xaxes(type='log', dtick=0.30103, title_text='Trading Pairs')
+    fig.update_layout(
+        title={
+            'text': '🔀 Pair Scaling: Throughput and Match Latency vs Pair Count',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=800,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.04,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_orderbook_stream_chart(stream: dict, output_path: str):
+    """Create update latency and delivery vs subscriber count, streaming vs polling, from orderbook_stream.py."""
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'Order to Update P50 Latency (ms)',
+            'Order to Update P99 Latency (ms)',
+            'Events / Responses per Second',
+            'Updates Delivered (%)'
+        ),
+        vertical_spacing=0.15,
+        horizontal_spacing=0.1
+    )
+    
+    for name, key, color in [('Go', 'go', '#00ADD8'), ('Java', 'java', '#ED8B00')]:
+        entry = stream.get(key)
+        if not entry or not entry.get("points"):
+            continue
+        points = sorted(entry["points"], key=lambda p: p["subscribers"])
+        x = [p["subscribers"] for p in points]
+        for mode, dash in [('stream', 'solid'), ('poll', 'dot')]:
+            if not all(mode in p for p in points):
+                continue
+            label = f'{name} {"Stream" if mode == "stream" else "Poll"}'
+            for row, col, field in [(1, 1, 'p50'), (1, 2, 'p99'), (2, 1, 'per_sec'), (2, 2, 'delivered')]:
+                fig.add_trace(go.Scatter(x=x, y=[p[mode][field] for p in points], name=label,
+                                         legendgroup=f'{key}-{mode}', showlegend=(row, col) == (1, 1),
+                                         mode='lines+markers', line=dict(color=color, dash=dash)),
+                              row=row, col=col)
+    
+    fig.update_xaxes(type='log', title_text='Subscribers')
+    fig.update_layout(
+        title={
+            'text': '📡 Order Book Fan-out: Streaming (solid) vs Polling (dotted)',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=800,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.04,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_archive_chart(runs, endpoints, output_path: str):
+    """Create latency, throughput and per-endpoint P99 across archived runs from results_archive.py."""
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'P50 / P99 Latency per Run (ms)',
+            'Achieved RPS per Run',
+            'Go Endpoint P99 per Run (ms)',
+            'Java Endpoint P99 per Run (ms)'
+        ),
+        vertical_spacing=0.15,
+        horizontal_spacing=0.1
+    )
+    
+    endpoint_colors = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A']
+    for name, key, color, col in [('Go', 'go', '#00ADD8', 1), ('Java', 'java', '#ED8B00', 2)]:
+        service_runs = runs[runs["service"] == key]
+        if service_runs.empty:
+            continue
+        # Short run keys in run order
+        labels = {run: f'{i + 1}. {run[:8]}' for i, run in enumerate(service_runs["run"])}
+        x = [labels[r] for r in service_runs["run"]]
+        for stat, dash in [('p50', 'dot'), ('p99', 'solid')]:
+            fig.add_trace(go.Scatter(x=x, y=service_runs[stat], name=f'{name} {stat.upper()}', legendgroup=key,
+                                     mode='lines+markers', line=dict(color=color, dash=dash)),
+                          row=1, col=1)
+        fig.add_trace(go.Bar(x=x, y=service_runs["rps"], name=f'{name} RPS', legendgroup=key,
+                             marker_color=color, showlegend=False),
+                      row=1, col=2)
+        if endpoints.empty:
+            continue
+        service_endpoints = endpoints[endpoints["service"] == key]
+        for i, (endpoint, label) in enumerate((n, e["label"]) for n, e in ENDPOINTS.items()):
+            points = service_endpoints[service_endpoints["endpoint"] == endpoint]
+            if points.empty:
+                continue
+            fig.add_trace(go.Scatter(x=[labels[r] for r in points["run"]], y=points["p99"], name=label,
+                                     legendgroup=endpoint, showlegend=col == 1, mode='lines+markers',
+                                     line=dict(color=endpoint_colors[i % len(endpoint_colors)])),
+                          row=2, col=col)
+    
+    fig.update_layout(
+        title={
+            'text': '🗄️ Run Archive: Latency and Throughput Across Runs',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=800,
+        font=dict(size=12),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.04,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_postgres_chart(go_profile: dict, java_profile: dict, output_path: str):
+    """Create Postgres session/lock-wait timelines and wait-event breakdown from pg_profiler.py."""
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=(
+            'Postgres Sessions: Active (solid) / Waiting on Locks (dotted)',
+            'Average Active Sessions by Wait Event Type'
+        ),
+        vertical_spacing=0.15
+    )
+    
+    for name, profile, color in [('Go', go_profile, '#00ADD8'), ('Java', java_profile, '#ED8B00')]:
+        if not profile:
+            continue
+        timeline = profile.get("timeline", [])
+        x = [t["t"] for t in timeline]
+        fig.add_trace(go.Scatter(x=x, y=[t["active"] for t in timeline], name=f'{name} Active',
+                                 line=dict(color=color)),
+                      row=1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=[t["lock_waiting"] for t in timeline], name=f'{name} Lock Waiting',
+                                 line=dict(color=color, dash='dot')),
+                      row=1, col=1)
+        
+        by_type = {}
+        for w in profile.get("waits", []):
+            by_type[w["wait_event_type"]] = by_type.get(w["wait_event_type"], 0) + w["avg_sessions"]
+        fig.add_trace(go.Bar(name=name, x=list(by_type), y=list(by_type.values()), marker_color=color,
+                             text=[f'{v:.1f}' for v in by_type.values()], textposition='outside'),
+                      row=2, col=1)
+    
+    fig.update_xaxes(title_text='Elapsed (s)', row=1, col=1)
+    fig.update_layout(
+        title={
+            'text': '🐘 Postgres Profile: Go vs Java',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=900,
+        barmode='group',
+        font=dict(size=12),
+    )
+    
+    save_figure(fig, output_path)
+
+
+def create_server_timing_chart(go_server: dict, java_server: dict, go_metrics: dict, java_metrics: dict,
+                               output_path: str):
+    """Create client vs server latency per endpoint and the in-flight/pool timeline from metrics_scraper.py."""
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=(
+            'Mean Latency per Endpoint: k6 Client (solid) vs Server Handler (light)',
+            'Requests in Flight (solid) / Pool Connections Acquired (dotted)'
+        ),
+        vertical_spacing=0.15
+    )
+    
+    labels = [endpoint["label"] for endpoint in ENDPOINTS.values()]
+    for name, server, metrics, color in [('Go', go_server, go_metrics, '#00ADD8'),
+                                         ('Java', java_server, java_metrics, '#ED8B00')]:
+        if not server:
+            continue
+        client = (metrics or {}).get("endpoints", {})
+        fig.add_trace(go.Bar(name=f'{name} Client', x=labels,
+                             y=[client.get(e, {}).get("avg", 0) for e in ENDPOINTS], marker_color=color),
+                      row=1, col=1)
+        fig.add_trace(go.Bar(name=f'{name} Server', x=labels,
+                             y=[server["endpoints"].get(e, {}).get("mean_ms", 0) for e in ENDPOINTS],
+                             marker_color=color, opacity=0.45),
+                      row=1, col=1)
+        
+        timeline = server.get("timeline", [])
+        x = [t["t"] for t in timeline]
+        fig.add_trace(go.Scatter(x=x, y=[t["in_flight"] for t in timeline], name=f'{name} In Flight',
+                                 line=dict(color=color)),
+                      row=2, col=1)
+        fig.add_trace(go.Scatter(x=x, y=[t["pool_acquired"] for t in timeline], name=f'{name} Pool Acquired',
+                                 line=dict(color=color, dash='dot')),
+                      row=2, col=1)
+    
+    fig.update_yaxes(title_text='Latency (ms)', type='log', row=1, col=1)
+    fig.update_xaxes(title_text='Elapsed (s)', row=2, col=1)
+    fig.update_layout(
+        title={
+            'text': '🔬 Server vs Client Time: Go vs Java',
+            'x': 0.5,
+            'font': {'size': 24}
+        },
+        template='plotly_white',
+        height=900,
+        barmode='group',
+        font=dict(size=12),
+    )
+    
+    save_figure(fig, output_path)
+
+
+def endpoint_section(go_metrics: dict, java_metrics: dict) -> str:
+    """RESULTS.md section with the per-endpoint table and chart."""
+    
+    def cell(metrics, name, key, fmt):
+        if not metrics or name not in metrics.get("endpoints", {}):
+            return 'N/A'
+        return fmt.format(metrics["endpoints"][name][key])
+    
+    rows = []
+    for name, endpoint in ENDPOINTS.items():
+        rows.append(
+            f'| `{endpoint["label"]}` '
+            f'| {cell(go_metrics, name, "rps", "{:,.0f}")} | {cell(java_metrics, name, "rps", "{:,.0f}")} '
+            f'| {cell(go_metrics, name, "p95", "{:.2f} ms")} | {cell(java_metrics, name, "p95", "{:.2f} ms")} '
+            f'| {cell(go_metrics, name, "p99", "{:.2f} ms")} | {cell(java_metrics, name, "p99", "{:.2f} ms")} '
+            f'| {cell(go_metrics, name, "error_rate", "{:.2f}%")} | {cell(java_metrics, name, "error_rate", "{:.2f}%")} |'
+        )
+    table = "\n".join(rows)
+    
+    return f"""## 🔀 Per-Endpoint Breakdown
+
+`/trades/match` locks rows with `FOR UPDATE SKIP LOCKED` and `/orderbook` runs two `GROUP BY price` aggregations, so each endpoint hits a different scaling limit.
+
+| Endpoint | Go RPS | Java RPS | Go P95 | Java P95 | Go P99 | Java P99 | Go Errors | Java Errors |
+|----------|--------|----------|--------|----------|--------|----------|-----------|-------------|
+{table}
+
+![Per-Endpoint Breakdown](./endpoints.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Endpoint Chart](./endpoints.html)
+
+</details>
+
+---
+
+"""
+
+
+def steady_state_section(go_metrics: dict, java_metrics: dict) -> str:
+    """RESULTS.md section with each service's steady-state window and what trimming changed."""
+    rows = []
+    for name, metrics in [('Go', go_metrics), ('Java', java_metrics)]:
+        steady = (metrics or {}).get("steady_state")
+        if not steady:
+            continue
+        whole = steady["whole_run"]
+        rows.append(
+            f'| **{name}** | **{steady["time_to_steady_s"]} s** | {steady["start"]}-{steady["end"]} s '
+            f'({steady["steady_s"]} of {steady["run_s"]} s) | {steady["cooldown_s"]} s '
+            f'| {len(steady["changepoints"])} | {whole["rps"]:,.0f} → {metrics["rps"]:,.0f} '
+            f'| {whole["p95"]:.2f} → {metrics["p95"]:.2f} ms | {whole["p99"]:.2f} → {metrics["p99"]:.2f} ms '
+            f'| {whole["error_rate"]:.2f}% → {metrics["error_rate"]:.2f}% |'
+        )
+    table = "\n".join(rows)
+    
+    return f"""## 🎯 Steady State
+
+Every metric in this report covers only the steady-state window of the measured run, found by `steady_state.py`: changepoint detection (PELT) on per-second RPS and P50/P99 latency, keeping the longest stable segment plus neighbours within 5% RPS / 25% P50 / 50% P99 of it. **Time to Steady State** is how long after the first request the service settled (JIT compilation, GC sizing, pool fill), measured rather than assumed from the warmup phase. The window is shaded on the timeline.
+
+| Service | Time to Steady State | Steady Window | Cool-down Trimmed | Changepoints | RPS (whole run → steady) | P95 | P99 | Errors |
+|---------|----------------------|---------------|-------------------|--------------|--------------------------|-----|-----|--------|
+{table}
+
+---
+
+"""
+
+
+def timeseries_section(telemetry: bool = False) -> str:
+    """RESULTS.md section for the per-second timeline chart."""
+    resources = " CPU and RSS of each service and Postgres, sampled from `/proc` by `telemetry.py`, are plotted on the same axis." if telemetry else ""
+    return f"""## ⏱️ Per-Second Timeline
+
+Requests per second, P50/P99 latency, errors and active VUs for every second of the run, from raw k6 samples. Warmup ramps, GC stalls and the onset of errors show up here even when the averages look flat.{resources}
+
+![Per-Second Timeline](./timeseries.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Timeline](./timeseries.html)
+
+</details>
+
+---
+
+"""
+
+
+def saturation_section(saturation: dict) -> str:
+    """RESULTS.md section for the saturation curve."""
+    rows = []
+    for name, key in [('Go', 'go'), ('Java', 'java')]:
+        entry = saturation.get(key)
+        if not entry or not entry.get("steps"):
+            continue
+        steps = entry["steps"]
+        limit = entry.get("max_sustainable_rps", 0)
+        first_fail = next((s for s in steps if not s["ok"] and s["target_rps"] > limit), None)
+        breached = ', '.join(f'`{b}`' for b in first_fail["breached"]) if first_fail else 'none up to max tested'
+        rows.append(f'| **{name}** | {limit:,} | {len(steps)} | {max(s["target_rps"] for s in steps):,} | {breached} |')
+    table = "\n".join(rows)
+    
+    return f"""## 📐 Saturation Point
+
+Highest constant arrival rate each service sustained while meeting every `options.thresholds` SLO in `10k-benchmark.js` (and reaching 95% of the target rate), found by `saturation.py` stepping and bisecting the rate.
+
+| Service | Max Sustainable RPS | Steps | Highest Rate Tried | First Breach |
+|---------|---------------------|-------|--------------------|--------------|
+{table}
+
+![Saturation Curve](./saturation.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Saturation Chart](./saturation.html)
+
+</details>
+
+---
+
+"""
+
+
+def efficiency_section(go_metrics: dict, java_metrics: dict, go_usage: dict, java_usage: dict) -> str:
+    """RESULTS.md section with resource use and RPS per core / per GB from telemetry.py."""
+    rows = []
+    for name, metrics, usage in [('Go', go_metrics, go_usage), ('Java', java_metrics, java_usage)]:
+        if not metrics or not usage:
+            continue
+        eff = efficiency(metrics['rps'], usage)
+        rows.append(
+            f"| **{name}** | {usage['app_cpu']:.2f} / {usage['app_cpu_peak']:.2f} of {usage['cpu_count']:.0f} "
+            f"| {usage['app_rss_mb']:,.0f} / {usage['app_rss_peak_mb']:,.0f} MB | {usage['app_procs']:.0f} "
+            f"| {usage['db_cpu']:.2f} | {usage['db_procs_peak']:.0f} | {usage['cpu_busy_pct']:.0f}% "
+            f"| {eff['rps_per_core']:,.0f} | {eff['rps_per_core_with_db']:,.0f} | {eff['rps_per_gb']:,.0f} |"
+        )
+    table = "\n".join(rows)
+    
+    return f"""## ⚡ Resource Efficiency
+
+Average / peak resource use during the measured run, sampled from `/proc` by `telemetry.py`. Go counts the prefork parent and all children; Postgres counts the server and every backend.
+
+| Service | App CPU avg / peak (cores) | App RSS avg / peak | App Processes | Postgres CPU (cores) | Postgres Processes | Host CPU Busy | RPS / App Core | RPS / Core (App + DB) | RPS / GB RSS |
+|---------|----------------------------|--------------------|---------------|----------------------|--------------------|---------------|----------------|-----------------------|--------------|
+{table}
+
+---
+
+"""
+
+
+def _statement_rows(profile: dict, limit: int) -> str:
+    rows = []
+    for stmt in profile.get("statements", [])[:limit]:
+        query = stmt["query"].replace('|', '\\|')
+        if len(query) > 90:
+            query = query[:87] + '...'
+        waits = stmt.get("wait_samples", {})
+        top_wait = max(waits, key=waits.get) if waits else '-'
+        rows.append(
+            f'| `{query}` | {stmt["calls"]:,} | {stmt["total_ms"] / 1000:,.1f} | {stmt["mean_ms"]:.2f} '
+            f'| {stmt["rows"]:,} | {stmt["lock_wait_s"]:,.1f} | {top_wait} |'
+        )
+    return "\n".join(rows)
+
+
+def pair_scaling_section(scaling: dict) -> str:
+    """RESULTS.md section for the pair-scaling curve ('' if no service has points)."""
+    rows = []
+    settings = None
+    for name, key in [('Go', 'go'), ('Java', 'java')]:
+        entry = scaling.get(key)
+        if not entry or not entry.get("points"):
+            continue
+        settings = settings or entry
+        points = sorted(entry["points"], key=lambda p: p["pairs"])
+        base = points[0]
+        for p in points:
+            # Trades/s relative to the smallest pair count, per added pair factor
+            growth = p["trades_per_sec"] / base["trades_per_sec"] if base["trades_per_sec"] else 0
+            efficiency = growth / (p["pairs"] / base["pairs"]) * 100
+            status = '✅' if p["ok"] else '❌'
+            rows.append(f'| **{name}** | {p["pairs"]} | {p["rps"]:,.0f} | {p["trades_per_sec"]:,.0f} | '
+                        f'{growth:.2f}x | {efficiency:.0f}% | {p["match_p95"]:.2f} | {p["match_p99"]:.2f} | '
+                        f'{p["create_order_p95"]:.2f} | {p["error_rate"]:.2f}% | {status} |')
+    if settings is None:
+        # e.g. an aborted sweep that wrote the file before its first point
+        return ""
+    table = "\n".join(rows)
+
+    return f"""## 🔀 Pair Scaling
+
+Same arrival rate ({settings["rps"]:,} RPS for {settings["duration"]} per run) spread over a growing number of trading pairs whose popularity follows Zipf with exponent {settings["skew"]}, from `pair_scaling.py`. Matching runs in one lane per pair, so trades/s should grow with the pair count while match latency falls; scaling efficiency is the trades/s growth over the smallest pair count divided by the growth in pairs.
+
+| Service | Pairs | Achieved RPS | Trades/s | Trades/s Growth | Scaling Efficiency | Match P95 (ms) | Match P99 (ms) | Create Order P95 (ms) | Errors | SLO |
+|---------|-------|--------------|----------|-----------------|--------------------|----------------|----------------|-----------------------|--------|-----|
+{table}
+
+![Pair Scaling](./pair-scaling.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Pair Scaling Chart](./pair-scaling.html)
+
+</details>
+
+---
+
+"""
+
+
+def orderbook_stream_section(stream: dict) -> str:
+    """RESULTS.md section comparing streamed order book updates with polling ('' if no service has points)."""
+    rows = []
+    settings = None
+    for name, key in [('Go', 'go'), ('Java', 'java')]:
+        entry = stream.get(key)
+        if not entry or not entry.get("points"):
+            continue
+        settings = settings or entry
+        for p in sorted(entry["points"], key=lambda p: p["subscribers"]):
+            for mode, label in [('stream', 'Stream'), ('poll', 'Poll')]:
+                r = p.get(mode)
+                if not r:
+                    continue
+                lost = f'{r["dropped"]} dropped, {r["gaps"]} gaps' if mode == 'stream' else '-'
+                rows.append(f'| **{name}** | {label} | {p["subscribers"]:,} | {r["p50"]:.1f} | {r["p95"]:.1f} | '
+                            f'{r["p99"]:.1f} | {r["delivered"]:.1f}% | {r["per_sec"]:,.0f} | '
+                            f'{r["mb_received"]:.1f} | {lost} | {r["errors"]} |')
+    if settings is None:
+        return ""
+    table = "\n".join(rows)
+    poll = (f'; the polling baseline fetches `GET /orderbook` every {settings["poll_interval_ms"]:g} ms per client'
+            if settings.get("poll_interval_ms") else '')
+
+    return f"""## 📡 Order Book Streaming
+
+{settings["orders"]} orders posted at {settings["rate"]:g}/s at new top-of-book bid prices of {settings["pair"]} while N clients follow `GET /orderbook/{{pair}}/stream` (snapshot, then diffs with sequence numbers), from `orderbook_stream.py`. Latency runs from sending the order to the client seeing its price level{poll}. Streams cost the server one event per change per client whatever the client count; polling costs one full book per interval per client and adds up to an interval of delay.
+
+| Service | Mode | Clients | P50 (ms) | P95 (ms) | P99 (ms) | Delivered | Events or Responses/s | MB Received | Lost | Errors |
+|---------|------|---------|----------|----------|----------|-----------|-----------------------|-------------|------|--------|
+{table}
+
+![Order Book Streaming](./orderbook-stream.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Order Book Streaming Chart](./orderbook-stream.html)
+
+</details>
+
+---
+
+"""
+
+
+def archive_section(runs, run_keys: dict) -> str:
+    """RESULTS.md section listing this environment's latest archived runs."""
+    rows = []
+    for name, key in [('Go', 'go'), ('Java', 'java')]:
+        for run in runs[runs["service"] == key].itertuples():
+            current = ' ◀' if run_keys.get(key) == run.run else ''
+            p50 = '-' if math.isnan(run.p50) else f'{run.p50:.2f}'
+            commit = run.commit if isinstance(run.commit, str) else '-'
+            rows.append(f'| **{name}** | `{run.run[:8]}`{current} | {run.recorded_at:%Y-%m-%d %H:%M} | '
+                        f'`{commit}` | {run.samples:,} | {run.rps:,.0f} | {p50} | {run.p95:.2f} | '
+                        f'{run.p99:.2f} | {run.error_rate:.2f}% |')
+    table = "\n".join(rows)
+    
+    return f"""## 🗄️ Run Archive
+
+The latest archived runs of this environment (◀ is this report's), from the per-request samples kept by `results_archive.py`; runs archived without raw k6 output show their summary numbers. Query the archive directly with `python results_archive.py query --last 5 --by run,endpoint`.
+
+| Service | Run | Recorded (UTC) | Commit | Samples | Achieved RPS | P50 (ms) | P95 (ms) | P99 (ms) | Errors |
+|---------|-----|----------------|--------|---------|--------------|----------|----------|----------|--------|
+{table}
+
+![Run Archive](./archive-runs.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Run Archive Chart](./archive-runs.html)
+
+</details>
+
+---
+
+"""
+
+
+def postgres_section(go_profile: dict, java_profile: dict, limit: int = 10) -> str:
+    """RESULTS.md section with per-query time/calls/rows/lock waits and connection pressure."""
+    summary = []
+    statements = []
+    for name, profile in [('Go', go_profile), ('Java', java_profile)]:
+        if not profile:
+            continue
+        conn = profile["connections"]
+        db = profile["database"]
+        waits = profile.get("waits", [])
+        top = f'{waits[0]["wait_event_type"]}:{waits[0]["wait_event"] or "-"}' if waits else '-'
+        summary.append(
+            f'| **{name}** | {conn["peak_total"]} / {conn["max_connections"]} | {conn["peak_active"]} '
+            f'| {conn["peak_idle_in_transaction"]} | {conn["peak_lock_waiting"]} | {conn["peak_blocked"]} '
+            f'| {db.get("deadlocks", 0):,} | {db.get("xact_rollback", 0):,} | {top} |'
+        )
+        statements.append(f"""### {name}: Top Statements by Total Time
+
+| Statement | Calls | Total (s) | Mean (ms) | Rows | Lock Wait (s) | Top Wait |
+|-----------|-------|-----------|-----------|------|---------------|----------|
+{_statement_rows(profile, limit)}
+""")
+    summary_table = "\n".join(summary)
+    statement_tables = "\n".join(statements)
+    
+    return f"""## 🐘 Postgres Profile
+
+Collected during the measured run by `pg_profiler.py`: `pg_stat_statements` and `pg_stat_database` deltas, with `pg_stat_activity` and `pg_locks` sampled every second. Connections pinned at `max_connections` point to pool exhaustion; many sessions waiting on `Lock` point to row contention. Lock wait per statement is estimated from sampled sessions, so it is only approximate.
+
+| Service | Peak Connections / Max | Peak Active | Peak Idle in Tx | Peak Lock Waiting | Peak Blocked | Deadlocks | Rollbacks | Top Wait Event |
+|---------|------------------------|-------------|-----------------|-------------------|--------------|-----------|-----------|----------------|
+{summary_table}
+
+{statement_tables}
+![Postgres Profile](./pg-profile.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Postgres Chart](./pg-profile.html)
+
+</details>
+
+---
+
+"""
+
+
+def server_timing_section(go_server: dict, java_server: dict, go_metrics: dict, java_metrics: dict,
+                          limit: int = 8) -> str:
+    """RESULTS.md section splitting k6 latency into server time and time outside the server."""
+    endpoint_rows = []
+    summary = []
+    db_tables = []
+    for name, server, metrics in [('Go', go_server, go_metrics), ('Java', java_server, java_metrics)]:
+        if not server:
+            continue
+        client = (metrics or {}).get("endpoints", {})
+        for key, endpoint in ENDPOINTS.items():
+            s = server["endpoints"].get(key)
+            c = client.get(key)
+            if not s:
+                continue
+            outside = f'{c["avg"] - s["mean_ms"]:.2f} ms' if c else 'N/A'
+            client_avg = f'{c["avg"]:.2f} ms' if c else 'N/A'
+            client_p95 = f'{c["p95"]:.2f} ms' if c else 'N/A'
+            endpoint_rows.append(
+                f'| **{name}** | `{endpoint["label"]}` | {s["count"]:,} | {client_avg} | {s["mean_ms"]:.2f} ms '
+                f'| {outside} | {client_p95} | {s["p95_ms"]:.2f} ms | {s["p99_ms"]:.2f} ms |'
+            )
+        pool = server["pool"]
+        gc = server["gc"]
+        summary.append(
+            f'| **{name}** | {server["workers"]} | {pool["peak_acquired"]:.0f} / {pool["max_conns"]:.0f} '
+            f'| {pool["acquire_wait_ms"]:.2f} ms | {server["admission"]["peak_in_flight"]:.0f} '
+            f'| {server["admission"]["rejected"]:,} | {gc["pause_s"]:.2f} s ({gc["pause_pct"]:.2f}%) '
+            f'| {gc["peak_heap_mb"]:,.0f} MB |'
+        )
+        ops = "\n".join(
+            f'| `{op}` | {d["count"]:,} | {d["count"] * d["mean_ms"] / 1000:,.1f} | {d["mean_ms"]:.2f} '
+            f'| {d["p95_ms"]:.2f} | {d["p99_ms"]:.2f} |'
+            for op, d in list(server["db"].items())[:limit]
+        )
+        db_tables.append(f"""### {name}: DB Time by Operation
+
+| Operation | Calls | Total (s) | Mean (ms) | P95 (ms) | P99 (ms) |
+|-----------|-------|-----------|-----------|----------|----------|
+{ops}
+""")
+    endpoint_table = "\n".join(endpoint_rows)
+    summary_table = "\n".join(summary)
+    db_section = "\n".join(db_tables)
+    
+    return f"""## 🔬 Server vs Client Time
+
+Scraped from each service's `GET /metrics` during the run by `metrics_scraper.py`. Server time is measured inside the handler; the rest of k6's latency (**Outside Server**) is spent in the network, the accept queue and the load generator itself. A large gap with a small server time means the bottleneck is in front of the handler, not in it. Server percentiles are interpolated from histogram buckets.
+
+| Service | Endpoint | Requests | Client Avg | Server Mean | Outside Server | Client P95 | Server P95 | Server P99 |
+|---------|----------|----------|------------|-------------|----------------|------------|------------|------------|
+{endpoint_table}
+
+| Service | Workers | Peak Pool Acquired / Max | Pool Acquire Wait | Peak In Flight | Rejected (503) | GC Pause | Peak Heap |
+|---------|---------|--------------------------|-------------------|----------------|----------------|----------|-----------|
+{summary_table}
+
+{db_section}
+![Server vs Client Time](./server-timing.png)
+
+<details>
+<summary>View Interactive Chart</summary>
+
+[Open Interactive Server Timing Chart](./server-timing.html)
+
+</details>
+
+---
+
+"""
+
+
+def create_results_markdown(go_metrics: dict, java_metrics: dict, output_dir: str, extra_sections: list = None):
+    """Create a markdown file with embedded images and results.
+    
+    `extra_sections` are markdown blocks inserted after the full dashboard.
+    """
+    extra = "".join(extra_sections or [])
     
     def calc_advantage(go_val, java_val, lower_is_better=True):
         if go_val == 0 or java_val == 0:
@@ -433,6 +1435,7 @@ def create_results_markdown(go_metrics: dict, java_metrics: dict, output_dir: st
 | **P95 Latency** | {go_metrics["p95"]:.2f} ms | {java_metrics["p95"]:.2f} ms | **{calc_advantage(go_metrics["p95"], java_metrics["p95"])}** |
 | **Error Rate** | {go_metrics["error_rate"]:.2f}% | {java_metrics["error_rate"]:.2f}% | ✅ |
 | **Dropped Requests** | {go_metrics["dropped"]:,} | {java_metrics["dropped"]:,} | ✅ |
+| **Trades Matched** | {go_metrics.get("trades_matched", 0):,} | {java_metrics.get("trades_matched", 0):,} | — |
 | **Total Requests** | {go_metrics["total_requests"]:,} | {java_metrics["total_requests"]:,} | **{calc_advantage(go_metrics["total_requests"], java_metrics["total_requests"], False)}** |
 
 ---
@@ -489,7 +1492,7 @@ def create_results_markdown(go_metrics: dict, java_metrics: dict, output_dir: st
 
 ---
 
-## 🔧 Go Optimizations Applied
+{extra}## 🔧 Go Optimizations Applied
 
 | Optimization | Description | Impact |
 |--------------|-------------|--------|
@@ -542,38 +1545,287 @@ Key takeaways:
     print(f"✓ Created: {md_path}")
 
 
-def main():
-    results_dir = sys.argv[1] if len(sys.argv) > 1 else "results/mac"
+def render_timeseries(go_raw: str, java_raw: str, output_path: str, go_telemetry: str = None,
+                      java_telemetry: str = None, go_window: tuple = None, java_window: tuple = None):
+    """Bucket raw samples (and telemetry) per second and render the timeline (runs in a pool worker)."""
+    go_series = per_second_frame(go_raw) if go_raw else None
+    java_series = per_second_frame(java_raw) if java_raw else None
+    go_usage = java_usage = None
+    if go_telemetry and go_series is not None and not go_series.empty:
+        go_usage = per_second_telemetry(go_telemetry, go_series.attrs["start"])
+    if java_telemetry and java_series is not None and not java_series.empty:
+        java_usage = per_second_telemetry(java_telemetry, java_series.attrs["start"])
+    create_timeseries_chart(go_series, java_series, output_path, go_usage, java_usage, go_window, java_window)
+
+
+def steady_window(metrics: dict) -> tuple:
+    steady = (metrics or {}).get("steady_state")
+    return (steady["start"], steady["end"]) if steady else None
+
+
+def find_results_dirs(root: str) -> list:
+    """Every directory under root holding k6 summaries, raw output or sketches."""
+    patterns = ("*-10k-results.json", "*-10k-raw.json*", "*.hdr.json")
+    dirs = set()
+    for pattern in patterns:
+        # Per-step summaries written by saturation.py and pair_scaling.py are not reports of their own
+        dirs.update(str(p.parent) for p in Path(root).rglob(pattern)
+                    if SATURATION_DIR not in p.parent.parts and PAIR_SCALING_DIR not in p.parent.parts)
+    return sorted(dirs)
+
+
+def generate_report(results_dir: str, executor, force: bool = False, history_db: str = None,
+                    archive_root: str = None):
+    """Render one results directory, submitting stale figures to the executor.
     
+    With `history_db`, each service's metrics are appended to the history store,
+    keyed by the content hash of its inputs so re-renders don't add duplicates.
+    With `archive_root`, each service's raw samples and metrics are archived under
+    the same key and the report gets this environment's trend across archived runs.
+    
+    Returns (cache, pending) where pending is a list of (name, digest, future);
+    the caller marks each figure in the cache once its future succeeds.
+    """
     print(f"\n📊 Generating benchmark graphs from: {results_dir}\n")
+    cache = ReportCache(results_dir, force)
     
     go_data, java_data = load_results(results_dir)
     
-    if not go_data and not java_data:
-        print("\n❌ No benchmark results found. Run benchmarks first.")
-        sys.exit(1)
-    
-    go_metrics = extract_metrics(go_data)
-    java_metrics = extract_metrics(java_data)
+    go_metrics = load_metrics(results_dir, "go", go_data, cache)
+    java_metrics = load_metrics(results_dir, "java", java_data, cache)
     
-    print("\n📈 Generating graphs (HTML + PNG)...\n")
+    if not go_metrics and not java_metrics:
+        print(f"\n❌ No benchmark results found in {results_dir}. Run benchmarks first.")
+        return cache, None
     
     output_dir = Path(results_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    create_latency_comparison(go_metrics, java_metrics, str(output_dir / "latency-comparison.html"))
-    create_throughput_comparison(go_metrics, java_metrics, str(output_dir / "throughput-comparison.html"))
-    create_dropped_requests_chart(go_metrics, java_metrics, str(output_dir / "dropped-requests.html"))
-    create_summary_dashboard(go_metrics, java_metrics, str(output_dir / "summary.html"))
+    go_raw = find_raw_output(results_dir, "go")
+    java_raw = find_raw_output(results_dir, "java")
+    summary_inputs = [
+        output_dir / "go-10k-results.json",
+        output_dir / "java-10k-results.json",
+        *find_sketches(results_dir, "go"),
+        *find_sketches(results_dir, "java"),
+        steady_state_path(results_dir, "go"),
+        steady_state_path(results_dir, "java"),
+    ]
+    raw_inputs = [go_raw, java_raw]
+    go_telemetry = output_dir / "go-telemetry.csv"
+    java_telemetry = output_dir / "java-telemetry.csv"
+    telemetry_inputs = [p for p in (go_telemetry, java_telemetry) if p.exists()]
+    go_pgprofile = output_dir / "go-pgprofile.json"
+    java_pgprofile = output_dir / "java-pgprofile.json"
+    pgprofile_inputs = [p for p in (go_pgprofile, java_pgprofile) if p.exists()]
+    go_server_metrics = output_dir / "go-server-metrics.json"
+    java_server_metrics = output_dir / "java-server-metrics.json"
+    server_inputs = [p for p in (go_server_metrics, java_server_metrics) if p.exists()]
+    
+    env = output_dir.resolve().name
+    run_keys = {}
+    for service, metrics in [("go", go_metrics), ("java", java_metrics)]:
+        if metrics:
+            inputs = [output_dir / f"{service}-10k-results.json", *find_sketches(results_dir, service)]
+            run_keys[service] = cache.digest(inputs, scripts=False)
+    if history_db:
+        for service, metrics in [("go", go_metrics), ("java", java_metrics)]:
+            if metrics and record_run(history_db, metrics, service, env, run_keys[service]):
+                print(f"✓ Recorded {service} run in {history_db}")
+    if archive_root:
+        try:
+            # Only --archive needs pyarrow
+            from results_archive import archive_run, run_trend
+        except ImportError as e:
+            print(f"⚠ --archive needs pyarrow ({e}); skipping the archive")
+            archive_root = None
+    if archive_root:
+        for service, metrics, raw in [("go", go_metrics, go_raw), ("java", java_metrics, java_raw)]:
+            if metrics and archive_run(archive_root, raw, metrics, service, env, run_keys[service]):
+                print(f"✓ Archived {service} run in {archive_root}")
+    
+    figures = [
+        ("latency-comparison.html", create_latency_comparison, summary_inputs),
+        ("throughput-comparison.html", create_throughput_comparison, summary_inputs),
+        ("dropped-requests.html", create_dropped_requests_chart, summary_inputs),
+        ("summary.html", create_summary_dashboard, summary_inputs),
+        ("endpoints.html", create_endpoint_comparison, summary_inputs),
+    ]
+    extra_sections = []
+    if any(m and m.get("steady_state") for m in (go_metrics, java_metrics)):
+        extra_sections.append(steady_state_section(go_metrics, java_metrics))
+    extra_sections.append(endpoint_section(go_metrics, java_metrics))
+    if telemetry_inputs:
+        go_usage = summarize(load_telemetry(go_telemetry), "go") if go_telemetry.exists() else {}
+        java_usage = summarize(load_telemetry(java_telemetry), "java") if java_telemetry.exists() else {}
+        extra_sections.append(efficiency_section(go_metrics, java_metrics, go_usage, java_usage))
+    
+    print("\n📈 Generating graphs (HTML + PNG)...\n")
+    
+    pending = []
+    for name, func, inputs in figures:
+        output_path = str(output_dir / name)
+        digest = cache.digest(inputs)
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+            continue
+        pending.append((name, digest, executor.submit(func, go_metrics, java_metrics, output_path)))
     
-    print("\n📝 Generating RESULTS.md...\n")
-    create_results_markdown(go_metrics, java_metrics, results_dir)
+    if go_raw or java_raw:
+        name = "timeseries.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest(raw_inputs + telemetry_inputs)
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            print("⏱️ Bucketing raw samples per second...")
+            future = executor.submit(render_timeseries, str(go_raw) if go_raw else None,
+                                     str(java_raw) if java_raw else None, output_path,
+                                     str(go_telemetry) if go_telemetry.exists() else None,
+                                     str(java_telemetry) if java_telemetry.exists() else None,
+                                     steady_window(go_metrics), steady_window(java_metrics))
+            pending.append((name, digest, future))
+        extra_sections.append(timeseries_section(bool(telemetry_inputs)))
+    
+    saturation_path = output_dir / SATURATION_FILE
+    saturation = load_saturation(results_dir)
+    if saturation:
+        name = "saturation.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest([saturation_path])
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            pending.append((name, digest, executor.submit(create_saturation_chart, saturation, output_path)))
+        extra_sections.append(saturation_section(saturation))
+    
+    pair_scaling_path = output_dir / PAIR_SCALING_FILE
+    pair_scaling = load_pair_scaling(results_dir)
+    section = pair_scaling_section(pair_scaling) if pair_scaling else ""
+    if section:
+        name = "pair-scaling.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest([pair_scaling_path])
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            pending.append((name, digest, executor.submit(create_pair_scaling_chart, pair_scaling, output_path)))
+        extra_sections.append(section)
+    
+    orderbook_stream_path = output_dir / ORDERBOOK_STREAM_FILE
+    orderbook_stream = load_orderbook_stream(results_dir)
+    section = orderbook_stream_section(orderbook_stream) if orderbook_stream else ""
+    if section:
+        name = "orderbook-stream.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest([orderbook_stream_path])
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            pending.append((name, digest, executor.submit(create_orderbook_stream_chart, orderbook_stream,
+                                                          output_path)))
+        extra_sections.append(section)
+    
+    archive_digest = None
+    if archive_root:
+        archive_runs, archive_endpoints = run_trend(archive_root, env)
+        if not archive_runs.empty:
+            # Archived runs never change, so their keys stand in for the files
+            keys = ",".join(sorted(archive_runs["run"]))
+            archive_digest = hashlib.sha256(f"{cache.digest([])}:{keys}".encode()).hexdigest()
+            name = "archive-runs.html"
+            output_path = str(output_dir / name)
+            if cache.is_fresh(name, archive_digest, output_path, output_path.replace('.html', '.png')):
+                print(f"✓ Unchanged: {output_path}")
+            else:
+                pending.append((name, archive_digest, executor.submit(create_archive_chart, archive_runs,
+                                                                      archive_endpoints, output_path)))
+            extra_sections.append(archive_section(archive_runs, run_keys))
+    
+    if pgprofile_inputs:
+        go_profile = load_profile(go_pgprofile) if go_pgprofile.exists() else None
+        java_profile = load_profile(java_pgprofile) if java_pgprofile.exists() else None
+        name = "pg-profile.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest(pgprofile_inputs)
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            pending.append((name, digest, executor.submit(create_postgres_chart, go_profile, java_profile,
+                                                          output_path)))
+        extra_sections.append(postgres_section(go_profile, java_profile))
+    
+    if server_inputs:
+        go_server = load_metrics_profile(go_server_metrics) if go_server_metrics.exists() else None
+        java_server = load_metrics_profile(java_server_metrics) if java_server_metrics.exists() else None
+        name = "server-timing.html"
+        output_path = str(output_dir / name)
+        digest = cache.digest(summary_inputs + server_inputs)
+        if cache.is_fresh(name, digest, output_path, output_path.replace('.html', '.png')):
+            print(f"✓ Unchanged: {output_path}")
+        else:
+            pending.append((name, digest, executor.submit(create_server_timing_chart, go_server, java_server,
+                                                          go_metrics, java_metrics, output_path)))
+        extra_sections.append(server_timing_section(go_server, java_server, go_metrics, java_metrics))
+    
+    md_path = output_dir / "RESULTS.md"
+    digest = cache.digest(summary_inputs + raw_inputs + telemetry_inputs + pgprofile_inputs + server_inputs
+                          + [saturation_path, pair_scaling_path, orderbook_stream_path])
+    if archive_digest:
+        digest += archive_digest
+    if cache.is_fresh(md_path.name, digest, md_path):
+        print(f"✓ Unchanged: {md_path}")
+    else:
+        print("\n📝 Generating RESULTS.md...\n")
+        create_results_markdown(go_metrics, java_metrics, results_dir, extra_sections)
+        cache.mark(md_path.name, digest)
+    
+    return cache, pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Go vs Java benchmark graphs")
+    parser.add_argument("results_dir", nargs="?", help="results directory (or root with --all)")
+    parser.add_argument("--all", action="store_true", help="regenerate every results directory under the root")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and re-render everything")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel figure workers")
+    parser.add_argument("--history", nargs="?", const="results/history.sqlite",
+                        help="append run metrics to this history database")
+    parser.add_argument("--archive", nargs="?", const="results/archive",
+                        help="archive run samples and summaries in this columnar archive")
+    args = parser.parse_args()
+    
+    if args.all:
+        results_dirs = find_results_dirs(args.results_dir or "results")
+    else:
+        results_dirs = [args.results_dir or "results/mac"]
+    
+    reports = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        for results_dir in results_dirs:
+            cache, pending = generate_report(results_dir, executor, args.force, args.history, args.archive)
+            if pending is not None:
+                reports.append((results_dir, cache, pending))
+        
+        failed = False
+        for results_dir, cache, pending in reports:
+            for name, digest, future in pending:
+                try:
+                    future.result()
+                    cache.mark(name, digest)
+                except Exception as e:
+                    failed = True
+                    print(f"⚠ {results_dir}/{name} failed: {e}")
+            cache.save()
+            print(f"\n✅ {results_dir}/: {len(pending)} chart(s) rendered, RESULTS.md up to date")
+    
+    if not reports:
+        print("\n❌ No benchmark results found. Run benchmarks first.")
+        sys.exit(1)
     
-    print(f"\n✅ All files saved to: {results_dir}/")
-    print(f"   - 4 HTML interactive charts")
-    print(f"   - 4 PNG images (1200x800)")
-    print(f"   - RESULTS.md summary")
     print(f"\n   Open RESULTS.md in GitHub to view the benchmark report.\n")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
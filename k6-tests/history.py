@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Append-only history of benchmark runs with regression detection.
+
+Every run's extract_metrics() output is stored in a local SQLite database
+together with the commit and environment it came from. `compare` checks the
+latest run(s) against a rolling baseline of earlier runs and flags
+regressions in RPS, P95/P99 latency and error rate using bootstrap intervals
+that include the baseline's run-to-run spread, so a single noisy run does not
+trigger an alert.
+
+Usage: python history.py list [--db PATH] [--env ENV] [--service go|java]
+       python history.py compare [--db PATH] --env ENV --service go|java
+                                 [--baseline 10] [--candidates 1] [--threshold 5]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+DEFAULT_DB = "results/history.sqlite"
+
+# (metric key, higher is better)
+TRACKED_METRICS = [
+    ("rps", True),
+    ("p95", False),
+    ("p99", False),
+    ("error_rate", False),
+]
+
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE = 0.95
+MIN_BASELINE_RUNS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL,
+    service TEXT NOT NULL,
+    env TEXT NOT NULL,
+    commit_sha TEXT,
+    recorded_at TEXT NOT NULL,
+    rps REAL,
+    avg REAL,
+    p90 REAL,
+    p95 REAL,
+    p99 REAL,
+    max REAL,
+    error_rate REAL,
+    dropped INTEGER,
+    total_requests INTEGER,
+    metrics_json TEXT NOT NULL,
+    UNIQUE (run_key, service)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_env_service ON runs(env, service, id);
+"""
+
+
+def connect(db_path: str = DEFAULT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def current_commit() -> str:
+    """Short SHA of HEAD, or None outside a git checkout."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_run(db_path: str, metrics: dict, service: str, env: str, run_key: str, commit: str = None) -> bool:
+    """Append one run; returns False if this exact run (same inputs) was already stored."""
+    with connect(db_path) as conn:
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO runs (
+                run_key, service, env, commit_sha, recorded_at,
+                rps, avg, p90, p95, p99, max, error_rate, dropped, total_requests, metrics_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                run_key, service, env, commit or current_commit(),
+                datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                metrics.get("rps"), metrics.get("avg"), metrics.get("p90"), metrics.get("p95"),
+                metrics.get("p99"), metrics.get("max"), metrics.get("error_rate"),
+                metrics.get("dropped"), metrics.get("total_requests"),
+                json.dumps(metrics, sort_keys=True),
+            ),
+        )
+        return cur.rowcount > 0
+
+
+def load_runs(conn: sqlite3.Connection, env: str = None, service: str = None) -> list:
+    query = "SELECT * FROM runs WHERE 1=1"
+    params = []
+    if env:
+        query += " AND env = ?"
+        params.append(env)
+    if service:
+        query += " AND service = ?"
+        params.append(service)
+    return conn.execute(query + " ORDER BY id", params).fetchall()
+
+
+def _mean(values: list) -> float:
+    return sum(values) / len(values)
+
+
+def bootstrap_delta(baseline: list, candidate: list, rng: random.Random) -> tuple:
+    """Bootstrap interval of the relative change (%) of candidate mean vs baseline mean.
+
+    The noise is what len(candidate) new runs would show with nothing changed:
+    each resample draws that many individual baseline runs and compares their
+    mean to a resampled baseline mean. The spread of those null deltas, shifted
+    by the observed change, is the interval, so it is as wide as the baseline's
+    run-to-run variance and a lone candidate is judged against single runs,
+    not against the standard error of the baseline mean.
+
+    Returns (point estimate, low, high).
+    """
+    base_mean = _mean(baseline)
+    if base_mean == 0:
+        return 0.0, 0.0, 0.0
+    point = (_mean(candidate) - base_mean) / base_mean * 100
+
+    null = []
+    for _ in range(BOOTSTRAP_RESAMPLES):
+        b = _mean([rng.choice(baseline) for _ in baseline])
+        c = _mean([rng.choice(baseline) for _ in candidate])
+        if b:
+            null.append((c - b) / b * 100)
+    null.sort()
+    tail = (1 - CONFIDENCE) / 2
+    null_low = null[int(tail * len(null))]
+    null_high = null[min(int((1 - tail) * len(null)), len(null) - 1)]
+    return point, point - null_high, point - null_low
+
+
+def compare(conn: sqlite3.Connection, env: str, service: str, baseline_size: int,
+            candidates: int, threshold: float, seed: int = 0) -> list:
+    """Compare the latest `candidates` runs against the `baseline_size` runs before them.
+
+    Returns a list of result dicts; `regression` is True when the whole interval
+    lies on the worse side and the point estimate is worse by more than `threshold` %.
+    """
+    runs = load_runs(conn, env, service)
+    if len(runs) < candidates + MIN_BASELINE_RUNS:
+        raise ValueError(
+            f"need at least {candidates + MIN_BASELINE_RUNS} {service} runs for env '{env}', "
+            f"found {len(runs)}"
+        )
+    candidate_runs = runs[-candidates:]
+    baseline_runs = runs[-candidates - baseline_size:-candidates]
+
+    rng = random.Random(seed)
+    results = []
+    for key, higher_is_better in TRACKED_METRICS:
+        baseline = [r[key] or 0 for r in baseline_runs]
+        candidate = [r[key] or 0 for r in candidate_runs]
+        point, low, high = bootstrap_delta(baseline, candidate, rng)
+        if higher_is_better:
+            regression = high < 0 and point < -threshold
+        else:
+            regression = low > 0 and point > threshold
+        # An error rate going from 0 to anything is a regression no percentage can express
+        if key == "error_rate" and _mean(baseline) == 0 and _mean(candidate) > 0:
+            regression = True
+        results.append({
+            "metric": key,
+            "baseline": _mean(baseline),
+            "candidate": _mean(candidate),
+            "delta_pct": point,
+            "ci_low": low,
+            "ci_high": high,
+            "regression": regression,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history and regression detection")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = sub.add_parser("list", help="show recorded runs")
+    list_cmd.add_argument("--db", default=DEFAULT_DB)
+    list_cmd.add_argument("--env")
+    list_cmd.add_argument("--service", choices=["go", "java"])
+
+    cmp_cmd = sub.add_parser("compare", help="flag regressions in the latest run(s)")
+    cmp_cmd.add_argument("--db", default=DEFAULT_DB)
+    cmp_cmd.add_argument("--env", required=True)
+    cmp_cmd.add_argument("--service", choices=["go", "java"], required=True)
+    cmp_cmd.add_argument("--baseline", type=int, default=10, help="rolling baseline size (runs)")
+    cmp_cmd.add_argument("--candidates", type=int, default=1, help="latest runs to test")
+    cmp_cmd.add_argument("--threshold", type=float, default=5.0, help="minimum change to flag (%%)")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+
+    if args.command == "list":
+        print(f"{'id':>4}  {'env':<14} {'svc':<5} {'commit':<9} {'recorded':<26} {'rps':>9} {'p95':>10} {'p99':>10} {'err%':>7}")
+        for r in load_runs(conn, args.env, args.service):
+            print(f"{r['id']:>4}  {r['env']:<14} {r['service']:<5} {r['commit_sha'] or '-':<9} {r['recorded_at']:<26} "
+                  f"{r['rps'] or 0:>9,.0f} {r['p95'] or 0:>10.2f} {r['p99'] or 0:>10.2f} {r['error_rate'] or 0:>7.2f}")
+        return
+
+    try:
+        results = compare(conn, args.env, args.service, args.baseline, args.candidates, args.threshold)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(2)
+
+    print(f"\n📉 Regression check: {args.service} on {args.env} "
+          f"(latest {args.candidates} vs previous {args.baseline}, {CONFIDENCE:.0%} bootstrap interval)\n")
+    for r in results:
+        flag = "❌ REGRESSION" if r["regression"] else "✓"
+        print(f"  {r['metric']:<11} {r['baseline']:>12.2f} → {r['candidate']:>12.2f}  "
+              f"{r['delta_pct']:+7.1f}%  [{r['ci_low']:+7.1f}%, {r['ci_high']:+7.1f}%]  {flag}")
+
+    if any(r["regression"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Streaming reader for raw k6 NDJSON output (`k6 run --out json=...`).
+
+The file is read line by line and every point is folded into a mergeable
+RunSketch (see latency_sketch.py), so a 10-minute 10K RPS run (millions of
+points, optionally gzipped) is processed in bounded memory.
+"""
+
+import gzip
+import json
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from latency_sketch import RunSketch
+
+# Per-endpoint Trend and check names emitted by 10k-benchmark.js
+ENDPOINTS = {
+    "create_order": {
+        "label": "POST /orders",
+        "path": "/orders",
+        "trend": "create_order_latency",
+        "check": "create order status is 201",
+    },
+    "get_orderbook": {
+        "label": "GET /orderbook/{pair}",
+        "path": "/orderbook/",
+        "trend": "get_orderbook_latency",
+        "check": "get orderbook status is 200",
+    },
+    "get_balance": {
+        "label": "GET /balance/{userId}",
+        "path": "/balance/",
+        "trend": "get_balance_latency",
+        "check": "get balance status is 200",
+    },
+    "match_orders": {
+        "label": "POST /trades/match",
+        "path": "/trades/match",
+        "trend": "match_orders_latency",
+        "check": "match orders status is 200",
+    },
+}
+
+_ENDPOINT_BY_TREND = {e["trend"]: name for name, e in ENDPOINTS.items()}
+_ENDPOINT_BY_CHECK = {e["check"]: name for name, e in ENDPOINTS.items()}
+
+
+def endpoint_of(tags: dict) -> Optional[str]:
+    """ENDPOINTS key of an http_req_* point from its request tags (k6 tags the URL as `name`)."""
+    url = tags.get("name") or tags.get("url") or ""
+    for name, endpoint in ENDPOINTS.items():
+        if endpoint["path"] in url:
+            return name
+    return None
+
+
+# Raw output file names written by the Makefile benchmark targets
+RAW_SUFFIXES = ("-10k-raw.json.gz", "-10k-raw.json")
+
+
+def find_raw_output(results_dir: str, service: str) -> Optional[Path]:
+    """Return the raw k6 NDJSON file for a service, if one was recorded."""
+    for suffix in RAW_SUFFIXES:
+        path = Path(results_dir) / f"{service}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def open_ndjson(path):
+    """Open a k6 NDJSON file as text, transparently handling gzip."""
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_points(path, metrics: Optional[set] = None) -> Iterator[tuple]:
+    """Yield (metric, time, value, tags) for every Point line in a k6 NDJSON file.
+
+    `time` is the raw ISO-8601 string k6 wrote; it is only parsed when needed.
+    If `metrics` is given, points for other metrics are skipped.
+    """
+    # Lines naming none of the wanted metrics are skipped before parsing
+    names = [f'"{metric}"' for metric in metrics] if metrics is not None else None
+    with open_ndjson(path) as f:
+        for line in f:
+            # Metric definition lines are far rarer than points; skip them cheaply
+            if '"Point"' not in line:
+                continue
+            if names is not None and not any(name in line for name in names):
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a truncated last line
+                continue
+            metric = obj.get("metric")
+            if metrics is not None and metric not in metrics:
+                continue
+            data = obj.get("data", {})
+            yield metric, data.get("time", ""), data.get("value", 0), data.get("tags") or {}
+
+
+def parse_time(value: str) -> datetime:
+    """Parse a k6 timestamp (nanosecond precision, optional 'Z') into a datetime."""
+    value = value.replace("Z", "+00:00")
+    head, sep, frac = value.partition(".")
+    if sep:
+        digits = len(frac) - len(frac.lstrip("0123456789"))
+        frac = frac[:min(digits, 6)] + frac[digits:]
+    return datetime.fromisoformat(head + sep + frac)
+
+
+def collect_samples(path, metrics: set) -> tuple:
+    """Columnar per-second samples for the given metrics.
+
+    Returns (second_labels, columns, offset) where second_labels[i] is the
+    'YYYY-MM-DDTHH:MM:SS' prefix of the i-th distinct second seen,
+    columns[metric] is an (int64 second ids, float64 values) pair of arrays
+    and offset is the UTC offset suffix of the run's timestamps ('Z',
+    '+02:00', or '' if k6 wrote none). Only the arrays grow with the run:
+    16 bytes per kept sample plus array over-allocation; parsed lines and
+    samples of other metrics are not retained.
+    """
+    second_ids = {}
+    offset = ""
+    columns = {metric: (array("q"), array("d")) for metric in metrics}
+    for metric, time, value, _tags in iter_points(path, metrics):
+        label = time[:19]
+        second = second_ids.get(label)
+        if second is None:
+            if not second_ids:
+                # One run's timestamps share an offset
+                offset = time[19:].lstrip(".0123456789")
+            second = second_ids[label] = len(second_ids)
+        ids, values = columns[metric]
+        ids.append(second)
+        values.append(value)
+    return list(second_ids), columns, offset
+
+
+def stream_sketch(path, window: Optional[tuple] = None) -> RunSketch:
+    """Fold a raw k6 NDJSON file into a mergeable RunSketch.
+
+    With `window` as (first, last) 'YYYY-MM-DDTHH:MM:SS' labels, only points
+    from those seconds (inclusive) are counted.
+    """
+    sketch = RunSketch()
+    first_time = last_time = None
+
+    wanted = {"http_req_duration", "http_reqs", "dropped_requests", "errors", "checks", "trades_matched"}
+    wanted.update(_ENDPOINT_BY_TREND)
+    for metric, time, value, tags in iter_points(path, wanted):
+        if window and not window[0] <= time[:19] <= window[1]:
+            continue
+        if metric == "http_req_duration":
+            sketch.latency.record(value)
+        elif metric == "http_reqs":
+            sketch.total_requests += int(value)
+            # ISO timestamps from one run share an offset, so string order is time order
+            if first_time is None or time < first_time:
+                first_time = time
+            if last_time is None or time > last_time:
+                last_time = time
+        elif metric == "dropped_requests":
+            sketch.dropped += int(value)
+        elif metric == "trades_matched":
+            sketch.trades_matched += int(value)
+        elif metric == "errors":
+            sketch.errors += value
+            sketch.error_samples += 1
+        elif metric == "checks":
+            name = _ENDPOINT_BY_CHECK.get(tags.get("check"))
+            if name:
+                endpoint = sketch.endpoint(name)
+                if value:
+                    endpoint.passes += 1
+                else:
+                    endpoint.fails += 1
+        else:
+            sketch.endpoint(_ENDPOINT_BY_TREND[metric]).latency.record(value)
+
+    if first_time and last_time:
+        sketch.add_interval(parse_time(first_time).timestamp(), parse_time(last_time).timestamp())
+    return sketch
+
+
+def stream_metrics(path) -> dict:
+    """Fold a raw k6 NDJSON file into the same dict that extract_metrics() returns."""
+    return stream_sketch(path).metrics()
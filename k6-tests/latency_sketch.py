@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Mergeable latency sketches for k6 runs.
+
+A RunSketch is an HDR-style histogram of request latency plus the counters
+needed to rebuild the report metrics (requests, errors, dropped requests and
+the wall-clock intervals covered), with one EndpointSketch per endpoint.
+Sketches from repeated runs or from several load generators can be merged
+and still give correct quantiles, unlike the precomputed p(90)/p(95) values
+in the k6 summary.
+
+Sketches are stored next to the results as `<service>-*.hdr.json`.
+Usage: python latency_sketch.py merge -o out.hdr.json in1.hdr.json [in2.hdr.json ...]
+"""
+
+import argparse
+import glob
+import json
+import math
+from pathlib import Path
+
+SKETCH_VERSION = 1
+
+# 3 significant figures keeps every recorded value within 0.1%
+SIGNIFICANT_FIGURES = 3
+
+
+class LatencyHistogram:
+    """HDR histogram over integer microseconds with sparse bucket storage."""
+
+    def __init__(self, significant_figures: int = SIGNIFICANT_FIGURES):
+        self.significant_figures = significant_figures
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half = self._sub_bucket_count >> 1
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        sub = value >> shift
+        return self._sub_bucket_count + (shift - 1) * self._sub_bucket_half + (sub - self._sub_bucket_half)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        offset = index - self._sub_bucket_count
+        shift = offset // self._sub_bucket_half + 1
+        sub = offset % self._sub_bucket_half + self._sub_bucket_half
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_ms: float, count: int = 1):
+        value = max(int(round(value_ms * 1000)), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        if not self.count or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+        self.count += count
+        self.total_us += value * count
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.significant_figures != self.significant_figures:
+            raise ValueError(
+                f"cannot merge histograms with {other.significant_figures} and "
+                f"{self.significant_figures} significant figures"
+            )
+        if not other.count:
+            return
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.min_us = other.min_us if not self.count else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile(self, p: float) -> float:
+        """Value (ms) at percentile p, as the highest value equivalent to its bucket."""
+        if not self.count:
+            return 0
+        rank = max(math.ceil(self.count * p / 100), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    @property
+    def mean(self) -> float:
+        return self.total_us / self.count / 1000 if self.count else 0
+
+    def to_dict(self) -> dict:
+        return {
+            "significant_figures": self.significant_figures,
+            "unit": "us",
+            "count": self.count,
+            "total": self.total_us,
+            "min": self.min_us,
+            "max": self.max_us,
+            "counts": [[index, self.counts[index]] for index in sorted(self.counts)],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        hist = cls(data.get("significant_figures", SIGNIFICANT_FIGURES))
+        hist.counts = {int(index): int(count) for index, count in data.get("counts", [])}
+        hist.count = data.get("count", 0)
+        hist.total_us = data.get("total", 0)
+        hist.min_us = data.get("min", 0)
+        hist.max_us = data.get("max", 0)
+        return hist
+
+
+class EndpointSketch:
+    """Latency and check outcomes for one endpoint of the benchmark mix."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.passes = 0
+        self.fails = 0
+
+    def merge(self, other: "EndpointSketch"):
+        self.latency.merge(other.latency)
+        self.passes += other.passes
+        self.fails += other.fails
+
+    def metrics(self, elapsed: float) -> dict:
+        requests = self.passes + self.fails
+        return {
+            "avg": self.latency.mean,
+            "p90": self.latency.percentile(90),
+            "p95": self.latency.percentile(95),
+            "p99": self.latency.percentile(99),
+            "max": self.latency.max_us / 1000,
+            "total_requests": requests,
+            "rps": requests / elapsed if elapsed > 0 else 0,
+            "error_rate": (self.fails / requests * 100) if requests else 0,
+        }
+
+    def to_dict(self) -> dict:
+        return {"latency": self.latency.to_dict(), "passes": self.passes, "fails": self.fails}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointSketch":
+        endpoint = cls()
+        endpoint.latency = LatencyHistogram.from_dict(data["latency"])
+        endpoint.passes = data.get("passes", 0)
+        endpoint.fails = data.get("fails", 0)
+        return endpoint
+
+
+class RunSketch:
+    """Everything the report needs from one or more k6 runs, in mergeable form."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.total_requests = 0
+        self.dropped = 0
+        self.errors = 0
+        self.error_samples = 0
+        self.trades_matched = 0
+        # Wall-clock [start, end] epoch seconds covered by the samples
+        self.intervals = []
+        self.endpoints = {}
+
+    def endpoint(self, name: str) -> EndpointSketch:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointSketch()
+        return self.endpoints[name]
+
+    def add_interval(self, start: float, end: float):
+        self.intervals.append([start, end])
+
+    def merge(self, other: "RunSketch"):
+        self.latency.merge(other.latency)
+        self.total_requests += other.total_requests
+        self.dropped += other.dropped
+        self.errors += other.errors
+        self.error_samples += other.error_samples
+        self.trades_matched += other.trades_matched
+        self.intervals.extend(other.intervals)
+        for name, endpoint in other.endpoints.items():
+            self.endpoint(name).merge(endpoint)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds covered by the union of intervals.
+
+        Overlapping shards of one run count once, sequential repeat runs add up.
+        """
+        covered = 0.0
+        current_start = current_end = None
+        for start, end in sorted(self.intervals):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    covered += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            covered += current_end - current_start
+        return covered
+
+    def metrics(self) -> dict:
+        """Same shape as generate-graphs.py extract_metrics()."""
+        elapsed = self.elapsed
+        return {
+            "avg": self.latency.mean,
+            "p90": self.latency.percentile(90),
+            "p95": self.latency.percentile(95),
+            "p99": self.latency.percentile(99),
+            "max": self.latency.max_us / 1000,
+            "min": self.latency.min_us / 1000,
+            "total_requests": self.total_requests,
+            "rps": self.total_requests / elapsed if elapsed > 0 else 0,
+            "dropped": self.dropped,
+            "error_rate": (self.errors / self.error_samples * 100) if self.error_samples else 0,
+            "trades_matched": self.trades_matched,
+            "endpoints": {name: e.metrics(elapsed) for name, e in self.endpoints.items()},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": SKETCH_VERSION,
+            "latency": self.latency.to_dict(),
+            "total_requests": self.total_requests,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "error_samples": self.error_samples,
+            "trades_matched": self.trades_matched,
+            "intervals": self.intervals,
+            "endpoints": {name: e.to_dict() for name, e in self.endpoints.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunSketch":
+        if data.get("version") != SKETCH_VERSION:
+            raise ValueError(f"unsupported sketch version: {data.get('version')}")
+        sketch = cls()
+        sketch.latency = LatencyHistogram.from_dict(data["latency"])
+        sketch.total_requests = data.get("total_requests", 0)
+        sketch.dropped = data.get("dropped", 0)
+        sketch.errors = data.get("errors", 0)
+        sketch.error_samples = data.get("error_samples", 0)
+        sketch.trades_matched = data.get("trades_matched", 0)
+        sketch.intervals = [list(i) for i in data.get("intervals", [])]
+        sketch.endpoints = {
+            name: EndpointSketch.from_dict(e) for name, e in data.get("endpoints", {}).items()
+        }
+        return sketch
+
+
+def sketch_path(results_dir: str, service: str) -> Path:
+    """Where the sketch built from a directory's own raw output is stored."""
+    return Path(results_dir) / f"{service}-10k.hdr.json"
+
+
+def save_sketch(sketch: RunSketch, path):
+    with open(path, "w") as f:
+        json.dump(sketch.to_dict(), f, separators=(",", ":"))
+
+
+def load_sketch(path) -> RunSketch:
+    with open(path) as f:
+        return RunSketch.from_dict(json.load(f))
+
+
+def merge_sketches(paths) -> RunSketch:
+    merged = RunSketch()
+    for path in paths:
+        merged.merge(load_sketch(path))
+    return merged
+
+
+def find_sketches(results_dir: str, service: str) -> list:
+    """All sketches for a service in a results directory (own run plus any shards)."""
+    return sorted(glob.glob(str(Path(results_dir) / f"{service}-*.hdr.json")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge k6 latency sketches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge_cmd = sub.add_parser("merge", help="merge sketches into one file")
+    merge_cmd.add_argument("inputs", nargs="+")
+    merge_cmd.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        merged = merge_sketches(args.inputs)
+        save_sketch(merged, args.output)
+        m = merged.metrics()
+        print(f"✓ Merged {len(args.inputs)} sketches into {args.output}")
+        print(f"   {m['total_requests']:,} requests, p95 {m['p95']:.2f} ms, p99 {m['p99']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
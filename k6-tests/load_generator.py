@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Open-loop asyncio load generator with coordinated-omission-correct latency.
+
+k6's constant-arrival-rate executor drops iterations when it runs out of VUs,
+so the requests a stalled server would have received are never timed. Here
+request i is scheduled at start + i/rate regardless of how earlier requests
+fare, and its latency is measured from that intended send time, so time spent
+queued behind a stall is counted.
+
+Requests go over pooled keep-alive HTTP/1.1 connections, and the schedule is
+sharded round-robin across processes to reach 10K+ RPS on one Linux box.
+Samples are written as k6 NDJSON points (`<service>-10k-raw.json.gz`), so
+generate-graphs.py reads them like `k6 run --out json=...` output.
+
+Usage: python load_generator.py --target http://localhost:8080 --rps 10000 --duration 10m
+           [--results-dir results/mac] [--service go] [--trace trace.ndjson]
+           [--shards 4] [--connections 2000] [--timeout 10] [--seed 42]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from queue import Empty
+from urllib.parse import quote, urlsplit
+
+from k6_stream import ENDPOINTS, open_ndjson
+from workload_trace import DEFAULT_MIX, TEST_USER_IDS, generate
+
+# Trace op -> ENDPOINTS key
+OP_ENDPOINTS = {
+    "order": "create_order",
+    "orderbook": "get_orderbook",
+    "balance": "get_balance",
+    "match": "match_orders",
+}
+
+EXPECTED_STATUS = {"order": 201, "orderbook": 200, "balance": 200, "match": 200}
+
+
+def parse_duration(value: str) -> float:
+    """k6-style duration ('90s', '10m', '1h30m') in seconds."""
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise ValueError(f"invalid duration '{value}'")
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client connection over asyncio streams."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, method: str, path: str, host: str, body: bytes = None) -> tuple:
+        """Send one request; returns (status, keep_alive)."""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: py-loadgen/1.0\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split(b" ", 2)[1])
+
+        length = 0
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding" and b"chunked" in value:
+                chunked = True
+            elif name == b"connection" and value == b"close":
+                keep_alive = False
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await self.reader.readexactly(length)
+        return status, keep_alive
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    """At most `size` connections; waiting for one counts toward request latency."""
+
+    def __init__(self, host: str, port: int, size: int):
+        self.host = host
+        self.port = port
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(size)
+
+    async def acquire(self) -> HTTPConnection:
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except BaseException:
+            self._slots.release()
+            raise
+        return HTTPConnection(reader, writer)
+
+    def release(self, conn: HTTPConnection, reusable: bool):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+
+class PointWriter:
+    """Writes k6-format NDJSON points with pre-formatted timestamps."""
+
+    def __init__(self, path: str):
+        self._f = gzip.open(path, "wt", compresslevel=1, encoding="utf-8")
+        self._second = None
+        self._prefix = ""
+
+    def _time(self, epoch: float) -> str:
+        second = int(epoch)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._prefix}.{int((epoch - second) * 1e6):06d}Z"
+
+    def point(self, metric: str, epoch: float, value: float, tags: str = "{}"):
+        self._f.write(
+            f'{{"metric":"{metric}","type":"Point","data":{{"time":"{self._time(epoch)}","value":{value},"tags":{tags}}}}}\n'
+        )
+
+    def close(self):
+        self._f.close()
+
+
+def load_trace(path: str) -> list:
+    ops = []
+    with open_ndjson(path) as f:
+        for line in f:
+            if line.strip():
+                op = json.loads(line)
+                if op.get("op") != "header":
+                    ops.append(op)
+    return ops
+
+
+def build_request(op: dict) -> tuple:
+    """(method, path, body) for a trace op."""
+    kind = op["op"]
+    if kind == "order":
+        body = {k: op[k] for k in ("user_id", "pair", "side", "price", "quantity")}
+        return "POST", "/orders", json.dumps(body, separators=(",", ":")).encode()
+    if kind == "orderbook":
+        return "GET", f"/orderbook/{quote(op['pair'], safe='')}", None
+    if kind == "balance":
+        return "GET", f"/balance/{op['user_id']}", None
+    return "POST", f"/trades/match?pair={quote(op['pair'], safe='')}", None
+
+
+async def run_shard_async(shard: int, args, start_epoch: float, in_flight, output: str) -> dict:
+    url = urlsplit(args.target)
+    host_header = url.netloc
+    pool = ConnectionPool(url.hostname, url.port or 80, max(args.connections // args.shards, 1))
+    writer = PointWriter(output)
+
+    total = int(args.rps * args.duration)
+    interval = 1.0 / args.rps
+    # Global request indices owned by this shard: shard, shard + shards, ...
+    indices = range(shard, total, args.shards)
+
+    if args.trace:
+        trace = load_trace(args.trace)
+        ops = (trace[i % len(trace)] for i in indices)
+    else:
+        rng_seed = args.seed * 1000 + shard
+        ops = iter(generate(len(indices), rng_seed, DEFAULT_MIX, TEST_USER_IDS, ["BTCUSDT"],
+                            "uniform:41000:43000"))
+        next(ops)  # header
+
+    checks = {op: json.dumps({"check": ENDPOINTS[name]["check"]}) for op, name in OP_ENDPOINTS.items()}
+    # Request tags like k6's, so the archive can tell endpoints apart (k6_stream.endpoint_of)
+    names = {op: json.dumps(ENDPOINTS[name]["label"]) for op, name in OP_ENDPOINTS.items()}
+    stats = {"sent": 0, "errors": 0, "dropped": 0}
+
+    # Map the shared wall-clock start onto this process's monotonic clock
+    mono_start = time.monotonic() + (start_epoch - time.time())
+
+    async def send(index: int, op: dict):
+        intended = mono_start + index * interval
+        kind = op["op"]
+        method, path, body = build_request(op)
+        in_flight[shard] += 1
+        status = 0
+        sent_at = None
+
+        async def exchange():
+            nonlocal sent_at
+            conn = await pool.acquire()
+            reusable = False
+            try:
+                sent_at = time.monotonic()
+                status, reusable = await conn.request(method, path, host_header, body)
+                return status
+            finally:
+                pool.release(conn, reusable)
+
+        try:
+            # One deadline for waiting on a connection and the request together, like k6's timeout
+            status = await asyncio.wait_for(exchange(), args.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status = 0
+        finally:
+            in_flight[shard] -= 1
+
+        done = time.monotonic()
+        latency_ms = (done - intended) * 1000
+        epoch = start_epoch + index * interval
+        ok = status == EXPECTED_STATUS[kind]
+        writer.point("http_req_duration", epoch, latency_ms, f'{{"status":"{status}","name":{names[kind]}}}')
+        writer.point("http_reqs", epoch, 1)
+        writer.point(ENDPOINTS[OP_ENDPOINTS[kind]]["trend"], epoch, latency_ms)
+        if sent_at is not None:
+            writer.point("http_req_service_time", epoch, (done - sent_at) * 1000)
+        writer.point("checks", epoch, 1 if ok else 0, checks[kind])
+        writer.point("errors", epoch, 0 if ok else 1)
+        if status == 0:
+            writer.point("dropped_requests", epoch, 1)
+            stats["dropped"] += 1
+        if not ok:
+            stats["errors"] += 1
+
+    async def report_in_flight():
+        # One shard reports the in-flight count summed over all shards as k6's
+        # `vus` gauge, once per second of the schedule
+        tick = 1
+        while True:
+            await asyncio.sleep(max(mono_start + tick - time.monotonic(), 0))
+            writer.point("vus", start_epoch + tick, sum(in_flight))
+            tick += 1
+
+    reporter = asyncio.ensure_future(report_in_flight()) if shard == 0 else None
+    tasks = set()
+    for index, op in zip(indices, ops):
+        delay = mono_start + index * interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(send(index, op))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        stats["sent"] += 1
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    if reporter:
+        reporter.cancel()
+    writer.close()
+    return stats
+
+
+def run_shard(shard: int, args, start_epoch: float, in_flight, output: str, results):
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    results.put((shard, asyncio.run(run_shard_async(shard, args, start_epoch, in_flight, output))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the exchanges")
+    parser.add_argument("--target", default="http://localhost:8080")
+    parser.add_argument("--rps", type=float, default=10000)
+    parser.add_argument("--duration", default="10m")
+    parser.add_argument("--results-dir", default="results/mac")
+    parser.add_argument("--service", choices=["go", "java"], help="defaults to go for :8080, else java")
+    parser.add_argument("--trace", help="replay this workload_trace.py trace instead of the random mix")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--connections", type=int, default=2000, help="keep-alive connections across all shards")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout (s), like k6's 10s")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    args.duration = parse_duration(args.duration)
+    service = args.service or ("go" if args.target.endswith(":8080") else "java")
+
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    output = results_dir / f"{service}-10k-raw.json.gz"
+    shard_files = [str(results_dir / f".{service}-raw.shard{i}.json.gz") for i in range(args.shards)]
+
+    print(f"\n🚀 Open-loop load: {args.rps:,.0f} RPS for {args.duration:.0f}s against {args.target} "
+          f"({args.shards} shards, {args.connections} connections)\n")
+
+    # One slot per shard, written only by that shard, so no lock is needed
+    in_flight = multiprocessing.Array("i", args.shards, lock=False)
+    queue = multiprocessing.Queue()
+    # Give every shard time to start before the shared schedule begins
+    start_epoch = time.time() + 2.0
+    procs = [
+        multiprocessing.Process(target=run_shard, args=(i, args, start_epoch, in_flight, shard_files[i], queue))
+        for i in range(args.shards)
+    ]
+    for p in procs:
+        p.start()
+    stats = {}
+    while len(stats) < len(procs):
+        try:
+            shard, shard_stats = queue.get(timeout=1.0)
+            stats[shard] = shard_stats
+            continue
+        except Empty:
+            pass
+        # A shard that died never reports; don't wait for it forever
+        crashed = [(i, p.exitcode) for i, p in enumerate(procs) if p.exitcode not in (None, 0)]
+        if crashed:
+            for p in procs:
+                p.terminate()
+                p.join()
+            print("✗ " + ", ".join(f"shard {i} exited with code {code}" for i, code in crashed)
+                  + f"; partial samples left in {results_dir}")
+            sys.exit(1)
+    for p in procs:
+        p.join()
+
+    # Concatenated gzip members are a valid gzip stream
+    with open(output, "wb") as out:
+        for path in shard_files:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out)
+            os.remove(path)
+
+    sent = sum(s["sent"] for s in stats.values())
+    errors = sum(s["errors"] for s in stats.values())
+    dropped = sum(s["dropped"] for s in stats.values())
+    print(f"✓ Sent {sent:,} requests ({sent / args.duration:,.0f}/s scheduled), "
+          f"{errors:,} errors, {dropped:,} dropped")
+    print(f"✓ Wrote samples to {output}")
+    print(f"\n   Generate the report with: python3 k6-tests/generate-graphs.py {results_dir}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Server-side metrics of a benchmark run, scraped from the services' GET /metrics.
+
+Every --interval seconds this reads the Prometheus text exposition of the
+service: per-route request latency histograms, requests in flight, DB time per
+repository operation, connection pool gauges and acquire waits, and GC/heap
+figures. Counters are reported as the difference between the first and the
+last scrape, so the profile covers only the run.
+
+Go runs one prefork worker per core and each keeps its own registry, labelled
+worker="<pid>". Every scrape opens a new connection so the kernel spreads them
+over the workers, and each tick scrapes up to --fanout times until every worker
+(exchange_workers) has answered; the run totals add up each worker's change.
+
+The result is written as JSON (`<results>/<service>-server-metrics.json`) and
+generate-graphs.py sets the server-side latency next to k6's client-side
+latency, so the gap shows time spent outside the handler: network, accept
+queues and the load generator itself.
+
+Only the standard library is used.
+
+Usage: python metrics_scraper.py -o results/mac/go-server-metrics.json --url http://localhost:8080/metrics -- k6 run ...
+       python metrics_scraper.py -o go-server-metrics.json --url ... [--duration 600]     (until SIGTERM/duration)
+           [--interval 1] [--fanout 16]
+"""
+
+import argparse
+import json
+import math
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+from k6_stream import ENDPOINTS
+
+METRICS_VERSION = 1
+
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+# (method, route with parameters as {}) -> k6 endpoint name
+ROUTES = {
+    ("POST", "/orders"): "create_order",
+    ("GET", "/orderbook/{}"): "get_orderbook",
+    ("GET", "/balance/{}"): "get_balance",
+    ("POST", "/trades/match"): "match_orders",
+}
+
+# Request latency histograms: Go (route label) and Spring/Micrometer (uri label)
+REQUEST_HISTOGRAMS = ("http_request_duration_seconds", "http_server_requests_seconds")
+
+# DB timing histograms and how a series is named in the report
+DB_HISTOGRAMS = {
+    "db_query_duration_seconds": lambda l: l.get("op", "?"),
+    "spring_data_repository_invocations_seconds": lambda l: f'{l.get("repository", "?")}.{l.get("method", "?")}',
+    "db_batch_insert_seconds": lambda l: "OrderBatcher.insert",
+}
+
+# Timeline gauges (summed over workers / label sets)
+TIMELINE_GAUGES = {
+    "in_flight": ("http_requests_in_flight", "http_server_requests_active_seconds_active_count"),
+    "pool_acquired": ("db_pool_acquired_conns",),
+    "pool_total": ("db_pool_total_conns",),
+    "admission_limit": ("admission_limit",),
+    "heap_mb": ("go_memstats_heap_alloc_bytes", "jvm_memory_used_bytes"),
+}
+
+GC_PAUSE_COUNTERS = ("go_gc_pause_seconds_total", "jvm_gc_pause_seconds_sum")
+
+
+def parse_metrics(text: str) -> dict:
+    """Prometheus text format -> {name: [(labels, value), ...]} (comments skipped)."""
+    families = defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = SAMPLE_RE.match(line)
+        if not m:
+            continue
+        name, labels, value = m.groups()
+        try:
+            value = float(value)
+        except ValueError:
+            continue
+        families[name].append((dict(LABEL_RE.findall(labels or "")), value))
+    return dict(families)
+
+
+def normalize_route(path: str) -> str:
+    """/balance/:userId and /balance/{userId} -> /balance/{}."""
+    return re.sub(r"/(:[^/]+|\{[^/]+\})", "/{}", path)
+
+
+def endpoint_of(labels: dict):
+    path = labels.get("route", labels.get("uri", ""))
+    return ROUTES.get((labels.get("method", ""), normalize_route(path)))
+
+
+def _heap(name: str, labels: dict) -> bool:
+    return name != "jvm_memory_used_bytes" or labels.get("area") == "heap"
+
+
+def histograms(scrape: dict, family: str, key) -> dict:
+    """Sum a histogram family by key(labels): {key: {"buckets": {le: n}, "sum": s, "count": n}}."""
+    out = {}
+
+    def entry(k):
+        return out.setdefault(k, {"buckets": defaultdict(float), "sum": 0.0, "count": 0.0})
+
+    for labels, value in scrape.get(f"{family}_bucket", []):
+        k = key(labels)
+        if k is not None:
+            entry(k)["buckets"][labels["le"]] += value
+    for suffix in ("sum", "count"):
+        for labels, value in scrape.get(f"{family}_{suffix}", []):
+            k = key(labels)
+            if k is not None:
+                entry(k)[suffix] += value
+    return out
+
+
+def subtract(after: dict, before: dict) -> dict:
+    """Histogram deltas between two results of histograms()."""
+    out = {}
+    for k, h in after.items():
+        prev = before.get(k, {"buckets": {}, "sum": 0.0, "count": 0.0})
+        out[k] = {
+            "buckets": {le: n - prev["buckets"].get(le, 0) for le, n in h["buckets"].items()},
+            "sum": h["sum"] - prev["sum"],
+            "count": h["count"] - prev["count"],
+        }
+    return out
+
+
+def add(total: dict, part: dict):
+    for k, h in part.items():
+        acc = total.setdefault(k, {"buckets": defaultdict(float), "sum": 0.0, "count": 0.0})
+        for le, n in h["buckets"].items():
+            acc["buckets"][le] += n
+        acc["sum"] += h["sum"]
+        acc["count"] += h["count"]
+
+
+def quantile(q: float, buckets: dict) -> float:
+    """Quantile in seconds from cumulative buckets, interpolating linearly within a bucket."""
+    bounds = sorted((float(le), n) for le, n in buckets.items())
+    if not bounds or bounds[-1][1] <= 0:
+        return 0.0
+    rank = q * bounds[-1][1]
+    lower, below = 0.0, 0.0
+    for le, n in bounds:
+        if n >= rank:
+            if math.isinf(le):
+                return lower
+            return lower + (le - lower) * ((rank - below) / (n - below) if n > below else 0)
+        lower, below = le, n
+    return lower
+
+
+def describe(h: dict) -> dict:
+    count = h["count"]
+    return {
+        "count": int(round(count)),
+        "mean_ms": h["sum"] / count * 1000 if count > 0 else 0,
+        "p50_ms": quantile(0.50, h["buckets"]) * 1000,
+        "p95_ms": quantile(0.95, h["buckets"]) * 1000,
+        "p99_ms": quantile(0.99, h["buckets"]) * 1000,
+    }
+
+
+def total(scrape: dict, names, predicate=lambda name, labels: True) -> float:
+    return sum(v for name in names for labels, v in scrape.get(name, []) if predicate(name, labels))
+
+
+def worker_of(scrape: dict) -> str:
+    """The worker="<pid>" label of a Go scrape; Java has one process and no label."""
+    for samples in scrape.values():
+        for labels, _ in samples:
+            return labels.get("worker", "")
+    return ""
+
+
+class Run:
+    """First and latest scrape per worker, plus a timeline over all workers."""
+
+    def __init__(self):
+        self.first = {}
+        self.last = {}
+        self.timeline = []
+
+    def add(self, scrape: dict):
+        worker = worker_of(scrape)
+        self.first.setdefault(worker, scrape)
+        self.last[worker] = scrape
+
+    def expected_workers(self) -> int:
+        return int(max((total(s, ["exchange_workers"]) for s in self.last.values()), default=0)) or 1
+
+    def tick(self, elapsed: float):
+        point = {"t": round(elapsed, 2), "workers": len(self.last)}
+        for key, names in TIMELINE_GAUGES.items():
+            value = sum(total(s, names, _heap) for s in self.last.values())
+            point[key] = round(value / 2**20, 1) if key == "heap_mb" else value
+        point["rejected"] = sum(total(s, ["admission_rejected_total"]) - total(self.first[w], ["admission_rejected_total"])
+                                for w, s in self.last.items())
+        self.timeline.append(point)
+
+    def _delta(self, family: str, key) -> dict:
+        out = {}
+        for worker, scrape in self.last.items():
+            add(out, subtract(histograms(scrape, family, key), histograms(self.first[worker], family, key)))
+        return out
+
+    def _counter(self, names, predicate=lambda name, labels: True) -> float:
+        return sum(total(s, names, predicate) - total(self.first[w], names, predicate) for w, s in self.last.items())
+
+    def summary(self, url: str, interval: float, elapsed: float) -> dict:
+        endpoints = {}
+        for family in REQUEST_HISTOGRAMS:
+            add(endpoints, self._delta(family, endpoint_of))
+        db = {}
+        for family, key in DB_HISTOGRAMS.items():
+            add(db, self._delta(family, key))
+
+        acquires = self._counter(["db_pool_acquire_seconds_count"])
+        acquire_s = self._counter(["db_pool_acquire_seconds_sum"])
+        gc_pause = self._counter(GC_PAUSE_COUNTERS)
+
+        def peak(key):
+            return max((p[key] for p in self.timeline), default=0)
+
+        return {
+            "version": METRICS_VERSION,
+            "url": url,
+            "interval": interval,
+            "duration": elapsed,
+            "workers": len(self.last),
+            "endpoints": {name: describe(endpoints[name]) for name in ENDPOINTS if name in endpoints},
+            "db": dict(sorted(((op, describe(h)) for op, h in db.items() if h["count"] > 0),
+                              key=lambda item: item[1]["count"] * item[1]["mean_ms"], reverse=True)),
+            "pool": {
+                "max_conns": sum(total(s, ["db_pool_max_conns"]) for s in self.last.values()),
+                "peak_acquired": peak("pool_acquired"),
+                "acquires": int(acquires),
+                "acquire_wait_ms": acquire_s / acquires * 1000 if acquires > 0 else 0,
+            },
+            "gc": {
+                "pause_s": gc_pause,
+                "pause_pct": gc_pause / elapsed * 100 if elapsed > 0 else 0,
+                "peak_heap_mb": peak("heap_mb"),
+            },
+            "admission": {
+                "rejected": int(self._counter(["admission_rejected_total"])),
+                "peak_in_flight": peak("in_flight"),
+            },
+            "timeline": self.timeline,
+        }
+
+
+def scrape(url: str, timeout: float) -> dict:
+    # A fresh connection per scrape reaches a random prefork worker
+    request = urllib.request.Request(url, headers={"Connection": "close"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return parse_metrics(response.read().decode("utf-8", errors="replace"))
+
+
+def scrape_workers(run: Run, url: str, fanout: int, timeout: float) -> int:
+    """Scrape until every worker has answered this tick (at most fanout times)."""
+    seen = set()
+    for _ in range(fanout):
+        result = scrape(url, timeout)
+        run.add(result)
+        seen.add(worker_of(result))
+        if len(seen) >= run.expected_workers():
+            break
+    return len(seen)
+
+
+def load_metrics_profile(path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the services' /metrics during a run")
+    parser.add_argument("-o", "--output", required=True, help="JSON profile to write")
+    parser.add_argument("--url", required=True, help="metrics URL, e.g. http://localhost:8080/metrics")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between scrapes")
+    parser.add_argument("--fanout", type=int, default=16, help="scrapes per tick to reach every prefork worker")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="-- command to run while scraping")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    timeout = max(args.interval, 1.0)
+
+    run = Run()
+    try:
+        # Baselines for as many workers as possible before the load starts
+        scrape_workers(run, args.url, args.fanout * 4, timeout)
+    except OSError as e:
+        print(f"⚠ Metrics unavailable at {args.url} ({e}); running without them", file=sys.stderr)
+        if command:
+            sys.exit(subprocess.call(command))
+        sys.exit(1)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    proc = subprocess.Popen(command) if command else None
+    start = time.monotonic()
+    deadline = start + args.duration if args.duration else None
+    next_tick = start
+    while not stopping:
+        if proc is not None and proc.poll() is not None:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        try:
+            scrape_workers(run, args.url, args.fanout, timeout)
+        except OSError as e:
+            # An overloaded server may not answer in time; skip the tick
+            print(f"⚠ {e}", file=sys.stderr)
+        run.tick(time.monotonic() - start)
+        next_tick += args.interval
+        time.sleep(max(next_tick - time.monotonic(), 0))
+    elapsed = time.monotonic() - start
+
+    try:
+        scrape_workers(run, args.url, args.fanout * 4, timeout)
+    except OSError as e:
+        print(f"⚠ Final scrape failed ({e}); using the last one per worker", file=sys.stderr)
+    result = run.summary(args.url, args.interval, elapsed)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"✓ Wrote server metrics ({result['workers']} worker(s), {len(run.timeline)} ticks) to {args.output}",
+          file=sys.stderr)
+    if proc is not None:
+        sys.exit(proc.wait())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Order book fan-out: propagation latency of pushed updates vs polling GET /orderbook.
+
+For each subscriber count, opens that many GET /orderbook/<pair>/stream
+connections (Server-Sent Events: a snapshot, then diffs with sequence numbers),
+posts orders at fresh bid prices at a steady rate and times how long each new
+level takes to reach every subscriber. The same is then done with as many
+pollers fetching GET /orderbook every --poll-interval, the baseline the stream
+replaces. Per point it records the order→update latency percentiles, the share
+of updates that arrived, sequence gaps and streams the server dropped for
+falling behind, and the requests/events per second the server had to serve.
+
+Both services apply a POST to the book at once on the instance that handled it,
+other Go prefork workers see it at their next re-sync (ORDERBOOK_MAX_STALENESS),
+so Go latencies mix both paths.
+
+The curve is written to `<results>/orderbook-stream.json`, which
+generate-graphs.py renders as the order book streaming section. The service must
+already be running with the order book cache on (see `make orderbook-stream-mac`).
+This client is single-threaded: at high fan-out check that it is not the limit
+(its own CPU near 100%) before blaming the server.
+
+Usage: python orderbook_stream.py --target http://localhost:8080 [--results results/mac]
+           [--pair BTC/USDT] [--subscribers 1,10,100,500] [--orders 200] [--rate 20]
+           [--poll-interval 100] [--no-poll] [--cooldown 5]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+ORDERBOOK_STREAM_FILE = "orderbook-stream.json"
+
+# Seeded user with USDT for the test bids
+USER_ID = "11111111-1111-1111-1111-111111111111"
+QUANTITY = 0.001
+# Distinct prices of the test bids, above the best bid so each one is a new top level
+TICK = 0.01
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client (stdlib only, handles chunked bodies)."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.received = 0
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+    async def send(self, method: str, path: str, body: bytes = None, accept: str = "application/json"):
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nAccept: {accept}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write((head + "\r\n").encode() + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            self.received += len(line)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        self.received += len(status_line)
+        return int(status_line.split()[1]), headers
+
+    async def chunks(self, headers: dict):
+        """Body chunks as they arrive."""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    # Closed without the last chunk
+                    return
+                size = int(line.split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    return
+                data = await self.reader.readexactly(size + 2)
+                self.received += len(data)
+                yield data[:-2]
+        elif "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+            self.received += len(data)
+            yield data
+        else:
+            while data := await self.reader.read(65536):
+                self.received += len(data)
+                yield data
+
+    async def request(self, method: str, path: str, body: bytes = None):
+        status, headers = await self.send(method, path, body)
+        data = b"".join([c async for c in self.chunks(headers)])
+        return status, data
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def new_bids(levels: list) -> dict:
+    """price (to the tick) -> quantity of the bid levels in an event or book."""
+    return {round(level["price"], 2): level["quantity"] for level in levels or []}
+
+
+class Probe:
+    """Orders posted during a point: price -> send time."""
+
+    def __init__(self):
+        self.sent = {}
+        self.failed = 0
+
+
+class Subscriber:
+    def __init__(self):
+        self.seen = {}
+        self.events = 0
+        self.gaps = 0
+        self.dropped = False
+        self.error = None
+        self.connected = asyncio.Event()
+        self.snapshot_ms = None
+
+
+async def subscribe(conn: Connection, path: str, sub: Subscriber, probe: Probe, stop: asyncio.Event):
+    started = time.perf_counter()
+    try:
+        await conn.open()
+        status, headers = await conn.send("GET", path, accept="text/event-stream")
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        buffer = b""
+        last_seq = None
+        async for chunk in conn.chunks(headers):
+            now = time.perf_counter()
+            buffer += chunk
+            # Events end with a blank line; comments (keep-alives) carry no data
+            *events, buffer = buffer.replace(b"\r\n", b"\n").split(b"\n\n")
+            for raw in events:
+                data = b"".join(line[5:].lstrip() for line in raw.split(b"\n") if line.startswith(b"data:"))
+                if not data:
+                    continue
+                event = json.loads(data)
+                sub.events += 1
+                if event["type"] == "snapshot":
+                    sub.snapshot_ms = (now - started) * 1000
+                    sub.connected.set()
+                elif last_seq is not None and event["seq"] != last_seq + 1:
+                    sub.gaps += 1
+                last_seq = event["seq"]
+                for price, qty in new_bids(event.get("bids")).items():
+                    if qty > 0 and price in probe.sent and price not in sub.seen:
+                        sub.seen[price] = now
+        # The server ended the stream (it fell behind, or the server stopped)
+        if not stop.is_set():
+            sub.dropped = True
+    except (OSError, ValueError, RuntimeError, asyncio.IncompleteReadError) as e:
+        if not stop.is_set():
+            sub.error = str(e) or type(e).__name__
+    finally:
+        sub.connected.set()
+
+
+async def poll(conn: Connection, path: str, interval: float, sub: Subscriber, probe: Probe, stop: asyncio.Event,
+               phase: float):
+    try:
+        await conn.open()
+        sub.connected.set()
+        await asyncio.sleep(phase)
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            status, data = await conn.request("GET", path)
+            now = time.perf_counter()
+            sub.events += 1
+            if status == 200:
+                for price, qty in new_bids(json.loads(data).get("bids")).items():
+                    if qty > 0 and price in probe.sent and price not in sub.seen:
+                        sub.seen[price] = now
+            next_at += interval
+            await asyncio.sleep(max(0, next_at - time.perf_counter()))
+    except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+        if not stop.is_set():
+            sub.error = str(e) or type(e).__name__
+    finally:
+        sub.connected.set()
+
+
+async def place_orders(conn: Connection, pair: str, prices: list, rate: float, probe: Probe):
+    """POST one bid per price at a steady rate."""
+    start = time.perf_counter()
+    for i, price in enumerate(prices):
+        await asyncio.sleep(max(0, start + i / rate - time.perf_counter()))
+        body = json.dumps({"user_id": USER_ID, "pair": pair, "side": "BUY", "price": price,
+                           "quantity": QUANTITY}).encode()
+        # Registered before sending, so an update that beats the response is still matched
+        probe.sent[round(price, 2)] = time.perf_counter()
+        status, _ = await conn.request("POST", "/orders", body)
+        if status != 201:
+            probe.failed += 1
+            del probe.sent[round(price, 2)]
+
+
+async def best_prices(host: str, port: int, pair: str) -> tuple:
+    conn = Connection(host, port)
+    await conn.open()
+    try:
+        status, data = await conn.request("GET", f"/orderbook/{quote(pair, safe='')}")
+    finally:
+        conn.close()
+    if status != 200:
+        raise RuntimeError(f"GET /orderbook returned {status}")
+    book = json.loads(data)
+    bids = [level["price"] for level in book.get("bids") or []]
+    asks = [level["price"] for level in book.get("asks") or []]
+    return (max(bids) if bids else None), (min(asks) if asks else None)
+
+
+async def run_point(target: str, mode: str, clients: int, pair: str, prices: list, rate: float,
+                    poll_interval: float, grace: float) -> dict:
+    """One side of a point: clients streaming (mode "stream") or polling ("poll") while orders are posted."""
+    url = urlsplit(target)
+    host, port = url.hostname, url.port or 80
+    path = f"/orderbook/{quote(pair, safe='')}" + ("/stream" if mode == "stream" else "")
+    probe = Probe()
+    stop = asyncio.Event()
+    subs = [Subscriber() for _ in range(clients)]
+    conns = [Connection(host, port) for _ in range(clients)]
+    if mode == "stream":
+        tasks = [asyncio.create_task(subscribe(c, path, s, probe, stop)) for c, s in zip(conns, subs)]
+    else:
+        tasks = [asyncio.create_task(poll(c, path, poll_interval, s, probe, stop, poll_interval * i / clients))
+                 for i, (c, s) in enumerate(zip(conns, subs))]
+    await asyncio.gather(*(s.connected.wait() for s in subs))
+
+    writer = Connection(host, port)
+    await writer.open()
+    started = time.perf_counter()
+    try:
+        await place_orders(writer, pair, prices, rate, probe)
+        await asyncio.sleep(grace)
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        writer.close()
+        for c in conns:
+            c.close()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [(s.seen[price] - sent) * 1000 for s in subs for price, sent in probe.sent.items()
+                 if price in s.seen]
+    expected = len(probe.sent) * sum(1 for s in subs if not s.error)
+    return {
+        "clients": clients,
+        "errors": sum(1 for s in subs if s.error),
+        "dropped": sum(1 for s in subs if s.dropped),
+        "gaps": sum(s.gaps for s in subs),
+        "orders": len(probe.sent),
+        "failed_orders": probe.failed,
+        "delivered": len(latencies) / expected * 100 if expected else 0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=0),
+        # Events received (stream) or responses (poll) per second over all clients
+        "per_sec": sum(s.events for s in subs) / elapsed,
+        "mb_received": sum(c.received for c in conns) / 1e6,
+        "snapshot_p99": percentile([s.snapshot_ms for s in subs if s.snapshot_ms is not None], 99),
+    }
+
+
+def load_orderbook_stream(results_dir: str) -> dict:
+    path = Path(results_dir) / ORDERBOOK_STREAM_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_orderbook_stream(results_dir: str, stream: dict):
+    with open(Path(results_dir) / ORDERBOOK_STREAM_FILE, "w") as f:
+        json.dump(stream, f, indent=2, sort_keys=True)
+
+
+def describe(side: dict) -> str:
+    return (f"p50 {side['p50']:.1f} ms, p99 {side['p99']:.1f} ms, {side['delivered']:.1f}% delivered, "
+            f"{side['per_sec']:,.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure order book update fan-out: streaming vs polling")
+    parser.add_argument("--target", default="http://localhost:8080")
+    parser.add_argument("--results", default="results/mac", help="results directory for the curve")
+    parser.add_argument("--pair", default="BTC/USDT")
+    parser.add_argument("--subscribers", default="1,10,100,500", help="comma-separated subscriber counts")
+    parser.add_argument("--orders", type=int, default=200, help="orders posted per run")
+    parser.add_argument("--rate", type=float, default=20, help="orders posted per second")
+    parser.add_argument("--poll-interval", type=float, default=100, help="polling baseline interval (ms)")
+    parser.add_argument("--no-poll", action="store_true", help="skip the polling baseline")
+    parser.add_argument("--grace", type=float, default=2, help="seconds to wait for updates after the last order")
+    parser.add_argument("--cooldown", type=float, default=5, help="seconds to idle between runs")
+    parser.add_argument("--base-price", type=float, help="first test bid (default: just above the best bid)")
+    args = parser.parse_args()
+
+    counts = sorted({int(n) for n in args.subscribers.split(",") if n.strip()})
+    # Same rule as handleSummary in 10k-benchmark.js
+    service = "go" if "8080" in args.target else "java"
+    url = urlsplit(args.target)
+    try:
+        best_bid, best_ask = asyncio.run(best_prices(url.hostname, url.port or 80, args.pair))
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"✗ {args.target}: {e}")
+        sys.exit(1)
+
+    # Every run gets fresh prices above the book so each order is a new, visible top level
+    runs = len(counts) * (1 if args.no_poll else 2)
+    base = args.base_price or (math.floor(best_bid) + 1 if best_bid else 42100)
+    top = base + runs * args.orders * TICK
+    if best_ask is not None and top >= best_ask:
+        print(f"✗ test bids {base:.2f}..{top:.2f} would cross the best ask {best_ask:.2f}; "
+              f"reset the data (make db-reset) or lower --orders")
+        sys.exit(1)
+
+    Path(args.results).mkdir(parents=True, exist_ok=True)
+    stream = load_orderbook_stream(args.results)
+    entry = {"target": args.target, "pair": args.pair, "orders": args.orders, "rate": args.rate,
+             "poll_interval_ms": None if args.no_poll else args.poll_interval, "points": []}
+    stream[service] = entry
+
+    print(f"\n📡 Order book fan-out for {service} ({args.target}), {args.orders} orders at {args.rate:g}/s per run"
+          + ("" if args.no_poll else f", polling every {args.poll_interval:g} ms for comparison") + "\n")
+
+    run = 0
+
+    def next_prices() -> list:
+        nonlocal run
+        first = base + run * args.orders * TICK
+        run += 1
+        return [round(first + i * TICK, 2) for i in range(args.orders)]
+
+    try:
+        for i, clients in enumerate(counts):
+            if i:
+                time.sleep(args.cooldown)
+            print(f">>> {clients} subscriber{'s' if clients != 1 else ''} ...", flush=True)
+            point = {"subscribers": clients}
+            point["stream"] = asyncio.run(run_point(args.target, "stream", clients, args.pair, next_prices(),
+                                                    args.rate, 0, args.grace))
+            print(f"    stream: {describe(point['stream'])}, {point['stream']['dropped']} dropped, "
+                  f"{point['stream']['gaps']} gaps, {point['stream']['errors']} errors")
+            if not args.no_poll:
+                time.sleep(args.cooldown)
+                point["poll"] = asyncio.run(run_point(args.target, "poll", clients, args.pair, next_prices(),
+                                                      args.rate, args.poll_interval / 1000, args.grace))
+                print(f"    poll:   {describe(point['poll'])}, {point['poll']['errors']} errors")
+            entry["points"].append(point)
+            # Saved after every point so an aborted sweep keeps its progress
+            save_orderbook_stream(args.results, stream)
+    except (OSError, RuntimeError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"\n✓ {service}: {len(entry['points'])} subscriber counts → {Path(args.results) / ORDERBOOK_STREAM_FILE}")
+
+
+if __name__ == "__main__":
+    main()
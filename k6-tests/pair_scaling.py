@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Pair-scaling curve: how throughput and match latency change with the number of trading pairs.
+
+Runs 10k-benchmark.js once per pair count with the PAIRS/PAIR_SKEW env knobs,
+at the same arrival rate each time, so the only variable is how many books the
+load is spread over (Zipf-skewed by default, like real venues where a few pairs
+take most of the flow). With per-pair match lanes the match calls of different
+pairs no longer serialize, so trades/s should grow and match latency shrink
+with the pair count until something shared (Postgres, CPU) becomes the limit.
+
+Each run's summary is kept under `<results>/pair-scaling/<service>-<n>pairs/`
+and the curve is written to `<results>/pair-scaling.json`, which
+generate-graphs.py renders as the pair-scaling section.
+
+The service must already be running (see `make pair-scaling-mac`).
+
+Usage: python pair_scaling.py --target http://localhost:8080 [--results results/mac]
+           [--pairs 1,2,4,8,16,32] [--skew 1.0] [--rps 5000] [--duration 2m] [--cooldown 15]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from saturation import K6_SCRIPT, evaluate
+
+PAIR_SCALING_FILE = "pair-scaling.json"
+PAIR_SCALING_DIR = "pair-scaling"
+
+
+def run_dir(results_dir: str, service: str, pairs: int) -> Path:
+    return Path(results_dir) / PAIR_SCALING_DIR / f"{service}-{pairs}pairs"
+
+
+def measure(data: dict, target_rps: int, pairs: int) -> dict:
+    """One point of the curve from a k6 summary: the saturation step plus match throughput/latency."""
+    metrics = data.get("metrics", {})
+    match = metrics.get("match_orders_latency", {}).get("values", {})
+    create = metrics.get("create_order_latency", {}).get("values", {})
+    trades = metrics.get("trades_matched", {}).get("values", {})
+    point = evaluate(data, target_rps)
+    point.update({
+        "pairs": pairs,
+        "trades_per_sec": trades.get("rate", 0),
+        "match_p95": match.get("p(95)", 0),
+        "match_p99": match.get("p(99)", 0),
+        "create_order_p95": create.get("p(95)", 0),
+    })
+    return point
+
+
+def run_point(target: str, service: str, pairs: int, skew: float, rps: int, duration: str,
+              results_dir: str) -> dict:
+    """Run k6 at one pair count."""
+    out_dir = run_dir(results_dir, service, pairs)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        "k6", "run", "--quiet",
+        "--env", f"TARGET={target}",
+        "--env", f"RPS={rps}",
+        "--env", f"DURATION={duration}",
+        "--env", f"PAIRS={pairs}",
+        "--env", f"PAIR_SKEW={skew}",
+        "--env", f"RESULTS_DIR={out_dir}",
+        str(K6_SCRIPT),
+    ]
+
+    # k6 exits 99 when thresholds fail; the point is still recorded
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL)
+    summary = out_dir / f"{service}-10k-results.json"
+    if not summary.exists():
+        raise RuntimeError(f"k6 exited with {proc.returncode} without writing {summary}")
+    with open(summary) as f:
+        data = json.load(f)
+    return measure(data, rps, pairs)
+
+
+def load_pair_scaling(results_dir: str) -> dict:
+    path = Path(results_dir) / PAIR_SCALING_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_pair_scaling(results_dir: str, scaling: dict):
+    with open(Path(results_dir) / PAIR_SCALING_FILE, "w") as f:
+        json.dump(scaling, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput and match latency against the trading pair count")
+    parser.add_argument("--target", default="http://localhost:8080")
+    parser.add_argument("--results", default="results/mac", help="results directory for the curve")
+    parser.add_argument("--pairs", default="1,2,4,8,16,32", help="comma-separated pair counts")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of pair popularity (0 = uniform)")
+    parser.add_argument("--rps", type=int, default=5000, help="arrival rate of every run")
+    parser.add_argument("--duration", default="2m", help="k6 duration per run")
+    parser.add_argument("--cooldown", type=float, default=15, help="seconds to idle between runs")
+    args = parser.parse_args()
+
+    counts = sorted({int(p) for p in args.pairs.split(",") if p.strip()})
+    # Same rule as handleSummary in 10k-benchmark.js
+    service = "go" if "8080" in args.target else "java"
+    Path(args.results).mkdir(parents=True, exist_ok=True)
+    scaling = load_pair_scaling(args.results)
+    entry = {"target": args.target, "duration": args.duration, "rps": args.rps, "skew": args.skew, "points": []}
+    scaling[service] = entry
+
+    print(f"\n🔀 Pair scaling for {service} ({args.target}), {args.rps:,} RPS for {args.duration} "
+          f"per run, Zipf skew {args.skew}\n")
+
+    try:
+        for i, pairs in enumerate(counts):
+            if i:
+                time.sleep(args.cooldown)
+            print(f">>> {pairs} pair{'s' if pairs != 1 else ''} ...", flush=True)
+            point = run_point(args.target, service, pairs, args.skew, args.rps, args.duration, args.results)
+            entry["points"].append(point)
+            # Saved after every run so an aborted sweep keeps its progress
+            save_pair_scaling(args.results, scaling)
+            status = "✓" if point["ok"] else "✗ " + ", ".join(point["breached"])
+            print(f"    achieved {point['rps']:,.0f} RPS, {point['trades_per_sec']:,.0f} trades/s, "
+                  f"match p99 {point['match_p99']:.1f} ms  {status}")
+    except (OSError, RuntimeError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"\n✓ {service}: {len(entry['points'])} pair counts → {Path(args.results) / PAIR_SCALING_FILE}")
+
+
+if __name__ == "__main__":
+    main()
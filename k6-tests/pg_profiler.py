@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Postgres-side profile of a benchmark run.
+
+Snapshots pg_stat_statements and pg_stat_database when the run starts and
+ends and reports the difference, so the profile covers only that run. While
+the run is going it samples pg_stat_activity (session states and wait events
+per query) and pg_locks (waiting lock requests) every --interval seconds.
+Together they separate the two suspects behind the error rates: a pool at
+max_connections with idle sessions shows up in connections, while lock
+contention shows up as Lock waits on the FOR UPDATE / UPDATE statements.
+
+Lock wait per statement is a sampling estimate: sessions seen waiting on a
+Lock event x sampling interval.
+
+Postgres is reached through psql (default: the docker-compose container), so
+no Python driver is needed. pg_stat_statements must be in
+shared_preload_libraries (docker-compose.yml sets it); the extension is
+created on first use.
+
+The profile is written as JSON (`<results>/<service>-pgprofile.json`) and
+generate-graphs.py renders it as the Postgres section of RESULTS.md.
+
+Usage: python pg_profiler.py -o results/mac/go-pgprofile.json [--interval 1] -- k6 run ...
+       python pg_profiler.py -o go-pgprofile.json [--duration 600]     (until SIGTERM/duration)
+           [--psql "docker exec -i cryptox-postgres psql -U postgres -d cryptox"]
+"""
+
+import argparse
+import json
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_PSQL = "docker exec -i cryptox-postgres psql -U postgres -d cryptox"
+PROFILE_VERSION = 1
+
+STATEMENTS_SQL = """
+SELECT coalesce(json_agg(s), '[]') FROM (
+    SELECT queryid, query, calls, total_exec_time, rows, shared_blks_hit, shared_blks_read
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+) s
+"""
+
+DATABASE_SQL = """
+SELECT json_build_object(
+    'xact_commit', xact_commit, 'xact_rollback', xact_rollback, 'deadlocks', deadlocks,
+    'blks_hit', blks_hit, 'blks_read', blks_read, 'temp_bytes', temp_bytes,
+    'max_connections', current_setting('max_connections')::int
+) FROM pg_stat_database WHERE datname = current_database()
+"""
+
+SAMPLE_SQL = """
+SELECT json_build_object(
+    'activity', (
+        SELECT coalesce(json_agg(a), '[]') FROM (
+            SELECT coalesce(state, '') AS state, coalesce(wait_event_type, '') AS wait_event_type,
+                   coalesce(wait_event, '') AS wait_event, query_id, count(*) AS sessions
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND pid <> pg_backend_pid()
+              AND backend_type = 'client backend'
+            GROUP BY 1, 2, 3, 4
+        ) a
+    ),
+    'locks', (
+        SELECT coalesce(json_agg(l), '[]') FROM (
+            SELECT locktype, mode, count(*) AS waiting
+            FROM pg_locks WHERE NOT granted
+            GROUP BY 1, 2
+        ) l
+    ),
+    'blocked', (
+        SELECT count(*) FROM pg_stat_activity
+        WHERE datname = current_database() AND cardinality(pg_blocking_pids(pid)) > 0
+    ),
+    'total', (
+        SELECT count(*) FROM pg_stat_activity
+        WHERE backend_type = 'client backend' AND pid <> pg_backend_pid()
+    )
+)
+"""
+
+
+class Psql:
+    """Runs single queries that return one JSON value through a psql command."""
+
+    def __init__(self, command: str):
+        self.command = shlex.split(command) + ["-X", "-A", "-t", "-q", "-v", "ON_ERROR_STOP=1"]
+
+    def query(self, sql: str):
+        out = subprocess.run(self.command, input=sql, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"psql failed: {out.stderr.strip()}")
+        return json.loads(out.stdout.strip() or "null")
+
+    def execute(self, sql: str):
+        out = subprocess.run(self.command, input=sql, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"psql failed: {out.stderr.strip()}")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def diff_statements(before: list, after: list) -> dict:
+    """Per-queryid counter deltas between two pg_stat_statements snapshots."""
+    base = {s["queryid"]: s for s in before}
+    out = {}
+    for s in after:
+        prev = base.get(s["queryid"], {})
+        calls = s["calls"] - prev.get("calls", 0)
+        if calls <= 0:
+            continue
+        out[s["queryid"]] = {
+            "queryid": s["queryid"],
+            "query": normalize_query(s["query"]),
+            "calls": calls,
+            "total_ms": s["total_exec_time"] - prev.get("total_exec_time", 0),
+            "rows": s["rows"] - prev.get("rows", 0),
+            "shared_blks_hit": s["shared_blks_hit"] - prev.get("shared_blks_hit", 0),
+            "shared_blks_read": s["shared_blks_read"] - prev.get("shared_blks_read", 0),
+        }
+    return out
+
+
+class Profile:
+    """Accumulates pg_stat_activity / pg_locks samples."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.waits = defaultdict(int)            # (type, event) -> session samples
+        self.query_waits = defaultdict(lambda: defaultdict(int))  # queryid -> type -> session samples
+        self.locks = defaultdict(lambda: [0, 0])  # (locktype, mode) -> [sum waiting, max waiting]
+        self.timeline = []
+
+    def add(self, elapsed: float, sample: dict):
+        self.samples += 1
+        states = defaultdict(int)
+        lock_waiting = 0
+        for row in sample["activity"]:
+            n = row["sessions"]
+            states[row["state"] or "unknown"] += n
+            if row["state"] != "active":
+                continue
+            wait_type = row["wait_event_type"] or "CPU"
+            self.waits[(wait_type, row["wait_event"])] += n
+            if row["query_id"] is not None:
+                self.query_waits[row["query_id"]][wait_type] += n
+            if wait_type == "Lock":
+                lock_waiting += n
+        for row in sample["locks"]:
+            acc = self.locks[(row["locktype"], row["mode"])]
+            acc[0] += row["waiting"]
+            acc[1] = max(acc[1], row["waiting"])
+        self.timeline.append({
+            "t": round(elapsed, 2),
+            "total": sample["total"],
+            "active": states.get("active", 0),
+            "idle": states.get("idle", 0),
+            "idle_in_transaction": states.get("idle in transaction", 0),
+            "lock_waiting": lock_waiting,
+            "blocked": sample["blocked"],
+        })
+
+    def summary(self, statements: dict, database: dict, elapsed: float) -> dict:
+        for queryid, waits in self.query_waits.items():
+            if queryid in statements:
+                statements[queryid]["wait_samples"] = dict(waits)
+        for s in statements.values():
+            s["mean_ms"] = s["total_ms"] / s["calls"]
+            s["lock_wait_s"] = s.get("wait_samples", {}).get("Lock", 0) * self.interval
+        n = max(self.samples, 1)
+
+        def peak(key):
+            return max((t[key] for t in self.timeline), default=0)
+
+        return {
+            "version": PROFILE_VERSION,
+            "interval": self.interval,
+            "duration": elapsed,
+            "samples": self.samples,
+            "statements": sorted(statements.values(), key=lambda s: s["total_ms"], reverse=True),
+            "waits": sorted(
+                ({"wait_event_type": t, "wait_event": e, "samples": c, "avg_sessions": c / n}
+                 for (t, e), c in self.waits.items()),
+                key=lambda w: w["samples"], reverse=True,
+            ),
+            "locks": sorted(
+                ({"locktype": lt, "mode": m, "avg_waiting": acc[0] / n, "max_waiting": acc[1]}
+                 for (lt, m), acc in self.locks.items()),
+                key=lambda l: l["avg_waiting"], reverse=True,
+            ),
+            "connections": {
+                "max_connections": database.get("max_connections"),
+                "peak_total": peak("total"),
+                "peak_active": peak("active"),
+                "peak_idle_in_transaction": peak("idle_in_transaction"),
+                "peak_lock_waiting": peak("lock_waiting"),
+                "peak_blocked": peak("blocked"),
+            },
+            "database": database,
+            "timeline": self.timeline,
+        }
+
+
+def diff_database(before: dict, after: dict) -> dict:
+    out = {k: after[k] - before.get(k, 0) for k in after if k != "max_connections"}
+    out["max_connections"] = after.get("max_connections")
+    return out
+
+
+def load_profile(path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile Postgres statements, waits and locks during a run")
+    parser.add_argument("-o", "--output", required=True, help="JSON profile to write")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between activity/lock samples")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--psql", default=DEFAULT_PSQL, help="psql command line to reach the database")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="-- command to run while profiling")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+
+    psql = Psql(args.psql)
+    try:
+        psql.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+        before = psql.query(STATEMENTS_SQL)
+        db_before = psql.query(DATABASE_SQL)
+    except (OSError, RuntimeError) as e:
+        print(f"⚠ Postgres profiling unavailable ({e}); running without it", file=sys.stderr)
+        if command:
+            sys.exit(subprocess.call(command))
+        sys.exit(1)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    proc = subprocess.Popen(command) if command else None
+    profile = Profile(args.interval)
+    start = time.monotonic()
+    deadline = start + args.duration if args.duration else None
+    next_tick = start
+    while not stopping:
+        if proc is not None and proc.poll() is not None:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        try:
+            profile.add(time.monotonic() - start, psql.query(SAMPLE_SQL))
+        except RuntimeError as e:
+            # An overloaded server may refuse the sampling connection; skip the tick
+            print(f"⚠ {e}", file=sys.stderr)
+        next_tick += args.interval
+        time.sleep(max(next_tick - time.monotonic(), 0))
+    elapsed = time.monotonic() - start
+
+    try:
+        statements = diff_statements(before, psql.query(STATEMENTS_SQL))
+        database = diff_database(db_before, psql.query(DATABASE_SQL))
+    except (OSError, RuntimeError) as e:
+        # The run's result is k6's: keep the sampled timeline and still exit with its status
+        print(f"⚠ Postgres statement/database stats unavailable ({e}); writing samples only", file=sys.stderr)
+        statements, database = {}, {}
+    result = profile.summary(statements, database, elapsed)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"✓ Wrote Postgres profile ({len(statements)} statements, {profile.samples} samples) to {args.output}",
+          file=sys.stderr)
+    if proc is not None:
+        sys.exit(proc.wait())
+
+
+if __name__ == "__main__":
+    main()
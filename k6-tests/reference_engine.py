@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+In-memory reference matching engine.
+
+Replays a recorded order stream against a price-level order book (sorted
+price levels, FIFO queue per price, __slots__ orders) with no database, to
+show how fast the matching logic itself can go and which trades it should
+produce.
+
+The default `per-call` mode mirrors MatchOrders (Go) and
+TradingService.matchOrders (Java): orders rest on arrival and every match op
+executes at most one trade between the best bid and best ask, at the ask
+price. `continuous` mode instead fills crossing orders as they arrive.
+
+Stream format (NDJSON, optionally gzipped), one op per line:
+    {"op": "order", "user_id": "...", "pair": "BTCUSDT", "side": "BUY", "price": 41500.0, "quantity": 0.1}
+    {"op": "match", "pair": "BTCUSDT"}
+    {"op": "orderbook", "pair": "BTCUSDT"}
+Lines without "op" are treated as orders (the POST /orders body). Other ops are ignored.
+
+Usage: python reference_engine.py STREAM [--mode per-call|continuous] [--trades trades.csv]
+                                  [--expected db-trades.csv] [--results results/mac]
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from k6_stream import ENDPOINTS, open_ndjson
+
+DEPTH_LEVELS = 50
+
+
+class Order:
+    __slots__ = ("seq", "user_id", "side", "price", "quantity")
+
+    def __init__(self, seq: int, user_id: str, side: str, price: float, quantity: float):
+        self.seq = seq
+        self.user_id = user_id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+
+
+class Trade:
+    __slots__ = ("buy_seq", "sell_seq", "price", "quantity")
+
+    def __init__(self, buy_seq: int, sell_seq: int, price: float, quantity: float):
+        self.buy_seq = buy_seq
+        self.sell_seq = sell_seq
+        self.price = price
+        self.quantity = quantity
+
+
+class PriceLevel:
+    __slots__ = ("price", "orders", "total")
+
+    def __init__(self, price: float):
+        self.price = price
+        self.orders = deque()
+        self.total = 0.0
+
+
+class OrderBook:
+    """Price-level book for one pair.
+
+    Level keys are kept sorted so the best level is always at the end:
+    bids by price ascending, asks by negated price ascending.
+    """
+
+    def __init__(self, pair: str):
+        self.pair = pair
+        self._levels = {"BUY": {}, "SELL": {}}
+        self._keys = {"BUY": [], "SELL": []}
+
+    @staticmethod
+    def _key(side: str, price: float) -> float:
+        return price if side == "BUY" else -price
+
+    def add(self, order: Order):
+        levels = self._levels[order.side]
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel(order.price)
+            bisect.insort(self._keys[order.side], self._key(order.side, order.price))
+        level.orders.append(order)
+        level.total += order.quantity
+
+    def best(self, side: str) -> PriceLevel:
+        keys = self._keys[side]
+        if not keys:
+            return None
+        return self._levels[side][keys[-1] if side == "BUY" else -keys[-1]]
+
+    def _consume(self, level: PriceLevel, quantity: float):
+        head = level.orders[0]
+        if head.quantity == quantity:
+            level.orders.popleft()
+        else:
+            head.quantity -= quantity
+        level.total -= quantity
+        if not level.orders:
+            side = head.side
+            del self._levels[side][level.price]
+            self._keys[side].pop()
+
+    def match_once(self) -> Trade:
+        """One trade between the best bid and best ask, at the ask price (service semantics)."""
+        bid_level = self.best("BUY")
+        ask_level = self.best("SELL")
+        if bid_level is None or ask_level is None or bid_level.price < ask_level.price:
+            return None
+        bid = bid_level.orders[0]
+        ask = ask_level.orders[0]
+        quantity = min(bid.quantity, ask.quantity)
+        trade = Trade(bid.seq, ask.seq, ask.price, quantity)
+        self._consume(bid_level, quantity)
+        self._consume(ask_level, quantity)
+        return trade
+
+    def match_all(self) -> list:
+        trades = []
+        while True:
+            trade = self.match_once()
+            if trade is None:
+                return trades
+            trades.append(trade)
+
+    def depth(self, levels: int = DEPTH_LEVELS) -> dict:
+        """Top-of-book aggregate, same shape as GET /orderbook."""
+        out = {"pair": self.pair}
+        for side, name in (("BUY", "bids"), ("SELL", "asks")):
+            keys = self._keys[side][-levels:][::-1]
+            book = self._levels[side]
+            out[name] = [
+                {"price": p, "quantity": book[p].total}
+                for p in (k if side == "BUY" else -k for k in keys)
+            ]
+        return out
+
+
+class Engine:
+    def __init__(self, mode: str = "per-call"):
+        self.mode = mode
+        self.books = {}
+        self.trades = []
+        self.orders = 0
+        self.match_calls = 0
+        self.depth_reads = 0
+        # Time spent inside matching only, excluding inserts and depth reads
+        self.match_seconds = 0.0
+        self._seq = 0
+
+    def book(self, pair: str) -> OrderBook:
+        if pair not in self.books:
+            self.books[pair] = OrderBook(pair)
+        return self.books[pair]
+
+    def apply(self, op: dict):
+        kind = op.get("op", "order")
+        pair = op.get("pair", "BTCUSDT")
+        if kind == "order":
+            self._seq += 1
+            self.orders += 1
+            book = self.book(pair)
+            book.add(Order(self._seq, op.get("user_id"), op["side"], float(op["price"]), float(op["quantity"])))
+            if self.mode == "continuous":
+                start = time.perf_counter()
+                self.trades.extend(book.match_all())
+                self.match_seconds += time.perf_counter() - start
+        elif kind == "match":
+            self.match_calls += 1
+            if self.mode == "per-call":
+                start = time.perf_counter()
+                trade = self.book(pair).match_once()
+                self.match_seconds += time.perf_counter() - start
+                if trade is not None:
+                    self.trades.append(trade)
+        elif kind == "orderbook":
+            self.depth_reads += 1
+            self.book(pair).depth()
+
+
+def load_ops(path) -> list:
+    """Read the whole stream up front so parsing is not part of the timed replay."""
+    ops = []
+    with open_ndjson(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                ops.append(json.loads(line))
+    return ops
+
+
+def write_trades(trades: list, path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["buy_seq", "sell_seq", "price", "quantity"])
+        for t in trades:
+            writer.writerow([t.buy_seq, t.sell_seq, f"{t.price:.8f}", f"{t.quantity:.8f}"])
+
+
+def compare_trades(trades: list, expected_path: str) -> dict:
+    """Compare against trades exported from Postgres (CSV with price,quantity columns).
+
+    Order IDs differ between runs, so trades are compared as a multiset of
+    (price, quantity) rounded to the column scale (8 decimals).
+    """
+    with open(expected_path, newline="") as f:
+        expected = Counter(
+            (round(float(r["price"]), 8), round(float(r["quantity"]), 8)) for r in csv.DictReader(f)
+        )
+    actual = Counter((round(t.price, 8), round(t.quantity, 8)) for t in trades)
+    return {
+        "expected": sum(expected.values()),
+        "actual": sum(actual.values()),
+        "matching": sum((expected & actual).values()),
+        "missing": sum((expected - actual).values()),
+        "unexpected": sum((actual - expected).values()),
+    }
+
+
+def service_match_rps(results_dir: str) -> dict:
+    """Match calls/sec each service sustained in a results directory's k6 summary."""
+    check_name = ENDPOINTS["match_orders"]["check"]
+    out = {}
+    for service in ("go", "java"):
+        path = Path(results_dir) / f"{service}-10k-results.json"
+        if not path.exists():
+            continue
+        with open(path) as f:
+            data = json.load(f)
+        elapsed = data.get("state", {}).get("testRunDurationMs", 0) / 1000
+        for check in data.get("root_group", {}).get("checks", []):
+            if check["name"] == check_name and elapsed > 0:
+                out[service] = check.get("passes", 0) / elapsed
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an order stream through the reference matching engine")
+    parser.add_argument("stream", help="NDJSON order stream (optionally gzipped)")
+    parser.add_argument("--mode", choices=["per-call", "continuous"], default="per-call")
+    parser.add_argument("--trades", help="write the produced trades to this CSV")
+    parser.add_argument("--expected", help="CSV of trades exported from Postgres to check against")
+    parser.add_argument("--results", help="results directory to compare match throughput with")
+    args = parser.parse_args()
+
+    ops = load_ops(args.stream)
+    print(f"✓ Loaded {len(ops):,} ops from {args.stream}")
+
+    engine = Engine(args.mode)
+    start = time.perf_counter()
+    for op in ops:
+        engine.apply(op)
+    elapsed = time.perf_counter() - start
+
+    volume = sum(t.price * t.quantity for t in engine.trades)
+    resting = sum(
+        len(level.orders)
+        for book in engine.books.values()
+        for side in book._levels.values()
+        for level in side.values()
+    )
+    print(f"\n⚙️  Reference engine ({args.mode}) replayed in {elapsed:.3f}s")
+    print(f"   Ops/sec:         {len(ops) / elapsed:>14,.0f}")
+    print(f"   Orders:          {engine.orders:>14,}")
+    print(f"   Match calls:     {engine.match_calls:>14,}")
+    print(f"   Depth reads:     {engine.depth_reads:>14,}")
+    match_rps = len(engine.trades) / engine.match_seconds if engine.match_seconds > 0 else 0
+    print(f"   Trades:          {len(engine.trades):>14,}  ({match_rps:,.0f} matches/sec of matching time)")
+    print(f"   Volume matched:  {volume:>14,.2f}")
+    print(f"   Resting orders:  {resting:>14,}")
+
+    if args.trades:
+        write_trades(engine.trades, args.trades)
+        print(f"\n✓ Wrote trades to {args.trades}")
+
+    if args.expected:
+        c = compare_trades(engine.trades, args.expected)
+        status = "✓" if c["missing"] == 0 and c["unexpected"] == 0 else "✗"
+        print(f"\n{status} Trades vs {args.expected}: {c['matching']:,}/{c['expected']:,} match, "
+              f"{c['missing']:,} missing, {c['unexpected']:,} unexpected")
+
+    if args.results:
+        for service, rps in service_match_rps(args.results).items():
+            headroom = f"{match_rps / rps:,.0f}x" if rps > 0 else "N/A"
+            print(f"   {service}: {rps:,.0f} successful match calls/sec via Postgres → engine headroom {headroom}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+On-disk cache manifest for incremental report generation.
+
+Each results directory keeps a `.graphs-cache.json` recording, per output
+(figure, sketch, RESULTS.md), the content hash of the inputs it was built
+from. An output is only rebuilt when that hash changes. File hashes are
+themselves memoized by (size, mtime) so multi-GB raw files are not rehashed
+on every run.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+CACHE_MANIFEST = ".graphs-cache.json"
+
+# Changing any report script invalidates every cached output
+_SCRIPT_FILES = ("generate-graphs.py", "k6_stream.py", "k6_timeseries.py", "latency_sketch.py", "report_cache.py",
+                 "saturation.py", "telemetry.py", "pg_profiler.py", "metrics_scraper.py", "steady_state.py",
+                 "pair_scaling.py", "orderbook_stream.py", "results_archive.py")
+
+
+def _hash_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _scripts_digest() -> str:
+    h = hashlib.sha256()
+    here = Path(__file__).parent
+    for name in _SCRIPT_FILES:
+        path = here / name
+        if path.exists():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class ReportCache:
+    """Content-hash manifest for one results directory."""
+
+    def __init__(self, results_dir: str, force: bool = False):
+        self.path = Path(results_dir) / CACHE_MANIFEST
+        self.force = force
+        self.outputs = {}
+        self.files = {}
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.outputs = data.get("outputs", {})
+                self.files = data.get("files", {})
+            except (OSError, ValueError):
+                # A corrupt manifest just means a full rebuild
+                pass
+        self._scripts = _scripts_digest()
+
+    def file_digest(self, path) -> str:
+        path = Path(path)
+        stat = path.stat()
+        # Inputs all live in the results directory the manifest belongs to
+        key = path.name
+        cached = self.files.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = _hash_file(path)
+        self.files[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def digest(self, inputs, scripts: bool = True) -> str:
+        """Combined hash of the given input files (missing ones skipped) and, by default, the report scripts."""
+        h = hashlib.sha256(self._scripts.encode() if scripts else b"")
+        for path in sorted(str(p) for p in inputs if p and Path(p).exists()):
+            h.update(Path(path).name.encode())
+            h.update(self.file_digest(path).encode())
+        return h.hexdigest()
+
+    def is_fresh(self, name: str, digest: str, *outputs) -> bool:
+        """True if `name` was built from the same inputs and all its outputs still exist."""
+        if self.force or self.outputs.get(name) != digest:
+            return False
+        return all(Path(output).exists() for output in outputs)
+
+    def mark(self, name: str, digest: str):
+        self.outputs[name] = digest
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"outputs": self.outputs, "files": self.files}, f, indent=2, sort_keys=True)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Columnar archive of benchmark runs for cross-run analysis.
+
+Each archived run keeps its per-request samples (time, endpoint, HTTP status,
+latency) from the raw k6 output, plus a one-row summary of its report metrics.
+Both are stored as Arrow IPC files in Hive-style partitions:
+
+    <archive>/samples/env=mac/service=go/run=<run key>/samples.arrow
+    <archive>/runs/env=mac/service=go/run=<run key>/summary.arrow
+
+The files are uncompressed, so reads memory-map them. A query only pages in
+the partitions and columns it touches. Filters and aggregations (an Acero
+plan with t-digest quantiles) stream record batches through Arrow, so tens of
+millions of samples across runs never become Python objects or one table. A sample takes 15 bytes:
+10M requests are about 150 MB on disk and are never loaded all at once.
+
+Runs are keyed like history.py entries (content hash of the summary inputs),
+so archiving the same results twice is a no-op. `generate-graphs.py --archive`
+archives every run it renders and adds a cross-run section. This script
+answers ad-hoc queries.
+
+Usage: python results_archive.py runs [--archive results/archive] [--env mac] [--service go]
+       python results_archive.py query [--env mac] [--service go] [--endpoint get_orderbook]
+           [--last 5] [--by run,endpoint] [--status 503]
+"""
+
+import argparse
+import os
+import re
+import sys
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from pyarrow import acero
+
+from history import current_commit
+from k6_stream import ENDPOINTS, endpoint_of, iter_points, parse_time
+
+DEFAULT_ARCHIVE = "results/archive"
+SAMPLES_DIR = "samples"
+RUNS_DIR = "runs"
+SAMPLES_FILE = "samples.arrow"
+SUMMARY_FILE = "summary.arrow"
+
+# Rows per record batch: bounds the writer's memory (about 16 MB of buffers)
+BATCH_ROWS = 1 << 20
+
+# Every file shares this dictionary, so runs concatenate without re-encoding
+ENDPOINT_NAMES = pa.array(list(ENDPOINTS) + ["other"], pa.string())
+_ENDPOINT_INDEX = {name: i for i, name in enumerate(ENDPOINT_NAMES.to_pylist())}
+
+SAMPLE_SCHEMA = pa.schema([
+    ("time", pa.timestamp("us", tz="UTC")),
+    ("endpoint", pa.dictionary(pa.int8(), pa.string())),
+    # 0 when the request got no response
+    ("status", pa.int16()),
+    ("latency_ms", pa.float32()),
+])
+
+# env/service/run come from the directory names, dictionary-encoded so a
+# sample's partition values cost an index rather than a string
+PARTITIONING = ds.HivePartitioning.discover(infer_dictionary=True)
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+_FRACTION = re.compile(r"\d{1,6}")
+
+
+def partition_dir(root: str, kind: str, env: str, service: str, run_key: str) -> Path:
+    return Path(root) / kind / f"env={env}" / f"service={service}" / f"run={run_key}"
+
+
+def _epoch_us(time: str, seconds: dict) -> int:
+    """k6 timestamp as Unix microseconds; each second is parsed once per run."""
+    label = time[:19]
+    base = seconds.get(label)
+    if base is None:
+        # One run's timestamps share an offset, so the second's label fixes its epoch
+        base = seconds[label] = int(parse_time(label + time[19:].lstrip(".0123456789")).timestamp()) * 1_000_000
+    if len(time) > 20 and time[19] == ".":
+        digits = _FRACTION.match(time, 20)
+        if digits:
+            return base + int(digits.group().ljust(6, "0"))
+    return base
+
+
+def _batch(times: array, endpoints: array, statuses: array, latencies: array) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays([
+        pa.array(np.frombuffer(times, dtype=np.int64), SAMPLE_SCHEMA.field("time").type),
+        pa.DictionaryArray.from_arrays(pa.array(np.frombuffer(endpoints, dtype=np.int8)), ENDPOINT_NAMES),
+        pa.array(np.frombuffer(statuses, dtype=np.int16)),
+        pa.array(np.frombuffer(latencies, dtype=np.float32)),
+    ], schema=SAMPLE_SCHEMA)
+
+
+def write_samples(raw_path, output: Path) -> int:
+    """Stream the http_req_duration points of a raw k6 run into an Arrow IPC file; returns the row count."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Dot-prefixed names are skipped by dataset scans
+    partial = output.with_name(f".{output.name}.partial")
+    seconds = {}
+    rows = 0
+    columns = (array("q"), array("b"), array("h"), array("f"))
+    with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, SAMPLE_SCHEMA) as writer:
+        for _metric, time, value, tags in iter_points(raw_path, {"http_req_duration"}):
+            times, endpoints, statuses, latencies = columns
+            times.append(_epoch_us(time, seconds))
+            endpoints.append(_ENDPOINT_INDEX[endpoint_of(tags) or "other"])
+            status = tags.get("status")
+            statuses.append(int(status) if status and status.isdigit() else 0)
+            latencies.append(value)
+            if len(times) == BATCH_ROWS:
+                writer.write_batch(_batch(*columns))
+                rows += len(times)
+                columns = (array("q"), array("b"), array("h"), array("f"))
+        if columns[0]:
+            writer.write_batch(_batch(*columns))
+            rows += len(columns[0])
+    # Readers only ever see complete files
+    os.replace(partial, output)
+    return rows
+
+
+def _flatten(metrics: dict, prefix: str = "") -> dict:
+    """Numeric report metrics as dotted column names (endpoints.get_balance.p99, ...)."""
+    row = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            row.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            row[f"{prefix}{key}"] = float(value)
+    return row
+
+
+def archive_run(root: str, raw_path, metrics: dict, service: str, env: str, run_key: str,
+                commit: str = None) -> bool:
+    """Archive one run's samples and summary; returns False if it was already archived."""
+    summary = partition_dir(root, RUNS_DIR, env, service, run_key) / SUMMARY_FILE
+    if summary.exists():
+        return False
+    samples = write_samples(raw_path, partition_dir(root, SAMPLES_DIR, env, service, run_key) / SAMPLES_FILE) \
+        if raw_path else 0
+
+    row = {
+        "env": env,
+        "service": service,
+        "run": run_key,
+        "recorded_at": datetime.now(timezone.utc),
+        "commit": commit or current_commit(),
+        "samples": samples,
+    }
+    row.update(_flatten(metrics))
+    table = pa.Table.from_pylist([row])
+    # Written last: a summary marks a complete run
+    summary.parent.mkdir(parents=True, exist_ok=True)
+    partial = summary.with_name(f".{summary.name}.partial")
+    with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(partial, summary)
+    return True
+
+
+def load_runs(root: str, env: str = None, service: str = None) -> pd.DataFrame:
+    """One row per archived run, oldest first (a few KB each, read whole)."""
+    frames = []
+    pattern = f"env={env or '*'}/service={service or '*'}/run=*/{SUMMARY_FILE}"
+    for path in (Path(root) / RUNS_DIR).glob(pattern):
+        with pa.memory_map(str(path)) as source:
+            frames.append(pa.ipc.open_file(source).read_all().to_pandas())
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values("recorded_at", ignore_index=True)
+
+
+def open_samples(root: str) -> Optional[ds.Dataset]:
+    """All archived samples as one memory-mapped dataset with env/service/run partition columns."""
+    path = Path(root) / SAMPLES_DIR
+    if not path.exists():
+        return None
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(str(path.resolve()), format="ipc", partitioning=PARTITIONING, filesystem=filesystem)
+
+
+def sample_filter(env: str = None, service: str = None, runs: list = None, endpoint: str = None,
+                  status: int = None) -> Optional[ds.Expression]:
+    """Dataset filter; partition fields prune whole files before anything is read."""
+    terms = []
+    if env:
+        terms.append(ds.field("env") == env)
+    if service:
+        terms.append(ds.field("service") == service)
+    if runs is not None:
+        terms.append(ds.field("run").isin(runs))
+    if endpoint:
+        terms.append(ds.field("endpoint") == endpoint)
+    if status is not None:
+        terms.append(ds.field("status") == status)
+    expression = None
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def latency_by(dataset: ds.Dataset, keys: list, filter: ds.Expression = None) -> pd.DataFrame:
+    """Request count, error share and latency mean/P50/P95/P99/max per group of `keys`.
+
+    Keys are sample or partition columns, or `second`/`minute` to bucket by time.
+    Quantiles are t-digest estimates (within a fraction of a percent at P99).
+    """
+    buckets = {"second", "minute"}
+    columns = sorted({"latency_ms", "status"} | {k for k in keys if k not in buckets} |
+                     ({"time"} if buckets.intersection(keys) else set()))
+    projection = [pc.floor_temporal(pc.field("time"), unit=k) if k in buckets else pc.field(k) for k in keys]
+    projection += [pc.field("latency_ms"), (pc.field("status") == 0) | (pc.field("status") >= 400)]
+
+    # The scan's filter only prunes partitions; the filter node drops the rows
+    plan = [acero.Declaration("scan", acero.ScanNodeOptions(dataset, columns=columns, filter=filter))]
+    if filter is not None:
+        plan.append(acero.Declaration("filter", acero.FilterNodeOptions(filter)))
+    plan += [
+        acero.Declaration("project", acero.ProjectNodeOptions(projection, keys + ["latency_ms", "failed"])),
+        # Dictionary keys group by their index; batches are aggregated as they stream
+        acero.Declaration("aggregate", acero.AggregateNodeOptions([
+            ("latency_ms", "hash_count", None, "requests"),
+            ("failed", "hash_sum", None, "failed"),
+            ("latency_ms", "hash_mean", None, "avg"),
+            ("latency_ms", "hash_tdigest", pc.TDigestOptions(q=QUANTILES), "quantiles"),
+            ("latency_ms", "hash_max", None, "max"),
+        ], keys=keys)),
+    ]
+    grouped = acero.Declaration.from_sequence(plan).to_table().to_pandas()
+    if grouped.empty:
+        return pd.DataFrame(columns=keys + ["requests", "error_rate", "avg", "p50", "p95", "p99", "max"])
+    for key in keys:
+        if isinstance(grouped[key].dtype, pd.CategoricalDtype):
+            grouped[key] = grouped[key].astype(str)
+    quantiles = pd.DataFrame(grouped.pop("quantiles").tolist(), columns=["p50", "p95", "p99"])
+    frame = pd.concat([grouped.reset_index(drop=True), quantiles], axis=1)
+    frame["error_rate"] = frame.pop("failed") / frame["requests"] * 100
+    return frame[keys + ["requests", "error_rate", "avg", "p50", "p95", "p99", "max"]].sort_values(keys,
+                                                                                                 ignore_index=True)
+
+
+def run_trend(root: str, env: str, last: int = 10) -> tuple:
+    """The latest `last` runs per service of one environment, oldest first.
+
+    Returns (runs, endpoints): one row per run with P50/P95/P99 and error rate
+    from its samples (the summary's for runs archived without them), and one row per run
+    and endpoint. Both are empty when nothing is archived for `env`.
+    """
+    runs = load_runs(root, env)
+    dataset = open_samples(root)
+    if runs.empty:
+        return runs, pd.DataFrame()
+    runs = runs.groupby("service").tail(last).reset_index(drop=True)
+    if dataset is None:
+        return runs.assign(p50=float("nan")), pd.DataFrame()
+
+    where = sample_filter(env=env, runs=runs["run"].tolist())
+    overall = latency_by(dataset, ["service", "run"], where)[["service", "run", "p50", "p95", "p99", "error_rate"]]
+    runs = runs.merge(overall, on=["service", "run"], how="left", suffixes=("_summary", ""))
+    for column in ("p95", "p99", "error_rate"):
+        if f"{column}_summary" in runs:
+            runs[column] = runs[column].fillna(runs.pop(f"{column}_summary"))
+    endpoints = latency_by(dataset, ["service", "run", "endpoint"], where)
+    order = {key: i for i, key in enumerate(runs["run"])}
+    endpoints = endpoints.sort_values(by="run", key=lambda s: s.map(order), kind="stable", ignore_index=True)
+    return runs, endpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the columnar results archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    runs_cmd = sub.add_parser("runs", help="list archived runs")
+    query_cmd = sub.add_parser("query", help="latency percentiles and errors from the per-request samples")
+    for cmd in (runs_cmd, query_cmd):
+        cmd.add_argument("--archive", default=DEFAULT_ARCHIVE)
+        cmd.add_argument("--env")
+        cmd.add_argument("--service", choices=["go", "java"])
+    query_cmd.add_argument("--endpoint", choices=list(ENDPOINTS) + ["other"])
+    query_cmd.add_argument("--status", type=int, help="only requests with this status (0 = no response)")
+    query_cmd.add_argument("--last", type=int, help="only the latest N runs per service")
+    query_cmd.add_argument("--by", default="service,run,endpoint",
+                           help="comma-separated group keys: env, service, run, endpoint, status, second, minute")
+    args = parser.parse_args()
+
+    runs = load_runs(args.archive, args.env, args.service)
+    if runs.empty:
+        print(f"No archived runs in {args.archive} (archive with generate-graphs.py --archive)")
+        sys.exit(1)
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_rows", 500)
+    if args.command == "runs":
+        columns = [c for c in ("env", "service", "run", "recorded_at", "commit", "samples", "rps", "p95", "p99",
+                               "error_rate") if c in runs]
+        frame = runs[columns].copy()
+        frame["run"] = frame["run"].str[:12]
+        print(frame.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+        return
+
+    keys = [k.strip() for k in args.by.split(",") if k.strip()]
+    run_keys = None
+    if args.last:
+        run_keys = runs.groupby(["env", "service"]).tail(args.last)["run"].tolist()
+    dataset = open_samples(args.archive)
+    if dataset is None:
+        print(f"No samples in {args.archive} (runs were archived without raw k6 output)")
+        sys.exit(1)
+    frame = latency_by(dataset, keys, sample_filter(args.env, args.service, run_keys, args.endpoint, args.status))
+    if "run" in frame:
+        # Short keys, in run order
+        order = {key: i for i, key in enumerate(runs["run"])}
+        frame = frame.sort_values(by="run", key=lambda s: s.map(order), kind="stable", ignore_index=True)
+        frame["run"] = frame["run"].str[:12]
+    print(frame.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
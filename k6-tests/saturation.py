@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Saturation-point finder: the highest arrival rate a service sustains within the SLO.
+
+Runs 10k-benchmark.js repeatedly with the RPS/DURATION env knobs, stepping the
+rate up from --start by --step until a step breaches one of the script's
+`options.thresholds` (read back from each step's handleSummary JSON, so the SLO
+lives in one place) or k6 cannot reach 95% of the target rate. With --search
+it then bisects between the last passing and the first failing rate.
+
+Each step's summary is kept under `<results>/saturation/<service>-<rps>rps/`
+and the curve is written to `<results>/saturation.json`, which
+generate-graphs.py renders as the latency-vs-throughput section.
+
+The service must already be running (see `make saturation-mac`).
+
+Usage: python saturation.py --target http://localhost:8080 [--results results/mac]
+           [--start 1000] [--step 1000] [--max 20000] [--search] [--resolution 250]
+           [--duration 2m] [--cooldown 15] [--trace traces/workload.ndjson]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SATURATION_FILE = "saturation.json"
+SATURATION_DIR = "saturation"
+K6_SCRIPT = Path(__file__).parent / "10k-benchmark.js"
+
+# k6 could not generate the load itself (VUs exhausted) below this fraction of the target
+MIN_ACHIEVED = 0.95
+
+
+def step_dir(results_dir: str, service: str, rps: int) -> Path:
+    return Path(results_dir) / SATURATION_DIR / f"{service}-{rps}rps"
+
+
+def breached_thresholds(data: dict) -> list:
+    """'metric expr' for every threshold k6 marked as failed in a summary."""
+    breached = []
+    for name, metric in data.get("metrics", {}).items():
+        for expr, result in metric.get("thresholds", {}).items():
+            if not result.get("ok", True):
+                breached.append(f"{name} {expr}")
+    return sorted(breached)
+
+
+def slo(data: dict) -> dict:
+    """The thresholds the script defines, by metric."""
+    return {
+        name: sorted(metric["thresholds"])
+        for name, metric in data.get("metrics", {}).items()
+        if metric.get("thresholds")
+    }
+
+
+def evaluate(data: dict, target_rps: int) -> dict:
+    """One step of the curve from a k6 summary."""
+    duration = data.get("metrics", {}).get("http_req_duration", {}).get("values", {})
+    rps = data.get("metrics", {}).get("http_reqs", {}).get("values", {}).get("rate", 0)
+    errors = data.get("metrics", {}).get("errors", {}).get("values", {}).get("rate", 0)
+    breached = breached_thresholds(data)
+    if rps < target_rps * MIN_ACHIEVED:
+        breached.append(f"http_reqs rate<{MIN_ACHIEVED:.0%} of target")
+    return {
+        "target_rps": target_rps,
+        "rps": rps,
+        "p50": duration.get("med", 0),
+        "p90": duration.get("p(90)", 0),
+        "p95": duration.get("p(95)", 0),
+        "p99": duration.get("p(99)", 0),
+        "error_rate": errors * 100,
+        "breached": breached,
+        "ok": not breached,
+    }
+
+
+def run_step(target: str, service: str, rps: int, duration: str, results_dir: str, trace: str = None) -> tuple:
+    """Run k6 at one fixed rate; returns (step, summary data)."""
+    out_dir = step_dir(results_dir, service, rps)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        "k6", "run", "--quiet",
+        "--env", f"TARGET={target}",
+        "--env", f"RPS={rps}",
+        "--env", f"DURATION={duration}",
+        "--env", f"RESULTS_DIR={out_dir}",
+    ]
+    if trace:
+        cmd += ["--env", f"TRACE={Path(trace).resolve()}"]
+    cmd.append(str(K6_SCRIPT))
+
+    # k6 exits 99 when thresholds fail; that is an expected outcome here
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL)
+    summary = out_dir / f"{service}-10k-results.json"
+    if not summary.exists():
+        raise RuntimeError(f"k6 exited with {proc.returncode} without writing {summary}")
+    with open(summary) as f:
+        data = json.load(f)
+    return evaluate(data, rps), data
+
+
+def find_saturation(run, start: int, step: int, max_rps: int, search: bool, resolution: int) -> list:
+    """Step the rate up until `run(rps)` fails, then optionally bisect. Returns all steps."""
+    steps = []
+    last_ok, first_fail = 0, None
+    rps = start
+    while rps <= max_rps:
+        result = run(rps)
+        steps.append(result)
+        if not result["ok"]:
+            first_fail = rps
+            break
+        last_ok = rps
+        rps += step
+
+    if search and first_fail is not None:
+        low, high = last_ok, first_fail
+        while high - low > resolution:
+            mid = (low + high) // 2
+            result = run(mid)
+            steps.append(result)
+            if result["ok"]:
+                low = mid
+            else:
+                high = mid
+    return steps
+
+
+def max_sustainable(steps: list) -> float:
+    """Highest passing target rate below the lowest failing one."""
+    failing = [s["target_rps"] for s in steps if not s["ok"]]
+    ceiling = min(failing) if failing else float("inf")
+    passing = [s["target_rps"] for s in steps if s["ok"] and s["target_rps"] < ceiling]
+    return max(passing) if passing else 0
+
+
+def load_saturation(results_dir: str) -> dict:
+    path = Path(results_dir) / SATURATION_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_saturation(results_dir: str, saturation: dict):
+    with open(Path(results_dir) / SATURATION_FILE, "w") as f:
+        json.dump(saturation, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the max arrival rate a service sustains within the k6 thresholds")
+    parser.add_argument("--target", default="http://localhost:8080")
+    parser.add_argument("--results", default="results/mac", help="results directory for the curve")
+    parser.add_argument("--start", type=int, default=1000, help="first rate (RPS)")
+    parser.add_argument("--step", type=int, default=1000, help="rate increment (RPS)")
+    parser.add_argument("--max", type=int, default=20000, help="stop stepping above this rate")
+    parser.add_argument("--search", action="store_true", help="bisect between the last pass and first failure")
+    parser.add_argument("--resolution", type=int, default=250, help="bisection stops at this gap (RPS)")
+    parser.add_argument("--duration", default="2m", help="k6 duration per step")
+    parser.add_argument("--cooldown", type=float, default=15, help="seconds to idle between steps")
+    parser.add_argument("--trace", help="workload trace to replay at every step")
+    args = parser.parse_args()
+
+    # Same rule as handleSummary in 10k-benchmark.js
+    service = "go" if "8080" in args.target else "java"
+    Path(args.results).mkdir(parents=True, exist_ok=True)
+    saturation = load_saturation(args.results)
+    entry = {"target": args.target, "duration": args.duration, "steps": [], "slo": {}}
+    saturation[service] = entry
+
+    print(f"\n🔎 Saturation search for {service} ({args.target}), {args.duration} per step\n")
+
+    def run(rps):
+        if entry["steps"]:
+            time.sleep(args.cooldown)
+        print(f">>> {rps:,} RPS ...", flush=True)
+        result, data = run_step(args.target, service, rps, args.duration, args.results, args.trace)
+        entry["slo"] = slo(data)
+        entry["steps"] = sorted(
+            [s for s in entry["steps"] if s["target_rps"] != rps] + [result],
+            key=lambda s: s["target_rps"],
+        )
+        entry["max_sustainable_rps"] = max_sustainable(entry["steps"])
+        # Saved after every step so an aborted search keeps its progress
+        save_saturation(args.results, saturation)
+        status = "✓" if result["ok"] else "✗ " + ", ".join(result["breached"])
+        print(f"    achieved {result['rps']:,.0f} RPS, p99 {result['p99']:.1f} ms, "
+              f"errors {result['error_rate']:.2f}%  {status}")
+        return result
+
+    try:
+        find_saturation(run, args.start, args.step, args.max, args.search, args.resolution)
+    except (OSError, RuntimeError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    print(f"\n✓ {service}: max sustainable rate {entry['max_sustainable_rps']:,} RPS "
+          f"({len(entry['steps'])} steps) → {Path(args.results) / SATURATION_FILE}")
+    if not any(not s["ok"] for s in entry["steps"]):
+        print(f"⚠ No step breached the SLO up to {args.max:,} RPS; raise --max to find the limit")
+
+
+if __name__ == "__main__":
+    main()
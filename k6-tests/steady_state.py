@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Steady-state window of a k6 run, found by changepoint detection.
+
+The per-second RPS and P50/P99 latency series (see k6_timeseries.py) are
+split into segments of constant mean with PELT, each series scaled by its own
+second-to-second noise so one penalty fits all of them. The longest segment is
+taken as the steady state and is widened by neighbouring segments whose medians
+stay within TOLERANCE of it; what comes before is warmup (JIT, GC sizing, pool
+fill), what comes after is cool-down. Time to steady state is the start of that
+window, measured from the first sample.
+
+The report metrics are then recomputed from only the raw samples inside the
+window, so whole-run aggregates no longer mix warmup into the numbers. The
+window and its sketch are stored as `<service>-steady-state.json`.
+
+Usage: python steady_state.py results/mac/go-10k-raw.json.gz [--min-segment 10]
+"""
+
+import argparse
+import json
+import math
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from k6_stream import parse_time, stream_sketch
+from k6_timeseries import per_second_frame
+from latency_sketch import RunSketch
+
+STEADY_STATE_VERSION = 1
+
+SIGNALS = ("rps", "p50", "p99")
+
+# Largest relative difference of a segment's median from the steady segment's
+# for the segment to count as part of the steady state
+TOLERANCE = {"rps": 0.05, "p50": 0.25, "p99": 0.5}
+
+# Shortest segment in seconds, so single-second spikes are not changepoints
+MIN_SEGMENT = 10
+
+# Penalty per changepoint, in units of log(n) per signal (BIC-like)
+PENALTY_FACTOR = 2.0
+
+
+def _signals(frame) -> np.ndarray:
+    """(seconds x signals) matrix: RPS and log latency, each scaled to unit noise."""
+    data = frame[list(SIGNALS)].astype(float)
+    # A second without completed requests has no latency; the RPS drop marks it
+    data[["p50", "p99"]] = np.log(data[["p50", "p99"]].ffill().bfill().clip(lower=1e-3))
+    x = data.to_numpy()
+    # Noise from second-to-second differences (MAD), which level shifts barely move
+    noise = np.median(np.abs(np.diff(x, axis=0)), axis=0) / (0.6745 * math.sqrt(2))
+    std = x.std(axis=0)
+    scale = np.where(noise > 0, noise, np.where(std > 0, std, 1.0))
+    return (x - x.mean(axis=0)) / scale
+
+
+def changepoints(x: np.ndarray, penalty: float, min_segment: int) -> list:
+    """PELT for changes in mean under a Gaussian cost; returns segment start indices after 0."""
+    n = len(x)
+    s1 = np.vstack([np.zeros(x.shape[1]), np.cumsum(x, axis=0)])
+    s2 = np.vstack([np.zeros(x.shape[1]), np.cumsum(x ** 2, axis=0)])
+
+    def cost(starts: np.ndarray, end: int) -> np.ndarray:
+        sums = s1[end] - s1[starts]
+        return ((s2[end] - s2[starts]) - sums ** 2 / (end - starts)[:, None]).sum(axis=1)
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    previous = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    for end in range(min_segment, n + 1):
+        admissible = candidates[end - candidates >= min_segment]
+        if not len(admissible):
+            continue
+        totals = best[admissible] + cost(admissible, end) + penalty
+        i = int(np.argmin(totals))
+        best[end] = totals[i]
+        previous[end] = admissible[i]
+        # Prune starts that can never be optimal again; too-recent ones stay
+        keep = best[admissible] + cost(admissible, end) <= best[end]
+        candidates = np.concatenate([admissible[keep], candidates[end - candidates < min_segment], [end]])
+
+    points = []
+    end = n
+    while end > 0:
+        end = int(previous[end])
+        if end > 0:
+            points.append(end)
+    return sorted(points)
+
+
+def detect_steady_state(frame, min_segment: int = MIN_SEGMENT) -> dict:
+    """Steady window on the frame's elapsed-seconds axis ([start, end), plus the segments found)."""
+    seconds = len(frame)
+    # The first and last seconds are partial
+    first, last = (1, seconds - 1) if seconds > 2 else (0, seconds)
+    trimmed = frame.iloc[first:last]
+    n = len(trimmed)
+
+    if n >= 2 * min_segment:
+        x = _signals(trimmed)
+        points = changepoints(x, PENALTY_FACTOR * x.shape[1] * math.log(n), min_segment)
+    else:
+        points = []
+
+    bounds = [0] + points + [n]
+    segments = []
+    for start, end in zip(bounds, bounds[1:]):
+        part = trimmed.iloc[start:end]
+        segments.append({
+            "start": first + start,
+            "end": first + end,
+            **{signal: float(part[signal].median()) if part[signal].notna().any() else 0.0 for signal in SIGNALS},
+        })
+
+    # Longest segment (the later one on ties), widened by neighbours that match it
+    ref = max(range(len(segments)), key=lambda i: (segments[i]["end"] - segments[i]["start"], i))
+
+    def matches(segment: dict) -> bool:
+        for signal, tolerance in TOLERANCE.items():
+            base = segments[ref][signal]
+            if base <= 0 or abs(segment[signal] / base - 1) > tolerance:
+                return False
+        return True
+
+    lo = hi = ref
+    while lo > 0 and matches(segments[lo - 1]):
+        lo -= 1
+    while hi < len(segments) - 1 and matches(segments[hi + 1]):
+        hi += 1
+
+    start, end = segments[lo]["start"], segments[hi]["end"]
+    return {
+        "version": STEADY_STATE_VERSION,
+        "start": start,
+        "end": end,
+        "time_to_steady_s": start,
+        "steady_s": end - start,
+        "run_s": seconds,
+        "cooldown_s": seconds - end,
+        "changepoints": [first + p for p in points],
+        "segments": segments,
+    }
+
+
+def window_labels(frame, detection: dict) -> tuple:
+    """First and last 'YYYY-MM-DDTHH:MM:SS' second inside the window, as k6 wrote them."""
+    start = frame.attrs["start"]
+    # stream_sketch() compares k6's local time strings, so format in the run's own offset
+    zone = parse_time("1970-01-01T00:00:00" + frame.attrs.get("offset", "")).tzinfo or timezone.utc
+
+    def label(second):
+        return datetime.fromtimestamp(start + second, zone).strftime("%Y-%m-%dT%H:%M:%S")
+
+    return label(detection["start"]), label(detection["end"] - 1)
+
+
+def analyze(raw_path, min_segment: int = MIN_SEGMENT) -> dict:
+    """Detect the steady window of a raw k6 run and sketch only the samples inside it.
+
+    None if the run has no samples, or none fall inside the window.
+    """
+    frame = per_second_frame(raw_path)
+    if frame.empty:
+        return None
+    detection = detect_steady_state(frame, min_segment)
+    sketch = stream_sketch(raw_path, window_labels(frame, detection))
+    if not sketch.total_requests:
+        return None
+    detection["sketch"] = sketch.to_dict()
+    return detection
+
+
+def steady_state_path(results_dir: str, service: str) -> Path:
+    return Path(results_dir) / f"{service}-steady-state.json"
+
+
+def save_steady_state(result: dict, path):
+    with open(path, "w") as f:
+        json.dump(result, f, separators=(",", ":"))
+
+
+def load_steady_state(path) -> dict:
+    """The stored window with its sketch rebuilt, or None for a missing/outdated file."""
+    try:
+        with open(path) as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if result.get("version") != STEADY_STATE_VERSION:
+        return None
+    result["sketch"] = RunSketch.from_dict(result["sketch"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the steady-state window of a raw k6 run")
+    parser.add_argument("raw", help="raw k6 NDJSON output (optionally gzipped)")
+    parser.add_argument("--min-segment", type=int, default=MIN_SEGMENT, help="shortest segment in seconds")
+    parser.add_argument("-o", "--output", help="also write the window and its sketch to this file")
+    args = parser.parse_args()
+
+    result = analyze(args.raw, args.min_segment)
+    if result is None:
+        print(f"✗ No steady-state samples in {args.raw}")
+        return
+    if args.output:
+        save_steady_state(result, args.output)
+    metrics = RunSketch.from_dict(result["sketch"]).metrics()
+    print(f"✓ Steady state from {result['start']}s to {result['end']}s of {result['run_s']}s "
+          f"(time to steady state {result['time_to_steady_s']}s, cool-down {result['cooldown_s']}s)")
+    for segment in result["segments"]:
+        print(f"   {segment['start']:>5}-{segment['end']:<5} rps {segment['rps']:>9,.0f}  "
+              f"p50 {segment['p50']:>9.2f} ms  p99 {segment['p99']:>9.2f} ms")
+    print(f"   Steady: {metrics['rps']:,.0f} rps, p95 {metrics['p95']:.2f} ms, p99 {metrics['p99']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Host and process resource telemetry sampled from /proc during a benchmark.
+
+Every --interval seconds this records, per process group (Go prefork parent
+and children, the JVM, Postgres server and backends), CPU in cores, RSS,
+threads, open fds and context switches, plus system load, CPU busy %, memory
+and network throughput, as one CSV row. Processes are matched by command
+line, so prefork children and new Postgres backends are picked up as they
+appear. Only the standard library is used so the script can be copied to the
+benchmark host as-is.
+
+Wrap a k6 run to sample exactly while it executes, or run in the background
+and stop it with SIGTERM. Save the output as `<results>/<service>-telemetry.csv`
+and generate-graphs.py overlays it on the per-second timeline and reports
+RPS per core and per GB.
+
+Usage: python telemetry.py -o results/mac/go-telemetry.csv [--interval 0.25] -- k6 run ...
+       python telemetry.py -o go-telemetry.csv [--duration 600]     (until SIGTERM/duration)
+           [--group name=REGEX ...]
+"""
+
+import argparse
+import csv
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+PROC = "/proc"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Matched against the full command line (argv joined by spaces)
+DEFAULT_GROUPS = {
+    "go": r"^\S*go-exchange",
+    "java": r"^\S*java\s.*(java-exchange|app)\.jar",
+    "postgres": r"^postgres",
+}
+
+SYSTEM_COLUMNS = ["time", "load1", "cpu_busy_pct", "cpu_count", "ctxt_per_s", "mem_used_mb",
+                  "net_rx_mbps", "net_tx_mbps"]
+GROUP_COLUMNS = ["procs", "cpu_cores", "rss_mb", "threads", "fds", "ctxsw_per_s"]
+
+
+def _read(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def _cmdline(pid: str) -> str:
+    try:
+        with open(f"{PROC}/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def read_process(pid: str) -> dict:
+    """CPU ticks, RSS, threads, fds and context switches of one PID, or None if it exited."""
+    try:
+        stat = _read(f"{PROC}/{pid}/stat")
+        status = _read(f"{PROC}/{pid}/status")
+    except OSError:
+        return None
+    # comm may contain spaces; the fields after it are fixed
+    fields = stat[stat.rindex(")") + 2:].split()
+    ctxsw = 0
+    for line in status.splitlines():
+        if line.startswith(("voluntary_ctxt_switches", "nonvoluntary_ctxt_switches")):
+            ctxsw += int(line.split()[1])
+    try:
+        fds = len(os.listdir(f"{PROC}/{pid}/fd"))
+    except OSError:
+        # Other users' fds need root
+        fds = 0
+    return {
+        "ticks": int(fields[11]) + int(fields[12]),
+        "threads": int(fields[17]),
+        "rss": int(fields[21]) * PAGE_SIZE,
+        "fds": fds,
+        "ctxsw": ctxsw,
+    }
+
+
+def read_system() -> dict:
+    cpu = _read(f"{PROC}/stat").splitlines()
+    totals = [int(v) for v in cpu[0].split()[1:]]
+    # idle + iowait
+    idle = totals[3] + (totals[4] if len(totals) > 4 else 0)
+    ctxt = next((int(line.split()[1]) for line in cpu if line.startswith("ctxt ")), 0)
+    meminfo = {}
+    for line in _read(f"{PROC}/meminfo").splitlines():
+        name, _, value = line.partition(":")
+        meminfo[name] = int(value.split()[0]) * 1024
+    rx = tx = 0
+    for line in _read(f"{PROC}/net/dev").splitlines()[2:]:
+        iface, _, data = line.partition(":")
+        if iface.strip() == "lo":
+            continue
+        values = data.split()
+        rx += int(values[0])
+        tx += int(values[8])
+    return {
+        "load1": float(_read(f"{PROC}/loadavg").split()[0]),
+        "cpu_total": sum(totals),
+        "cpu_idle": idle,
+        "cpu_count": sum(1 for line in cpu if re.match(r"cpu\d+ ", line)),
+        "ctxt": ctxt,
+        "mem_used": meminfo.get("MemTotal", 0) - meminfo.get("MemAvailable", 0),
+        "rx": rx,
+        "tx": tx,
+    }
+
+
+class Sampler:
+    """Turns successive /proc readings into per-interval CSV rows."""
+
+    def __init__(self, groups: dict):
+        self.groups = {name: re.compile(pattern) for name, pattern in groups.items()}
+        self._group_of = {}
+        self._prev_procs = {}
+        self._prev_system = None
+        self._prev_time = None
+        self._self = str(os.getpid())
+
+    def columns(self) -> list:
+        return SYSTEM_COLUMNS + [f"{g}_{c}" for g in self.groups for c in GROUP_COLUMNS]
+
+    def _classify(self, pid: str):
+        if pid not in self._group_of:
+            cmdline = _cmdline(pid)
+            self._group_of[pid] = next(
+                (name for name, pattern in self.groups.items() if cmdline and pattern.search(cmdline)), None
+            )
+        return self._group_of[pid]
+
+    def sample(self) -> dict:
+        """One row, or None on the first call (rates need a previous reading)."""
+        now = time.time()
+        pids = {p for p in os.listdir(PROC) if p.isdigit() and p != self._self}
+        # Forget exited PIDs so a reused PID is classified again
+        for pid in list(self._group_of):
+            if pid not in pids:
+                del self._group_of[pid]
+
+        procs = {}
+        for pid in pids:
+            group = self._classify(pid)
+            if group is None:
+                continue
+            info = read_process(pid)
+            if info is not None:
+                info["group"] = group
+                procs[pid] = info
+        system = read_system()
+
+        row = None
+        if self._prev_time is not None:
+            dt = now - self._prev_time
+            prev = self._prev_system
+            total = system["cpu_total"] - prev["cpu_total"]
+            busy = total - (system["cpu_idle"] - prev["cpu_idle"])
+            row = {
+                "time": round(now, 3),
+                "load1": system["load1"],
+                "cpu_busy_pct": round(busy / total * 100, 2) if total else 0,
+                "cpu_count": system["cpu_count"],
+                "ctxt_per_s": round((system["ctxt"] - prev["ctxt"]) / dt),
+                "mem_used_mb": round(system["mem_used"] / 2**20, 1),
+                "net_rx_mbps": round((system["rx"] - prev["rx"]) * 8 / dt / 1e6, 3),
+                "net_tx_mbps": round((system["tx"] - prev["tx"]) * 8 / dt / 1e6, 3),
+            }
+            for group in self.groups:
+                members = [(pid, p) for pid, p in procs.items() if p["group"] == group]
+                ticks = ctxsw = 0
+                for pid, p in members:
+                    # New PIDs count from the next interval on
+                    before = self._prev_procs.get(pid)
+                    if before is not None:
+                        ticks += p["ticks"] - before["ticks"]
+                        ctxsw += p["ctxsw"] - before["ctxsw"]
+                row[f"{group}_procs"] = len(members)
+                row[f"{group}_cpu_cores"] = round(ticks / CLK_TCK / dt, 3)
+                row[f"{group}_rss_mb"] = round(sum(p["rss"] for _, p in members) / 2**20, 1)
+                row[f"{group}_threads"] = sum(p["threads"] for _, p in members)
+                row[f"{group}_fds"] = sum(p["fds"] for _, p in members)
+                row[f"{group}_ctxsw_per_s"] = round(ctxsw / dt)
+
+        self._prev_procs = procs
+        self._prev_system = system
+        self._prev_time = now
+        return row
+
+
+def load_telemetry(path) -> list:
+    """Rows of a telemetry CSV as dicts of floats."""
+    with open(path, newline="") as f:
+        return [{k: float(v) for k, v in row.items() if v != ""} for row in csv.DictReader(f)]
+
+
+def summarize(rows: list, group: str) -> dict:
+    """Mean/peak resource use of one process group (and Postgres) over a run."""
+    if not rows:
+        return {}
+
+    def mean(key):
+        values = [r.get(key, 0) for r in rows]
+        return sum(values) / len(values)
+
+    def peak(key):
+        return max(r.get(key, 0) for r in rows)
+
+    return {
+        "cpu_count": peak("cpu_count"),
+        "cpu_busy_pct": mean("cpu_busy_pct"),
+        "app_cpu": mean(f"{group}_cpu_cores"),
+        "app_cpu_peak": peak(f"{group}_cpu_cores"),
+        "app_rss_mb": mean(f"{group}_rss_mb"),
+        "app_rss_peak_mb": peak(f"{group}_rss_mb"),
+        "app_procs": peak(f"{group}_procs"),
+        "app_threads_peak": peak(f"{group}_threads"),
+        "db_cpu": mean("postgres_cpu_cores"),
+        "db_rss_mb": mean("postgres_rss_mb"),
+        "db_procs_peak": peak("postgres_procs"),
+    }
+
+
+def efficiency(rps: float, summary: dict) -> dict:
+    """RPS per core of the app, per core of app + Postgres, and per GB of app RSS."""
+    app_cpu = summary.get("app_cpu", 0)
+    total_cpu = app_cpu + summary.get("db_cpu", 0)
+    rss_gb = summary.get("app_rss_mb", 0) / 1024
+    return {
+        "rps_per_core": rps / app_cpu if app_cpu > 0 else 0,
+        "rps_per_core_with_db": rps / total_cpu if total_cpu > 0 else 0,
+        "rps_per_gb": rps / rss_gb if rss_gb > 0 else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample process and host resources from /proc")
+    parser.add_argument("-o", "--output", required=True, help="CSV file to write")
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between samples")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--group", action="append", default=[], metavar="NAME=REGEX",
+                        help="extra/overridden process group (matched against the command line)")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="-- command to run while sampling")
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+
+    if not os.path.exists(f"{PROC}/stat"):
+        print("⚠ /proc not available (Linux only); running without telemetry", file=sys.stderr)
+        if command:
+            sys.exit(subprocess.call(command))
+        sys.exit(0)
+
+    groups = dict(DEFAULT_GROUPS)
+    for spec in args.group:
+        name, _, pattern = spec.partition("=")
+        groups[name] = pattern
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    proc = subprocess.Popen(command) if command else None
+    sampler = Sampler(groups)
+    deadline = time.monotonic() + args.duration if args.duration else None
+    rows = 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=sampler.columns())
+        writer.writeheader()
+        next_tick = time.monotonic()
+        while not stopping:
+            if proc is not None and proc.poll() is not None:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            row = sampler.sample()
+            if row is not None:
+                writer.writerow(row)
+                rows += 1
+                # Keep the file usable if the sampler is killed
+                f.flush()
+            next_tick += args.interval
+            time.sleep(max(next_tick - time.monotonic(), 0))
+
+    print(f"✓ Wrote {rows:,} telemetry samples to {args.output}", file=sys.stderr)
+    if proc is not None:
+        sys.exit(proc.wait())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import random
+
+from history import bootstrap_delta, compare, connect, record_run
+
+# Ten baseline runs with the usual ±7% run-to-run spread in RPS
+BASELINE_RPS = [1000, 1060, 930, 1040, 960, 1070, 940, 1010, 990, 1000]
+
+
+def record(db, rps_values):
+    for i, rps in enumerate(rps_values):
+        metrics = {"rps": rps, "p95": 10.0, "p99": 20.0, "error_rate": 0.0}
+        record_run(db, metrics, "go", "test", f"run-{i}", commit="abc123")
+
+
+def rps_result(db):
+    results = compare(connect(db), "test", "go", baseline_size=10, candidates=1, threshold=5.0)
+    return next(r for r in results if r["metric"] == "rps")
+
+
+def test_single_run_within_noise_is_not_flagged(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    # 6% below the baseline mean, but no lower than its slowest runs
+    record(db, BASELINE_RPS + [940])
+
+    result = rps_result(db)
+
+    assert result["delta_pct"] < -5
+    assert not result["regression"]
+
+
+def test_single_run_far_outside_noise_is_flagged(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    record(db, BASELINE_RPS + [700])
+
+    assert rps_result(db)["regression"]
+
+
+def test_interval_is_as_wide_as_the_run_to_run_spread():
+    point, low, high = bootstrap_delta(BASELINE_RPS, [1000], random.Random(0))
+
+    assert point == 0
+    assert low < -5 and high > 5
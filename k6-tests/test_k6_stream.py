@@ -0,0 +1,89 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from k6_stream import ENDPOINTS, collect_samples, iter_points, parse_time, stream_metrics, stream_sketch
+
+
+def point(metric: str, time: str, value: float, **tags) -> str:
+    return json.dumps({"type": "Point", "metric": metric, "data": {"time": time, "value": value, "tags": tags}})
+
+
+def write_lines(path, lines: list):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+RUN = [
+    json.dumps({"type": "Metric", "metric": "http_req_duration", "data": {"type": "trend"}}),
+    point("http_reqs", "2026-10-17T12:00:00.100000000+02:00", 1),
+    point("http_req_duration", "2026-10-17T12:00:00.100000000+02:00", 4.0, name="POST /orders"),
+    point("create_order_latency", "2026-10-17T12:00:00.100000000+02:00", 4.0),
+    point("checks", "2026-10-17T12:00:00.100000000+02:00", 1, check=ENDPOINTS["create_order"]["check"]),
+    point("errors", "2026-10-17T12:00:00.100000000+02:00", 0),
+    point("http_reqs", "2026-10-17T12:00:02.100000000+02:00", 1),
+    point("http_req_duration", "2026-10-17T12:00:02.100000000+02:00", 8.0, name="GET /balance/{userId}"),
+    point("get_balance_latency", "2026-10-17T12:00:02.100000000+02:00", 8.0),
+    point("checks", "2026-10-17T12:00:02.100000000+02:00", 0, check=ENDPOINTS["get_balance"]["check"]),
+    point("errors", "2026-10-17T12:00:02.100000000+02:00", 1),
+    # A run killed mid-write leaves a truncated last line
+    '{"type":"Point","metric":"http_reqs","data":{"time":"2026-10-17T12:00:03',
+]
+
+
+def test_parse_time_keeps_offset_and_truncates_nanoseconds():
+    parsed = parse_time("2026-10-17T12:00:00.123456789+02:00")
+
+    assert parsed.utcoffset() == timedelta(hours=2)
+    assert parsed.microsecond == 123456
+    assert parse_time("2026-10-17T10:00:00Z") == datetime(2026, 10, 17, 10, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("name", ["run.json", "run.json.gz"])
+def test_iter_points_filters_metrics_and_skips_bad_lines(tmp_path, name):
+    path = tmp_path / name
+    write_lines(path, RUN)
+
+    points = list(iter_points(path, {"http_reqs"}))
+
+    assert [(m, v) for m, _t, v, _tags in points] == [("http_reqs", 1), ("http_reqs", 1)]
+    assert len(list(iter_points(path))) == 10
+
+
+def test_stream_sketch_builds_the_report_metrics(tmp_path):
+    path = tmp_path / "run.json"
+    write_lines(path, RUN)
+
+    metrics = stream_metrics(path)
+
+    assert metrics["total_requests"] == 2
+    assert metrics["rps"] == pytest.approx(1.0)
+    assert metrics["error_rate"] == 50
+    assert metrics["endpoints"]["create_order"]["error_rate"] == 0
+    assert metrics["endpoints"]["get_balance"]["error_rate"] == 100
+    assert metrics["max"] == 8.0
+
+
+def test_stream_sketch_window_is_inclusive_local_seconds(tmp_path):
+    path = tmp_path / "run.json"
+    write_lines(path, RUN)
+
+    sketch = stream_sketch(path, ("2026-10-17T12:00:02", "2026-10-17T12:00:02"))
+
+    assert sketch.total_requests == 1
+    assert sketch.latency.max_us == 8000
+
+
+def test_collect_samples_returns_labels_and_offset(tmp_path):
+    path = tmp_path / "run.json"
+    write_lines(path, RUN)
+
+    labels, columns, offset = collect_samples(path, {"http_reqs", "errors"})
+
+    assert labels == ["2026-10-17T12:00:00", "2026-10-17T12:00:02"]
+    assert offset == "+02:00"
+    assert list(columns["errors"][0]) == [0, 1]
+    assert list(columns["errors"][1]) == [0.0, 1.0]
@@ -0,0 +1,79 @@
+import math
+import random
+
+import pytest
+
+from latency_sketch import LatencyHistogram, RunSketch
+
+
+def exact_percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * p / 100), 1) - 1]
+
+
+def sketch_of(values: list, start: float, end: float) -> RunSketch:
+    sketch = RunSketch()
+    for value in values:
+        sketch.latency.record(value)
+        sketch.endpoint("create_order").latency.record(value)
+        sketch.endpoint("create_order").passes += 1
+    sketch.total_requests = len(values)
+    sketch.add_interval(start, end)
+    return sketch
+
+
+def test_percentiles_stay_within_the_precision():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(1.5, 1.0) for _ in range(20000)]
+    hist = LatencyHistogram()
+    for value in values:
+        hist.record(value)
+
+    for p in (50, 90, 95, 99, 99.9):
+        assert hist.percentile(p) == pytest.approx(exact_percentile(values, p), rel=2e-3, abs=1e-3)
+    assert hist.mean == pytest.approx(sum(values) / len(values), rel=1e-3)
+
+
+def test_merge_equals_one_sketch_of_all_samples():
+    rng = random.Random(2)
+    first = [rng.expovariate(0.2) for _ in range(5000)]
+    second = [rng.expovariate(0.05) for _ in range(3000)]
+
+    merged = sketch_of(first, 0, 10)
+    merged.merge(sketch_of(second, 5, 12))
+    whole = sketch_of(first + second, 0, 12)
+
+    assert merged.latency.counts == whole.latency.counts
+    assert merged.metrics() == whole.metrics()
+
+
+def test_merge_is_order_independent():
+    a, b = sketch_of([1.0, 2.0, 3.0], 0, 1), sketch_of([10.0, 20.0], 1, 2)
+    ab, ba = RunSketch(), RunSketch()
+    ab.merge(a)
+    ab.merge(b)
+    ba.merge(b)
+    ba.merge(a)
+
+    assert ab.metrics() == ba.metrics()
+
+
+def test_overlapping_shards_count_their_time_once():
+    sketch = RunSketch()
+    sketch.add_interval(0, 10)
+    sketch.add_interval(5, 10)
+    sketch.add_interval(20, 30)
+
+    assert sketch.elapsed == 20
+
+
+def test_round_trip_through_dict():
+    sketch = sketch_of([0.5, 1.5, 250.0], 100, 160)
+    sketch.errors, sketch.error_samples, sketch.dropped = 1, 3, 2
+
+    assert RunSketch.from_dict(sketch.to_dict()).metrics() == sketch.metrics()
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        LatencyHistogram(2).merge(LatencyHistogram(3))
@@ -0,0 +1,68 @@
+import pytest
+
+from metrics_scraper import add, describe, endpoint_of, histograms, parse_metrics, quantile, subtract
+
+SCRAPE = """\
+# HELP http_request_duration_seconds Request latency
+# TYPE http_request_duration_seconds histogram
+http_request_duration_seconds_bucket{method="POST",route="/orders",le="0.005"} 40
+http_request_duration_seconds_bucket{method="POST",route="/orders",le="0.01"} 90
+http_request_duration_seconds_bucket{method="POST",route="/orders",le="+Inf"} 100
+http_request_duration_seconds_sum{method="POST",route="/orders"} 0.75
+http_request_duration_seconds_count{method="POST",route="/orders"} 100
+http_request_duration_seconds_bucket{method="GET",route="/balance/:userId",le="0.005"} 10
+http_request_duration_seconds_bucket{method="GET",route="/balance/:userId",le="0.01"} 10
+http_request_duration_seconds_bucket{method="GET",route="/balance/:userId",le="+Inf"} 10
+http_request_duration_seconds_sum{method="GET",route="/balance/:userId"} 0.02
+http_request_duration_seconds_count{method="GET",route="/balance/:userId"} 10
+db_query_duration_seconds_count{op="insert_order",note="say \\"hi\\", ok"} 3
+go_goroutines 42
+not a sample line
+broken_value{a="b"} abc
+"""
+
+
+def test_parse_metrics_reads_labels_and_skips_junk():
+    scrape = parse_metrics(SCRAPE)
+
+    assert scrape["go_goroutines"] == [({}, 42.0)]
+    labels, value = scrape["db_query_duration_seconds_count"][0]
+    assert labels == {"op": "insert_order", "note": 'say \\"hi\\", ok'} and value == 3
+    assert "broken_value" not in scrape
+    assert len(scrape["http_request_duration_seconds_bucket"]) == 6
+
+
+def test_endpoint_of_normalizes_go_and_spring_routes():
+    assert endpoint_of({"method": "GET", "route": "/balance/:userId"}) == "get_balance"
+    assert endpoint_of({"method": "GET", "uri": "/orderbook/{pair}"}) == "get_orderbook"
+    assert endpoint_of({"method": "GET", "route": "/metrics"}) is None
+
+
+def test_quantile_interpolates_within_a_bucket():
+    buckets = {"0.005": 40, "0.01": 90, "+Inf": 100}
+
+    # Rank 50 is the 10th of 50 requests in (0.005, 0.01]
+    assert quantile(0.5, buckets) == pytest.approx(0.006)
+    assert quantile(0.2, buckets) == pytest.approx(0.0025)
+    # Ranks past the last finite bucket report its bound
+    assert quantile(0.99, buckets) == pytest.approx(0.01)
+    assert quantile(0.5, {}) == 0.0
+    assert quantile(0.5, {"0.01": 0, "+Inf": 0}) == 0.0
+
+
+def test_histogram_deltas_between_scrapes():
+    before = histograms(parse_metrics(SCRAPE), "http_request_duration_seconds", endpoint_of)
+    after_text = SCRAPE.replace('le="+Inf"} 100', 'le="+Inf"} 110').replace(
+        'route="/orders"} 100', 'route="/orders"} 110').replace('route="/orders"} 0.75', 'route="/orders"} 1.25')
+    after = histograms(parse_metrics(after_text), "http_request_duration_seconds", endpoint_of)
+
+    delta = subtract(after, before)["create_order"]
+    assert delta["count"] == 10
+    assert delta["buckets"] == {"0.005": 0, "0.01": 0, "+Inf": 10}
+    assert describe(delta)["mean_ms"] == pytest.approx(50.0)
+
+    total = {}
+    add(total, before)
+    add(total, before)
+    assert total["get_balance"]["count"] == 20
+    assert describe(total["create_order"])["p50_ms"] == pytest.approx(6.0)
@@ -0,0 +1,53 @@
+from reference_engine import Engine
+
+
+def order(side: str, price: float, quantity: float, pair: str = "BTCUSDT") -> dict:
+    return {"op": "order", "user_id": "u", "pair": pair, "side": side, "price": price, "quantity": quantity}
+
+
+def trades(engine: Engine) -> list:
+    return [(t.buy_seq, t.sell_seq, t.price, t.quantity) for t in engine.trades]
+
+
+def test_per_call_mode_makes_one_trade_per_match_at_the_ask():
+    engine = Engine("per-call")
+    for op in (order("SELL", 100, 1.0), order("SELL", 101, 1.0), order("BUY", 102, 1.5),
+               {"op": "match", "pair": "BTCUSDT"}):
+        engine.apply(op)
+
+    assert trades(engine) == [(3, 1, 100, 1.0)]
+
+    engine.apply({"op": "match", "pair": "BTCUSDT"})
+    engine.apply({"op": "match", "pair": "BTCUSDT"})
+    assert trades(engine)[1:] == [(3, 2, 101, 0.5)]
+    assert engine.match_calls == 3
+
+
+def test_continuous_mode_fills_on_arrival():
+    engine = Engine("continuous")
+    for op in (order("SELL", 100, 1.0), order("SELL", 101, 1.0), order("BUY", 102, 1.5)):
+        engine.apply(op)
+
+    assert trades(engine) == [(3, 1, 100, 1.0), (3, 2, 101, 0.5)]
+    assert engine.book("BTCUSDT").depth() == {"pair": "BTCUSDT", "bids": [],
+                                              "asks": [{"price": 101.0, "quantity": 0.5}]}
+
+
+def test_same_price_fills_first_in_first_out():
+    engine = Engine("continuous")
+    for op in (order("BUY", 100, 1.0), order("BUY", 100, 1.0), order("SELL", 99, 1.5)):
+        engine.apply(op)
+
+    assert trades(engine) == [(1, 3, 99, 1.0), (2, 3, 99, 0.5)]
+
+
+def test_depth_orders_levels_best_first_and_pairs_stay_apart():
+    engine = Engine("per-call")
+    for op in (order("BUY", 99, 1.0), order("BUY", 100, 2.0), order("BUY", 100, 1.0),
+               order("SELL", 105, 1.0), order("SELL", 103, 1.0), order("BUY", 10, 1.0, pair="ETHUSDT")):
+        engine.apply(op)
+
+    depth = engine.book("BTCUSDT").depth()
+    assert depth["bids"] == [{"price": 100.0, "quantity": 3.0}, {"price": 99.0, "quantity": 1.0}]
+    assert [level["price"] for level in depth["asks"]] == [103.0, 105.0]
+    assert engine.book("ETHUSDT").depth()["bids"] == [{"price": 10.0, "quantity": 1.0}]
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from results_archive import (SAMPLES_DIR, SAMPLES_FILE, _epoch_us, archive_run, latency_by, load_runs,  # noqa: E402
+                             open_samples, partition_dir, run_trend, sample_filter)
+
+
+def write_run(path, offset: str = "+02:00"):
+    """20 requests: 10 create_order at 1..10 ms, 10 get_balance at 100 ms, two of them 500s."""
+    with open(path, "w") as f:
+        for i in range(20):
+            endpoint, latency = ("POST /orders", i + 1.0) if i < 10 else ("GET /balance/{userId}", 100.0)
+            status = "500" if i >= 18 else ("201" if i < 10 else "200")
+            f.write(json.dumps({"type": "Point", "metric": "http_req_duration", "data": {
+                "time": f"2026-10-17T12:00:{i:02d}.250000000{offset}", "value": latency,
+                "tags": {"name": endpoint, "status": status}}}) + "\n")
+
+
+def test_epoch_us_honours_offset_and_fraction():
+    seconds = {}
+
+    assert _epoch_us("2026-10-17T12:00:00.250000123+02:00", seconds) == 1792231200_250000
+    assert _epoch_us("2026-10-17T10:00:00Z", seconds) == 1792231200_000000
+
+
+def test_archive_round_trip(tmp_path):
+    raw = tmp_path / "go-10k-raw.json"
+    write_run(raw)
+    root = str(tmp_path / "archive")
+
+    assert archive_run(root, raw, {"rps": 20.0, "p95": 100.0, "endpoints": {"get_balance": {"p99": 100.0}}},
+                       "go", "mac", "run1", commit="abc123")
+    # The same run key is only archived once
+    assert not archive_run(root, raw, {"rps": 1.0}, "go", "mac", "run1", commit="abc123")
+
+    runs = load_runs(root, "mac")
+    assert runs[["service", "run", "samples", "rps"]].to_dict("records") == [
+        {"service": "go", "run": "run1", "samples": 20, "rps": 20.0}]
+    assert runs.loc[0, "endpoints.get_balance.p99"] == 100.0
+    assert partition_dir(root, SAMPLES_DIR, "mac", "go", "run1").joinpath(SAMPLES_FILE).exists()
+
+    by_endpoint = latency_by(open_samples(root), ["endpoint"], sample_filter(service="go"))
+    rows = {r["endpoint"]: r for r in by_endpoint.to_dict("records")}
+    assert rows["create_order"]["requests"] == 10
+    assert rows["create_order"]["max"] == pytest.approx(10.0)
+    assert rows["create_order"]["avg"] == pytest.approx(5.5)
+    assert rows["get_balance"]["error_rate"] == pytest.approx(20.0)
+
+
+def test_run_trend_reads_samples_per_run(tmp_path):
+    root = str(tmp_path / "archive")
+    for key in ("run1", "run2"):
+        raw = tmp_path / f"{key}.json"
+        write_run(raw)
+        archive_run(root, raw, {"rps": 20.0}, "go", "mac", key, commit="abc123")
+
+    runs, endpoints = run_trend(root, "mac")
+
+    assert sorted(runs["run"]) == ["run1", "run2"]
+    assert runs["error_rate"].tolist() == pytest.approx([10.0, 10.0])
+    assert len(endpoints) == 4
+    assert run_trend(root, "ec2")[0].empty
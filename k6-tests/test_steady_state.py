@@ -0,0 +1,73 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from k6_timeseries import per_second_frame
+from latency_sketch import RunSketch
+from steady_state import analyze, changepoints, detect_steady_state, window_labels
+
+
+def write_run(path, offset: str, seconds: int = 60, rps: int = 20):
+    """Synthetic raw k6 run at a constant rate, timestamps written with `offset`."""
+    with open(path, "w") as f:
+        for second in range(seconds):
+            for i in range(rps):
+                time = f"2026-10-17T12:{second // 60:02d}:{second % 60:02d}.{i * 1000000 // rps:06d}123{offset}"
+                for metric, value in (("http_reqs", 1), ("http_req_duration", 3.0 + i % 5),
+                                      ("errors", 0), ("vus", 5)):
+                    f.write(json.dumps({"type": "Point", "metric": metric,
+                                        "data": {"time": time, "value": value, "tags": {}}}) + "\n")
+
+
+@pytest.mark.parametrize("offset", ["Z", "+02:00", "-05:30"])
+def test_window_labels_use_the_runs_offset(tmp_path, offset):
+    raw = tmp_path / "run.json"
+    write_run(raw, offset)
+    frame = per_second_frame(raw)
+
+    assert window_labels(frame, {"start": 5, "end": 11}) == ("2026-10-17T12:00:05", "2026-10-17T12:00:10")
+
+
+@pytest.mark.parametrize("offset", ["Z", "+02:00"])
+def test_steady_sketch_counts_the_window(tmp_path, offset):
+    raw = tmp_path / "run.json"
+    write_run(raw, offset)
+
+    result = analyze(raw)
+    metrics = RunSketch.from_dict(result["sketch"]).metrics()
+
+    assert result["end"] - result["start"] > 40
+    assert metrics["total_requests"] == 20 * (result["end"] - result["start"])
+    assert metrics["rps"] == pytest.approx(20, rel=0.1)
+
+
+def test_analyze_without_samples(tmp_path):
+    raw = tmp_path / "run.json"
+    raw.write_text("")
+
+    assert analyze(raw) is None
+
+
+def test_changepoints_find_a_level_shift():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(0, 1, 60), rng.normal(8, 1, 90)])[:, None]
+
+    assert changepoints(x, 2 * math.log(len(x)), 10) == [60]
+    assert changepoints(rng.normal(0, 1, 150)[:, None], 2 * math.log(150), 10) == []
+
+
+def test_warmup_is_excluded_from_the_steady_window():
+    seconds = 120
+    rps = [200.0] * seconds
+    # 30 s of JIT warmup with latency falling, then a flat plateau
+    p50 = [40.0 - i for i in range(30)] + [5.0 + (i % 3) * 0.1 for i in range(seconds - 30)]
+    frame = pd.DataFrame({"rps": rps, "p50": p50, "p99": [v * 3 for v in p50]})
+
+    result = detect_steady_state(frame)
+
+    assert 25 <= result["time_to_steady_s"] <= 35
+    assert result["end"] >= seconds - 2
+    assert result["run_s"] == seconds
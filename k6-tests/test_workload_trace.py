@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from workload_trace import DEFAULT_MIX, TEST_USER_IDS, generate, pair_names, parse_mix, user_ids
+
+SCRIPT = Path(__file__).with_name("workload_trace.py")
+
+
+def trace(seed: int, ops: int = 2000, pairs=("BTCUSDT",), skew: float = 1.0) -> list:
+    return list(generate(ops, seed, DEFAULT_MIX, TEST_USER_IDS, list(pairs), "uniform:41000:43000", skew))
+
+
+def test_same_seed_gives_the_same_trace():
+    assert trace(42) == trace(42)
+    assert trace(42) != trace(43)
+
+
+def test_trace_files_are_byte_identical(tmp_path):
+    outputs = []
+    for name in ("a.ndjson", "b.ndjson"):
+        output = tmp_path / name
+        subprocess.run([sys.executable, str(SCRIPT), "-o", str(output), "--ops", "500", "--pairs", "4"],
+                       check=True, capture_output=True)
+        outputs.append(output.read_bytes())
+
+    assert outputs[0] == outputs[1]
+    header = json.loads(outputs[0].split(b"\n", 1)[0])
+    assert header["op"] == "header" and header["ops"] == 500 and header["pair_skew"] == 1.0
+
+
+def test_mix_follows_the_weights():
+    ops = Counter(record["op"] for record in trace(7, ops=20000)[1:])
+    weights = {op: weight for op, weight in (part.split("=") for part in DEFAULT_MIX.split(","))}
+
+    for op, weight in weights.items():
+        assert ops[op] / 20000 == pytest.approx(int(weight) / 100, abs=0.02)
+    assert parse_mix(DEFAULT_MIX)[-1][0] == pytest.approx(1.0)
+
+
+def test_pair_skew_zero_is_uniform_and_one_is_zipf():
+    pairs = pair_names(4)
+
+    def shares(skew):
+        counts = Counter(r["pair"] for r in trace(3, ops=20000, pairs=pairs, skew=skew)[1:] if "pair" in r)
+        return [counts[p] / sum(counts.values()) for p in pairs]
+
+    assert shares(0) == pytest.approx([0.25] * 4, abs=0.02)
+    zipf = [1 / k for k in range(1, 5)]
+    assert shares(1.0) == pytest.approx([w / sum(zipf) for w in zipf], abs=0.02)
+
+
+def test_extra_users_are_deterministic():
+    assert user_ids(3, 1) == TEST_USER_IDS
+    assert user_ids(10, 1) == user_ids(10, 1)
+    assert len(set(user_ids(10, 1))) == 10
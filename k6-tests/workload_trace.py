@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Deterministic workload traces for the benchmark.
+
+10k-benchmark.js builds every request with Math.random(), so no two runs
+send the same workload. This generates a seeded trace instead: the same
+seed and options always produce a byte-identical file. Replaying it with
+`k6 run --env TRACE=<path> k6-tests/10k-benchmark.js` sends exactly that
+request stream, in order, at the scenario's fixed arrival rate, so Go and
+Java see the same workload. The trace also feeds reference_engine.py.
+
+Format: NDJSON, one op per line, after a header line recording the options:
+    {"op":"header","version":1,"seed":42,...}
+    {"op":"order","user_id":"...","pair":"BTCUSDT","side":"BUY","price":41234.56,"quantity":0.1234}
+    {"op":"orderbook","pair":"BTCUSDT"}
+    {"op":"balance","user_id":"..."}
+    {"op":"match","pair":"BTCUSDT"}
+
+Usage: python workload_trace.py -o trace.ndjson [--ops 1000000] [--seed 42]
+           [--mix order=30,orderbook=30,balance=25,match=15] [--users 3]
+           [--pairs BTCUSDT | --pairs 16] [--pair-skew 1.0] [--price uniform:41000:43000]
+           [--seed-sql users.sql]
+
+--pairs takes a list of pairs or a count N of generated ones (BTCUSDT, ETHUSDT, ...,
+the same names as 10k-benchmark.js with PAIRS=N); the k-th pair is picked with Zipf
+weight 1/k^s, s = --pair-skew (default 1.0 like PAIR_SKEW; 0 = uniform).
+"""
+
+import argparse
+import bisect
+import json
+import random
+import uuid
+
+TRACE_VERSION = 1
+
+# Seeded by init.sql
+TEST_USER_IDS = [
+    "11111111-1111-1111-1111-111111111111",
+    "22222222-2222-2222-2222-222222222222",
+    "33333333-3333-3333-3333-333333333333",
+]
+
+# Same 30/30/25/15 mix as 10k-benchmark.js
+DEFAULT_MIX = "order=30,orderbook=30,balance=25,match=15"
+OPS = ("order", "orderbook", "balance", "match")
+
+
+# Base currencies of generated pair names, as in 10k-benchmark.js
+PAIR_BASES = ["BTC", "ETH", "SOL", "BNB", "XRP", "ADA", "DOGE", "AVAX", "DOT", "LINK", "LTC", "TRX", "ATOM", "NEAR",
+              "UNI", "XLM"]
+
+
+def pair_names(count: int) -> list:
+    return [f"{PAIR_BASES[i] if i < len(PAIR_BASES) else f'COIN{i}'}USDT" for i in range(count)]
+
+
+def parse_pairs(spec: str) -> list:
+    """'BTCUSDT,ETHUSDT' -> those pairs; '16' -> 16 generated pair names."""
+    spec = spec.strip()
+    if spec.isdigit():
+        return pair_names(int(spec))
+    return [p.strip() for p in spec.split(",") if p.strip()]
+
+
+def pair_picker(pairs: list, skew: float):
+    """function(rng) -> pair: uniform for skew 0, else Zipf (weight 1/k^skew for the k-th pair)."""
+    if skew <= 0:
+        return lambda rng: rng.choice(pairs)
+    cumulative = []
+    total = 0.0
+    for k in range(1, len(pairs) + 1):
+        total += 1 / k ** skew
+        cumulative.append(total)
+    # Clamped because float rounding can leave the last weight a hair under the total
+    return lambda rng: pairs[min(bisect.bisect_right(cumulative, rng.random() * total), len(pairs) - 1)]
+
+
+def parse_mix(spec: str) -> list:
+    """'order=30,match=15,...' -> cumulative [(threshold, op)] normalized to 1.0."""
+    weights = {}
+    for part in spec.split(","):
+        op, _, weight = part.partition("=")
+        op = op.strip()
+        if op not in OPS:
+            raise ValueError(f"unknown op '{op}' in mix (expected one of {', '.join(OPS)})")
+        weights[op] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("mix weights must add up to more than 0")
+    cumulative = []
+    running = 0.0
+    for op in OPS:
+        if weights.get(op):
+            running += weights[op] / total
+            cumulative.append((running, op))
+    return cumulative
+
+
+def parse_price(spec: str):
+    """'uniform:MIN:MAX' or 'normal:MEAN:STDDEV' -> function(rng) -> price."""
+    kind, *args = spec.split(":")
+    if kind == "uniform" and len(args) == 2:
+        low, high = float(args[0]), float(args[1])
+        return lambda rng: low + rng.random() * (high - low)
+    if kind == "normal" and len(args) == 2:
+        mean, stddev = float(args[0]), float(args[1])
+        return lambda rng: max(rng.gauss(mean, stddev), 0.01)
+    raise ValueError(f"invalid price distribution '{spec}' (use uniform:MIN:MAX or normal:MEAN:STDDEV)")
+
+
+def user_ids(count: int, seed: int) -> list:
+    """The init.sql test users first, then deterministic extra users."""
+    if count <= len(TEST_USER_IDS):
+        return TEST_USER_IDS[:count]
+    rng = random.Random(f"users-{seed}")
+    extra = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count - len(TEST_USER_IDS))]
+    return TEST_USER_IDS + extra
+
+
+def seed_sql(users: list) -> str:
+    """INSERTs for users beyond the init.sql ones (with the same wallet balances as alice)."""
+    lines = []
+    for i, user_id in enumerate(users[len(TEST_USER_IDS):]):
+        lines.append(
+            f"INSERT INTO users (id, email) VALUES ('{user_id}', 'trace-user-{i}@test.com') ON CONFLICT DO NOTHING;"
+        )
+        lines.append(
+            f"INSERT INTO wallets (user_id, currency, balance) VALUES "
+            f"('{user_id}', 'BTC', 10.0), ('{user_id}', 'USDT', 100000.0) ON CONFLICT DO NOTHING;"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def generate(ops: int, seed: int, mix: str, users: list, pairs: list, price: str, pair_skew: float = 1.0):
+    """Yield the header and then `ops` trace records as dicts."""
+    rng = random.Random(seed)
+    cumulative = parse_mix(mix)
+    price_fn = parse_price(price)
+    pick_pair = pair_picker(pairs, pair_skew)
+
+    yield {
+        "op": "header",
+        "version": TRACE_VERSION,
+        "seed": seed,
+        "ops": ops,
+        "mix": mix,
+        "users": len(users),
+        "pairs": pairs,
+        "pair_skew": pair_skew,
+        "price": price,
+    }
+
+    for _ in range(ops):
+        r = rng.random()
+        # Float rounding can leave the last threshold a hair under 1.0
+        op = cumulative[-1][1]
+        for threshold, name in cumulative:
+            if r < threshold:
+                op = name
+                break
+        if op == "order":
+            yield {
+                "op": "order",
+                "user_id": rng.choice(users),
+                "pair": pick_pair(rng),
+                "side": "BUY" if rng.random() > 0.5 else "SELL",
+                "price": round(price_fn(rng), 2),
+                "quantity": round(0.01 + rng.random() * 0.5, 4),
+            }
+        elif op == "orderbook":
+            yield {"op": "orderbook", "pair": pick_pair(rng)}
+        elif op == "balance":
+            yield {"op": "balance", "user_id": rng.choice(users)}
+        else:
+            yield {"op": "match", "pair": pick_pair(rng)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic benchmark workload trace")
+    parser.add_argument("-o", "--output", required=True, help="trace file to write (NDJSON)")
+    parser.add_argument("--ops", type=int, default=1_000_000, help="number of requests in the trace")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights")
+    parser.add_argument("--users", type=int, default=len(TEST_USER_IDS), help="distinct users")
+    parser.add_argument("--pairs", default="BTCUSDT", help="comma-separated trading pairs, or a pair count")
+    parser.add_argument("--pair-skew", type=float, default=1.0,
+                        help="Zipf exponent of pair popularity (0 = uniform; default matches k6's PAIR_SKEW)")
+    parser.add_argument("--price", default="uniform:41000:43000", help="price distribution")
+    parser.add_argument("--seed-sql", help="write INSERTs for users beyond the init.sql ones here")
+    args = parser.parse_args()
+
+    users = user_ids(args.users, args.seed)
+    pairs = parse_pairs(args.pairs)
+
+    with open(args.output, "w", newline="\n") as f:
+        for record in generate(args.ops, args.seed, args.mix, users, pairs, args.price, args.pair_skew):
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    print(f"✓ Wrote {args.ops:,} ops (seed {args.seed}) to {args.output}")
+
+    if len(users) > len(TEST_USER_IDS):
+        if args.seed_sql:
+            with open(args.seed_sql, "w") as f:
+                f.write(seed_sql(users))
+            print(f"✓ Wrote seed SQL for {len(users) - len(TEST_USER_IDS)} extra users to {args.seed_sql}")
+        else:
+            print("⚠ Extra users must exist in the database; rerun with --seed-sql and load it with psql")
+
+
+if __name__ == "__main__":
+    main()
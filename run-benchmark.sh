@@ -73,7 +73,8 @@ echo -e "${GREEN}✓${NC} Database reset"
 # Run Go benchmark
 echo -e "\n${BLUE}[4/5] Running Go Exchange benchmark...${NC}"
 echo "This will take approximately 5 minutes..."
-k6 run --env TARGET=http://localhost:8080 k6-tests/benchmark.js 2>&1 | tee /tmp/go-results.txt
+python3 k6-tests/telemetry.py -o /tmp/go-telemetry.csv -- \
+    k6 run --env TARGET=http://localhost:8080 k6-tests/benchmark.js 2>&1 | tee /tmp/go-results.txt
 
 # Reset database between tests
 echo -e "\n${YELLOW}Resetting database for Java test...${NC}"
@@ -83,7 +84,8 @@ sleep 5
 # Run Java benchmark
 echo -e "\n${BLUE}[5/5] Running Java Exchange benchmark...${NC}"
 echo "This will take approximately 5 minutes..."
-k6 run --env TARGET=http://localhost:8081 k6-tests/benchmark.js 2>&1 | tee /tmp/java-results.txt
+python3 k6-tests/telemetry.py -o /tmp/java-telemetry.csv -- \
+    k6 run --env TARGET=http://localhost:8081 k6-tests/benchmark.js 2>&1 | tee /tmp/java-results.txt
 
 # Summary
 echo -e "\n${BLUE}╔══════════════════════════════════════════════════════════════╗${NC}"
@@ -93,6 +95,7 @@ echo -e "${BLUE}╚════════════════════
 echo -e "\n${GREEN}Results saved to:${NC}"
 echo "  - results-go.json"
 echo "  - results-java.json"
+echo "  - /tmp/go-telemetry.csv, /tmp/java-telemetry.csv (CPU/RSS/threads/fds per process, from /proc)"
 
 echo -e "\n${YELLOW}Resource usage during test:${NC}"
 docker stats --no-stream --format "table {{.Name}}\t{{.CPUPerc}}\t{{.MemUsage}}"